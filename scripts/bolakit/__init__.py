@@ -0,0 +1,31 @@
+"""Núcleo compartido de las herramientas BOLA (motor de enumeración, control de tasa, pool de tokens)."""
+
+from .cache import ResponseCache, open_cache
+from .client import ClientConfig, LoginError, TokenProvider, make_session
+from .engine import IdEnumerator, ProbeResult, make_async_client, ordered_map
+from .metrics import RequestMetrics
+from .outcomes import OutcomeStore
+from .ratelimit import AdaptiveRateController, parse_retry_after
+from .resources import ResourceSpec, resolve_specs
+from .tokens import Identity, TokenPool
+
+__all__ = [
+    "AdaptiveRateController",
+    "ClientConfig",
+    "IdEnumerator",
+    "Identity",
+    "LoginError",
+    "OutcomeStore",
+    "ProbeResult",
+    "RequestMetrics",
+    "ResourceSpec",
+    "ResponseCache",
+    "TokenPool",
+    "TokenProvider",
+    "make_async_client",
+    "make_session",
+    "open_cache",
+    "ordered_map",
+    "parse_retry_after",
+    "resolve_specs",
+]
@@ -0,0 +1,347 @@
+"""Análisis de los objetos filtrados: quién quedó expuesto y dónde.
+
+Lee resultados del scanner (JSONL, ``.gz``/``.zst`` o ``.outcomes``) o de
+``exploit_bola.py`` por bloques de ``chunk_size`` hallazgos y los pasa a
+columnas NumPy (ID, dueño, monto). Sobre esas columnas calcula, sin recorrer
+fila por fila:
+
+- exposición por víctima (``userId`` dueño): objetos filtrados y monto total;
+- mapa de calor del espacio de IDs: hallazgos por tramo y su densidad;
+- distribución dueño/ID: rango de IDs de cada víctima y concentración.
+
+Sólo se consideran lecturas (GET) VULNERABLE; un ID repetido entre archivos
+cuenta una vez. ``--resource`` (y ``--resources-file``) indica qué clave
+envuelve al objeto y cuál es el campo del dueño, como en el scanner. Uso (desde ``scripts/``)::
+
+    python -m bolakit.analyze scan-results/bola_scan_*.jsonl --report analisis.txt
+
+Requiere ``numpy`` (incluido en ``requirements.txt``: ``pip install -r requirements.txt``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+from colorama import Fore, init
+
+from .baseline import latest_results
+from .outcomes import STATUS_CODES, OutcomeStore
+from .resources import DEFAULT_SPECS, ResourceSpec, resolve_specs
+from .sink import open_results
+
+try:
+    import numpy as np
+except ImportError:  # dependencia opcional
+    np = None
+
+init(autoreset=True)
+
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_BINS = 40
+DEFAULT_TOP = 10
+BAR_WIDTH = 40
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("El análisis requiere 'pip install numpy'")
+
+
+@dataclass
+class HitColumns:
+    """Un bloque de hallazgos en columnas: dueño -1 y monto NaN si faltan."""
+
+    ids: 'np.ndarray'
+    owners: 'np.ndarray'
+    amounts: 'np.ndarray'
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _columns(ids: array, owners: array, amounts: array) -> HitColumns:
+    return HitColumns(
+        np.frombuffer(ids, dtype=np.int64).copy(),
+        np.frombuffer(owners, dtype=np.int32).copy(),
+        np.frombuffer(amounts, dtype=np.float64).copy(),
+    )
+
+
+def hit_object(record: dict, spec: Optional[ResourceSpec] = None) -> dict:
+    """Objeto filtrado de un registro (``<item_key>`` del exploit o ``meta`` del scanner)."""
+    spec = spec or DEFAULT_SPECS['orders']
+    if isinstance(record.get(spec.item_key), dict):
+        return record[spec.item_key]
+    return spec.extract(record.get('meta'))
+
+
+def _number(value, default):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else default
+
+
+def iter_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, owner_field: Optional[str] = None,
+                amount_field: str = 'amount', spec: Optional[ResourceSpec] = None) -> Iterator[HitColumns]:
+    """Recorrer los hallazgos de ``path`` en bloques de hasta ``chunk_size``.
+
+    Sin ``owner_field`` se usa el campo del dueño de ``spec``.
+    """
+    _require_numpy()
+    spec = spec or DEFAULT_SPECS['orders']
+    owner_field = owner_field or spec.owner_field
+    if path.endswith('.outcomes'):
+        yield from _outcome_chunks(path, chunk_size, amount_field)
+        return
+    ids, owners, amounts = array('q'), array('i'), array('d')
+    with open_results(path) as handler:
+        for line in handler:
+            # La mayoría de las líneas no son hallazgos; se descartan sin parsear.
+            if '"VULNERABLE"' not in line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('status') != 'VULNERABLE' or record.get('method', 'GET') != 'GET':
+                continue
+            item = hit_object(record, spec)
+            object_id = _number(record.get('id', item.get('id')), None)
+            if object_id is None:
+                continue
+            owner = _number(item.get(owner_field), -1)
+            ids.append(int(object_id))
+            owners.append(int(owner) if 0 <= owner < 2 ** 31 else -1)
+            amounts.append(float(_number(item.get(amount_field), float('nan'))))
+            if len(ids) >= chunk_size:
+                yield _columns(ids, owners, amounts)
+                ids, owners, amounts = array('q'), array('i'), array('d')
+    if ids:
+        yield _columns(ids, owners, amounts)
+
+
+def _outcome_chunks(path: str, chunk_size: int, amount_field: str) -> Iterator[HitColumns]:
+    """Hallazgos de un ``.outcomes``: IDs y dueños salen de las columnas mapeadas.
+
+    Cada bloque se copia del mapa antes de convertirlo, así ninguna vista de
+    NumPy queda apuntando al archivo cuando se cierra.
+    """
+    store = OutcomeStore.load(path)
+    try:
+        for start in range(0, store.size, chunk_size):
+            end = min(store.size, start + chunk_size)
+            block = np.frombuffer(bytes(store.status[start:end]), dtype=np.uint8)
+            index = np.flatnonzero(block == STATUS_CODES['VULNERABLE'])
+            if not len(index):
+                continue
+            owners = np.frombuffer(bytes(store.owners[start:end]), dtype=np.int32)[index]
+            ids = index.astype(np.int64) + start + store.first_id
+            amounts = np.array([
+                float(_number((store.body(int(object_id)) or {}).get(amount_field), float('nan')))
+                for object_id in ids
+            ], dtype=np.float64)
+            yield HitColumns(ids, owners, amounts)
+    finally:
+        store.close()
+
+
+@dataclass
+class Analysis:
+    ids: 'np.ndarray'
+    owners: 'np.ndarray'
+    amounts: 'np.ndarray'
+    victims: 'np.ndarray'
+    victim_hits: 'np.ndarray'
+    victim_amounts: 'np.ndarray'
+    victim_min_id: 'np.ndarray'
+    victim_max_id: 'np.ndarray'
+    bin_edges: 'np.ndarray'
+    bin_hits: 'np.ndarray'
+    duplicates: int = 0
+
+    @property
+    def total(self) -> int:
+        return len(self.ids)
+
+    @property
+    def exposed_amount(self) -> float:
+        return float(np.nansum(self.amounts))
+
+    def ranking(self, top: int = DEFAULT_TOP) -> 'np.ndarray':
+        """Índices de víctimas por objetos filtrados (y monto, para desempatar)."""
+        order = np.lexsort((-np.nan_to_num(self.victim_amounts), -self.victim_hits))
+        return order[:top]
+
+    def concentration(self, share: float = 0.1) -> float:
+        """Fracción de los hallazgos que reúne el ``share`` de víctimas más expuestas."""
+        if not len(self.victim_hits):
+            return 0.0
+        counts = np.sort(self.victim_hits)[::-1]
+        head = max(1, int(np.ceil(len(counts) * share)))
+        return float(counts[:head].sum() / counts.sum())
+
+    def to_dict(self, top: int = DEFAULT_TOP) -> dict:
+        per_victim = self.victim_hits.astype(np.float64)
+        last_id = int(self.ids[-1]) if len(self.ids) else 0
+        return {
+            'hits': self.total,
+            'duplicates': self.duplicates,
+            'unknown_owner': int((self.owners < 0).sum()),
+            'exposed_amount': round(self.exposed_amount, 2),
+            'victims': len(self.victims),
+            'hits_per_victim': {
+                'mean': round(float(per_victim.mean()), 2) if len(per_victim) else 0,
+                'p50': float(np.percentile(per_victim, 50)) if len(per_victim) else 0,
+                'p90': float(np.percentile(per_victim, 90)) if len(per_victim) else 0,
+            },
+            'top_decile_share': round(self.concentration(), 4),
+            'by_victim': [
+                {
+                    'userId': int(self.victims[i]),
+                    'hits': int(self.victim_hits[i]),
+                    'amount': round(float(self.victim_amounts[i]), 2),
+                    'min_id': int(self.victim_min_id[i]),
+                    'max_id': int(self.victim_max_id[i]),
+                }
+                for i in self.ranking(top)
+            ],
+            'heatmap': [
+                {'from': int(lower), 'to': min(int(upper), last_id), 'hits': int(hits)}
+                for lower, upper, hits in zip(self.bin_edges[:-1], self.bin_edges[1:] - 1, self.bin_hits)
+            ],
+        }
+
+
+def analyze(chunks, bins: int = DEFAULT_BINS) -> Analysis:
+    """Unir los bloques, quitar IDs repetidos y agregar por víctima y tramo de IDs."""
+    _require_numpy()
+    chunks = [chunk for chunk in chunks if len(chunk)]
+    if chunks:
+        ids = np.concatenate([chunk.ids for chunk in chunks])
+        owners = np.concatenate([chunk.owners for chunk in chunks])
+        amounts = np.concatenate([chunk.amounts for chunk in chunks])
+    else:
+        ids = np.empty(0, dtype=np.int64)
+        owners = np.empty(0, dtype=np.int32)
+        amounts = np.empty(0, dtype=np.float64)
+    ids, first = np.unique(ids, return_index=True)
+    duplicates = len(owners) - len(ids)
+    owners, amounts = owners[first], amounts[first]
+
+    known = owners >= 0
+    victims, inverse, victim_hits = np.unique(owners[known], return_inverse=True, return_counts=True)
+    victim_amounts = np.bincount(inverse, weights=np.nan_to_num(amounts[known]), minlength=len(victims))
+    victim_min_id = np.full(len(victims), np.iinfo(np.int64).max, dtype=np.int64)
+    victim_max_id = np.zeros(len(victims), dtype=np.int64)
+    np.minimum.at(victim_min_id, inverse, ids[known])
+    np.maximum.at(victim_max_id, inverse, ids[known])
+
+    if len(ids):
+        lower, upper = int(ids[0]), int(ids[-1])
+        width = max(1, -(-(upper - lower + 1) // max(1, bins)))
+        bin_edges = np.arange(lower, upper + width + 1, width, dtype=np.int64)
+        bin_hits = np.bincount((ids - lower) // width, minlength=len(bin_edges) - 1)
+    else:
+        bin_edges = np.zeros(1, dtype=np.int64)
+        bin_hits = np.zeros(0, dtype=np.int64)
+    return Analysis(ids, owners, amounts, victims, victim_hits, victim_amounts,
+                    victim_min_id, victim_max_id, bin_edges, bin_hits, duplicates)
+
+
+def render(analysis: Analysis, sources: List[str], top: int = DEFAULT_TOP) -> List[str]:
+    """Reporte en texto plano (el mismo que se imprime y se guarda con ``--report``)."""
+    summary = analysis.to_dict(top)
+    per_victim = summary['hits_per_victim']
+    lines = [
+        "Análisis de exposición BOLA",
+        f"Fuentes: {', '.join(sources)}",
+        "==================================",
+        f"Objetos filtrados:  {summary['hits']} ({summary['duplicates']} repetidos descartados)",
+        f"Víctimas:           {summary['victims']} ({summary['unknown_owner']} objetos sin dueño conocido)",
+        f"Monto expuesto:     {summary['exposed_amount']:,.2f}",
+        f"Por víctima:        media {per_victim['mean']}, p50 {per_victim['p50']:g}, p90 {per_victim['p90']:g}",
+        f"Concentración:      el 10% más expuesto reúne el {summary['top_decile_share']:.1%} de los hallazgos",
+        "",
+        f"Top {min(top, summary['victims'])} víctimas:",
+        f"  {'userId':>8}  {'objetos':>8}  {'monto':>14}  rango de IDs",
+    ]
+    for victim in summary['by_victim']:
+        lines.append(f"  {victim['userId']:>8}  {victim['hits']:>8}  {victim['amount']:>14,.2f}  "
+                     f"{victim['min_id']}-{victim['max_id']}")
+    lines += ["", "Mapa de calor de IDs (hallazgos por tramo; densidad = hallazgos / IDs del tramo):"]
+    peak = max((row['hits'] for row in summary['heatmap']), default=0) or 1
+    for row in summary['heatmap']:
+        span = row['to'] - row['from'] + 1
+        bar = '█' * round(BAR_WIDTH * row['hits'] / peak)
+        lines.append(f"  {row['from']:>10}-{row['to']:<10} {bar:<{BAR_WIDTH}} {row['hits']:>7} ({row['hits'] / span:.0%})")
+    return lines
+
+
+def parse_args(argv=None):
+    env = os.environ
+    parser = argparse.ArgumentParser(prog='python -m bolakit.analyze', description='Análisis por víctima y por tramo de IDs de los objetos filtrados')
+    parser.add_argument('paths', nargs='*', help='Resultados JSONL/.outcomes del scanner o del exploit (default: el último de --results-dir)')
+    parser.add_argument('-r', '--results-dir', default=env.get('BOLA_RESULTS_DIR', 'scan-results'), help='Carpeta donde buscar el último resultado')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Hallazgos por bloque al cargar (default 100000)')
+    parser.add_argument('--bins', type=int, default=DEFAULT_BINS, help='Tramos del mapa de calor (default 40)')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='Víctimas a listar (default 10)')
+    parser.add_argument('--resource', default=env.get('BOLA_RESOURCE', 'orders'), help='Recurso de los resultados (orders, users, invoices...)')
+    parser.add_argument('--resources-file', default=env.get('BOLA_RESOURCES_FILE') or None, help='JSON con specs de recursos')
+    parser.add_argument('--owner-field', help='Campo con el dueño del objeto (default: el de la spec del recurso)')
+    parser.add_argument('--amount-field', default='amount', help='Campo con el monto del objeto')
+    parser.add_argument('--report', help='Guardar el reporte de texto en este archivo')
+    parser.add_argument('--json', dest='json_file', help='Guardar los agregados en JSON')
+    args = parser.parse_args(argv)
+    if not args.paths:
+        latest = latest_results(args.results_dir, args.resource) or latest_results(args.results_dir)
+        if latest is None:
+            parser.error(f"no hay resultados en {args.results_dir}; indicá los archivos a analizar")
+        args.paths = [latest]
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        _require_numpy()
+    except RuntimeError as exc:
+        print(f"{Fore.RED}[!] {exc}", file=sys.stderr)
+        return 2
+
+    try:
+        spec = resolve_specs(args.resource, args.resources_file)[0]
+    except (OSError, ValueError) as exc:
+        print(f"{Fore.RED}[!] No se pudieron leer las specs de recursos: {exc}", file=sys.stderr)
+        return 1
+
+    def chunks():
+        for path in args.paths:
+            print(f"{Fore.BLUE}[*] Cargando {path}...")
+            yield from iter_chunks(path, args.chunk_size, args.owner_field, args.amount_field, spec)
+
+    try:
+        analysis = analyze(chunks(), args.bins)
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(f"{Fore.RED}[!] No se pudo leer los resultados: {exc}", file=sys.stderr)
+        return 1
+    lines = render(analysis, args.paths, args.top)
+    print("")
+    for line in lines:
+        print(line)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as handler:
+            handler.write("\n".join(lines) + "\n")
+        print(f"{Fore.GREEN}[✓] Reporte guardado en {args.report}")
+    if args.json_file:
+        with open(args.json_file, 'w', encoding='utf-8') as handler:
+            json.dump(analysis.to_dict(args.top), handler, ensure_ascii=False, indent=2)
+        print(f"{Fore.GREEN}[✓] Agregados guardados en {args.json_file}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
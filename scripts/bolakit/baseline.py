@@ -0,0 +1,138 @@
+"""Escaneo incremental contra un JSONL de resultados anterior (baseline).
+
+En vez de recorrer otra vez ``1..límite``, la primera pasada consulta sólo:
+
+1. IDs nuevos, por encima del *high-water mark* del baseline (el ID más alto
+   que existía, es decir, con un resultado distinto de NOT_FOUND);
+2. IDs que antes fueron VULNERABLE o ERROR, o que no figuran en el baseline;
+3. una muestra aleatoria del resto (``sample_percent`` % con un mínimo de
+   ``MIN_SAMPLE`` IDs).
+
+Si algún ID de la muestra cambió de resultado hay *deriva*: la muestra deja
+de representar al resto y se escala a una segunda pasada con los IDs que
+quedaron fuera. Sin deriva, el escaneo cuesta unos pocos puntos porcentuales
+de un barrido completo.
+"""
+
+from __future__ import annotations
+
+import glob
+import math
+import os
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+from .outcomes import OutcomeStore
+from .sink import iter_records
+
+DEFAULT_SAMPLE_PERCENT = 5.0
+MIN_SAMPLE = 8
+RECHECK_STATUSES = ('VULNERABLE', 'ERROR')
+# Resultados de un escaneo de un solo recurso (sin sufijo ``_<recurso>``).
+SINGLE_RESULTS = re.compile(r'bola_scan_\d{8}_\d{6}\.jsonl')
+
+
+def latest_results(results_dir: str, resource: Optional[str] = None) -> Optional[str]:
+    """Resultados más recientes de ``results_dir``: el ``.outcomes`` compacto si
+    la corrida lo dejó, si no el JSONL (plano, .gz o .zst). Con ``resource``,
+    sólo los de ese recurso en un escaneo de varios (``bola_scan_<ts>_<recurso>``)."""
+    if resource:
+        paths = glob.glob(os.path.join(results_dir, f'bola_scan_*_{glob.escape(resource)}.jsonl*'))
+    else:
+        paths = [path for path in glob.glob(os.path.join(results_dir, 'bola_scan_*.jsonl*'))
+                 if SINGLE_RESULTS.match(os.path.basename(path))]
+    latest = max(paths, key=os.path.getmtime, default=None)
+    if latest is None:
+        return None
+    outcomes = f"{latest.split('.jsonl', 1)[0]}.outcomes"
+    return outcomes if os.path.isfile(outcomes) else latest
+
+
+@dataclass
+class Baseline:
+    """Último resultado del GET por ID en un JSONL de resultados (o un ``.outcomes``)."""
+
+    path: str
+    statuses: Union[Dict[int, str], OutcomeStore] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str) -> 'Baseline':
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        if path.endswith('.outcomes'):
+            return cls(path, OutcomeStore.load(path))
+        baseline = cls(path)
+        for record in iter_records(path):
+            # Las escrituras no dicen si el objeto existe; manda el GET.
+            if record.get('method', 'GET') != 'GET':
+                continue
+            object_id, status = record.get('id'), record.get('status')
+            if isinstance(object_id, int) and isinstance(status, str):
+                baseline.statuses[object_id] = status
+        return baseline
+
+    @property
+    def high_water(self) -> int:
+        return max((object_id for object_id, status in self.statuses.items() if status != 'NOT_FOUND'), default=0)
+
+    def __len__(self) -> int:
+        return len(self.statuses)
+
+    def close(self):
+        if isinstance(self.statuses, OutcomeStore):
+            self.statuses.close()
+
+
+@dataclass
+class DeltaPlan:
+    """IDs de cada pasada y deriva observada en la muestra."""
+
+    baseline: Baseline
+    new: List[int]
+    recheck: List[int]
+    sample: List[int]
+    rest: List[int]
+    drift: List[Tuple[int, str, str]] = field(default_factory=list)
+    probed: int = 0
+
+    def __post_init__(self):
+        self._sampled = set(self.sample)
+
+    def first_pass(self) -> List[int]:
+        return sorted(self.recheck + self.sample) + self.new
+
+    def observe(self, object_id: int, status: str):
+        """Registrar el resultado de un ID; sólo los de la muestra miden deriva."""
+        self.probed += 1
+        if object_id in self._sampled:
+            before = self.baseline.statuses[object_id]
+            if before != status:
+                self.drift.append((object_id, before, status))
+
+    @property
+    def total(self) -> int:
+        return len(self.new) + len(self.recheck) + len(self.sample) + len(self.rest)
+
+    def describe(self) -> str:
+        return (f"{len(self.new)} nuevos, {len(self.recheck)} a re-chequear, "
+                f"muestra {len(self.sample)} de {len(self.sample) + len(self.rest)}")
+
+
+def plan_delta(baseline: Baseline, scan_limit: int, sample_percent: float = DEFAULT_SAMPLE_PERCENT,
+               seed: Optional[int] = None) -> DeltaPlan:
+    """Repartir ``1..scan_limit`` entre las pasadas según el baseline."""
+    high_water = min(baseline.high_water, scan_limit)
+    recheck, candidates = [], []
+    for object_id in range(1, high_water + 1):
+        status = baseline.statuses.get(object_id)
+        if status is None or status in RECHECK_STATUSES:
+            recheck.append(object_id)
+        else:
+            candidates.append(object_id)
+    size = min(len(candidates), max(MIN_SAMPLE, math.ceil(len(candidates) * sample_percent / 100)))
+    sample = sorted(random.Random(seed).sample(candidates, size))
+    sampled = set(sample)
+    rest = [object_id for object_id in candidates if object_id not in sampled]
+    return DeltaPlan(baseline, list(range(high_water + 1, scan_limit + 1)), recheck, sample, rest)
@@ -0,0 +1,516 @@
+"""Benchmarks de throughput y latencia de los caminos de escaneo.
+
+Por cada combinación de tamaño de dataset y latencia inyectada levanta
+``bolakit.mockapi`` en un proceso aparte y corre cada camino en un subproceso
+propio, así CPU y RSS pico se miden por caso sin mezclar el servidor ni los
+demás casos. El resultado es un JSON pensado para compararse entre commits::
+
+    python -m bolakit.bench --sizes 1000,10000 --concurrency 1,16 --latency 0,20 \\
+        --output bench-results/$(git rev-parse --short HEAD).json
+    python -m bolakit.bench --baseline bench-results/main.json --output bench-results/nuevo.json
+
+Caminos medidos:
+
+- ``exploit``: ``BOLAExploit.brute_force_orders`` de ``exploit_bola.py``.
+- ``find_foreign``: ``find_foreign_order`` de ``test_vulnerable.py``, pidiendo
+  tantos hallazgos como IDs para que recorra el rango completo.
+- ``scanner``: ``python -m bolakit.scanner``.
+- ``bash``: ``run_scan`` de ``kali/bola_scanner.sh`` (siempre secuencial; se
+  mide el proceso completo, login incluido).
+
+Los scanners corren sin límite de tasa (``--max-rps``) para medir el techo del
+cliente, no el del control adaptativo. El mock es un único proceso Python: con
+concurrencia alta puede ser él el cuello de botella, por eso los números sirven
+para comparar commits entre sí y no como capacidad absoluta.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+
+from colorama import Fore, init
+
+from .ratelimit import percentile
+
+init(autoreset=True)
+
+PATHS = ('exploit', 'find_foreign', 'scanner', 'bash')
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASH_SCANNER = os.path.join(os.path.dirname(SCRIPTS_DIR), 'kali', 'bola_scanner.sh')
+BENCH_EMAIL = 'alice@example.com'
+BENCH_PASSWORD = 'password123'
+UNLIMITED_RPS = 1_000_000.0
+RESULT_FORMAT = 1
+
+
+@dataclass
+class BenchCase:
+    path: str
+    size: int
+    concurrency: int
+    latency_ms: float
+    target: str = ''
+    max_rps: float = UNLIMITED_RPS
+
+    @property
+    def key(self) -> str:
+        return f"{self.path}/n={self.size}/c={self.concurrency}/lat={self.latency_ms:g}ms"
+
+
+def latency_summary(samples: List[float]) -> dict:
+    """Percentiles de latencia en milisegundos."""
+    if not samples:
+        return {'p50': None, 'p95': None, 'p99': None, 'mean': None, 'max': None}
+    return {
+        'p50': round(percentile(samples, 50) * 1000, 3),
+        'p95': round(percentile(samples, 95) * 1000, 3),
+        'p99': round(percentile(samples, 99) * 1000, 3),
+        'mean': round(sum(samples) / len(samples) * 1000, 3),
+        'max': round(max(samples) * 1000, 3),
+    }
+
+
+# -- casos (se ejecutan dentro del subproceso) --------------------------------
+
+class LatencyRecorder:
+    """Mide cada ``send`` de httpx y requests del proceso.
+
+    Sólo se instala en el subproceso de un caso: envolver los dos puntos por
+    los que pasan todos los requests evita tocar el código medido.
+    """
+
+    def __init__(self):
+        self.samples: List[float] = []
+
+    def install(self):
+        import httpx
+        import requests
+
+        samples = self.samples
+        async_send = httpx.AsyncClient.send
+        sync_send = requests.Session.send
+
+        async def timed_async_send(client, request, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await async_send(client, request, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - started)
+
+        def timed_sync_send(session, request, **kwargs):
+            started = time.perf_counter()
+            try:
+                return sync_send(session, request, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - started)
+
+        httpx.AsyncClient.send = timed_async_send
+        requests.Session.send = timed_sync_send
+
+
+def _run_exploit(case: BenchCase, workdir: str) -> float:
+    from exploit_bola import BOLAExploit
+
+    from .ratelimit import AdaptiveRateController
+    from .sink import ResultSink
+    from .tokens import Identity, TokenPool
+
+    exploit = BOLAExploit(case.target)
+    exploit.rate = AdaptiveRateController(initial_rps=case.max_rps, max_rps=case.max_rps, adaptive=False)
+    token, user = exploit.login(BENCH_EMAIL, BENCH_PASSWORD)
+    if not token:
+        raise RuntimeError("login falló")
+    exploit.pool = TokenPool(
+        [Identity(BENCH_EMAIL, BENCH_PASSWORD, token, user.get('id'))], exploit._url('/api/auth/login'),
+    )
+    exploit.sink = ResultSink(os.path.join(workdir, 'exploit_results.jsonl'), count_by='phase')
+    exploit.get_my_orders(token)
+    started = time.perf_counter()
+    try:
+        exploit.brute_force_orders(token, 1, case.size, 0, concurrency=case.concurrency)
+    finally:
+        exploit.sink.close()
+    return time.perf_counter() - started
+
+
+def _run_find_foreign(case: BenchCase, workdir: str) -> float:
+    import test_vulnerable
+
+    from .client import LOGIN_PATH, LoginError, login
+    from .testrunner import TestContext
+    from .tokens import Identity
+
+    session = test_vulnerable.SESSION
+    try:
+        token, user = login(session, BENCH_EMAIL, BENCH_PASSWORD, f"{case.target}{LOGIN_PATH}")
+    except LoginError as exc:
+        raise RuntimeError(f"login falló: {exc}") from exc
+    ctx = TestContext(
+        'bench', case.target, Identity(BENCH_EMAIL, BENCH_PASSWORD, token, user.get('id')), session, 10,
+        options={'max_id': case.size, 'concurrency': case.concurrency, 'foreign_hits': case.size},
+    )
+    ctx.set('token', token)
+    ctx.set('user_id', user.get('id'))
+    if not test_vulnerable.test_own_orders(ctx):
+        raise RuntimeError("no se pudieron leer las órdenes propias")
+    started = time.perf_counter()
+    test_vulnerable.find_foreign_order(ctx)
+    return time.perf_counter() - started
+
+
+def _run_scanner(case: BenchCase, workdir: str) -> float:
+    import asyncio
+
+    from .scanner import BolaScanner, load_config
+
+    config = load_config([
+        '-t', case.target, '-e', BENCH_EMAIL, '-p', BENCH_PASSWORD, '-m', str(case.size),
+        '--concurrency', str(case.concurrency), '--max-rps', str(case.max_rps),
+        '--sleep', str(1 / case.max_rps), '--fixed-sleep', '-c', os.path.join(workdir, '.bola-scanner.env'),
+        '--state-file', os.path.join(workdir, 'scan_state.sqlite'),
+    ])
+    config.results_dir = workdir
+    started = time.perf_counter()
+    asyncio.run(BolaScanner(config).run())
+    return time.perf_counter() - started
+
+
+CASE_RUNNERS = {
+    'exploit': _run_exploit,
+    'find_foreign': _run_find_foreign,
+    'scanner': _run_scanner,
+}
+
+
+def run_case(case: BenchCase, workdir: str, out_path: str):
+    """Punto de entrada del subproceso: corre el caso y deja sus métricas en ``out_path``."""
+    recorder = LatencyRecorder()
+    recorder.install()
+    elapsed = CASE_RUNNERS[case.path](case, workdir)
+    with open(out_path, 'w', encoding='utf-8') as handler:
+        json.dump({'elapsed': elapsed, 'latencies': recorder.samples}, handler)
+
+
+# -- coordinación -------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _child_env() -> dict:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [SCRIPTS_DIR, env.get('PYTHONPATH')]))
+    return env
+
+
+def _wait_healthy(url: str, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"El mock no respondió en {url}")
+        time.sleep(0.1)
+
+
+@contextlib.contextmanager
+def mock_target(size: int, latency_ms: float, jitter_ms: float = 0.0) -> Iterator[str]:
+    """Mock vulnerable con ``size`` órdenes, dos por usuario, en un proceso propio."""
+    port = _free_port()
+    command = [
+        sys.executable, '-m', 'bolakit.mockapi', '--port', str(port), '--orders', str(size),
+        '--users', str(max(3, size // 2)), '--latency', str(latency_ms), '--jitter', str(jitter_ms),
+    ]
+    process = subprocess.Popen(command, env=_child_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_healthy(url)
+        yield url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def _spawn_measured(command: List[str], cwd: str, env: dict, timeout: float):
+    """Correr ``command`` y devolver (exit code, pared, rusage) vía ``wait4``.
+
+    ``wait4`` incluye los hijos ya recolectados del proceso, así que el CPU y
+    RSS del scanner bash contemplan sus ``curl``/``jq``.
+    """
+    with open(os.path.join(cwd, 'stderr.log'), 'wb') as errors:
+        started = time.perf_counter()
+        process = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=errors)
+        timer = threading.Timer(timeout, process.kill)
+        timer.start()
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        finally:
+            timer.cancel()
+        wall = time.perf_counter() - started
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, wall, usage
+
+
+def _last_error(workdir: str) -> str:
+    try:
+        with open(os.path.join(workdir, 'stderr.log'), encoding='utf-8', errors='replace') as handler:
+            lines = [line.strip() for line in handler if line.strip()]
+    except OSError:
+        return ''
+    return lines[-1] if lines else ''
+
+
+def measure(case: BenchCase, timeout: float) -> dict:
+    """Ejecutar un caso en un subproceso y armar su registro de resultados."""
+    workdir = tempfile.mkdtemp(prefix='bola-bench-')
+    env = _child_env()
+    try:
+        if case.path == 'bash':
+            timing_log = os.path.join(workdir, 'timing.log')
+            env.update({'BOLA_TIMING_LOG': timing_log, 'BOLA_RESULTS_DIR': workdir})
+            command = [
+                'bash', BASH_SCANNER, '-t', case.target, '-e', BENCH_EMAIL, '-p', BENCH_PASSWORD,
+                '-m', str(case.size), '--sleep', '0.001', '--fixed-sleep',
+                '-c', os.path.join(workdir, '.bola-scanner.env'),
+            ]
+            code, wall, usage = _spawn_measured(command, workdir, env, timeout)
+            elapsed = wall
+            latencies = []
+            with contextlib.suppress(OSError), open(timing_log, encoding='utf-8') as handler:
+                for line in handler:
+                    with contextlib.suppress(ValueError):
+                        latencies.append(float(line))
+            # Sale con 1 tanto si halla vulnerabilidades como si falla el login;
+            # en el segundo caso no llega a consultar ningún ID.
+            ok = code in (0, 1) and bool(latencies)
+        else:
+            out_path = os.path.join(workdir, 'case.json')
+            command = [
+                sys.executable, '-m', 'bolakit.bench', '--run-case', json.dumps(asdict(case)),
+                '--case-out', out_path,
+            ]
+            code, wall, usage = _spawn_measured(command, workdir, env, timeout)
+            ok = code == 0 and os.path.exists(out_path)
+            elapsed, latencies = wall, []
+            if ok:
+                with open(out_path, encoding='utf-8') as handler:
+                    data = json.load(handler)
+                elapsed, latencies = data['elapsed'], data['latencies']
+
+        cpu = usage.ru_utime + usage.ru_stime
+        # ru_maxrss viene en KiB en Linux y en bytes en macOS.
+        peak_rss_kb = usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+        requests_made = len(latencies)
+        record = {
+            'key': case.key,
+            'path': case.path,
+            'size': case.size,
+            'concurrency': case.concurrency,
+            'latency_ms': case.latency_ms,
+            'ok': ok,
+            'exit_code': code,
+            'ids': case.size,
+            'requests': requests_made,
+            'elapsed': round(elapsed, 4),
+            'wall': round(wall, 4),
+            'ids_per_sec': round(case.size / elapsed, 2) if ok and elapsed > 0 else None,
+            'latency': latency_summary(latencies),
+            'cpu_seconds': round(cpu, 4),
+            'cpu_ms_per_request': round(cpu * 1000 / requests_made, 4) if requests_made else None,
+            'peak_rss_kb': peak_rss_kb,
+        }
+        if not ok:
+            record['error'] = _last_error(workdir) or f"exit code {code}"
+        return record
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _median_run(runs: List[dict]) -> dict:
+    """Quedarse con la corrida de throughput mediano (las fallidas van al final)."""
+    ranked = sorted(runs, key=lambda run: run['ids_per_sec'] or 0)
+    chosen = dict(ranked[len(ranked) // 2])
+    chosen['repeats'] = len(runs)
+    return chosen
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ['git', 'describe', '--always', '--dirty'], cwd=SCRIPTS_DIR, capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def plan_cases(paths, sizes, concurrency_levels, bash_max_size: int):
+    """Combinaciones a medir; bash es secuencial y se acota a datasets chicos."""
+    for path in paths:
+        if path == 'bash':
+            for size in sizes:
+                if size <= bash_max_size:
+                    yield path, size, 1
+            continue
+        for size in sizes:
+            for concurrency in concurrency_levels:
+                yield path, size, concurrency
+
+
+def run_suite(args) -> dict:
+    paths = [path for path in args.paths if path != 'bash' or _bash_available()]
+    if len(paths) != len(args.paths):
+        print(f"{Fore.YELLOW}[~] Se omite 'bash': faltan bash, curl o jq")
+    results = []
+    for latency_ms in args.latency:
+        for size in args.sizes:
+            cases = list(plan_cases(paths, [size], args.concurrency, args.bash_max_size))
+            if not cases:
+                continue
+            with (contextlib.nullcontext(args.target) if args.target else mock_target(size, latency_ms, args.jitter)) as target:
+                for path, _, concurrency in cases:
+                    case = BenchCase(path, size, concurrency, latency_ms, target, args.max_rps or UNLIMITED_RPS)
+                    print(f"{Fore.CYAN}[*] {case.key}...", end=' ', flush=True)
+                    record = _median_run([measure(case, args.timeout) for _ in range(args.repeat)])
+                    results.append(record)
+                    if record['ok']:
+                        print(f"{Fore.GREEN}{record['ids_per_sec']} IDs/s, p95 {record['latency']['p95']} ms, "
+                              f"{record['cpu_ms_per_request']} ms CPU/req, RSS {record['peak_rss_kb'] // 1024} MiB")
+                    else:
+                        print(f"{Fore.RED}falló: {record['error']}")
+    return {
+        'format': RESULT_FORMAT,
+        'meta': {
+            'revision': _git_revision(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'target': args.target or 'mockapi',
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+
+
+def _bash_available() -> bool:
+    return all(shutil.which(binary) for binary in ('bash', 'curl', 'jq'))
+
+
+def compare(baseline: dict, current: dict) -> List[dict]:
+    """Variación de throughput y p95 por caso respecto de otra corrida."""
+    previous = {record['key']: record for record in baseline.get('results', [])}
+    rows = []
+    for record in current.get('results', []):
+        old = previous.get(record['key'])
+        if not old or not old.get('ids_per_sec') or not record.get('ids_per_sec'):
+            continue
+        old_p95, new_p95 = old['latency'].get('p95'), record['latency'].get('p95')
+        rows.append({
+            'key': record['key'],
+            'ids_per_sec': (old['ids_per_sec'], record['ids_per_sec']),
+            'throughput_change': round((record['ids_per_sec'] / old['ids_per_sec'] - 1) * 100, 1),
+            'p95': (old_p95, new_p95),
+        })
+    return rows
+
+
+def print_comparison(rows: List[dict], revision: Optional[str]):
+    print(f"\n{Fore.BLUE}[*] Comparación contra {revision or 'baseline'}:")
+    if not rows:
+        print(f"{Fore.YELLOW}[~] No hay casos en común con la corrida anterior")
+    for row in rows:
+        change = row['throughput_change']
+        color = Fore.GREEN if change >= 0 else Fore.RED
+        old_rate, new_rate = row['ids_per_sec']
+        old_p95, new_p95 = row['p95']
+        print(f"    {row['key']:<40} {old_rate:>10} → {new_rate:>10} IDs/s "
+              f"{color}({change:+.1f}%){Fore.RESET}  p95 {old_p95} → {new_p95} ms")
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def _float_list(value: str) -> List[float]:
+    return [float(item) for item in value.split(',') if item.strip()]
+
+
+def _path_list(value: str) -> List[str]:
+    paths = [item.strip() for item in value.split(',') if item.strip()]
+    unknown = [path for path in paths if path not in PATHS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"caminos desconocidos: {', '.join(unknown)} (válidos: {', '.join(PATHS)})")
+    return paths
+
+
+def main(argv=None) -> int:
+    env = os.environ
+    parser = argparse.ArgumentParser(prog='python -m bolakit.bench', description='Benchmark de throughput y latencia de los scanners BOLA')
+    parser.add_argument('--paths', type=_path_list, default=list(PATHS), help=f"Caminos a medir (default {','.join(PATHS)})")
+    parser.add_argument('--sizes', type=_int_list, default=[1000, 10000], help='Tamaños de dataset (IDs) separados por coma')
+    parser.add_argument('--concurrency', type=_int_list, default=[1, 8, 32], help='Niveles de concurrencia separados por coma')
+    parser.add_argument('--latency', type=_float_list, default=[0.0, 20.0], help='Latencias inyectadas en el mock (ms) separadas por coma')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Variación de latencia del mock (± ms)')
+    parser.add_argument('--max-rps', type=float, default=0.0, help='Tope de tasa de los scanners (0 = sin límite)')
+    parser.add_argument('--bash-max-size', type=int, default=2000, help='Tamaño máximo para el scanner bash (default 2000)')
+    parser.add_argument('--repeat', type=int, default=1, help='Corridas por caso; se reporta la de throughput mediano')
+    parser.add_argument('--timeout', type=float, default=900.0, help='Tiempo máximo por caso en segundos')
+    parser.add_argument('--target', default=env.get('BOLA_BENCH_TARGET'), help='API existente a medir en lugar del mock (ignora --latency)')
+    parser.add_argument('--output', default=env.get('BOLA_BENCH_OUTPUT', 'bench-results.json'), help='JSON de resultados')
+    parser.add_argument('--baseline', help='JSON de una corrida anterior para comparar')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    parser.add_argument('--case-out', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        run_case(BenchCase(**json.loads(args.run_case)), os.getcwd(), args.case_out)
+        return 0
+
+    args.repeat = max(1, args.repeat)
+    if args.target:
+        args.target = args.target.rstrip('/')
+        args.latency = [0.0]
+    report = run_suite(args)
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as handler:
+        json.dump(report, handler, indent=2)
+    print(f"{Fore.GREEN}[✓] {len(report['results'])} casos guardados en {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as handler:
+            baseline = json.load(handler)
+        print_comparison(compare(baseline, report), baseline.get('meta', {}).get('revision'))
+    return 0 if all(record['ok'] for record in report['results']) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
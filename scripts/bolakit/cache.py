@@ -0,0 +1,373 @@
+"""Caché persistente de respuestas GET con revalidación condicional.
+
+Pensada para los barridos periódicos: cada respuesta 200/403/404 se guarda en
+SQLite con clave ``(target, identidad, método, ruta)`` junto a su ``ETag`` y
+``Last-Modified``. En la corrida siguiente:
+
+- si la entrada tiene menos de ``ttl`` segundos se responde desde disco, sin red;
+- si no, se manda ``If-None-Match``/``If-Modified-Since`` y un 304 reutiliza el
+  cuerpo guardado (sólo viajan los headers);
+- sin validadores se hace el request normal y se reemplaza la entrada.
+
+La identidad sale del token del request; con ``identify(pool)`` se traduce al
+label estable de la identidad (email), así un token renovado no invalida la
+caché. El tamaño total se acota con desalojo LRU por bytes.
+
+Además se guarda, por la misma clave, el último resultado de autorización
+clasificado (``swap_outcome``) para los reportes "sólo cambios".
+
+Con ``ttl`` > 0 un cambio de permisos dentro de esa ventana no se ve hasta que
+la entrada vence; el default (0) siempre revalida contra el servidor.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .state import identity_label
+
+CACHEABLE_STATUSES = (200, 403, 404)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_COMMIT_EVERY = 500
+# Al desalojar se baja hasta esta fracción del máximo para no desalojar en cada insert.
+EVICT_TARGET = 0.9
+CACHE_HEADER = 'X-Bola-Cache'
+# El cuerpo se guarda ya decodificado, así que estos headers no se reenvían.
+DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key           TEXT PRIMARY KEY,
+    target        TEXT NOT NULL,
+    identity      TEXT NOT NULL,
+    method        TEXT NOT NULL,
+    path          TEXT NOT NULL,
+    status        INTEGER NOT NULL,
+    content_type  TEXT,
+    etag          TEXT,
+    last_modified TEXT,
+    body          BLOB NOT NULL,
+    size          INTEGER NOT NULL,
+    stored        REAL NOT NULL,
+    accessed      REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+CREATE TABLE IF NOT EXISTS outcomes (
+    key     TEXT PRIMARY KEY,
+    status  TEXT NOT NULL,
+    updated REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+@dataclass
+class CachedResponse:
+    key: str
+    status: int
+    content_type: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: bytes
+    stored: float
+
+    def headers(self, source: str) -> dict:
+        headers = {CACHE_HEADER: source, 'Content-Length': str(len(self.body))}
+        if self.content_type:
+            headers['Content-Type'] = self.content_type
+        if self.etag:
+            headers['ETag'] = self.etag
+        if self.last_modified:
+            headers['Last-Modified'] = self.last_modified
+        return headers
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+def split_url(url: str) -> Tuple[str, str]:
+    """Separar ``url`` en (target, ruta con query)."""
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path = f"{path}?{parts.query}"
+    return f"{parts.scheme}://{parts.netloc}", path
+
+
+def _storable(status: int, headers) -> bool:
+    cache_control = (headers.get('cache-control') or '').lower()
+    return status in CACHEABLE_STATUSES and 'no-store' not in cache_control
+
+
+class ResponseCache:
+    """Respuestas y resultados de autorización en SQLite, con TTL y LRU por bytes."""
+
+    def __init__(self, path: str, ttl: float = 0.0, max_bytes: int = DEFAULT_MAX_BYTES,
+                 commit_every: int = DEFAULT_COMMIT_EVERY):
+        self.path = path
+        self.ttl = max(0.0, ttl)
+        self.max_bytes = max_bytes
+        self.commit_every = max(1, commit_every)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evicted = 0
+        self._pool = None
+        self._pending = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self.size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def __enter__(self) -> 'ResponseCache':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # -- claves ---------------------------------------------------------------
+
+    def identify(self, pool):
+        """Resolver tokens a labels de identidad usando un ``TokenPool``."""
+        self._pool = pool
+
+    def identity_for(self, authorization: Optional[str]) -> str:
+        if not authorization:
+            return 'anonymous'
+        token = authorization.split(' ', 1)[-1].strip()
+        if self._pool is not None:
+            for identity in self._pool.identities:
+                if identity.token == token:
+                    return identity.label
+        return identity_label(token=token)
+
+    @staticmethod
+    def key(target: str, identity: str, method: str, path: str) -> str:
+        return hashlib.sha256(f"{target}|{identity}|{method}|{path}".encode('utf-8')).hexdigest()[:24]
+
+    def key_for(self, method: str, url: str, authorization: Optional[str]) -> Tuple[str, str, str, str]:
+        target, path = split_url(url)
+        identity = self.identity_for(authorization)
+        return self.key(target, identity, method, path), target, identity, path
+
+    # -- respuestas -----------------------------------------------------------
+
+    def lookup(self, key: str) -> Optional[CachedResponse]:
+        row = self._db.execute(
+            "SELECT status, content_type, etag, last_modified, body, stored FROM responses WHERE key = ?", (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        self._touch()
+        return CachedResponse(key, *row)
+
+    def fresh(self, entry: CachedResponse) -> bool:
+        return self.ttl > 0 and time.time() - entry.stored < self.ttl
+
+    def store(self, key: str, target: str, identity: str, method: str, path: str,
+              status: int, headers, body: bytes):
+        if not _storable(status, headers):
+            return
+        now = time.time()
+        previous = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, target, identity, method, path, status, headers.get('content-type'),
+             headers.get('etag'), headers.get('last-modified'), body, len(body), now, now),
+        )
+        self.size += len(body) - (previous[0] if previous else 0)
+        self._touch()
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def refreshed(self, entry: CachedResponse):
+        """La entrada se revalidó (304): vuelve a contar el TTL desde ahora."""
+        now = time.time()
+        self._db.execute("UPDATE responses SET stored = ?, accessed = ? WHERE key = ?", (now, now, entry.key))
+        self._touch()
+
+    def evict(self):
+        """Borrar las entradas menos usadas hasta bajar de ``max_bytes * EVICT_TARGET``."""
+        goal = self.max_bytes * EVICT_TARGET
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall()
+        doomed = []
+        for key, size in rows:
+            if self.size <= goal:
+                break
+            doomed.append((key,))
+            self.size -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self.evicted += len(doomed)
+        self._touch()
+
+    # -- resultados de autorización ------------------------------------------
+
+    def swap_outcome(self, identity: str, method: str, url: str, status: str) -> Optional[str]:
+        """Guardar el resultado clasificado y devolver el de la corrida anterior."""
+        target, path = split_url(url)
+        key = self.key(target, identity, method, path)
+        row = self._db.execute("SELECT status FROM outcomes WHERE key = ?", (key,)).fetchone()
+        self._db.execute("INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?)", (key, status, time.time()))
+        self._touch()
+        return row[0] if row else None
+
+    # -- mantenimiento ---------------------------------------------------------
+
+    def _touch(self):
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._db.commit()
+            self._pending = 0
+
+    def summary(self) -> dict:
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'evicted': self.evicted,
+            'size_bytes': self.size,
+        }
+
+    def describe(self) -> str:
+        stats = self.summary()
+        return (f"{stats['hits']} desde disco, {stats['revalidated']} revalidadas (304), "
+                f"{stats['misses']} descargadas, {stats['evicted']} desalojadas, "
+                f"{stats['size_bytes'] / 1024 / 1024:.1f} MB en caché")
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._db.close()
+
+
+def open_cache(path: Optional[str], ttl: float = 0.0, max_mb: float = 0) -> Optional[ResponseCache]:
+    """Abrir la caché si hay ruta configurada; ``None`` la desactiva."""
+    if not path:
+        return None
+    max_bytes = int(max_mb * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+    return ResponseCache(path, ttl=ttl, max_bytes=max_bytes)
+
+
+# -- httpx ---------------------------------------------------------------------
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """Transporte httpx que responde GETs desde la caché o los revalida."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: ResponseCache):
+        self._transport = transport
+        self.cache = cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != 'GET':
+            return await self._transport.handle_async_request(request)
+        cache = self.cache
+        key, target, identity, path = cache.key_for('GET', str(request.url), request.headers.get('authorization'))
+        entry = cache.lookup(key)
+        if entry is not None and cache.fresh(entry):
+            cache.hits += 1
+            return httpx.Response(entry.status, headers=entry.headers('hit'), content=entry.body, request=request)
+        if entry is not None:
+            request.headers.update(entry.conditional_headers())
+
+        response = await self._transport.handle_async_request(request)
+        if response.status_code == 304 and entry is not None:
+            await response.aclose()
+            cache.revalidated += 1
+            cache.refreshed(entry)
+            return httpx.Response(entry.status, headers=entry.headers('revalidated'), content=entry.body, request=request)
+
+        body = await response.aread()
+        await response.aclose()
+        cache.misses += 1
+        cache.store(key, target, identity, 'GET', path, response.status_code, response.headers, body)
+        headers = [(name, value) for name, value in response.headers.items() if name.lower() not in DROPPED_HEADERS]
+        return httpx.Response(
+            response.status_code, headers=headers, content=body, request=request, extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+# -- requests ------------------------------------------------------------------
+
+class CachingAdapter(BaseAdapter):
+    """Adapter de ``requests`` con la misma lógica, delegando en otro adapter."""
+
+    def __init__(self, adapter: BaseAdapter, cache: ResponseCache):
+        super().__init__()
+        self.adapter = adapter
+        self.cache = cache
+
+    @staticmethod
+    def _response(request, status: int, headers, body: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        try:
+            response.reason = HTTPStatus(status).phrase
+        except ValueError:
+            response.reason = ''
+        return response
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET':
+            return self.adapter.send(request, **kwargs)
+        cache = self.cache
+        key, target, identity, path = cache.key_for('GET', request.url, request.headers.get('Authorization'))
+        entry = cache.lookup(key)
+        if entry is not None and cache.fresh(entry):
+            cache.hits += 1
+            return self._response(request, entry.status, entry.headers('hit'), entry.body)
+        if entry is not None:
+            request.headers.update(entry.conditional_headers())
+
+        response = self.adapter.send(request, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            cache.revalidated += 1
+            cache.refreshed(entry)
+            return self._response(request, entry.status, entry.headers('revalidated'), entry.body)
+        cache.misses += 1
+        cache.store(key, target, identity, 'GET', path, response.status_code, response.headers, response.content)
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+def cache_session(session: requests.Session, cache: ResponseCache) -> requests.Session:
+    """Envolver los adapters http/https ya montados en ``session`` con la caché."""
+    for prefix in ('http://', 'https://'):
+        session.mount(prefix, CachingAdapter(session.get_adapter(prefix), cache))
+    return session
@@ -0,0 +1,244 @@
+"""Cliente compartido de los scripts: configuración, sesión y login.
+
+``exploit_bola.py``, ``test_vulnerable.py``, ``test_secure.py`` y
+``seed_data.py`` arman su sesión HTTP desde acá:
+
+- ``ClientConfig`` junta URL base, credenciales, timeout, reintentos, tamaño
+  del pool, TLS y proxy, con defaults de las variables ``BOLA_*``;
+- ``add_client_arguments`` agrega las mismas opciones de CLI a cada script;
+- ``make_session`` devuelve una ``ClientSession`` con pool keep-alive (una
+  conexión TCP reutilizada por host), timeout por defecto, URLs relativas a la
+  URL base y reintentos ante fallas de conexión;
+- ``login`` y ``TokenProvider`` hacen el login una vez por cuenta.
+
+Los reintentos sólo cubren errores de conexión y lecturas cortadas de métodos
+idempotentes: los 429/503 quedan a cargo de ``AdaptiveRateController``.
+
+``http2`` (``--http2``, ``BOLA_HTTP2``) sólo aplica a ``async_client``: la
+sesión síncrona es ``requests``, que habla HTTP/1.1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .cache import ResponseCache, cache_session
+from .engine import make_async_client
+from .metrics import InstrumentedAdapter, RequestMetrics
+from .tokens import Identity
+
+DEFAULT_BASE_URL = 'http://localhost:3000'
+DEFAULT_EMAIL = 'alice@example.com'
+DEFAULT_PASSWORD = 'password123'
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_RETRIES = 2
+DEFAULT_POOL_SIZE = 16
+LOGIN_PATH = '/api/auth/login'
+
+# Campo de ``ClientConfig`` -> variable de entorno.
+ENV_KEYS = {
+    'base_url': 'BOLA_BASE_URL',
+    'email': 'BOLA_EMAIL',
+    'password': 'BOLA_PASSWORD',
+    'timeout': 'BOLA_TIMEOUT',
+    'retries': 'BOLA_RETRIES',
+    'pool_size': 'BOLA_POOL_SIZE',
+    'proxy': 'BOLA_PROXY',
+    'login_path': 'BOLA_LOGIN_PATH',
+    'http2': 'BOLA_HTTP2',
+}
+
+
+class LoginError(RuntimeError):
+    """El login falló (red, credenciales o respuesta sin token)."""
+
+
+@dataclass
+class ClientConfig:
+    base_url: str = DEFAULT_BASE_URL
+    email: str = DEFAULT_EMAIL
+    password: str = DEFAULT_PASSWORD
+    timeout: float = DEFAULT_TIMEOUT
+    retries: int = DEFAULT_RETRIES
+    pool_size: int = DEFAULT_POOL_SIZE
+    verify: bool = True
+    proxy: Optional[str] = None
+    login_path: str = LOGIN_PATH
+    http2: bool = False
+
+    def __post_init__(self):
+        self.base_url = self.base_url.rstrip('/')
+
+    @classmethod
+    def from_env(cls, env: Optional[Mapping[str, str]] = None, aliases: Optional[Dict[str, tuple]] = None,
+                 **defaults) -> 'ClientConfig':
+        """Config desde ``BOLA_*``; ``aliases`` agrega variables propias de un script
+        (que tienen prioridad) y ``defaults`` cubre lo que el entorno no define."""
+        values = {k: v for k, v in defaults.items() if v is not None}
+        for name in ENV_KEYS:
+            raw = env_value(name, env, (aliases or {}).get(name, ()))
+            if raw is not None:
+                values[name] = raw
+        for name, cast in (('timeout', float), ('retries', int), ('pool_size', int), ('http2', _flag)):
+            if name in values:
+                values[name] = cast(values[name])
+        return cls(**values)
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def async_client(self, concurrency: Optional[int] = None, timeout: Optional[float] = None, **kwargs):
+        """``httpx.AsyncClient`` con el mismo timeout, TLS y proxy que la sesión síncrona."""
+        return make_async_client(
+            concurrency or self.pool_size, timeout=timeout or self.timeout, verify=self.verify,
+            proxy=self.proxy, http2=self.http2, **kwargs,
+        )
+
+
+def env_value(name: str, env: Optional[Mapping[str, str]] = None, aliases=()) -> Optional[str]:
+    """Primera variable definida entre ``aliases`` y la ``BOLA_*`` de ``name``."""
+    env = os.environ if env is None else env
+    for key in (*aliases, ENV_KEYS[name]):
+        if env.get(key):
+            return env[key]
+    return None
+
+
+def _flag(value) -> bool:
+    return str(value).lower() not in ('0', 'false', 'no', '')
+
+
+def add_client_arguments(parser: argparse.ArgumentParser, base_url: Optional[str] = DEFAULT_BASE_URL,
+                         url_option: bool = True, credentials: bool = True, http2_option: bool = True,
+                         aliases: Optional[Dict[str, tuple]] = None):
+    """Opciones comunes de conexión (y de login) con defaults de ``BOLA_*``."""
+    aliases = aliases or {}
+
+    def default(name, fallback):
+        value = env_value(name, aliases=aliases.get(name, ()))
+        return fallback if value is None else value
+
+    if url_option:
+        parser.add_argument('--base-url', default=default('base_url', base_url), help='URL base de la API')
+    if credentials:
+        parser.add_argument('--email', default=default('email', DEFAULT_EMAIL), help='Email para autenticarse')
+        parser.add_argument('--password', default=default('password', DEFAULT_PASSWORD), help='Password para autenticarse')
+    parser.add_argument('--timeout', type=float, default=float(default('timeout', DEFAULT_TIMEOUT)), help='Timeout por request en segundos (default %(default)s)')
+    parser.add_argument('--retries', type=int, default=int(default('retries', DEFAULT_RETRIES)), help='Reintentos ante fallas de conexión (default %(default)s)')
+    parser.add_argument('--pool-size', type=int, default=int(default('pool_size', DEFAULT_POOL_SIZE)), help='Conexiones keep-alive por host (default %(default)s)')
+    parser.add_argument('--insecure', action='store_true', help='Deshabilitar verificación TLS (para labs)')
+    parser.add_argument('--proxy', default=default('proxy', None), help='Proxy HTTP/HTTPS (p.ej. http://127.0.0.1:8080)')
+    if http2_option:
+        parser.add_argument('--http2', action='store_true', default=_flag(default('http2', '0')),
+                            help='Multiplexar los probes concurrentes sobre HTTP/2 (requiere h2; cae a HTTP/1.1)')
+    return parser
+
+
+def config_from_args(args: argparse.Namespace, base_url: Optional[str] = None) -> ClientConfig:
+    """``ClientConfig`` a partir de las opciones de ``add_client_arguments``."""
+    return ClientConfig(
+        base_url=base_url or getattr(args, 'base_url', None) or DEFAULT_BASE_URL,
+        email=getattr(args, 'email', DEFAULT_EMAIL),
+        password=getattr(args, 'password', DEFAULT_PASSWORD),
+        timeout=args.timeout,
+        retries=max(0, args.retries),
+        pool_size=max(1, args.pool_size),
+        verify=not args.insecure,
+        proxy=args.proxy,
+        login_path=env_value('login_path') or LOGIN_PATH,
+        http2=getattr(args, 'http2', False),
+    )
+
+
+class ClientSession(requests.Session):
+    """``requests.Session`` con timeout por defecto y rutas relativas a ``base_url``."""
+
+    def __init__(self, base_url: str = '', timeout: float = DEFAULT_TIMEOUT):
+        super().__init__()
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, url, *args, **kwargs):
+        if url.startswith('/'):
+            url = f"{self.base_url}{url}"
+        kwargs.setdefault('timeout', self.timeout)
+        # Sin ``verify`` explícito, ``requests`` prefiere REQUESTS_CA_BUNDLE a
+        # ``session.verify`` y --insecure dejaría de tener efecto.
+        kwargs.setdefault('verify', self.verify)
+        return super().request(method, url, *args, **kwargs)
+
+
+def make_session(config: ClientConfig, metrics: Optional[RequestMetrics] = None,
+                 cache: Optional[ResponseCache] = None) -> ClientSession:
+    """Sesión con pool keep-alive, reintentos de conexión y, opcionalmente, métricas y caché."""
+    session = ClientSession(config.base_url, config.timeout)
+    session.verify = config.verify
+    if config.proxy:
+        session.proxies = {'http': config.proxy, 'https': config.proxy}
+    retry = Retry(
+        total=config.retries, connect=config.retries, read=config.retries, status=0,
+        backoff_factor=0.2, raise_on_status=False,
+    )
+    options = {'pool_connections': config.pool_size, 'pool_maxsize': config.pool_size, 'max_retries': retry}
+    adapter = InstrumentedAdapter(metrics, **options) if metrics is not None else HTTPAdapter(**options)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if cache is not None:
+        cache_session(session, cache)
+    return session
+
+
+def auth_headers(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def login(session: requests.Session, email: str, password: str, login_path: str = LOGIN_PATH) -> Tuple[str, dict]:
+    """``(token, usuario)`` de ``POST login_path``; ``LoginError`` si no hay token."""
+    try:
+        response = session.post(login_path, json={"email": email, "password": password})
+    except requests.RequestException as exc:
+        raise LoginError(f"Error de red en login: {exc}") from exc
+    if response.status_code != 200:
+        raise LoginError(f"Login rechazado (HTTP {response.status_code})")
+    try:
+        data = response.json()
+    except ValueError as exc:
+        raise LoginError("Respuesta de login inválida (no es JSON)") from exc
+    token, user = data.get('token'), data.get('user')
+    if not token or not isinstance(user, dict):
+        raise LoginError(f"Respuesta de login inválida: {data}")
+    return token, user
+
+
+class TokenProvider:
+    """Tokens por email sobre una sesión: cada cuenta hace login una sola vez."""
+
+    def __init__(self, session: requests.Session, login_path: str = LOGIN_PATH):
+        self.session = session
+        self.login_path = login_path
+        self.tokens: Dict[str, str] = {}
+        self.users: Dict[str, dict] = {}
+
+    def token(self, email: str, password: str, fresh: bool = False) -> str:
+        if fresh or email not in self.tokens:
+            token, user = login(self.session, email, password, self.login_path)
+            self.tokens[email], self.users[email] = token, user
+        return self.tokens[email]
+
+    def user(self, email: str) -> dict:
+        return self.users.get(email, {})
+
+    def identity(self, email: str, password: str) -> Identity:
+        """``Identity`` autenticada, lista para un ``TokenPool``."""
+        token = self.token(email, password)
+        return Identity(email, password, token, self.user(email).get('id'))
+
+    def headers(self, email: str, password: str) -> dict:
+        return auth_headers(self.token(email, password))
@@ -0,0 +1,356 @@
+"""Comparador diferencial de autorización entre dos despliegues.
+
+Reemplaza a ``kali/compare_apis.sh``: en vez de un único ID con pausas entre
+fases, repite el mismo set de probes (IDs × métodos) contra ambos targets a la
+vez, empareja las respuestas y arma una matriz de resultados de autorización
+más las diferencias de latencia::
+
+    python -m bolakit.compare -v http://localhost:3000 -s http://localhost:3001 --ids 1-500 --methods GET,PUT
+
+Cada ID se pide con GET en los dos targets; PUT y PATCH reenvían lo que
+devolvió ese GET (``engine.reversible_payload``, no modifican nada) y DELETE,
+que sí es destructivo, sólo se admite con ``--allow-delete``. Cada par queda en un JSONL y el resumen en
+consola (y en JSON con ``--report``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from colorama import Fore, Style, init
+
+from .engine import IdEnumerator, ProbeResult, make_async_client, ordered_map, reversible_payload
+from .metrics import Histogram, RequestMetrics
+from .ratelimit import THROTTLE_STATUSES, AdaptiveRateController
+from .sink import ResultSink
+from .tokens import Identity, TokenPool
+
+init(autoreset=True)
+
+OUTCOMES = ('OWN', 'ALLOWED', 'DENIED', 'NOT_FOUND', 'THROTTLED', 'ERROR')
+SUPPORTED_METHODS = ('GET', 'PUT', 'PATCH', 'DELETE')
+# Cuántas divergencias se listan en consola (el JSONL las tiene todas).
+MAX_DIVERGENCES_SHOWN = 20
+
+
+def parse_ids(spec: str) -> Iterator[int]:
+    """Expandir ``"1-200,350,400-410"`` en IDs, en el orden dado."""
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        lower, _, upper = part.partition('-')
+        start = int(lower)
+        end = int(upper) if upper else start
+        yield from range(start, end + 1)
+
+
+def outcome(result: ProbeResult, owner, own_user_id) -> str:
+    """Resultado de autorización de un probe, visto desde el atacante."""
+    code = result.status
+    if 200 <= code < 300:
+        if own_user_id is not None and owner == own_user_id:
+            return 'OWN'
+        return 'ALLOWED'
+    if code in (401, 403):
+        return 'DENIED'
+    if code == 404:
+        return 'NOT_FOUND'
+    if code in THROTTLE_STATUSES:
+        return 'THROTTLED'
+    return 'ERROR'
+
+
+def _order(result: ProbeResult) -> dict:
+    data = result.data if isinstance(result.data, dict) else {}
+    order = data.get('order')
+    return order if isinstance(order, dict) else {}
+
+
+@dataclass
+class Target:
+    """Uno de los dos despliegues comparados."""
+
+    name: str
+    url: str
+    tokens: TokenPool
+    rate: AdaptiveRateController
+    enumerator: Optional[IdEnumerator] = None
+
+    @property
+    def user_id(self):
+        return self.tokens.primary.user_id
+
+
+@dataclass
+class Comparison:
+    """Matriz de resultados y latencias acumuladas durante la corrida."""
+
+    names: Tuple[str, str]
+    matrix: Counter = field(default_factory=Counter)
+    latency: Dict[Tuple[str, str], Histogram] = field(default_factory=dict)
+    deltas: Dict[str, List[float]] = field(default_factory=dict)
+    divergences: int = 0
+    exposed_in_second: int = 0
+    pairs: int = 0
+
+    def add(self, method: str, first: Tuple[str, ProbeResult], second: Tuple[str, ProbeResult]) -> bool:
+        (first_outcome, first_result), (second_outcome, second_result) = first, second
+        self.pairs += 1
+        self.matrix[(method, first_outcome, second_outcome)] += 1
+        for name, result in zip(self.names, (first_result, second_result)):
+            self.latency.setdefault((name, method), Histogram()).record(result.elapsed)
+        self.deltas.setdefault(method, []).append(second_result.elapsed - first_result.elapsed)
+        if second_outcome == 'ALLOWED':
+            self.exposed_in_second += 1
+        diverged = first_outcome != second_outcome
+        self.divergences += diverged
+        return diverged
+
+    def summary(self) -> dict:
+        methods = sorted({method for method, _, _ in self.matrix})
+        latency = {}
+        for method in methods:
+            deltas = sorted(self.deltas.get(method, []))
+            entry = {}
+            for name in self.names:
+                histogram = self.latency.get((name, method))
+                if histogram is not None:
+                    entry[name] = {
+                        'p50_ms': round(histogram.percentile(50) * 1000, 2),
+                        'p95_ms': round(histogram.percentile(95) * 1000, 2),
+                    }
+            if deltas:
+                entry['delta_ms'] = {
+                    'mean': round(sum(deltas) / len(deltas) * 1000, 2),
+                    'p50': round(deltas[len(deltas) // 2] * 1000, 2),
+                    'p95': round(deltas[min(len(deltas) - 1, int(len(deltas) * 0.95))] * 1000, 2),
+                }
+            latency[method] = entry
+        return {
+            'targets': list(self.names),
+            'pairs': self.pairs,
+            'divergences': self.divergences,
+            'exposed_in_second': self.exposed_in_second,
+            'matrix': {
+                method: {
+                    f"{first}->{second}": count
+                    for (row_method, first, second), count in sorted(self.matrix.items())
+                    if row_method == method
+                }
+                for method in methods
+            },
+            'latency': latency,
+        }
+
+
+class DifferentialComparator:
+    """Repite cada probe contra ambos targets y empareja las respuestas."""
+
+    def __init__(self, args):
+        self.args = args
+        self.methods = args.methods
+        self.metrics = RequestMetrics()
+        self.targets: List[Target] = []
+        self.comparison: Optional[Comparison] = None
+        self.sink: Optional[ResultSink] = None
+        self._shown = 0
+
+    def _target(self, name: str, url: str) -> Target:
+        identity = Identity(self.args.email, self.args.password, self.args.token or '')
+        return Target(
+            name=name,
+            url=url,
+            tokens=TokenPool([identity], f"{url}{self.args.login_path}"),
+            rate=AdaptiveRateController(
+                initial_rps=self.args.max_rps if self.args.fixed_rate else min(20.0, self.args.max_rps),
+                max_rps=self.args.max_rps, adaptive=not self.args.fixed_rate,
+            ),
+        )
+
+    async def login(self, client) -> bool:
+        results = await asyncio.gather(
+            *(target.tokens.login_all(client) for target in self.targets), return_exceptions=True,
+        )
+        ok = True
+        for target, result in zip(self.targets, results):
+            if isinstance(result, Exception):
+                print(f"{Fore.RED}[✗] Error al autenticar en {target.name} ({target.url})")
+                ok = False
+            else:
+                print(f"{Fore.GREEN}[✓] Token {target.name} obtenido (usuario {target.user_id})")
+        return ok
+
+    async def _probe_both(self, method: str, object_id: int, payloads=(None, None)):
+        return await asyncio.gather(*(
+            target.enumerator.paced_probe(object_id, method=method, json=payload)
+            for target, payload in zip(self.targets, payloads)
+        ))
+
+    async def compare_id(self, object_id: int) -> List[dict]:
+        """Todos los métodos sobre un ID, en paralelo en ambos targets."""
+        gets = await self._probe_both('GET', object_id)
+        orders = [_order(result) for result in gets]
+        owners = [order.get('userId') for order in orders]
+        rows = []
+        for method in self.methods:
+            if method == 'GET':
+                results = gets
+            else:
+                payloads = [reversible_payload(method, order) for order in orders]
+                results = await self._probe_both(method, object_id, payloads)
+            rows.append({
+                'id': object_id,
+                'method': method,
+                'results': [
+                    (outcome(result, owner, target.user_id), result)
+                    for target, result, owner in zip(self.targets, results, owners)
+                ],
+            })
+        return rows
+
+    def record(self, row: dict):
+        first, second = row['results']
+        diverged = self.comparison.add(row['method'], first, second)
+        record = {
+            'timestamp': time.time(),
+            'id': row['id'],
+            'method': row['method'],
+            'diverged': diverged,
+        }
+        for target, (result_outcome, result) in zip(self.targets, row['results']):
+            record[target.name] = {
+                'outcome': result_outcome,
+                'status': result.status,
+                'elapsed_ms': round(result.elapsed * 1000, 2),
+            }
+        self.sink.write(record)
+        if diverged and self._shown < MAX_DIVERGENCES_SHOWN:
+            self._shown += 1
+            (first_outcome, _), (second_outcome, _) = first, second
+            color = Fore.RED if second_outcome == 'ALLOWED' else Fore.YELLOW
+            print(f"{color}[≠] {row['method']:<6} ID {row['id']}: "
+                  f"{self.targets[0].name}={first_outcome} / {self.targets[1].name}={second_outcome}")
+
+    async def run(self) -> int:
+        args = self.args
+        self.targets = [self._target(args.first_name, args.first), self._target(args.second_name, args.second)]
+        self.comparison = Comparison((args.first_name, args.second_name))
+        ids = list(parse_ids(args.ids))
+        started = time.monotonic()
+
+        async with make_async_client(args.concurrency * 2, timeout=args.timeout, metrics=self.metrics,
+                                     http2=args.http2) as client:
+            if not await self.login(client):
+                return 2
+            for target in self.targets:
+                target.enumerator = IdEnumerator(
+                    client,
+                    lambda object_id, base=target.url: f"{base}{args.item_path}/{object_id}",
+                    concurrency=args.concurrency,
+                    rate=target.rate,
+                    tokens=target.tokens,
+                )
+            print(f"{Fore.BLUE}[*] {len(ids)} IDs × {','.join(self.methods)} contra ambos targets "
+                  f"(concurrencia {args.concurrency})")
+            with ResultSink(args.output) as self.sink:
+                async for rows in ordered_map(self.compare_id, ids, args.concurrency):
+                    for row in rows:
+                        self.record(row)
+
+        summary = self.comparison.summary()
+        summary['elapsed'] = round(time.monotonic() - started, 2)
+        self.print_summary(summary)
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as handler:
+                json.dump(summary, handler, indent=2, ensure_ascii=False)
+        return 1 if summary['exposed_in_second'] else 0
+
+    def print_summary(self, summary: dict):
+        first, second = summary['targets']
+        print(f"\n{Fore.CYAN}{'═' * 63}")
+        print(f"{Fore.CYAN}{'MATRIZ DE AUTORIZACIÓN':^63}")
+        print(f"{Fore.CYAN}{'═' * 63}{Style.RESET_ALL}")
+        for method, cells in summary['matrix'].items():
+            print(f"\n{Fore.BLUE}{method}{Style.RESET_ALL} (filas: {first}, columnas: {second})")
+            present = sorted(
+                {key.split('->')[1] for key in cells}, key=OUTCOMES.index,
+            )
+            print(f"{'':<12}" + ''.join(f"{name:>12}" for name in present))
+            for row in sorted({key.split('->')[0] for key in cells}, key=OUTCOMES.index):
+                values = ''.join(f"{cells.get(f'{row}->{column}', 0):>12}" for column in present)
+                print(f"{row:<12}{values}")
+            latency = summary['latency'].get(method, {})
+            if 'delta_ms' in latency:
+                print(f"Latencia p50/p95: {first} {latency[first]['p50_ms']}/{latency[first]['p95_ms']} ms, "
+                      f"{second} {latency[second]['p50_ms']}/{latency[second]['p95_ms']} ms "
+                      f"(Δ p50 {latency['delta_ms']['p50']:+} ms)")
+
+        print(f"\n{summary['pairs']} pares en {summary['elapsed']}s, {summary['divergences']} con resultado distinto")
+        if summary['exposed_in_second']:
+            print(f"{Fore.RED}[💀] {second}: {summary['exposed_in_second']} accesos a objetos ajenos permitidos")
+        else:
+            print(f"{Fore.GREEN}[🛡️] {second}: ningún acceso a objetos ajenos")
+        print(f"Pares guardados en: {self.sink.path}")
+
+
+def parse_args(argv=None):
+    env = os.environ
+    parser = argparse.ArgumentParser(prog='python -m bolakit.compare', description='Comparador diferencial de autorización entre dos APIs')
+    parser.add_argument('-v', '--vuln', dest='first', default=env.get('BOLA_VULN_API', env.get('VULN_API', 'http://localhost:3000')), help='Primer target (default API vulnerable, http://localhost:3000)')
+    parser.add_argument('-s', '--secure', dest='second', default=env.get('BOLA_SECURE_API', env.get('SECURE_API', 'http://localhost:3001')), help='Segundo target (default API segura, http://localhost:3001)')
+    parser.add_argument('--first-name', default='vulnerable', help='Etiqueta del primer target')
+    parser.add_argument('--second-name', default='segura', help='Etiqueta del segundo target')
+    parser.add_argument('-e', '--email', default=env.get('BOLA_EMAIL', 'alice@example.com'), help='Email de login')
+    parser.add_argument('-p', '--password', default=env.get('BOLA_PASSWORD', 'password123'), help='Password')
+    parser.add_argument('-k', '--token', default=env.get('BOLA_TOKEN'), help='Token JWT existente (válido en ambos targets)')
+    parser.add_argument('--ids', default=env.get('COMPARE_IDS', '1-100'), help='IDs a comparar, p.ej. "1-500,900" (default 1-100)')
+    parser.add_argument('--methods', default=env.get('COMPARE_METHODS', 'GET'), help=f"Métodos a comparar ({','.join(SUPPORTED_METHODS)}; default GET)")
+    parser.add_argument('--allow-delete', action='store_true', help='Permitir DELETE (borra datos en el target que no bloquee)')
+    parser.add_argument('--login-path', default=env.get('BOLA_LOGIN_PATH', '/api/auth/login'), help='Ruta de login')
+    parser.add_argument('--item-path', default=env.get('BOLA_ITEM_PATH', '/api/orders'), help='Ruta base por ID')
+    parser.add_argument('--concurrency', type=int, default=int(env.get('BOLA_CONCURRENCY', 16)), help='IDs en vuelo a la vez')
+    parser.add_argument('--max-rps', type=float, default=float(env.get('BOLA_MAX_RPS', 200)), help='Tasa máxima por target')
+    parser.add_argument('--fixed-rate', action='store_true', default=env.get('BOLA_ADAPTIVE', '1') in ('0', 'false', 'no'), help='Ir a --max-rps fijo, sin ajuste AIMD')
+    parser.add_argument('-t', '--timeout', type=float, default=float(env.get('COMPARE_TIMEOUT', 12)), help='Timeout por request en segundos')
+    parser.add_argument('--http2', action='store_true', default=env.get('BOLA_HTTP2', '0') not in ('0', 'false', 'no', ''), help='Multiplexar los probes sobre HTTP/2 (requiere h2; cae a HTTP/1.1)')
+    parser.add_argument('-r', '--results-dir', default=env.get('COMPARE_RESULTS_DIR', 'compare_results'), help='Carpeta de resultados')
+    parser.add_argument('--output', help='JSONL de pares (default <results-dir>/compare_<fecha>.jsonl)')
+    parser.add_argument('--report', help='JSON con la matriz y las latencias')
+    args = parser.parse_args(argv)
+
+    args.first = args.first.rstrip('/')
+    args.second = args.second.rstrip('/')
+    args.methods = [method.strip().upper() for method in args.methods.split(',') if method.strip()]
+    unsupported = [method for method in args.methods if method not in SUPPORTED_METHODS]
+    if unsupported:
+        parser.error(f"métodos no soportados: {', '.join(unsupported)}")
+    if 'DELETE' in args.methods:
+        if not args.allow_delete:
+            parser.error("DELETE borra órdenes en el target que no lo bloquee; confirmá con --allow-delete")
+        # DELETE al final, para que GET, PUT y PATCH vean el objeto intacto.
+        args.methods = [method for method in args.methods if method != 'DELETE'] + ['DELETE']
+    args.concurrency = max(1, args.concurrency)
+    if not args.output:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        args.output = os.path.join(args.results_dir, f"compare_{timestamp}.jsonl")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    print(f"{Fore.CYAN}[*] {args.first_name}: {args.first} | {args.second_name}: {args.second}")
+    return asyncio.run(DifferentialComparator(args).run())
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""Descubrimiento del espacio de IDs para tablas dispersas.
+
+En lugar de adivinar el límite con ``max(ids propios) + padding`` o recorrer
+``1..max_id``, se hace:
+
+1. Estimación de densidad con una muestra aleatoria por debajo del hint (el
+   último ID propio), que crece hasta ver algunos objetos vivos.
+2. *Galloping* desde el hint con tramos que duplican su tamaño; cada tramo se
+   consulta con una ventana contigua al principio más una muestra aleatoria.
+   Tras el primer hueco confirmado se sigue por octavas hasta
+   ``hueco * 2**dead_octaves``, volviendo a muestrear lo ya recorrido, para
+   no cortar en un hueco entre grupos de objetos.
+3. Muestreo de densidad por bloques sobre ``[1, límite]``; sólo los bloques
+   con densidad suficiente forman parte del plan de escaneo.
+
+Un hueco sólo se confirma cuando una ventana contigua de ``n`` IDs quedó
+vacía, con ``n`` tal que, a la densidad estimada, la probabilidad de no ver
+ningún objeto vivo sea menor que ``MISS_PROBABILITY``. La densidad se estima
+sin los IDs propios (``known_ids``) y por su cota inferior, así una racha de
+suerte cerca del hint no achica las muestras. El límite es el ID anterior al
+primer hueco confirmado, nunca el ID vivo más alto visto.
+
+Si el plan por bloques no puede ahorrar más de lo que cuesta muestrearlo (una
+tabla casi llena, o una tan dispersa que una muestra vacía no descarta un
+bloque), se escanea ``[1, límite]`` entero sin más probes.
+
+El algoritmo pide lotes de IDs y recibe sus códigos HTTP, de modo que el mismo
+plan se ejecuta con un cliente síncrono (``discover_sync``) o con el motor
+asíncrono (``discover_async``), que consulta cada lote en paralelo.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Generator, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_WINDOW = 8
+DEFAULT_BLOCK_SIZE = 256
+DEFAULT_SAMPLES = 16
+DEFAULT_MIN_DENSITY = 0.0
+DEFAULT_DEAD_OCTAVES = 3
+# Densidad más baja que se supone (y que el descubrimiento garantiza ver); es
+# también la que se usa mientras no se vio ningún objeto vivo ajeno.
+DEFAULT_FLOOR_DENSITY = 1 / 4096
+# Probabilidad aceptada de que una ventana vacía esconda objetos vivos.
+MISS_PROBABILITY = 0.001
+# Objetos vivos a ver por debajo del hint antes de confiar en la densidad.
+MIN_LIVE = 3
+# z de la cota inferior (Wilson, una cola al 95%) de la densidad.
+DENSITY_Z = 1.645
+
+Batch = List[int]
+Statuses = Dict[int, int]
+
+
+def is_live(status: int) -> bool:
+    """Un ID existe si la API responde algo distinto de 404/410 o error."""
+    return status not in (0, 404, 410) and status < 500
+
+
+def density_lower_bound(live: int, probes: int) -> float:
+    """Cota inferior de Wilson de la proporción ``live / probes``."""
+    if not probes:
+        return 0.0
+    ratio = live / probes
+    z2 = DENSITY_Z ** 2
+    margin = DENSITY_Z * math.sqrt(ratio * (1 - ratio) / probes + z2 / (4 * probes ** 2))
+    return max(0.0, (ratio + z2 / (2 * probes) - margin) / (1 + z2 / probes))
+
+
+def needed_samples(density: float) -> int:
+    """IDs vacíos necesarios para descartar ``density`` con ``MISS_PROBABILITY``."""
+    if density >= 1:
+        return 1
+    return math.ceil(math.log(MISS_PROBABILITY) / math.log1p(-density))
+
+
+@dataclass
+class DiscoveryResult:
+    highest_id: int
+    ranges: List[Tuple[int, int]] = field(default_factory=list)
+    densities: Dict[int, float] = field(default_factory=dict)
+    probes: int = 0
+    limit: int = 0
+
+    @property
+    def planned(self) -> int:
+        return sum(upper - lower + 1 for lower, upper in self.ranges)
+
+    def iter_ids(self) -> Iterator[int]:
+        for lower, upper in self.ranges:
+            yield from range(lower, upper + 1)
+
+
+def _plan(start: int, hint: int, window: int, block_size: int, samples: int,
+          min_density: float, dead_octaves: int, floor_density: float,
+          known_ids: Iterable[int], seed: Optional[int],
+          ) -> Generator[Batch, Statuses, DiscoveryResult]:
+    rng = random.Random(seed)
+    known = set(known_ids)
+    # Todo lo consultado (y los IDs propios, vivos) para no repetir probes.
+    observed: Dict[int, bool] = {object_id: True for object_id in known}
+    state = {'highest': max([start - 1, *known]), 'probes': 0}
+
+    def record(statuses: Statuses) -> List[int]:
+        state['probes'] += len(statuses)
+        live = []
+        for object_id, status in statuses.items():
+            observed[object_id] = is_live(status)
+            if observed[object_id]:
+                live.append(object_id)
+        state['highest'] = max([state['highest'], *live])
+        return live
+
+    def density(point: bool = False) -> float:
+        """Densidad de la zona poblada ``[start, highest]`` sin los IDs propios."""
+        probes = live = 0
+        for object_id, alive in observed.items():
+            if object_id <= state['highest'] and object_id not in known:
+                probes += 1
+                live += alive
+        if point:
+            return live / probes if probes else 0.0
+        return max(density_lower_bound(live, probes), floor_density)
+
+    def unobserved(ids: Iterable[int]) -> Batch:
+        return [object_id for object_id in ids if object_id not in observed]
+
+    def stretch(lower: int, upper: int, size: int, spread: int) -> Batch:
+        """Ventana contigua de ``size`` IDs en ``lower`` más una muestra aleatoria del resto.
+
+        La muestra (``size // 2``, y nunca menos de ``spread``) busca grupos de
+        objetos vivos separados por huecos dentro del tramo.
+        """
+        head = range(lower, min(upper, lower + size))
+        rest = range(head.stop, upper)
+        return unobserved(head) + unobserved(rng.sample(rest, min(max(size // 2, spread), len(rest))))
+
+    def dead_from(position: int, size: int) -> bool:
+        """Si los ``size`` IDs desde ``position`` se consultaron y están todos muertos."""
+        return all(observed.get(object_id) is False for object_id in range(position, position + size))
+
+    # 1) Densidad por debajo del hint: muestra aleatoria creciente.
+    below = range(start, hint)
+    size = window
+    sampled = live_below = 0
+    while live_below < MIN_LIVE and sampled < min(len(below), needed_samples(floor_density)):
+        batch = unobserved(rng.sample(below, min(size, len(below))))
+        if batch:
+            statuses = yield batch
+            live_below += len(record(statuses))
+        sampled += size
+        size *= 2
+
+    # 2) Galloping desde el hint con tramos que duplican su tamaño.
+    position = max(start, hint + 1, 1)
+    step = window
+    gap_start = None
+    dead_run = 0
+    while gap_start is None or dead_run < dead_octaves or position < gap_start * 2 ** dead_octaves:
+        size = needed_samples(density())
+        end = position + step
+        if gap_start is None:
+            batch = stretch(position, end, size, window)
+        else:
+            # Lo ya recorrido desde el hueco se vuelve a muestrear, así un grupo
+            # justo después del hueco no depende de una sola muestra.
+            behind = range(gap_start, position)
+            batch = stretch(position, end, size, 2 * window)
+            batch += unobserved(rng.sample(behind, min(2 * window, len(behind))))
+        live = record((yield batch)) if batch else []
+        if live or any(position <= object_id < end for object_id in known):
+            gap_start = None
+            dead_run = 0
+        else:
+            gap_start = position if gap_start is None else gap_start
+            # Un tramo más corto que la ventana necesaria todavía no concluye.
+            if dead_from(gap_start, size):
+                dead_run += 1
+        position = end
+        # Confirmado el hueco, el resto del alcance se recorre por octavas.
+        step = max(step * 2, position) if dead_run else step * 2
+
+    highest, limit = state['highest'], gap_start - 1
+
+    if limit < start:
+        return DiscoveryResult(highest_id=0, probes=state['probes'], limit=0)
+
+    # 3) Muestreo de densidad por bloques, sólo si puede ahorrar más de lo que cuesta.
+    span = limit - start + 1
+    blocks = list(range(start, limit + 1, block_size))
+    size = needed_samples(density())
+    cost = samples * len(blocks)
+    if size >= block_size // 2 or cost >= (1 - density(point=True)) * span or state['probes'] + cost >= span:
+        return DiscoveryResult(highest_id=highest, ranges=[(start, limit)], probes=state['probes'], limit=limit)
+
+    def block_ids(block: int) -> range:
+        return range(block, min(block + block_size, limit + 1))
+
+    def sampled_in(block: int) -> Tuple[int, int]:
+        """(muestras, vivos) ya observados en el bloque, sin los IDs propios."""
+        seen = [observed[object_id] for object_id in block_ids(block)
+                if object_id in observed and object_id not in known]
+        return len(seen), sum(seen)
+
+    batch = []
+    for block in blocks:
+        population = block_ids(block)
+        missing = samples - sampled_in(block)[0]
+        if missing > 0:
+            batch += unobserved(rng.sample(population, min(missing, len(population))))
+    if batch:
+        record((yield batch))
+
+    # Un bloque sin aciertos sólo se descarta si la muestra alcanza para
+    # descartar la densidad observada. Si hace falta muestrear más de la mitad
+    # del bloque para decidirlo, sale más barato escanearlo entero.
+    size = needed_samples(density())
+    include = set()
+    refine = []
+    for block in blocks:
+        taken, hits = sampled_in(block)
+        population = block_ids(block)
+        if hits or taken >= size:
+            continue
+        if size >= len(population) // 2:
+            include.add(block)
+        else:
+            remaining = unobserved(population)
+            refine += rng.sample(remaining, min(size - taken, len(remaining)))
+    if refine:
+        record((yield refine))
+
+    densities = {}
+    ranges: List[Tuple[int, int]] = []
+    for block in blocks:
+        taken, hits = sampled_in(block)
+        densities[block] = hits / taken if taken else 0.0
+        block_end = min(block + block_size - 1, limit)
+        owns_known = any(block <= object_id <= block_end for object_id in known)
+        dense = hits and densities[block] >= min_density
+        if dense or block in include or owns_known:
+            if ranges and ranges[-1][1] == block - 1:
+                ranges[-1] = (ranges[-1][0], block_end)
+            else:
+                ranges.append((block, block_end))
+
+    return DiscoveryResult(highest_id=highest, ranges=ranges, densities=densities,
+                           probes=state['probes'], limit=limit)
+
+
+def _make_plan(**kwargs) -> Generator[Batch, Statuses, DiscoveryResult]:
+    return _plan(
+        start=kwargs.get('start', 1),
+        hint=kwargs.get('hint', 0),
+        window=kwargs.get('window', DEFAULT_WINDOW),
+        block_size=kwargs.get('block_size', DEFAULT_BLOCK_SIZE),
+        samples=kwargs.get('samples', DEFAULT_SAMPLES),
+        min_density=kwargs.get('min_density', DEFAULT_MIN_DENSITY),
+        dead_octaves=kwargs.get('dead_octaves', DEFAULT_DEAD_OCTAVES),
+        floor_density=kwargs.get('floor_density', DEFAULT_FLOOR_DENSITY),
+        known_ids=list(kwargs.get('known_ids', ())),
+        seed=kwargs.get('seed'),
+    )
+
+
+def discover_sync(probe_many: Callable[[Batch], Statuses], **kwargs) -> DiscoveryResult:
+    """Ejecutar el descubrimiento con una función ``ids -> {id: status}`` síncrona."""
+    plan = _make_plan(**kwargs)
+    try:
+        batch = next(plan)
+        while True:
+            batch = plan.send(probe_many(batch))
+    except StopIteration as done:
+        return done.value
+
+
+async def discover_async(probe_many: Callable[[Batch], Awaitable[Statuses]], **kwargs) -> DiscoveryResult:
+    """Igual que ``discover_sync`` pero con una función de probe asíncrona."""
+    plan = _make_plan(**kwargs)
+    try:
+        batch = next(plan)
+        while True:
+            batch = plan.send(await probe_many(batch))
+    except StopIteration as done:
+        return done.value
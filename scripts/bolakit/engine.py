@@ -0,0 +1,238 @@
+"""Motor asíncrono de enumeración de IDs con concurrencia acotada.
+
+Mantiene un número limitado de requests en vuelo sobre un cliente HTTP con
+keep-alive y entrega los resultados en el mismo orden de los IDs de entrada.
+
+Con ``http2=True`` (requiere el paquete opcional ``h2``) los requests en vuelo
+se multiplexan como streams sobre pocas conexiones por origen en lugar de una
+conexión TCP/TLS por request. El protocolo se negocia por ALPN: si el servidor
+no ofrece HTTP/2, o el target es ``http://`` sin TLS, httpx sigue con HTTP/1.1
+y el pool abre las conexiones que haga falta.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional, TypeVar
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (httpx lo usa para HTTP/2)
+except ImportError:  # dependencia opcional
+    h2 = None
+
+from .cache import CachingTransport, ResponseCache
+from .metrics import InstrumentedTransport, RequestMetrics
+from .ratelimit import THROTTLE_STATUSES, AdaptiveRateController, parse_retry_after
+from .tokens import AUTH_RETRIES, Identity, TokenPool
+
+DEFAULT_CONCURRENCY = 16
+# Cuántas tareas por encima de la concurrencia se agendan para no bloquear
+# el pipeline cuando el ID en cabeza tarda más que los siguientes.
+REORDER_FACTOR = 4
+# Reintentos por ID cuando el servidor responde 429/503.
+THROTTLE_RETRIES = 5
+# Métodos de escritura que se prueban con un cuerpo que deja el objeto igual.
+WRITE_METHODS = ('PUT', 'PATCH', 'DELETE')
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+@dataclass
+class ProbeResult:
+    """Resultado de un probe individual sobre un ID."""
+
+    id: int
+    status: int
+    data: Optional[dict] = None
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    skipped: bool = False
+    retry_after: Optional[float] = None
+    identity: Optional[Identity] = None
+
+
+def reversible_payload(method: str, original: Optional[dict], field: str = 'status') -> Optional[dict]:
+    """Cuerpo para probar ``method`` sin alterar el objeto leído con GET.
+
+    PUT reenvía el objeto completo y PATCH sólo ``field`` con su valor actual;
+    si la lectura fue bloqueada se manda un cuerpo vacío. DELETE no lleva cuerpo
+    (y no es reversible: quien lo pida debe confirmarlo explícitamente).
+    """
+    if method == 'PUT':
+        return dict(original) if original else {}
+    if method == 'PATCH':
+        return {field: original[field]} if original and field in original else {}
+    return None
+
+
+def http2_available() -> bool:
+    return h2 is not None
+
+
+def make_async_client(concurrency: int = DEFAULT_CONCURRENCY, timeout: float = 10,
+                      verify: bool = True, proxy: Optional[str] = None,
+                      metrics: Optional[RequestMetrics] = None,
+                      cache: Optional[ResponseCache] = None, http2: bool = False) -> httpx.AsyncClient:
+    """Crear un cliente asíncrono con pool keep-alive dimensionado a la concurrencia.
+
+    Con ``metrics`` cada request registra sus fases de tiempo, código y bytes;
+    con ``cache`` los GET se sirven o revalidan desde la caché en disco (y no
+    cuentan en las métricas cuando no salen a la red).
+
+    Con ``http2`` se negocia HTTP/2 y los ``concurrency`` requests en vuelo
+    comparten una conexión por origen, respetando el límite de streams que
+    anuncia el servidor (los que exceden esperan un stream libre). El pool se
+    sigue dimensionando para HTTP/1.1 por si la negociación cae a ese
+    protocolo. Sin ``h2`` instalado se usa HTTP/1.1 (ver ``http2_available``).
+    """
+    http2 = http2 and http2_available()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    if metrics is None and cache is None:
+        return httpx.AsyncClient(limits=limits, timeout=timeout, verify=verify, proxy=proxy, http2=http2)
+    transport = httpx.AsyncHTTPTransport(limits=limits, verify=verify, proxy=proxy, http2=http2)
+    if metrics is not None:
+        transport = InstrumentedTransport(transport, metrics)
+    if cache is not None:
+        transport = CachingTransport(transport, cache)
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+
+class IdEnumerator:
+    """Enumera IDs contra un endpoint con un máximo de ``concurrency`` requests en vuelo."""
+
+    def __init__(self, client: httpx.AsyncClient, url_for: Callable[[int], str],
+                 headers: Optional[dict] = None, concurrency: int = DEFAULT_CONCURRENCY,
+                 method: str = 'GET', rate: Optional[AdaptiveRateController] = None,
+                 tokens: Optional[TokenPool] = None):
+        self.client = client
+        self.url_for = url_for
+        self.headers = headers or {}
+        self.concurrency = max(1, concurrency)
+        self.method = method
+        self.rate = rate
+        self.tokens = tokens
+
+    async def probe(self, object_id: int, headers: Optional[dict] = None,
+                    method: Optional[str] = None, json: Any = None) -> ProbeResult:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(
+                method or self.method, self.url_for(object_id),
+                headers=self.headers if headers is None else headers, json=json,
+            )
+        except httpx.HTTPError as exc:
+            return ProbeResult(object_id, 0, elapsed=time.perf_counter() - started, error=str(exc) or type(exc).__name__)
+
+        data = None
+        if response.content:
+            try:
+                data = response.json()
+            except ValueError:
+                data = None
+        return ProbeResult(
+            object_id,
+            response.status_code,
+            data,
+            time.perf_counter() - started,
+            retry_after=parse_retry_after(response.headers.get('retry-after')),
+        )
+
+    async def paced_probe(self, object_id: int, method: Optional[str] = None, json: Any = None,
+                          identity: Optional[Identity] = None) -> ProbeResult:
+        """Probe respetando el controlador de tasa; reintenta los 429/503.
+
+        Con un ``TokenPool`` cada probe usa la siguiente identidad (y su tasa
+        propia, si tiene) y ante un 401 renueva el token y reintenta.
+        ``method`` y ``json`` reemplazan, para este probe, al método del enumerador;
+        ``identity`` fija la identidad (p.ej. para todos los métodos sobre un ID)
+        y requiere un ``TokenPool`` (``tokens``), que arma sus headers y lo renueva.
+        """
+        if identity is not None and self.tokens is None:
+            raise ValueError("paced_probe con identity requiere un TokenPool (IdEnumerator(..., tokens=...))")
+        if identity is None and self.tokens is not None:
+            identity = self.tokens.acquire()
+        rate = self.rate
+        if identity is not None and identity.rate is not None:
+            rate = identity.rate
+        throttled = reauths = 0
+        while True:
+            if rate is not None:
+                await rate.acquire()
+            if identity is None:
+                result = await self.probe(object_id, method=method, json=json)
+            else:
+                used_token = identity.token
+                result = await self.probe(object_id, self.tokens.headers(identity, self.headers), method, json)
+                result.identity = identity
+            if rate is not None:
+                rate.record(result.status, result.elapsed, result.retry_after)
+            if result.status == 401 and identity is not None and reauths < AUTH_RETRIES:
+                reauths += 1
+                if await self.tokens.refresh(self.client, identity, used_token):
+                    continue
+                break
+            if result.status not in THROTTLE_STATUSES or throttled >= THROTTLE_RETRIES:
+                break
+            throttled += 1
+            if rate is None:
+                await asyncio.sleep(result.retry_after or 1.0)
+        return result
+
+    async def stream(self, ids: Iterable[int], skip: Optional[set] = None) -> AsyncIterator[ProbeResult]:
+        """Entregar un ``ProbeResult`` por ID, en orden, a medida que se completan.
+
+        Los IDs presentes en ``skip`` no se consultan y se devuelven con
+        ``skipped=True``. Al cerrar el iterador se cancelan los probes pendientes.
+        """
+        skip = skip or set()
+
+        async def probe(object_id: int) -> ProbeResult:
+            if object_id in skip:
+                return ProbeResult(object_id, 0, skipped=True)
+            return await self.paced_probe(object_id)
+
+        async for result in ordered_map(probe, ids, self.concurrency):
+            yield result
+
+
+async def ordered_map(worker: Callable[[T], Awaitable[R]], items: Iterable[T],
+                      concurrency: int = DEFAULT_CONCURRENCY) -> AsyncIterator[R]:
+    """Aplicar ``worker`` con hasta ``concurrency`` llamadas en vuelo y entregar en orden.
+
+    Se agendan hasta ``concurrency * REORDER_FACTOR`` elementos por delante del
+    que está en cabeza. Al cerrar el iterador se cancelan los pendientes.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    window = max(1, concurrency) * REORDER_FACTOR
+    pending: deque = deque()
+    item_iter = iter(items)
+
+    async def guarded(item: T) -> R:
+        async with semaphore:
+            return await worker(item)
+
+    def fill():
+        while len(pending) < window:
+            try:
+                item = next(item_iter)
+            except StopIteration:
+                return
+            pending.append(asyncio.ensure_future(guarded(item)))
+
+    try:
+        fill()
+        while pending:
+            result = await pending.popleft()
+            fill()
+            yield result
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,463 @@
+"""Matriz de autorización identidad × objeto × método.
+
+Con N identidades (``--identities``) arma la matriz de quién puede hacer qué
+sobre los objetos de quién, sin N×M requests en serie:
+
+1. cada identidad lista sus propios objetos (``GET <list_path>``, todas en
+   paralelo): el dueño de cada objeto se aprende de ahí, sin probar nada;
+2. se prueban sólo las celdas cruzadas (identidad ≠ dueño); la diagonal ya se
+   sabe accesible por el listado;
+3. con ``--sample K`` se toman hasta K objetos por dueño (al azar, ``--seed``),
+   los mismos para todas las identidades, y la corrida queda acotada a
+   N × (N-1) × K celdas por método.
+
+Las celdas van en vuelo con ``--concurrency`` y cada identidad lleva su propia
+tasa AIMD. PUT y PATCH reenvían el objeto tal como lo listó su dueño
+(``engine.reversible_payload``); DELETE, destructivo, exige ``--allow-delete``,
+corre al final y, por objeto, se detiene en la primera identidad que logra
+borrarlo (las siguientes quedan sin probar).
+
+La matriz se guarda en un JSON compacto: por método, una cadena por identidad
+con un carácter por objeto (``CODES``), junto con el resumen de fugas por
+identidad (como atacante y como víctima)::
+
+    python -m bolakit.matrix --identities cuentas.txt --methods GET,PUT --sample 20 --output matriz.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+from colorama import Fore, Style, init
+
+from .compare import SUPPORTED_METHODS, outcome
+from .engine import IdEnumerator, make_async_client, ordered_map, reversible_payload
+from .metrics import RequestMetrics
+from .progress import ProgressRenderer, resolve_mode
+from .ratelimit import AdaptiveRateController
+from .resources import ResourceSpec, resolve_specs
+from .tokens import Identity, TokenPool, load_identities
+
+init(autoreset=True)
+
+# Un carácter por celda en el archivo de la matriz.
+CODES = {
+    'OWN': 'O',
+    'ALLOWED': 'A',
+    'DENIED': 'D',
+    'NOT_FOUND': 'N',
+    'THROTTLED': 'T',
+    'ERROR': 'E',
+}
+UNPROBED = '.'
+# Cuentas de la línea de progreso con las etiquetas del scanner.
+PROGRESS_STATUS = {
+    'ALLOWED': 'VULNERABLE',
+    'DENIED': 'PROTECTED',
+    'NOT_FOUND': 'NOT_FOUND',
+    'THROTTLED': 'ERROR',
+    'ERROR': 'ERROR',
+}
+# Con más identidades la tabla atacante × dueño no entra en consola (el archivo la tiene igual).
+MAX_TABLE_IDENTITIES = 12
+
+
+class AuthorizationMatrix:
+    """Resultado por (identidad, objeto, método), un byte por celda.
+
+    ``owners[column]`` es la fila de la identidad dueña de ``objects[column]``;
+    las celdas de la diagonal nacen como ``OWN`` y el resto sin probar.
+    """
+
+    def __init__(self, identities: Sequence[Identity], objects: Sequence[int], owners: Sequence[int],
+                 methods: Sequence[str]):
+        self.identities = list(identities)
+        self.objects = list(objects)
+        self.owners = list(owners)
+        self.methods = list(methods)
+        self.cells: Dict[str, List[bytearray]] = {}
+        for method in self.methods:
+            rows = [bytearray(UNPROBED * len(self.objects), 'ascii') for _ in self.identities]
+            for column, owner in enumerate(self.owners):
+                rows[owner][column] = ord(CODES['OWN'])
+            self.cells[method] = rows
+
+    @property
+    def cross_cells(self) -> int:
+        """Celdas cruzadas por método (identidad ≠ dueño)."""
+        return len(self.objects) * (len(self.identities) - 1)
+
+    def record(self, method: str, row: int, column: int, result_outcome: str):
+        self.cells[method][row][column] = ord(CODES[result_outcome])
+
+    def rows(self, method: str) -> List[str]:
+        return [row.decode('ascii') for row in self.cells[method]]
+
+    def allowed_by_owner(self, method: str) -> List[Counter]:
+        """Por identidad atacante: objetos ajenos permitidos agrupados por fila del dueño."""
+        allowed = ord(CODES['ALLOWED'])
+        table = []
+        for row in self.cells[method]:
+            counts = Counter()
+            for column, cell in enumerate(row):
+                if cell == allowed:
+                    counts[self.owners[column]] += 1
+            table.append(counts)
+        return table
+
+    def summary(self) -> dict:
+        """Fugas por identidad, como atacante (``allowed``) y como víctima (``exposed``)."""
+        allowed = ord(CODES['ALLOWED'])
+        own_objects = Counter(self.owners)
+        per_identity = []
+        for row, identity in enumerate(self.identities):
+            per_identity.append({
+                'identity': identity.label,
+                'user_id': identity.user_id,
+                'objects': own_objects[row],
+                'probed': 0,
+                'allowed': Counter(),
+                'victims': set(),
+                'exposed': Counter(),
+                'exposed_to': set(),
+            })
+        probed_total = allowed_total = 0
+        for method in self.methods:
+            for row, cells in enumerate(self.cells[method]):
+                attacker = per_identity[row]
+                for column, cell in enumerate(cells):
+                    owner = self.owners[column]
+                    if owner == row or cell == ord(UNPROBED):
+                        continue
+                    attacker['probed'] += 1
+                    probed_total += 1
+                    if cell != allowed:
+                        continue
+                    allowed_total += 1
+                    attacker['allowed'][method] += 1
+                    attacker['victims'].add(owner)
+                    victim = per_identity[owner]
+                    victim['exposed'][method] += 1
+                    victim['exposed_to'].add(row)
+        for entry in per_identity:
+            entry['allowed'] = dict(entry['allowed'])
+            entry['exposed'] = dict(entry['exposed'])
+            entry['victims'] = len(entry['victims'])
+            entry['exposed_to'] = len(entry['exposed_to'])
+        return {
+            'identities': len(self.identities),
+            'objects': len(self.objects),
+            'probed': probed_total,
+            'allowed': allowed_total,
+            'per_identity': per_identity,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            'codes': {**{code: name for name, code in CODES.items()}, UNPROBED: 'UNPROBED'},
+            'identities': [{'label': identity.label, 'user_id': identity.user_id} for identity in self.identities],
+            'objects': self.objects,
+            'owners': self.owners,
+            'methods': self.methods,
+            'matrix': {method: self.rows(method) for method in self.methods},
+        }
+
+
+def sample_objects(owned: Sequence[List[int]], sample: int = 0, seed: Optional[int] = None) -> Tuple[List[int], List[int]]:
+    """Columnas de la matriz: objetos (hasta ``sample`` por dueño) y la fila de su dueño."""
+    rng = random.Random(seed)
+    columns = []
+    for row, ids in enumerate(owned):
+        chosen = sorted(rng.sample(ids, sample)) if 0 < sample < len(ids) else sorted(ids)
+        columns.extend((object_id, row) for object_id in chosen)
+    columns.sort()
+    return [object_id for object_id, _ in columns], [row for _, row in columns]
+
+
+class MatrixBuilder:
+    """Aprende los dueños por listado y prueba en paralelo las celdas cruzadas."""
+
+    def __init__(self, args, spec: ResourceSpec):
+        self.args = args
+        self.spec = spec
+        self.metrics = RequestMetrics()
+        self.tokens: Optional[TokenPool] = None
+        self.items: Dict[int, dict] = {}
+        self.matrix: Optional[AuthorizationMatrix] = None
+        self.progress = ProgressRenderer(resolve_mode(args.quiet), unit='celdas')
+
+    def _rate_factory(self) -> AdaptiveRateController:
+        args = self.args
+        return AdaptiveRateController(
+            initial_rps=args.max_rps if args.fixed_rate else min(20.0, args.max_rps),
+            max_rps=args.max_rps, adaptive=not args.fixed_rate,
+        )
+
+    async def login(self, client: httpx.AsyncClient) -> bool:
+        args = self.args
+        try:
+            identities = load_identities(args.identities, args.email, args.password, args.token or '')
+        except OSError as exc:
+            print(f"{Fore.RED}[!] No se pudo leer el archivo de identidades: {exc}", file=sys.stderr)
+            return False
+        self.tokens = TokenPool(identities, f"{args.base_url}{args.login_path}", rate_factory=self._rate_factory)
+        try:
+            failed = await self.tokens.login_all(client)
+        except RuntimeError:
+            print(f"{Fore.RED}[!] Login falló para todas las identidades ({len(identities)}).", file=sys.stderr)
+            return False
+        for identity in failed:
+            print(f"{Fore.YELLOW}[~] Login falló para {identity.label}; se excluye de la matriz.")
+        if len(self.tokens) < 2:
+            print(f"{Fore.RED}[!] La matriz necesita al menos dos identidades autenticadas (--identities).",
+                  file=sys.stderr)
+            return False
+        print(f"{Fore.GREEN}[✓] {len(self.tokens)} identidades autenticadas")
+        return True
+
+    async def _listing(self, client: httpx.AsyncClient, identity: Identity) -> Optional[List[dict]]:
+        try:
+            response = await client.get(self.spec.list_url(self.args.base_url), headers=self.tokens.headers(identity))
+            body = response.json() if response.status_code == 200 else None
+        except (httpx.HTTPError, ValueError):
+            body = None
+        items = body.get(self.spec.list_key) if isinstance(body, dict) else None
+        if not isinstance(items, list):
+            return None
+        return [item for item in items if isinstance(item, dict) and isinstance(item.get(self.spec.id_field), int)]
+
+    async def learn_ownership(self, client: httpx.AsyncClient) -> List[List[int]]:
+        """IDs propios de cada identidad, a partir de su listado (todos en paralelo).
+
+        Si la identidad no trae ``user_id`` (token provisto) se toma del dueño
+        de sus objetos; si lo trae, se descartan los objetos listados de otro
+        dueño. Un objeto que aparece en dos listados queda de la primera identidad.
+        """
+        identities = self.tokens.identities
+        listings = await asyncio.gather(*(self._listing(client, identity) for identity in identities))
+        owned: List[List[int]] = []
+        shared = 0
+        for identity, items in zip(identities, listings):
+            ids = []
+            if items is None:
+                print(f"{Fore.YELLOW}[~] No se pudo obtener el listado de {identity.label}; sus objetos quedan fuera.")
+                items = []
+            if identity.user_id is None:
+                identity.user_id = next((self.spec.owner(item) for item in items), None)
+            for item in items:
+                object_id = item[self.spec.id_field]
+                owner = self.spec.owner(item)
+                if owner is not None and identity.user_id is not None and owner != identity.user_id:
+                    continue
+                if object_id in self.items:
+                    shared += 1
+                    continue
+                self.items[object_id] = item
+                ids.append(object_id)
+            owned.append(ids)
+        if shared:
+            print(f"{Fore.YELLOW}[~] {shared} objetos aparecen en más de un listado; "
+                  "se atribuyen a la primera identidad que los listó.")
+        return owned
+
+    async def probe_cell(self, enumerator: IdEnumerator, method: str, row: int, column: int) -> str:
+        object_id = self.matrix.objects[column]
+        payload = reversible_payload(method, self.items.get(object_id))
+        result = await enumerator.paced_probe(
+            object_id, method=method, json=payload, identity=self.tokens.identities[row],
+        )
+        result_outcome = outcome(result, None, None)
+        self.matrix.record(method, row, column, result_outcome)
+        self.progress.count(PROGRESS_STATUS[result_outcome])
+        return result_outcome
+
+    async def probe_delete_column(self, enumerator: IdEnumerator, column: int):
+        """DELETE fila por fila sobre un objeto: después del primer borrado no queda qué probar."""
+        rows = [row for row in range(len(self.tokens)) if row != self.matrix.owners[column]]
+        for done, row in enumerate(rows, 1):
+            if await self.probe_cell(enumerator, 'DELETE', row, column) == 'ALLOWED':
+                self.progress.count('SKIPPED', len(rows) - done)
+                return
+
+    def cross_cells(self, method: str):
+        """Celdas cruzadas de ``method``, objeto por objeto para repartir la carga entre identidades."""
+        for column, owner in enumerate(self.matrix.owners):
+            for row in range(len(self.tokens)):
+                if row != owner:
+                    yield method, row, column
+
+    async def run(self) -> int:
+        args = self.args
+        started = time.monotonic()
+        async with make_async_client(args.concurrency, timeout=args.timeout, verify=not args.insecure,
+                                     metrics=self.metrics, http2=args.http2) as client:
+            if not await self.login(client):
+                return 2
+            owned = await self.learn_ownership(client)
+            objects, owners = sample_objects(owned, args.sample, args.seed)
+            if not objects:
+                print(f"{Fore.RED}[!] Ningún listado devolvió objetos de {self.spec.name}.", file=sys.stderr)
+                return 2
+            self.matrix = AuthorizationMatrix(self.tokens.identities, objects, owners, args.methods)
+            listed = sum(len(ids) for ids in owned)
+            sampled = f" (muestra de {len(objects)})" if len(objects) < listed else ''
+            print(f"{Fore.BLUE}[*] {listed} objetos de {len(self.tokens)} dueños{sampled}: "
+                  f"{self.matrix.cross_cells} celdas cruzadas × {','.join(args.methods)} "
+                  f"(concurrencia {args.concurrency})")
+
+            enumerator = IdEnumerator(
+                client,
+                lambda object_id: self.spec.item_url(args.base_url, object_id),
+                concurrency=args.concurrency,
+                tokens=self.tokens,
+            )
+            self.progress.start(self.matrix.cross_cells * len(args.methods))
+            try:
+                for method in args.methods:
+                    if method == 'DELETE':
+                        async for _ in ordered_map(lambda column: self.probe_delete_column(enumerator, column),
+                                                   range(len(objects)), args.concurrency):
+                            pass
+                        continue
+                    async for _ in ordered_map(lambda cell: self.probe_cell(enumerator, *cell),
+                                               self.cross_cells(method), args.concurrency):
+                        pass
+            finally:
+                self.progress.stop()
+
+        summary = self.matrix.summary()
+        summary['elapsed'] = round(time.monotonic() - started, 2)
+        self.print_summary(summary)
+        self.save(summary)
+        return 1 if summary['allowed'] else 0
+
+    def save(self, summary: dict):
+        document = {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'base_url': self.args.base_url,
+            'resource': self.spec.name,
+            'sample': self.args.sample or None,
+            'seed': self.args.seed,
+            **self.matrix.to_dict(),
+            'summary': summary,
+        }
+        directory = os.path.dirname(self.args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.args.output, 'w', encoding='utf-8') as handler:
+            json.dump(document, handler, ensure_ascii=False, separators=(',', ':'))
+        print(f"Matriz guardada en: {self.args.output}")
+
+    def print_summary(self, summary: dict):
+        matrix = self.matrix
+        labels = [identity.label for identity in matrix.identities]
+        print(f"\n{Fore.CYAN}{'═' * 63}")
+        print(f"{Fore.CYAN}{'MATRIZ DE AUTORIZACIÓN POR IDENTIDAD':^63}")
+        print(f"{Fore.CYAN}{'═' * 63}{Style.RESET_ALL}")
+
+        if len(labels) <= MAX_TABLE_IDENTITIES:
+            width = max(6, *(len(str(number)) for number in range(len(labels))))
+            for method in matrix.methods:
+                print(f"\n{Fore.BLUE}{method}{Style.RESET_ALL} (objetos ajenos permitidos; filas: atacante, columnas: dueño)")
+                print(f"{'':<4}" + ''.join(f"{f'#{number}':>{width}}" for number in range(len(labels))))
+                for row, counts in enumerate(matrix.allowed_by_owner(method)):
+                    cells = ''.join(
+                        f"{'·' if owner == row else counts[owner]:>{width}}" for owner in range(len(labels))
+                    )
+                    print(f"{f'#{row}':<4}{cells}")
+            print()
+            for number, label in enumerate(labels):
+                print(f"  #{number} {label}")
+
+        print(f"\n{Fore.BLUE}Fugas por identidad:{Style.RESET_ALL}")
+        for entry in summary['per_identity']:
+            leaked = sum(entry['allowed'].values())
+            color = Fore.RED if leaked else Fore.GREEN
+            methods = ' · '.join(f"{method} {count}" for method, count in entry['allowed'].items()) or 'ninguno'
+            exposed = sum(entry['exposed'].values())
+            print(f"  {color}{entry['identity']}{Style.RESET_ALL} (usuario {entry['user_id']}): "
+                  f"{leaked}/{entry['probed']} accesos ajenos permitidos sobre {entry['victims']} dueños ({methods}); "
+                  f"sus {entry['objects']} objetos: {exposed} accesos de {entry['exposed_to']} identidades")
+
+        print(f"\n{summary['probed']} celdas cruzadas probadas en {summary['elapsed']}s "
+              f"({summary['objects']} objetos × {summary['identities']} identidades)")
+        if summary['allowed']:
+            print(f"{Fore.RED}[💀] {summary['allowed']} accesos a objetos ajenos permitidos")
+        else:
+            print(f"{Fore.GREEN}[🛡️] Ningún acceso a objetos ajenos")
+        breakdown = self.metrics.breakdown()
+        if breakdown:
+            print(f"{Fore.CYAN}Latencias por fase:{Style.RESET_ALL}")
+            for line in breakdown:
+                print(f"    {line}")
+
+
+def parse_args(argv=None):
+    env = os.environ
+    parser = argparse.ArgumentParser(prog='python -m bolakit.matrix', description='Matriz de autorización identidad × objeto × método')
+    parser.add_argument('-u', '--base-url', default=env.get('BOLA_BASE_URL', 'http://localhost:3000'), help='URL base de la API (default http://localhost:3000)')
+    parser.add_argument('-i', '--identities', default=env.get('BOLA_IDENTITIES'), help='Archivo con email:password (o token:<jwt>) por línea; una fila de la matriz por identidad')
+    parser.add_argument('-e', '--email', default=env.get('BOLA_EMAIL', 'alice@example.com'), help='Email de login (sin --identities)')
+    parser.add_argument('-p', '--password', default=env.get('BOLA_PASSWORD', 'password123'), help='Password')
+    parser.add_argument('-k', '--token', default=env.get('BOLA_TOKEN'), help='Token JWT existente (sin --identities)')
+    parser.add_argument('-r', '--resource', default=env.get('BOLA_RESOURCE', 'orders'), help='Recurso a evaluar (default orders)')
+    parser.add_argument('--resources-file', default=env.get('BOLA_RESOURCES_FILE'), help='JSON con specs de recursos (rutas, claves, campo de ID y de dueño)')
+    parser.add_argument('--methods', default=env.get('BOLA_MATRIX_METHODS', 'GET'), help=f"Métodos a probar ({','.join(SUPPORTED_METHODS)}; default GET)")
+    parser.add_argument('--allow-delete', action='store_true', help='Permitir DELETE (borra datos en el target que no lo bloquee)')
+    parser.add_argument('--sample', type=int, default=int(env.get('BOLA_MATRIX_SAMPLE', 0)), help='Objetos por dueño a probar (0 = todos)')
+    parser.add_argument('--seed', type=int, default=int(env['BOLA_MATRIX_SEED']) if env.get('BOLA_MATRIX_SEED') else None, help='Semilla de la muestra, para repetir la misma matriz')
+    parser.add_argument('--login-path', default=env.get('BOLA_LOGIN_PATH', '/api/auth/login'), help='Ruta de login')
+    parser.add_argument('--concurrency', type=int, default=int(env.get('BOLA_CONCURRENCY', 16)), help='Celdas en vuelo a la vez')
+    parser.add_argument('--max-rps', type=float, default=float(env.get('BOLA_MAX_RPS', 200)), help='Tasa máxima por identidad')
+    parser.add_argument('--fixed-rate', action='store_true', default=env.get('BOLA_ADAPTIVE', '1') in ('0', 'false', 'no'), help='Ir a --max-rps fijo, sin ajuste AIMD')
+    parser.add_argument('-t', '--timeout', type=float, default=float(env.get('BOLA_TIMEOUT', 10)), help='Timeout por request en segundos')
+    parser.add_argument('--insecure', action='store_true', help='Deshabilitar verificación TLS (para labs)')
+    parser.add_argument('--http2', action='store_true', default=env.get('BOLA_HTTP2', '0') not in ('0', 'false', 'no', ''), help='Multiplexar los probes sobre HTTP/2 (requiere h2; cae a HTTP/1.1)')
+    parser.add_argument('--quiet', action='store_true', help='Sin línea de progreso')
+    parser.add_argument('--results-dir', default=env.get('BOLA_RESULTS_DIR', 'scan-results'), help='Carpeta de resultados')
+    parser.add_argument('-o', '--output', help='JSON de la matriz (default <results-dir>/matrix_<recurso>_<fecha>.json)')
+    args = parser.parse_args(argv)
+
+    args.base_url = args.base_url.rstrip('/')
+    args.methods = [method.strip().upper() for method in args.methods.split(',') if method.strip()]
+    unsupported = [method for method in args.methods if method not in SUPPORTED_METHODS]
+    if unsupported:
+        parser.error(f"métodos no soportados: {', '.join(unsupported)}")
+    if 'DELETE' in args.methods:
+        if not args.allow_delete:
+            parser.error("DELETE borra objetos en el target que no lo bloquee; confirmá con --allow-delete")
+        # DELETE al final, para que GET, PUT y PATCH vean los objetos intactos.
+        args.methods = [method for method in args.methods if method != 'DELETE'] + ['DELETE']
+    if ',' in args.resource:
+        parser.error("la matriz se arma sobre un recurso por vez")
+    args.concurrency = max(1, args.concurrency)
+    args.sample = max(0, args.sample)
+    if not args.output:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        args.output = os.path.join(args.results_dir, f"matrix_{args.resource.strip('/')}_{timestamp}.json")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        spec, = resolve_specs(args.resource, args.resources_file)
+    except (OSError, ValueError) as exc:
+        print(f"{Fore.RED}[!] No se pudieron leer las specs de recursos: {exc}", file=sys.stderr)
+        return 2
+    print(f"{Fore.CYAN}[*] Target: {args.base_url} | recurso: {spec.name}")
+    return asyncio.run(MatrixBuilder(args, spec).run())
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,471 @@
+"""Métricas por request HTTP: fases de tiempo, códigos y bytes.
+
+Cada request de los scanners pasa por una capa de instrumentación (transporte
+httpx o adapter de ``requests``) que separa el tiempo en fases:
+
+- ``queue``: espera por una conexión libre del pool (cliente).
+- ``connect``: conexión TCP nueva, resolución DNS incluida (red).
+- ``tls``: handshake TLS de una conexión nueva (red).
+- ``ttfb``: desde el inicio del request hasta recibir los headers de respuesta.
+- ``total``: hasta terminar de leer el cuerpo.
+
+``connect`` y ``tls`` sólo se registran cuando se abre una conexión; con
+keep-alive la mayoría de los requests no las tienen. Del lado httpx también se
+cuenta el protocolo negociado (HTTP/1.1 o HTTP/2) de cada respuesta. Las latencias se guardan en
+histogramas log-lineales estilo HDR (error relativo < 1 %, memoria acotada) y se
+exportan en formato OpenMetrics a un archivo o a un endpoint ``/metrics``.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+PHASES = ('queue', 'connect', 'tls', 'ttfb', 'total')
+# Límites (segundos) de los buckets acumulados que se exportan en OpenMetrics.
+EXPORT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+DEFAULT_EXPORT_INTERVAL = 5.0
+
+
+class Histogram:
+    """Histograma log-lineal estilo HDR sobre microsegundos.
+
+    Los valores menores a ``2**sub_bucket_bits`` µs se guardan exactos; por
+    encima, cada potencia de dos se divide en ``2**(sub_bucket_bits-1)``
+    sub-buckets, así el error relativo queda acotado sin importar la escala.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 7):
+        self._bits = sub_bucket_bits
+        self._sub = 1 << sub_bucket_bits
+        self._half = self._sub >> 1
+        self.counts: Counter = Counter()
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _index(self, micros: int) -> int:
+        if micros < self._sub:
+            return micros
+        shift = micros.bit_length() - self._bits
+        return self._sub + (shift - 1) * self._half + ((micros >> shift) - self._half)
+
+    def _value(self, index: int) -> float:
+        """Punto medio (en segundos) del rango que cubre ``index``."""
+        if index < self._sub:
+            return index / 1e6
+        shift, offset = divmod(index - self._sub, self._half)
+        shift += 1
+        low = (offset + self._half) << shift
+        return (low + (1 << shift) / 2) / 1e6
+
+    def record(self, seconds: float):
+        seconds = max(0.0, seconds)
+        self.counts[self._index(int(seconds * 1e6))] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        target = max(1, round(pct / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    def cumulative(self, bounds: Iterable[float]) -> List[int]:
+        """Cantidad de valores ``<= bound`` por cada límite (buckets OpenMetrics)."""
+        ordered = sorted((self._value(index), count) for index, count in self.counts.items())
+        result, seen, position = [], 0, 0
+        for bound in bounds:
+            while position < len(ordered) and ordered[position][0] <= bound:
+                seen += ordered[position][1]
+                position += 1
+            result.append(seen)
+        return result
+
+
+class RequestMetrics:
+    """Registro compartido (thread-safe) de fases, códigos de estado y bytes."""
+
+    def __init__(self, namespace: str = 'bola'):
+        self.namespace = namespace
+        self.histograms: Dict[str, Histogram] = {phase: Histogram() for phase in PHASES}
+        self.statuses: Counter = Counter()
+        self.protocols: Counter = Counter()
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    @property
+    def requests(self) -> int:
+        return sum(self.statuses.values())
+
+    def observe(self, phases: Dict[str, float], status: int, received: int = 0, sent: int = 0,
+                protocol: Optional[str] = None):
+        with self._lock:
+            for phase, seconds in phases.items():
+                if seconds is not None:
+                    self.histograms[phase].record(seconds)
+            self.statuses[status] += 1
+            if protocol:
+                self.protocols[protocol] += 1
+            self.bytes_received += received
+            self.bytes_sent += sent
+
+    def render(self) -> str:
+        """Estado actual en formato de exposición OpenMetrics."""
+        name = f"{self.namespace}_http"
+        lines = [
+            f"# TYPE {name}_requests counter",
+            f"# HELP {name}_requests Requests HTTP por código de estado (0 = sin respuesta).",
+        ]
+        with self._lock:
+            for status, count in sorted(self.statuses.items()):
+                lines.append(f'{name}_requests_total{{code="{status}"}} {count}')
+            if self.protocols:
+                lines += [
+                    f"# TYPE {name}_responses_by_protocol counter",
+                    f"# HELP {name}_responses_by_protocol Respuestas por protocolo negociado.",
+                ]
+                for protocol, count in sorted(self.protocols.items()):
+                    lines.append(f'{name}_responses_by_protocol_total{{protocol="{protocol}"}} {count}')
+            lines += [
+                f"# TYPE {name}_response_bytes counter",
+                f"{name}_response_bytes_total {self.bytes_received}",
+                f"# TYPE {name}_request_bytes counter",
+                f"{name}_request_bytes_total {self.bytes_sent}",
+                f"# TYPE {name}_request_duration_seconds histogram",
+                f"# HELP {name}_request_duration_seconds Duración por fase del request.",
+            ]
+            for phase in PHASES:
+                histogram = self.histograms[phase]
+                for bound, count in zip(EXPORT_BUCKETS, histogram.cumulative(EXPORT_BUCKETS)):
+                    lines.append(f'{name}_request_duration_seconds_bucket{{phase="{phase}",le="{bound}"}} {count}')
+                lines += [
+                    f'{name}_request_duration_seconds_bucket{{phase="{phase}",le="+Inf"}} {histogram.count}',
+                    f'{name}_request_duration_seconds_count{{phase="{phase}"}} {histogram.count}',
+                    f'{name}_request_duration_seconds_sum{{phase="{phase}"}} {histogram.sum:.6f}',
+                ]
+            lines.append(f"# TYPE {name}_request_duration_quantile_seconds gauge")
+            for phase in PHASES:
+                histogram = self.histograms[phase]
+                for quantile in (0.5, 0.95, 0.99):
+                    value = histogram.percentile(quantile * 100)
+                    lines.append(
+                        f'{name}_request_duration_quantile_seconds{{phase="{phase}",quantile="{quantile}"}} {value:.6f}'
+                    )
+            lines += [
+                f"# TYPE {self.namespace}_run_start_time_seconds gauge",
+                f"{self.namespace}_run_start_time_seconds {self.started:.3f}",
+            ]
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Escribir el snapshot de forma atómica (los lectores nunca ven uno a medias)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as handler:
+            handler.write(self.render())
+        os.replace(tmp_path, path)
+
+    def breakdown(self) -> List[str]:
+        """Tabla de latencias por fase para el resumen de fin de corrida."""
+        with self._lock:
+            if not self.requests:
+                return []
+            lines = [f"{'Fase':<8} {'n':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9}"]
+            for phase in PHASES:
+                histogram = self.histograms[phase]
+                if not histogram.count:
+                    continue
+                lines.append(
+                    f"{phase:<8} {histogram.count:>8} {histogram.percentile(50) * 1000:>9.2f} "
+                    f"{histogram.percentile(95) * 1000:>9.2f} {histogram.percentile(99) * 1000:>9.2f} "
+                    f"{histogram.max * 1000:>9.2f}"
+                )
+            codes = ', '.join(f"{status}={count}" for status, count in sorted(self.statuses.items()))
+            lines.append(f"Códigos: {codes} | recibidos {self.bytes_received} B, enviados {self.bytes_sent} B")
+            if self.protocols:
+                lines.append("Protocolos: " + ', '.join(f"{protocol}={count}" for protocol, count in sorted(self.protocols.items())))
+        return lines
+
+
+class _Timing:
+    """Marcas de tiempo de un request, alimentadas por el trace de httpcore."""
+
+    __slots__ = ('started', 'first_event', 'connect', 'tls', 'headers', '_marks')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_event: Optional[float] = None
+        self.connect: Optional[float] = None
+        self.tls: Optional[float] = None
+        self.headers: Optional[float] = None
+        self._marks: Dict[str, float] = {}
+
+    async def trace(self, event: str, info: dict):
+        now = time.perf_counter()
+        if self.first_event is None:
+            self.first_event = now
+        if event.endswith('.started'):
+            self._marks[event[:-len('.started')]] = now
+        elif event == 'connection.connect_tcp.complete':
+            self.connect = now - self._marks.get('connection.connect_tcp', now)
+        elif event == 'connection.start_tls.complete':
+            self.tls = now - self._marks.get('connection.start_tls', now)
+        elif event.endswith('receive_response_headers.complete'):
+            self.headers = now
+
+    def phases(self, finished: float) -> Dict[str, Optional[float]]:
+        return {
+            'queue': (self.first_event - self.started) if self.first_event is not None else None,
+            'connect': self.connect,
+            'tls': self.tls,
+            'ttfb': (self.headers or finished) - self.started,
+            'total': finished - self.started,
+        }
+
+
+def _request_size(request: httpx.Request) -> int:
+    size = sum(len(name) + len(value) + 4 for name, value in request.headers.raw)
+    try:
+        return size + len(request.content)
+    except httpx.RequestNotRead:
+        return size
+
+
+class _MeasuredStream(httpx.AsyncByteStream):
+    """Cuenta los bytes del cuerpo y registra el request al cerrarse el stream."""
+
+    def __init__(self, stream, done):
+        self._stream = stream
+        self._done = done
+        self._received = 0
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._received += len(chunk)
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._done is not None:
+                self._done(self._received)
+                self._done = None
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Transporte httpx que registra fases, código y bytes de cada request."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, metrics: RequestMetrics):
+        self._transport = transport
+        self.metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        timing = _Timing()
+        request.extensions = {**request.extensions, 'trace': timing.trace}
+        sent = _request_size(request)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            self.metrics.observe(timing.phases(time.perf_counter()), 0, 0, sent)
+            raise
+
+        protocol = response.extensions.get('http_version', b'').decode('ascii', 'replace')
+
+        def done(received: int):
+            self.metrics.observe(timing.phases(time.perf_counter()), response.status_code, received, sent, protocol)
+
+        response.stream = _MeasuredStream(response.stream, done)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+# -- requests / urllib3 --------------------------------------------------------
+
+_current = threading.local()
+
+
+class _ConnectTimer:
+    """Anota en el request en curso del hilo cuánto tardó abrir el socket."""
+
+    def _new_conn(self):
+        started = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            phases = getattr(_current, 'phases', None)
+            if phases is not None:
+                phases['connect'] = time.perf_counter() - started
+
+
+class _TimedHTTPConnection(_ConnectTimer, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_ConnectTimer, HTTPSConnection):
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            phases = getattr(_current, 'phases', None)
+            if phases is not None and phases.get('connect') is not None:
+                phases['tls'] = max(0.0, time.perf_counter() - started - phases['connect'])
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """Adapter de ``requests`` con las mismas métricas que ``InstrumentedTransport``.
+
+    urllib3 no expone la espera por el pool, así que ``queue`` no se registra.
+    """
+
+    def __init__(self, metrics: RequestMetrics, **kwargs):
+        self.metrics = metrics
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, stream=False, **kwargs):
+        phases: Dict[str, Optional[float]] = {}
+        sent = sum(len(name) + len(value) + 4 for name, value in request.headers.items()) + len(request.body or b'')
+        _current.phases = phases
+        started = time.perf_counter()
+        try:
+            response = super().send(request, stream=stream, **kwargs)
+        except requests.RequestException:
+            phases['total'] = time.perf_counter() - started
+            self.metrics.observe(phases, 0, 0, sent)
+            raise
+        finally:
+            _current.phases = None
+        phases['ttfb'] = time.perf_counter() - started
+        received = int(response.headers.get('Content-Length') or 0)
+        if not stream:
+            # Leer acá el cuerpo para medir el total; requests lo deja cacheado.
+            received = len(response.content)
+        phases['total'] = time.perf_counter() - started
+        self.metrics.observe(phases, response.status_code, received, sent)
+        return response
+
+
+def instrument_session(session: requests.Session, metrics: RequestMetrics) -> requests.Session:
+    """Montar ``InstrumentedAdapter`` para http y https en ``session``."""
+    adapter = InstrumentedAdapter(metrics)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# -- exportación -----------------------------------------------------------------
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsExporter:
+    """Publica ``metrics`` en un archivo (refrescado cada ``interval``) y/o en HTTP.
+
+    El archivo sirve para el textfile collector de node_exporter; el endpoint
+    ``http://<host>:<port>/metrics`` para que Prometheus lo consulte en vivo.
+    """
+
+    def __init__(self, metrics: RequestMetrics, path: Optional[str] = None, port: Optional[int] = None,
+                 host: str = '127.0.0.1', interval: float = DEFAULT_EXPORT_INTERVAL):
+        self.metrics = metrics
+        self.path = path
+        self.port = port
+        self.host = host
+        self.interval = interval
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> Optional[str]:
+        if self._server is None:
+            return None
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self) -> 'MetricsExporter':
+        if self.path:
+            self._writer = threading.Thread(target=self._write_loop, name='bola-metrics-writer', daemon=True)
+            self._writer.start()
+        if self.port is not None:
+            self._server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+            self._server.daemon_threads = True
+            self._server.metrics = self.metrics
+            threading.Thread(target=self._server.serve_forever, name='bola-metrics-http', daemon=True).start()
+        return self
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            self.metrics.write(self.path)
+
+    def stop(self):
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join()
+        if self.path:
+            self.metrics.write(self.path)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self) -> 'MetricsExporter':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,504 @@
+"""API de órdenes simulada para pruebas y benchmarks sin las APIs Node.
+
+Implementa ``/health``, ``/api/auth/login``, ``/api/auth/register`` y
+``/api/orders[/<id>]`` (GET/POST/PUT/PATCH/DELETE) con la misma forma de respuesta
+que las APIs del proyecto; ``GET /api/orders/<id>`` además manda ``ETag`` y
+responde 304 a ``If-None-Match``. ``/api/users[/<id>]`` (perfiles) y
+``/api/invoices[/<id>]`` (facturas) son de sólo lectura y siguen la misma
+política de autorización, para escanear varios recursos. Sólo usa la librería
+estándar::
+
+    python -m bolakit.mockapi --port 3000 --mode vulnerable --orders 2000000
+    python -m bolakit.mockapi --port 3001 --mode secure --latency 20 --rate-limit 300
+
+Las órdenes precargadas no se guardan en memoria: la orden ``i`` se calcula a
+partir de la semilla, así que millones de órdenes cuestan lo mismo que seis.
+Sólo se almacenan las órdenes creadas, modificadas o eliminadas. Con los
+valores por defecto los IDs 1-6 coinciden con ``seed_data.py`` (alice: 1-2,
+bob: 3-4, charlie: 5-6).
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from colorama import Fore, init
+
+init(autoreset=True)
+
+DEMO_USERS = [
+    ("alice@example.com", "Alice Johnson"),
+    ("bob@example.com", "Bob Smith"),
+    ("charlie@example.com", "Charlie Brown"),
+]
+DEFAULT_PASSWORD = "password123"
+PRODUCTS = [
+    ("Laptop Dell XPS 15", 1899.99), ("Mouse Logitech MX Master", 99.99), ("iPhone 15 Pro", 1299.99),
+    ("AirPods Pro", 249.99), ("Samsung Galaxy S24", 999.99), ("PlayStation 5", 499.99),
+]
+ORDER_PATH = re.compile(r"^/api/orders/(\d+)$")
+# Recursos de sólo lectura: ruta -> (clave del objeto, nombre en los mensajes).
+READ_ONLY = {
+    'users': ('user', 'perfil'),
+    'invoices': ('invoice', 'factura'),
+}
+READ_ONLY_PATH = re.compile(r"^/api/(users|invoices)(?:/(\d+))?$")
+
+
+@dataclass
+class MockConfig:
+    mode: str = 'vulnerable'
+    orders: int = 6
+    users: int = 3
+    orders_per_user: int = 2
+    invoices: Optional[int] = None
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    rate_limit: float = 0.0
+    burst: int = 0
+    token_ttl: float = 0.0
+    seed: int = 1
+
+
+class MockStore:
+    """Usuarios y órdenes: sintéticos calculados al vuelo más cambios en memoria."""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.extra_users: Dict[str, dict] = {}
+        self.created: Dict[int, dict] = {}
+        self.updated: Dict[int, dict] = {}
+        self.deleted = set()
+        self.tokens: Dict[str, Tuple[int, float]] = {}
+        self.stats: Counter = Counter()
+
+    # -- usuarios ---------------------------------------------------------
+    def synthetic_user(self, user_id: int) -> Optional[dict]:
+        if not 1 <= user_id <= self.config.users:
+            return None
+        if user_id <= len(DEMO_USERS):
+            email, name = DEMO_USERS[user_id - 1]
+        else:
+            email, name = f"user{user_id:06d}@example.com", f"Usuario {user_id}"
+        return {"id": user_id, "email": email, "name": name, "password": DEFAULT_PASSWORD}
+
+    def profile(self, user_id: int) -> Optional[dict]:
+        """Perfil público de un usuario (sin password), con datos de contacto."""
+        user = self.synthetic_user(user_id)
+        if user is None:
+            user = next((extra for extra in self.extra_users.values() if extra['id'] == user_id), None)
+        if user is None:
+            return None
+        rng = random.Random(f"{self.config.seed}:user:{user_id}")
+        return {
+            "id": user_id,
+            "email": user['email'],
+            "name": user['name'],
+            "phone": f"+51 9{user_id % 100:02d} {rng.randint(0, 999):03d} {rng.randint(0, 999):03d}",
+            "address": f"{100 + user_id} Main St, Ciudad",
+        }
+
+    def find_user(self, email: str) -> Optional[dict]:
+        if email in self.extra_users:
+            return self.extra_users[email]
+        for index, (demo_email, _) in enumerate(DEMO_USERS, start=1):
+            if email == demo_email:
+                return self.synthetic_user(index)
+        match = re.fullmatch(r"user(\d+)@example\.com", email or '')
+        return self.synthetic_user(int(match.group(1))) if match else None
+
+    def register(self, payload: dict) -> Optional[dict]:
+        email = payload.get('email')
+        with self.lock:
+            if not email or self.find_user(email) is not None:
+                return None
+            user = {
+                "id": self.config.users + len(self.extra_users) + 1,
+                "email": email,
+                "name": payload.get('name') or email,
+                "password": payload.get('password') or '',
+            }
+            self.extra_users[email] = user
+            return user
+
+    def issue_token(self, user_id: int) -> str:
+        token = f"mock.{user_id}.{secrets.token_hex(8)}"
+        with self.lock:
+            self.tokens[token] = (user_id, time.monotonic())
+        return token
+
+    def user_for_token(self, token: str) -> Optional[int]:
+        entry = self.tokens.get(token)
+        if entry is None:
+            return None
+        user_id, issued = entry
+        if self.config.token_ttl and time.monotonic() - issued > self.config.token_ttl:
+            return None
+        return user_id
+
+    # -- órdenes ----------------------------------------------------------
+    def owner_of(self, order_id: int) -> int:
+        return (order_id - 1) // self.config.orders_per_user % self.config.users + 1
+
+    def synthetic_order(self, order_id: int) -> dict:
+        rng = random.Random(f"{self.config.seed}:{order_id}")
+        product, price = PRODUCTS[(order_id - 1) % len(PRODUCTS)]
+        owner = self.owner_of(order_id)
+        return {
+            "id": order_id,
+            "userId": owner,
+            "product": product,
+            "amount": price if order_id <= 6 else round(price * rng.uniform(0.8, 1.2), 2),
+            "status": "pending",
+            "creditCard": f"**** **** **** {(1234 + (owner - 1) * 4444) % 10000:04d}",
+            "address": f"{100 + owner} Main St, Ciudad",
+            "phone": f"+51 9{owner % 100:02d} {rng.randint(0, 999):03d} {rng.randint(0, 999):03d}",
+        }
+
+    # -- facturas (una por orden precargada, mismo dueño) -----------------
+    @property
+    def invoice_count(self) -> int:
+        return self.config.orders if self.config.invoices is None else self.config.invoices
+
+    def get_invoice(self, invoice_id: int) -> Optional[dict]:
+        if not 1 <= invoice_id <= self.invoice_count:
+            return None
+        rng = random.Random(f"{self.config.seed}:invoice:{invoice_id}")
+        owner = self.owner_of(invoice_id)
+        _, price = PRODUCTS[(invoice_id - 1) % len(PRODUCTS)]
+        return {
+            "id": invoice_id,
+            "userId": owner,
+            "orderId": invoice_id,
+            "total": round(price * 1.18, 2),
+            "taxId": f"10{owner:08d}{rng.randint(0, 9)}",
+            "billingAddress": f"{100 + owner} Main St, Ciudad",
+        }
+
+    def invoices_of(self, user_id: int) -> list:
+        per, users = self.config.orders_per_user, self.config.users
+        found = []
+        if 1 <= user_id <= users:
+            for block in range((user_id - 1) * per + 1, self.invoice_count + 1, per * users):
+                found.extend(self.get_invoice(invoice_id)
+                             for invoice_id in range(block, min(block + per, self.invoice_count + 1)))
+        return found
+
+    def get_order(self, order_id: int) -> Optional[dict]:
+        if order_id in self.deleted:
+            return None
+        if order_id in self.updated:
+            return self.updated[order_id]
+        if order_id in self.created:
+            return self.created[order_id]
+        if 1 <= order_id <= self.config.orders:
+            return self.synthetic_order(order_id)
+        return None
+
+    def orders_of(self, user_id: int) -> list:
+        per, users = self.config.orders_per_user, self.config.users
+        found = []
+        if 1 <= user_id <= users:
+            for block in range((user_id - 1) * per + 1, self.config.orders + 1, per * users):
+                for order_id in range(block, min(block + per, self.config.orders + 1)):
+                    order = self.get_order(order_id)
+                    if order is not None and order['userId'] == user_id:
+                        found.append(order)
+        found.extend(order for order in self.created.values()
+                     if order['userId'] == user_id and order['id'] not in self.deleted)
+        return found
+
+    def create_order(self, user_id: int, payload: dict) -> dict:
+        with self.lock:
+            order_id = self.config.orders + len(self.created) + 1
+            order = {k: v for k, v in payload.items() if k not in ('id', 'userId')}
+            order.update({"id": order_id, "userId": user_id})
+            order.setdefault("status", "pending")
+            self.created[order_id] = order
+        return order
+
+    def update_order(self, order: dict, payload: dict) -> dict:
+        with self.lock:
+            updated = dict(order)
+            updated.update({k: v for k, v in payload.items() if k not in ('id', 'userId')})
+            if order['id'] in self.created:
+                self.created[order['id']] = updated
+            else:
+                self.updated[order['id']] = updated
+        return updated
+
+    def delete_order(self, order_id: int):
+        with self.lock:
+            self.deleted.add(order_id)
+
+
+class TokenBucket:
+    """Límite global de requests por segundo; devuelve la espera sugerida."""
+
+    def __init__(self, rate: float, burst: int = 0):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: 'MockServer'
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code: int, payload: dict, headers: Optional[dict] = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.store.stats[code] += 1
+
+    def _send_validated(self, payload: dict):
+        """200 con ``ETag``, o 304 sin cuerpo si el cliente ya tiene esa versión."""
+        body = json.dumps(payload).encode('utf-8')
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.server.store.stats[304] += 1
+            return None
+        return self._send(200, payload, {"ETag": etag})
+
+    def _body(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            data = json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _user_id(self) -> Optional[int]:
+        header = self.headers.get('Authorization', '')
+        if not header.startswith('Bearer '):
+            return None
+        return self.server.store.user_for_token(header[7:])
+
+    def _simulate(self) -> bool:
+        """Latencia, 429 y errores simulados. ``False`` si ya se respondió."""
+        config = self.server.config
+        if self.server.bucket is not None:
+            wait = self.server.bucket.take()
+            if wait:
+                self._send(429, {"error": "Too Many Requests"}, {"Retry-After": str(max(1, math.ceil(wait)))})
+                return False
+        if config.latency_ms or config.jitter_ms:
+            time.sleep(max(0.0, config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)) / 1000)
+        if config.error_rate and random.random() < config.error_rate:
+            self._send(500, {"error": "Error interno simulado"})
+            return False
+        return True
+
+    def _dispatch(self, method: str):
+        body = self._body() if method in ('POST', 'PUT', 'PATCH') else {}
+        path = self.path.split('?', 1)[0].rstrip('/') or '/'
+        if path == '/health':
+            return self._send(200, {"status": "ok", "mode": self.server.config.mode, "orders": self.server.config.orders})
+        if path == '/__stats':
+            return self._send(200, {"responses": {str(k): v for k, v in self.server.store.stats.items()}})
+        if not self._simulate():
+            return None
+
+        store = self.server.store
+        if method == 'POST' and path == '/api/auth/register':
+            user = store.register(body)
+            if user is None:
+                return self._send(400, {"error": "El usuario ya existe"})
+            return self._send(201, {"message": "Usuario registrado", "user": {k: user[k] for k in ('id', 'email', 'name')}})
+        if method == 'POST' and path == '/api/auth/login':
+            user = store.find_user(body.get('email'))
+            if user is None or user['password'] != body.get('password'):
+                return self._send(401, {"error": "Credenciales inválidas"})
+            return self._send(200, {
+                "token": store.issue_token(user['id']),
+                "user": {k: user[k] for k in ('id', 'email', 'name')},
+            })
+
+        user_id = self._user_id()
+        if user_id is None:
+            return self._send(401, {"error": "Token inválido o expirado"})
+        if path == '/api/orders':
+            if method == 'GET':
+                orders = store.orders_of(user_id)
+                return self._send(200, {"orders": orders, "count": len(orders)})
+            if method == 'POST':
+                order = store.create_order(user_id, body)
+                return self._send(201, {"message": "Orden creada", "orderId": order['id'], "order": order})
+            return self._send(405, {"error": "Método no permitido"})
+
+        match = READ_ONLY_PATH.match(path)
+        if match is not None:
+            return self._dispatch_read_only(method, match.group(1), match.group(2), user_id)
+        match = ORDER_PATH.match(path)
+        if match is None:
+            return self._send(404, {"error": "Ruta no encontrada"})
+        order = store.get_order(int(match.group(1)))
+        if order is None:
+            return self._send(404, {"error": "Orden no encontrada"})
+        foreign = order['userId'] != user_id
+        if foreign and self.server.config.mode == 'secure':
+            return self._send(403, {"error": "No tienes permiso para acceder a esta orden"})
+
+        if method == 'GET':
+            payload = {"order": order}
+            if foreign:
+                payload.update({
+                    "should_block": True,
+                    "blocked": False,
+                    "attacker": {"userId": user_id},
+                    "security_note": "VULNERABLE: orden de otro usuario expuesta sin verificar propiedad",
+                })
+            return self._send_validated(payload)
+        if method in ('PUT', 'PATCH'):
+            return self._send(200, {"message": "Orden actualizada", "order": store.update_order(order, body)})
+        if method == 'DELETE':
+            store.delete_order(order['id'])
+            return self._send(200, {"message": "Orden eliminada", "orderId": order['id']})
+        return self._send(405, {"error": "Método no permitido"})
+
+    def _dispatch_read_only(self, method: str, resource: str, object_id: Optional[str], user_id: int):
+        """Perfiles y facturas: listado propio y lectura por ID, sin escrituras."""
+        store = self.server.store
+        key, noun = READ_ONLY[resource]
+        if method != 'GET':
+            return self._send(405, {"error": "Método no permitido"})
+        if object_id is None:
+            items = [store.profile(user_id)] if resource == 'users' else store.invoices_of(user_id)
+            return self._send(200, {resource: items, "count": len(items)})
+        item = store.profile(int(object_id)) if resource == 'users' else store.get_invoice(int(object_id))
+        if item is None:
+            return self._send(404, {"error": f"Recurso no encontrado ({noun})"})
+        owner = item['id'] if resource == 'users' else item['userId']
+        foreign = owner != user_id
+        if foreign and self.server.config.mode == 'secure':
+            return self._send(403, {"error": "No tienes permiso para acceder a este recurso"})
+        payload = {key: item}
+        if foreign:
+            payload.update({
+                "should_block": True,
+                "blocked": False,
+                "attacker": {"userId": user_id},
+                "security_note": f"VULNERABLE: datos de {noun} de otro usuario expuestos sin verificar propiedad",
+            })
+        return self._send_validated(payload)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_PATCH(self):
+        self._dispatch('PATCH')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+
+    def __init__(self, address, config: MockConfig):
+        super().__init__(address, MockHandler)
+        self.config = config
+        self.store = MockStore(config)
+        self.bucket = TokenBucket(config.rate_limit, config.burst) if config.rate_limit else None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_in_thread(config: Optional[MockConfig] = None, host: str = '127.0.0.1', port: int = 0) -> MockServer:
+    """Levantar el mock en un hilo de fondo (``port=0`` elige uno libre)."""
+    server = MockServer((host, port), config or MockConfig())
+    threading.Thread(target=server.serve_forever, name='bola-mockapi', daemon=True).start()
+    return server
+
+
+def main(argv=None) -> int:
+    env = os.environ
+    parser = argparse.ArgumentParser(prog='python -m bolakit.mockapi', description='API de órdenes simulada (vulnerable o segura)')
+    parser.add_argument('--host', default=env.get('BOLA_MOCK_HOST', '127.0.0.1'), help='Interfaz de escucha')
+    parser.add_argument('--port', type=int, default=int(env.get('BOLA_MOCK_PORT', 3000)), help='Puerto (default 3000)')
+    parser.add_argument('--mode', choices=['vulnerable', 'secure'], default=env.get('BOLA_MOCK_MODE', 'vulnerable'), help='Política de autorización')
+    parser.add_argument('--orders', type=int, default=int(env.get('BOLA_MOCK_ORDERS', 6)), help='Órdenes precargadas (se generan al vuelo)')
+    parser.add_argument('--users', type=int, default=int(env.get('BOLA_MOCK_USERS', 3)), help='Usuarios dueños de las órdenes precargadas')
+    parser.add_argument('--orders-per-user', type=int, default=2, help='Órdenes consecutivas por usuario (default 2)')
+    parser.add_argument('--invoices', type=int, default=int(env['BOLA_MOCK_INVOICES']) if env.get('BOLA_MOCK_INVOICES') else None,
+                        help='Facturas precargadas (default = órdenes; mismo dueño que la orden del mismo ID)')
+    parser.add_argument('--latency', type=float, default=float(env.get('BOLA_MOCK_LATENCY', 0)), help='Latencia media en ms')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Variación de latencia (± ms)')
+    parser.add_argument('--error-rate', type=float, default=float(env.get('BOLA_MOCK_ERROR_RATE', 0)), help='Proporción de respuestas 500 (0-1)')
+    parser.add_argument('--rate-limit', type=float, default=float(env.get('BOLA_MOCK_RATE_LIMIT', 0)), help='Requests/s antes de responder 429 (0 = sin límite)')
+    parser.add_argument('--burst', type=int, default=0, help='Ráfaga permitida por el limitador (default = rate-limit)')
+    parser.add_argument('--token-ttl', type=float, default=float(env.get('BOLA_MOCK_TOKEN_TTL', 0)), help='Vigencia de los tokens en segundos (0 = sin vencimiento)')
+    parser.add_argument('--seed', type=int, default=1, help='Semilla de los datos sintéticos')
+    args = parser.parse_args(argv)
+
+    config = MockConfig(
+        mode=args.mode, orders=args.orders, users=max(1, args.users), orders_per_user=max(1, args.orders_per_user),
+        invoices=args.invoices,
+        latency_ms=args.latency, jitter_ms=args.jitter, error_rate=args.error_rate, rate_limit=args.rate_limit,
+        burst=args.burst, token_ttl=args.token_ttl, seed=args.seed,
+    )
+    server = MockServer((args.host, args.port), config)
+    print(f"{Fore.BLUE}[*] Mock API {config.mode} en {server.url} - {config.orders} órdenes, {config.users} usuarios")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
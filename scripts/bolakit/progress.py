@@ -0,0 +1,293 @@
+"""Salida de consola desacoplada del bucle de probes.
+
+El bucle de probes no escribe en la terminal: sólo llama a
+``ProgressRenderer.count`` (sumar a un contador) y a ``finding`` (encolar un
+hallazgo). Un hilo aparte despierta cada ``interval`` segundos, vuelca los
+hallazgos y avisos encolados en una sola escritura y redibuja en el lugar una
+línea de estado con IDs procesados, IDs/s, ETA y cuentas por resultado. Así el
+costo de la consola no depende de la tasa de probes.
+
+Mientras el renderer está activo ``sys.stdout`` se reemplaza por una cola de
+líneas que escribe el mismo hilo: un ``print`` suelto (un aviso de 401, la
+deriva de un baseline) no rompe la línea de estado ni bloquea el bucle.
+
+Modos (``resolve_mode``):
+
+- ``live``: hallazgos y línea de estado redibujada (terminal interactiva);
+- ``plain``: hallazgos y una línea de progreso cada ``PLAIN_INTERVAL`` s
+  (logs de CI, pipes);
+- ``quiet``: sólo hallazgos y avisos;
+- ``json``: una línea JSON por hallazgo en stdout y un resumen al final
+  (``finish``); el resto del texto va a stderr (ver ``redirect``).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import shutil
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Optional
+
+from colorama import Fore, Style
+
+MODES = ('live', 'plain', 'quiet', 'json')
+DEFAULT_INTERVAL = 0.25
+PLAIN_INTERVAL = 10.0
+# Peso de la última medición en el promedio móvil de IDs/s.
+RATE_SMOOTHING = 0.3
+# Resultados de la línea de estado: etiqueta corta y color; el resto se agrega tal cual.
+STATUS_LABELS = (
+    ('VULNERABLE', 'vuln', Fore.RED),
+    ('PROTECTED', 'prot', Fore.GREEN),
+    ('OWNED', 'propios', Fore.GREEN),
+    ('NOT_FOUND', '404', Fore.YELLOW),
+    ('ERROR', 'err', Fore.YELLOW),
+)
+# Otros resultados que pueden aparecer en la línea de estado.
+EXTRA_LABELS = {'SKIPPED': 'omitidos'}
+_CLEAR_LINE = '\r\033[K'
+
+
+def resolve_mode(quiet: bool = False, json_output: bool = False, stream=None) -> str:
+    """``json`` > ``quiet`` > ``live`` si la salida es una terminal, si no ``plain``."""
+    if json_output:
+        return 'json'
+    if quiet:
+        return 'quiet'
+    stream = stream or sys.stdout
+    isatty = getattr(stream, 'isatty', None)
+    return 'live' if isatty is not None and isatty() else 'plain'
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '--:--'
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class _LineQueue(io.TextIOBase):
+    """Reemplazo de ``sys.stdout`` que encola líneas completas para el renderer."""
+
+    def __init__(self, renderer: 'ProgressRenderer'):
+        self.renderer = renderer
+        self._partial = ''
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return False
+
+    def write(self, text: str) -> int:
+        *lines, self._partial = (self._partial + text).split('\n')
+        for line in lines:
+            self.renderer.note(line)
+        return len(text)
+
+    def drain(self):
+        if self._partial:
+            self.renderer.note(self._partial)
+            self._partial = ''
+
+
+class ProgressRenderer:
+    """Contadores del escaneo y un hilo que los muestra sin frenar el bucle.
+
+    ``start``/``stop`` se pueden anidar (varios recursos comparten un
+    renderer): el hilo arranca con el primer ``start`` y se detiene con el
+    último ``stop``.
+    """
+
+    def __init__(self, mode: str = 'plain', total: Optional[int] = None, interval: float = DEFAULT_INTERVAL,
+                 stream=None, unit: str = 'IDs'):
+        if mode not in MODES:
+            raise ValueError(f"Modo de salida desconocido: {mode}")
+        self.mode = mode
+        self.total = total
+        self.interval = interval
+        # En modo json, el stdout real (antes de ``redirect``) recibe sólo JSON.
+        self.stream = stream or sys.stdout
+        self.unit = unit
+        self.counts: Counter = Counter()
+        self.done = 0
+        self.findings = 0
+        self._queue: deque = deque()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._console = None
+        self._capture: Optional[_LineQueue] = None
+        self._users = 0
+        self._started = 0.0
+        self._sample = (0.0, 0)
+        self._rate = 0.0
+        self._status_shown = False
+        self._next_plain = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None
+
+    def redirect(self):
+        """En modo json, mandar a stderr todo lo que no es un hallazgo."""
+        if self.mode == 'json':
+            return contextlib.redirect_stdout(sys.stderr)
+        return contextlib.nullcontext()
+
+    # ─── Bucle de probes: sin I/O ───
+
+    def count(self, status: str, amount: int = 1):
+        self.counts[status] += amount
+        self.done += amount
+
+    def add_total(self, amount: int):
+        self.total = (self.total or 0) + amount
+
+    def finding(self, text: str, record: Optional[dict] = None):
+        """Encolar un hallazgo (``text`` para la consola, ``record`` para ``--json``)."""
+        self.findings += 1
+        if self.active:
+            self._queue.append(('finding', text, record))
+        else:
+            self._write(self._render([('finding', text, record)]))
+
+    def note(self, text: str):
+        self._queue.append(('note', text, None))
+
+    # ─── Ciclo de vida ───
+
+    def start(self, total: Optional[int] = None) -> 'ProgressRenderer':
+        if total is not None:
+            self.add_total(total)
+        self._users += 1
+        if self._users > 1:
+            return self
+        self._console = sys.stdout
+        self._capture = _LineQueue(self)
+        sys.stdout = self._capture
+        self._started = time.perf_counter()
+        self._sample = (self._started, self.done)
+        self._next_plain = self._started + PLAIN_INTERVAL
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='bola-progress', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._users == 0:
+            return
+        self._users -= 1
+        if self._users > 0:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._capture.drain()
+        sys.stdout = self._console
+        self._flush(final=True)
+
+    def finish(self):
+        """Cerrar la salida de la corrida: en modo json, la línea de resumen."""
+        if self.mode == 'json':
+            self._emit_json(self.summary())
+
+    def __enter__(self) -> 'ProgressRenderer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            'event': 'summary',
+            'processed': self.done,
+            'total': self.total,
+            'findings': self.findings,
+            'elapsed': round(elapsed, 3),
+            'ids_per_sec': round(self.done / elapsed, 2) if elapsed else 0.0,
+            'counts': dict(self.counts),
+        }
+
+    # ─── Hilo de render ───
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._flush()
+
+    def _flush(self, final: bool = False):
+        items = []
+        while self._queue:
+            items.append(self._queue.popleft())
+        now = time.perf_counter()
+        self._measure(now)
+        text = self._render(items)
+        if self.mode == 'live':
+            if self._status_shown:
+                text = _CLEAR_LINE + text
+            text += self.status_line() + ('\n' if final else '')
+            self._status_shown = not final
+        elif self.mode == 'plain' and (final or now >= self._next_plain):
+            text += self.status_line() + Style.RESET_ALL + '\n'
+            self._next_plain = now + PLAIN_INTERVAL
+        self._write(text)
+
+    def _render(self, items) -> str:
+        lines = []
+        for kind, text, record in items:
+            if kind == 'finding' and self.mode == 'json':
+                self._emit_json(record or {'event': 'finding', 'message': text})
+            else:
+                lines.append(f"{text}{Style.RESET_ALL}\n")
+        return ''.join(lines)
+
+    def _write(self, text: str):
+        if not text:
+            return
+        console = self._console or sys.stdout
+        console.write(text)
+        console.flush()
+
+    def _emit_json(self, record: dict):
+        self.stream.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        self.stream.flush()
+
+    def _measure(self, now: float):
+        last_time, last_done = self._sample
+        if now - last_time <= 0:
+            return
+        instant = (self.done - last_done) / (now - last_time)
+        self._rate = instant if not self._rate else (1 - RATE_SMOOTHING) * self._rate + RATE_SMOOTHING * instant
+        self._sample = (now, self.done)
+
+    def eta(self) -> Optional[float]:
+        if not self.total or self._rate <= 0:
+            return None
+        return max(0, self.total - self.done) / self._rate
+
+    def status_line(self) -> str:
+        """Línea de estado; en ``live`` se recorta al ancho de la terminal para redibujarla con ``\\r``."""
+        progress = f"{self.done}/{self.total}" if self.total else f"{self.done}"
+        segments = [
+            (Fore.CYAN, f"[▶] {progress} {self.unit}"),
+            (Fore.CYAN, f"{self._rate:.0f} {self.unit}/s"),
+            (Fore.CYAN, f"ETA {format_eta(self.eta())}"),
+        ]
+        known = {status for status, _, _ in STATUS_LABELS}
+        for status, label, color in STATUS_LABELS:
+            segments.append((color, f"{label} {self.counts[status]}"))
+        for status, count in sorted(self.counts.items()):
+            if status not in known:
+                segments.append((Fore.BLUE, f"{EXTRA_LABELS.get(status, status.lower())} {count}"))
+        if self.mode == 'live':
+            width = shutil.get_terminal_size((100, 20)).columns - 1
+            while len(segments) > 1 and len(' · '.join(text for _, text in segments)) > width:
+                segments.pop()
+        return ' · '.join(f"{color}{text}{Style.RESET_ALL}" for color, text in segments)
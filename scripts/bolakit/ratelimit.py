@@ -0,0 +1,174 @@
+"""Control adaptativo de tasa (AIMD) para los probes contra la API.
+
+El controlador reparte turnos a intervalos de ``1/rate`` segundos, sube la tasa
+mientras la latencia p95 y la tasa de errores se mantienen estables y la recorta
+ante 429/503, errores o degradación de latencia, respetando ``Retry-After``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convertir un header ``Retry-After`` (segundos o fecha HTTP) a segundos."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class AdaptiveRateController:
+    """Pacer compartido con ajuste AIMD guiado por latencia y errores.
+
+    Arranca en *slow start* (duplica la tasa en cada evaluación sana) hasta la
+    primera señal de congestión; desde ahí aplica incremento aditivo y
+    decremento multiplicativo. Con ``adaptive=False`` se comporta como un delay fijo.
+    """
+
+    def __init__(self, initial_rps: float = 5.0, min_rps: float = 0.5, max_rps: float = 500.0,
+                 increase: float = 1.0, decrease: float = 0.5, window: int = 50,
+                 latency_tolerance: float = 1.5, latency_slack: float = 0.05,
+                 max_error_rate: float = 0.05, adaptive: bool = True):
+        self.min_rps = min_rps
+        self.max_rps = max_rps
+        self.rate = min(max(initial_rps, min_rps), max_rps)
+        self.increase = increase
+        self.decrease = decrease
+        self.window = window
+        self.latency_tolerance = latency_tolerance
+        self.latency_slack = latency_slack
+        self.max_error_rate = max_error_rate
+        self.adaptive = adaptive
+
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=window)
+        self._errors: deque = deque(maxlen=window)
+        self._since_adjust = 0
+        self._baseline_p95: Optional[float] = None
+        self._slow_start = True
+        self._next_slot = 0.0
+        self._pause_until = 0.0
+        self._cut_guard = 0.0
+        self._started: Optional[float] = None
+        self.completed = 0
+        self.throttled = 0
+
+    @classmethod
+    def from_delay(cls, delay: float, **kwargs) -> 'AdaptiveRateController':
+        """Construir el controlador a partir del delay clásico entre requests."""
+        max_rps = kwargs.pop('max_rps', 500.0)
+        initial = 1.0 / delay if delay > 0 else max_rps
+        return cls(initial_rps=initial, max_rps=max_rps, **kwargs)
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if self._started is None:
+                self._started = now
+            slot = max(now, self._next_slot, self._pause_until)
+            self._next_slot = slot + 1.0 / self.rate
+            return slot - now
+
+    async def acquire(self):
+        """Esperar (sin bloquear el loop) hasta el próximo turno disponible."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, status: int, latency: float, retry_after: Optional[float] = None):
+        """Registrar el resultado de un request y ajustar la tasa si corresponde."""
+        with self._lock:
+            self.completed += 1
+            if status in THROTTLE_STATUSES:
+                self.throttled += 1
+                if retry_after:
+                    self._pause_until = max(self._pause_until, time.monotonic() + retry_after)
+                if self.adaptive and time.monotonic() >= self._cut_guard:
+                    self._cut()
+                return
+
+            self._latencies.append(latency)
+            self._errors.append(status == 0 or status >= 500)
+            self._since_adjust += 1
+            if self.adaptive and self._since_adjust >= max(5, self.window // 4):
+                self._evaluate()
+
+    def _cut(self):
+        self._slow_start = False
+        self.rate = max(self.min_rps, self.rate * self.decrease)
+        self._since_adjust = 0
+        # Un solo recorte por episodio: los errores que lo causaron no deben
+        # volver a contarse en las evaluaciones siguientes.
+        self._errors.clear()
+        # Los 429 de requests ya agendados antes del recorte responden a la
+        # tasa vieja; se ignoran hasta que se drenen esos turnos.
+        self._cut_guard = max(self._next_slot, time.monotonic()) + 2 * percentile(self._latencies, 95)
+
+    def _evaluate(self):
+        self._since_adjust = 0
+        p95 = percentile(self._latencies, 95)
+        # Con pocas muestras un único error aislado dispararía un recorte.
+        error_rate = sum(self._errors) / len(self._errors) if len(self._errors) >= self.window // 2 else 0.0
+        if self._baseline_p95 is None:
+            self._baseline_p95 = p95
+
+        # Se exige además un margen absoluto para no reaccionar al ruido de
+        # latencias de pocos milisegundos.
+        degraded = (p95 > self._baseline_p95 * self.latency_tolerance
+                    and p95 - self._baseline_p95 > self.latency_slack)
+        if error_rate > self.max_error_rate or degraded:
+            self._cut()
+            return
+
+        # La línea base sigue lentamente a la latencia sana para tolerar deriva.
+        self._baseline_p95 = 0.9 * self._baseline_p95 + 0.1 * p95
+        if self._slow_start:
+            self.rate = min(self.max_rps, self.rate * 2)
+        else:
+            self.rate = min(self.max_rps, self.rate + self.increase)
+
+    @property
+    def achieved_rps(self) -> float:
+        if self._started is None:
+            return 0.0
+        elapsed = time.monotonic() - self._started
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> dict:
+        return {
+            'requests': self.completed,
+            'achieved_rps': round(self.achieved_rps, 2),
+            'current_rps': round(self.rate, 2),
+            'throttled': self.throttled,
+            'p95_latency': round(percentile(self._latencies, 95), 4),
+        }
@@ -0,0 +1,136 @@
+"""Modelo declarativo de recursos de la API.
+
+Un ``ResourceSpec`` describe cómo listar y leer un recurso: rutas, la clave
+del listado y la que envuelve al objeto (``{"orders": [...]}`` y
+``{"order": {...}}``), el campo de ID, el campo del dueño y los campos
+sensibles que se muestran en los reportes. Los recursos conocidos vienen en
+``DEFAULT_SPECS``; otros se declaran en un JSON::
+
+    {"resources": [
+        {"name": "invoices", "owner_field": "customerId",
+         "sensitive_fields": ["total", "taxId", "billingAddress"]}
+    ]}
+
+Un nombre sin spec usa las convenciones ``/api/<name>`` y ``userId``.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional, Tuple
+
+# Etiquetas de los campos más comunes en los reportes; el resto se muestra tal cual.
+FIELD_LABELS = {
+    'product': 'Producto',
+    'amount': 'Monto',
+    'creditCard': 'Tarjeta',
+    'address': 'Dirección',
+    'phone': 'Teléfono',
+    'email': 'Email',
+    'name': 'Nombre',
+    'total': 'Total',
+    'taxId': 'RUC',
+    'billingAddress': 'Dirección de facturación',
+}
+
+
+def field_label(name: str) -> str:
+    return FIELD_LABELS.get(name, name)
+
+
+@dataclass(frozen=True)
+class ResourceSpec:
+    """Cómo se lista, se lee y se atribuye a un dueño un recurso."""
+
+    name: str
+    list_path: str = ''
+    item_path: str = ''
+    list_key: str = ''
+    item_key: str = ''
+    id_field: str = 'id'
+    owner_field: str = 'userId'
+    sensitive_fields: Tuple[str, ...] = field(default_factory=tuple)
+    # Nombre del objeto en los mensajes ("lectura de <noun> de otro usuario").
+    noun: str = ''
+
+    def __post_init__(self):
+        name = self.name.strip('/')
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'list_path', self.list_path or f"/api/{name}")
+        object.__setattr__(self, 'item_path', (self.item_path or f"/api/{name}").rstrip('/'))
+        object.__setattr__(self, 'list_key', self.list_key or name)
+        object.__setattr__(self, 'item_key', self.item_key or (name[:-1] if name.endswith('s') else name))
+        object.__setattr__(self, 'sensitive_fields', tuple(self.sensitive_fields))
+        object.__setattr__(self, 'noun', self.noun or self.item_key)
+
+    @classmethod
+    def from_mapping(cls, data: dict) -> 'ResourceSpec':
+        known = {spec_field.name for spec_field in fields(cls)}
+        unknown = set(data) - known
+        if unknown or not data.get('name'):
+            raise ValueError(f"Spec de recurso inválida ({', '.join(sorted(unknown)) or 'falta name'})")
+        return cls(**data)
+
+    def list_url(self, base: str) -> str:
+        return f"{base}{self.list_path}"
+
+    def item_url(self, base: str, object_id: int) -> str:
+        return f"{base}{self.item_path}/{object_id}"
+
+    def extract(self, body) -> dict:
+        """Objeto devuelto por la API (``{"<item_key>": {...}}`` o el cuerpo mismo)."""
+        if not isinstance(body, dict):
+            return {}
+        return body[self.item_key] if isinstance(body.get(self.item_key), dict) else body
+
+    def owner(self, item: dict):
+        return item.get(self.owner_field) if isinstance(item, dict) else None
+
+    def ids_in_list(self, body) -> List[int]:
+        items = body.get(self.list_key) if isinstance(body, dict) else None
+        if not isinstance(items, list):
+            return []
+        return [item.get(self.id_field) for item in items
+                if isinstance(item, dict) and isinstance(item.get(self.id_field), int)]
+
+    def exposed(self, item: dict) -> Dict[str, object]:
+        """Campos sensibles presentes en ``item``, en el orden de la spec."""
+        return {name: item[name] for name in self.sensitive_fields if name in item}
+
+
+DEFAULT_SPECS = {
+    'orders': ResourceSpec('orders', sensitive_fields=('product', 'amount', 'creditCard', 'address', 'phone'),
+                           noun='orden'),
+    # Un perfil es del usuario que describe: su propio ``id`` es el dueño.
+    'users': ResourceSpec('users', owner_field='id', sensitive_fields=('email', 'name', 'phone', 'address'),
+                          noun='perfil'),
+    'invoices': ResourceSpec('invoices', sensitive_fields=('total', 'taxId', 'billingAddress'), noun='factura'),
+}
+
+
+def load_specs(path: str) -> Dict[str, ResourceSpec]:
+    """Leer specs de un JSON (lista u objeto con ``resources``)."""
+    with open(path, encoding='utf-8') as handler:
+        data = json.load(handler)
+    entries = data.get('resources', []) if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: se esperaba una lista de recursos")
+    specs = [ResourceSpec.from_mapping(entry) for entry in entries]
+    return {spec.name: spec for spec in specs}
+
+
+def resolve_specs(names, path: Optional[str] = None) -> List[ResourceSpec]:
+    """Specs para ``names`` (lista o texto separado por comas).
+
+    Se buscan en el archivo ``path``, luego en ``DEFAULT_SPECS``; un nombre
+    desconocido usa las convenciones. Sin nombres se usan todos los del archivo.
+    """
+    declared = load_specs(path) if path else {}
+    if isinstance(names, str):
+        names = [name.strip().strip('/') for name in names.split(',') if name.strip()]
+    names = list(names or declared or ['orders'])
+    specs = []
+    for name in dict.fromkeys(names):
+        specs.append(declared.get(name) or DEFAULT_SPECS.get(name) or ResourceSpec(name))
+    return specs
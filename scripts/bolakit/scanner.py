@@ -0,0 +1,1072 @@
+"""BOLA Scanner - port en Python de ``kali/bola_scanner.sh``.
+
+Mismas opciones, archivo ``.bola-scanner.env``, regla de corte por
+``MISS_THRESHOLD`` y clasificación VULNERABLE/OWNED/PROTECTED/NOT_FOUND/ERROR,
+pero con un único pool HTTP keep-alive y cada respuesta JSON parseada una sola
+vez en proceso. Uso (desde ``scripts/``)::
+
+    python -m bolakit.scanner -t http://localhost:3000 -e alice@example.com
+
+Con ``--methods GET,PUT,PATCH,DELETE`` cada ID se lee con GET y, sobre la
+misma identidad y el mismo pool, se prueban los métodos de escritura con un
+cuerpo reversible (ver ``engine.reversible_payload``); DELETE exige
+``--allow-delete``.
+
+Con ``--cache-file`` los GET se revalidan con ``ETag``/``Last-Modified`` contra
+una caché en disco (ver ``bolakit.cache``) y ``--changed-only`` reporta sólo
+los IDs cuyo resultado de autorización cambió respecto de la corrida anterior.
+
+Con ``--baseline <jsonl>`` (o ``--baseline latest``) el escaneo es incremental:
+primero IDs nuevos, los que antes fueron VULNERABLE/ERROR y una muestra del
+resto; sólo si la muestra muestra deriva se escala al rango completo (ver
+``bolakit.baseline``).
+
+Con ``-r orders,users,invoices`` se escanean varios recursos a la vez: cada uno
+con su rango, su corte por 404 y sus archivos de resultados, compartiendo la
+sesión, las identidades, el control de tasa y la caché (ver
+``ResourceScheduler``). Rutas, claves, campo de ID y campo del dueño salen de
+las specs de ``bolakit.resources`` o de un JSON con ``--resources-file``.
+
+La consola no frena el escaneo: el bucle sólo suma contadores y encola los
+hallazgos, y un hilo de ``bolakit.progress`` los muestra junto a una línea de
+estado con IDs/s, ETA y cuentas por resultado. ``--quiet`` deja sólo los
+hallazgos y ``--json`` los emite como JSON en stdout (el resto va a stderr).
+
+Con ``--http2`` los probes se multiplexan sobre una conexión HTTP/2 por
+origen (ver ``engine.make_async_client``), así ``--concurrency`` puede subir a
+cientos sin abrir cientos de conexiones TLS; si el target no negocia HTTP/2 se
+sigue con HTTP/1.1. El resumen indica el protocolo de cada respuesta.
+
+Precedencia de configuración: defaults < archivo .env < variables de entorno < CLI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Dict, Optional
+
+import httpx
+from colorama import Fore, Style, init
+from dotenv import dotenv_values
+
+from .baseline import DEFAULT_SAMPLE_PERCENT, Baseline, latest_results, plan_delta
+from .cache import open_cache
+from .discovery import DEFAULT_BLOCK_SIZE, DEFAULT_SAMPLES, discover_async
+from .engine import (WRITE_METHODS, IdEnumerator, ProbeResult, http2_available, make_async_client, ordered_map,
+                     reversible_payload)
+from .metrics import MetricsExporter, RequestMetrics
+from .outcomes import OutcomeStore
+from .progress import ProgressRenderer, resolve_mode
+from .ratelimit import AdaptiveRateController
+from .resources import DEFAULT_SPECS, ResourceSpec, resolve_specs
+from .sink import ResultSink
+from .state import ScanState
+from .tokens import TokenPool, load_identities
+
+init(autoreset=True)
+
+CONFIG_FILE_DEFAULT = ".bola-scanner.env"
+DEFAULTS = {
+    'BOLA_TARGET': 'http://localhost:3000',
+    'BOLA_EMAIL': '',
+    'BOLA_PASSWORD': '',
+    'BOLA_TOKEN': '',
+    'BOLA_RESOURCE': 'orders',
+    'BOLA_RESOURCES_FILE': '',
+    'BOLA_MAX_ID': '0',
+    'BOLA_SCAN_PADDING': '15',
+    'BOLA_MISS_THRESHOLD': '8',
+    'BOLA_RESULTS_DIR': 'scan-results',
+    'BOLA_SLEEP': '0.08',
+    'BOLA_LOGIN_PATH': '/api/auth/login',
+    'BOLA_LIST_PATH': '',
+    'BOLA_ITEM_PATH': '',
+    'BOLA_METHODS': 'GET',
+    'BOLA_ALLOW_DELETE': '0',
+    'BOLA_ADAPTIVE': '1',
+    'BOLA_MAX_RPS': '200',
+    'BOLA_CONCURRENCY': '8',
+    'BOLA_DISCOVER': '0',
+    'BOLA_BLOCK_SIZE': str(DEFAULT_BLOCK_SIZE),
+    'BOLA_SAMPLES': str(DEFAULT_SAMPLES),
+    'BOLA_COMPRESS': '',
+    'BOLA_STATE_FILE': '',
+    'BOLA_IDENTITIES': '',
+    'BOLA_METRICS_FILE': '',
+    'BOLA_METRICS_PORT': '',
+    'BOLA_CACHE_FILE': '',
+    'BOLA_CACHE_TTL': '0',
+    'BOLA_CACHE_MAX_MB': '256',
+    'BOLA_CHANGED_ONLY': '0',
+    'BOLA_BASELINE': '',
+    'BOLA_BASELINE_SAMPLE': str(DEFAULT_SAMPLE_PERCENT),
+    'BOLA_QUIET': '0',
+    'BOLA_JSON': '0',
+    'BOLA_HTTP2': '0',
+}
+
+# Claves de ``BolaScanner.counts`` por estado clasificado. Los ERROR se
+# reintentan al reanudar, así que no se arrastran del estado previo.
+COUNT_KEYS = {
+    'VULNERABLE': 'vuln',
+    'OWNED': 'own',
+    'PROTECTED': 'protected',
+    'NOT_FOUND': 'notfound',
+}
+TALLY_KEYS = {**COUNT_KEYS, 'ERROR': 'errors'}
+# IDs de la muestra con deriva que se listan antes de escalar.
+DRIFT_SHOWN = 10
+
+
+@dataclass
+class ScannerConfig:
+    target: str
+    email: str
+    password: str
+    token: str
+    resource: str
+    max_id: int
+    scan_padding: int
+    miss_threshold: int
+    results_dir: str
+    sleep: float
+    login_path: str
+    list_path: str
+    item_path: str
+    methods: list
+    adaptive: bool
+    max_rps: float
+    concurrency: int
+    discover: bool = False
+    block_size: int = DEFAULT_BLOCK_SIZE
+    samples: int = DEFAULT_SAMPLES
+    compress: str = ''
+    state_file: str = ''
+    resume: bool = False
+    identities: str = ''
+    metrics_file: str = ''
+    metrics_port: Optional[int] = None
+    insecure: bool = False
+    allow_delete: bool = False
+    cache_file: str = ''
+    cache_ttl: float = 0.0
+    cache_max_mb: float = 256
+    changed_only: bool = False
+    baseline: str = ''
+    baseline_sample: float = DEFAULT_SAMPLE_PERCENT
+    resources_file: str = ''
+    quiet: bool = False
+    json_output: bool = False
+    http2: bool = False
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m bolakit.scanner',
+        description='BOLA Scanner - Broken Object Level Authorization Detector',
+    )
+    parser.add_argument('-t', '--target', help='Base URL (http://localhost:3000 para vulnerable, 3001 segura)')
+    parser.add_argument('-e', '--email', help='Email para login (por defecto alice@example.com)')
+    parser.add_argument('-p', '--password', help='Password para login')
+    parser.add_argument('-k', '--token', help='Token JWT existente (omite login)')
+    parser.add_argument('--identities', help='Archivo con email:password (o token:<jwt>) por línea; los requests se reparten entre ellas')
+    parser.add_argument('-r', '--resource', help='Recurso(s) a evaluar: orders, o varios en paralelo (orders,users,invoices)')
+    parser.add_argument('--resources-file', help='JSON con specs de recursos (rutas, claves, campo de ID y de dueño)')
+    parser.add_argument('-m', '--max-id', type=int, help='Límite superior de IDs a escanear (auto si se omite)')
+    parser.add_argument('--methods', help='Métodos a probar: GET,PUT,PATCH,DELETE (default GET; GET siempre se hace primero)')
+    parser.add_argument('--allow-delete', action='store_true', help='Permitir DELETE (borra los objetos que la API no proteja)')
+    parser.add_argument('--login-path', help='Ruta de login (default /api/auth/login)')
+    parser.add_argument('--list-path', help='Ruta para listar recursos propios (default /api/<resource>; sólo con un recurso)')
+    parser.add_argument('--item-path', help='Ruta base para acceder a un ID (default /api/<resource>; sólo con un recurso)')
+    parser.add_argument('--sleep', type=float, help='Delay inicial entre IDs (default 0.08, ajustado dinámicamente)')
+    parser.add_argument('--fixed-sleep', action='store_true', help='Desactivar el control adaptativo de tasa')
+    parser.add_argument('--max-rps', type=float, help='Tasa máxima de requests por segundo (default 200)')
+    parser.add_argument('--concurrency', type=int, help='Requests simultáneos (default 8)')
+    parser.add_argument('--discover', action='store_true', help='Descubrir el ID más alto y escanear sólo bloques densos')
+    parser.add_argument('--block-size', type=int, help='Tamaño de bloque para el muestreo de densidad (default 256)')
+    parser.add_argument('--samples', type=int, help='IDs muestreados por bloque (default 16)')
+    parser.add_argument('--compress', choices=['gzip', 'zstd'], help='Comprimir el JSONL de resultados')
+    parser.add_argument('--state-file', help='Base SQLite con el estado del escaneo (default <results-dir>/scan_state.sqlite)')
+    parser.add_argument('--resume', action='store_true', help='Saltar los IDs ya completados en una corrida anterior')
+    parser.add_argument('--metrics-file', help='Archivo OpenMetrics refrescado durante el escaneo (textfile collector)')
+    parser.add_argument('--metrics-port', type=int, help='Publicar /metrics en este puerto mientras dura el escaneo')
+    parser.add_argument('--cache-file', help='Caché SQLite de respuestas GET con revalidación ETag/Last-Modified')
+    parser.add_argument('--cache-ttl', type=float, help='Segundos en que una respuesta cacheada se usa sin revalidar (default 0)')
+    parser.add_argument('--cache-max-mb', type=float, help='Tamaño máximo de la caché; desaloja las menos usadas (default 256)')
+    parser.add_argument('--changed-only', action='store_true', help='Reportar sólo resultados que cambiaron desde la corrida anterior')
+    parser.add_argument('--baseline', help="JSONL de una corrida anterior ('latest' = el más reciente): escaneo incremental")
+    parser.add_argument('--baseline-sample', type=float, help='Porcentaje del resto de IDs a muestrear contra el baseline (default 5)')
+    parser.add_argument('--quiet', action='store_true', help='Sin línea de progreso: sólo hallazgos y avisos')
+    parser.add_argument('--json', action='store_true', help='Hallazgos como JSON por línea en stdout (el resto a stderr), para CI')
+    parser.add_argument('--http2', action='store_true', help='Multiplexar los probes sobre HTTP/2 (requiere h2; cae a HTTP/1.1)')
+    parser.add_argument('--insecure', action='store_true', help='Deshabilitar verificación TLS (para labs)')
+    parser.add_argument('-c', '--config', default=CONFIG_FILE_DEFAULT, help='Archivo .env opcional (default .bola-scanner.env)')
+    return parser
+
+
+def load_config(argv=None) -> ScannerConfig:
+    args = build_parser().parse_args(argv)
+
+    values = dict(DEFAULTS)
+    if os.path.isfile(args.config):
+        values.update({k: v for k, v in dotenv_values(args.config).items() if v is not None})
+    values.update({k: v for k, v in os.environ.items() if k in DEFAULTS})
+
+    cli = {
+        'BOLA_TARGET': args.target,
+        'BOLA_EMAIL': args.email,
+        'BOLA_PASSWORD': args.password,
+        'BOLA_TOKEN': args.token,
+        'BOLA_RESOURCE': args.resource,
+        'BOLA_RESOURCES_FILE': args.resources_file,
+        'BOLA_MAX_ID': args.max_id,
+        'BOLA_METHODS': args.methods,
+        'BOLA_LOGIN_PATH': args.login_path,
+        'BOLA_LIST_PATH': args.list_path,
+        'BOLA_ITEM_PATH': args.item_path,
+        'BOLA_SLEEP': args.sleep,
+        'BOLA_MAX_RPS': args.max_rps,
+        'BOLA_CONCURRENCY': args.concurrency,
+        'BOLA_BLOCK_SIZE': args.block_size,
+        'BOLA_SAMPLES': args.samples,
+        'BOLA_COMPRESS': args.compress,
+        'BOLA_STATE_FILE': args.state_file,
+        'BOLA_IDENTITIES': args.identities,
+        'BOLA_METRICS_FILE': args.metrics_file,
+        'BOLA_METRICS_PORT': args.metrics_port,
+        'BOLA_CACHE_FILE': args.cache_file,
+        'BOLA_CACHE_TTL': args.cache_ttl,
+        'BOLA_CACHE_MAX_MB': args.cache_max_mb,
+        'BOLA_BASELINE': args.baseline,
+        'BOLA_BASELINE_SAMPLE': args.baseline_sample,
+    }
+    values.update({k: str(v) for k, v in cli.items() if v is not None})
+    if args.fixed_sleep:
+        values['BOLA_ADAPTIVE'] = '0'
+    if args.discover:
+        values['BOLA_DISCOVER'] = '1'
+    if args.allow_delete:
+        values['BOLA_ALLOW_DELETE'] = '1'
+    if args.changed_only:
+        values['BOLA_CHANGED_ONLY'] = '1'
+    if args.quiet:
+        values['BOLA_QUIET'] = '1'
+    if args.json:
+        values['BOLA_JSON'] = '1'
+    if args.http2:
+        values['BOLA_HTTP2'] = '1'
+    changed_only = values['BOLA_CHANGED_ONLY'] not in ('0', 'false', 'no', '')
+    if changed_only and not values['BOLA_CACHE_FILE']:
+        # Los resultados anteriores viven en la caché; sin ruta se usa una por defecto.
+        values['BOLA_CACHE_FILE'] = os.path.join(values['BOLA_RESULTS_DIR'], 'response_cache.sqlite')
+
+    resource = ','.join(name.strip().strip('/') for name in values['BOLA_RESOURCE'].split(',') if name.strip())
+    return ScannerConfig(
+        target=values['BOLA_TARGET'].rstrip('/'),
+        email=values['BOLA_EMAIL'],
+        password=values['BOLA_PASSWORD'],
+        token=values['BOLA_TOKEN'],
+        resource=resource,
+        max_id=int(values['BOLA_MAX_ID'] or 0),
+        scan_padding=int(values['BOLA_SCAN_PADDING']),
+        miss_threshold=int(values['BOLA_MISS_THRESHOLD']),
+        results_dir=values['BOLA_RESULTS_DIR'],
+        sleep=float(values['BOLA_SLEEP']),
+        login_path=values['BOLA_LOGIN_PATH'],
+        list_path=values['BOLA_LIST_PATH'],
+        item_path=values['BOLA_ITEM_PATH'],
+        methods=[m.strip().upper() for m in values['BOLA_METHODS'].split(',') if m.strip()],
+        adaptive=values['BOLA_ADAPTIVE'] not in ('0', 'false', 'no'),
+        max_rps=float(values['BOLA_MAX_RPS']),
+        concurrency=max(1, int(values['BOLA_CONCURRENCY'])),
+        discover=values['BOLA_DISCOVER'] not in ('0', 'false', 'no', ''),
+        block_size=int(values['BOLA_BLOCK_SIZE']),
+        samples=int(values['BOLA_SAMPLES']),
+        compress=values['BOLA_COMPRESS'],
+        state_file=values['BOLA_STATE_FILE'] or os.path.join(values['BOLA_RESULTS_DIR'], 'scan_state.sqlite'),
+        resume=args.resume,
+        identities=values['BOLA_IDENTITIES'],
+        metrics_file=values['BOLA_METRICS_FILE'],
+        metrics_port=int(values['BOLA_METRICS_PORT']) if values['BOLA_METRICS_PORT'] else None,
+        insecure=args.insecure,
+        allow_delete=values['BOLA_ALLOW_DELETE'] not in ('0', 'false', 'no', ''),
+        cache_file=values['BOLA_CACHE_FILE'],
+        cache_ttl=float(values['BOLA_CACHE_TTL']),
+        cache_max_mb=float(values['BOLA_CACHE_MAX_MB']),
+        changed_only=changed_only,
+        baseline=values['BOLA_BASELINE'],
+        baseline_sample=float(values['BOLA_BASELINE_SAMPLE']),
+        resources_file=values['BOLA_RESOURCES_FILE'],
+        quiet=values['BOLA_QUIET'] not in ('0', 'false', 'no', ''),
+        json_output=values['BOLA_JSON'] not in ('0', 'false', 'no', ''),
+        http2=values['BOLA_HTTP2'] not in ('0', 'false', 'no', ''),
+    )
+
+
+def resource_specs(config: ScannerConfig) -> list:
+    """Specs de los recursos pedidos; ``--list-path``/``--item-path`` aplican con uno solo."""
+    specs = resolve_specs(config.resource, config.resources_file or None)
+    if len(specs) == 1:
+        paths = {'list_path': config.list_path, 'item_path': config.item_path}
+        specs[0] = replace(specs[0], **{key: path for key, path in paths.items() if path})
+    elif config.list_path or config.item_path:
+        print(f"{Fore.YELLOW}[~] Con varios recursos se ignoran --list-path/--item-path; declara las rutas en --resources-file.")
+    return specs
+
+
+def print_banner():
+    print(f"""{Fore.RED}
+╔═══════════════════════════════════════════════════════════╗
+║           BOLA SCANNER - Automated Testing                ║
+║        Broken Object Level Authorization Detector         ║
+╚═══════════════════════════════════════════════════════════╝{Style.RESET_ALL}""")
+
+
+def resource_object(body, spec: Optional[ResourceSpec] = None) -> dict:
+    """Objeto devuelto por la API (``{"order": {...}}`` o el cuerpo mismo)."""
+    return (spec or DEFAULT_SPECS['orders']).extract(body)
+
+
+def resource_owner(body, spec: Optional[ResourceSpec] = None):
+    """Dueño del objeto según la spec (``userId`` de órdenes por defecto)."""
+    spec = spec or DEFAULT_SPECS['orders']
+    owner = spec.owner(resource_object(body, spec))
+    return owner if owner is not None or not isinstance(body, dict) else body.get('userId')
+
+
+def classify(result: ProbeResult, own_user_id=None, spec: Optional[ResourceSpec] = None):
+    """Traducir un probe a (estado, mensaje, meta), igual que ``scan_id_get``.
+
+    Si se conoce el ``userId`` del atacante, un 2xx sobre un objeto de otro
+    dueño también cuenta como VULNERABLE aunque la API no lo anote.
+    """
+    body = result.data if isinstance(result.data, dict) else {}
+    code = result.status
+
+    if 200 <= code < 300:
+        should_block = body.get('should_block', body.get('shouldBlock', False))
+        blocked = body.get('blocked', False)
+        enforcement = body.get('enforcement')
+        note = body.get('security_note') or ''
+        owner = resource_owner(body, spec)
+        foreign = own_user_id is not None and owner is not None and owner != own_user_id
+        if (should_block is True and blocked is False) or enforcement == 'not_blocked' or 'VULNERABLE' in note or foreign:
+            return 'VULNERABLE', f'HTTP {code} sin bloqueo', body
+        return 'OWNED', f'HTTP {code} propietario', {
+            'userId': owner,
+            'attacker': body.get('attacker'),
+        }
+    if code == 403:
+        return 'PROTECTED', 'HTTP 403', body
+    if code == 401:
+        return 'ERROR', '401 unauthorized', body
+    if code == 404:
+        return 'NOT_FOUND', 'HTTP 404', body
+    if code == 0:
+        return 'ERROR', 'Sin respuesta', body
+    return 'ERROR', f'HTTP {code}', body
+
+
+def classify_write(method: str, result: ProbeResult, read_status: str, owner, own_user_id=None,
+                   spec: Optional[ResourceSpec] = None):
+    """Clasificar un probe de escritura usando también lo que devolvió el GET.
+
+    Un 2xx es VULNERABLE si el GET ya mostró que el objeto es ajeno (leído sin
+    bloqueo o bloqueado con 403), aunque la respuesta de la escritura no traiga
+    el dueño. 405/501 indican que el endpoint no implementa el método.
+    """
+    if result.status in (405, 501):
+        return 'UNSUPPORTED', f'{method}: HTTP {result.status}', None
+    status, message, meta = classify(result, own_user_id, spec)
+    foreign = read_status in ('VULNERABLE', 'PROTECTED') or (
+        own_user_id is not None and owner is not None and owner != own_user_id
+    )
+    if status == 'OWNED' and foreign:
+        return 'VULNERABLE', f'{method}: HTTP {result.status} sobre objeto ajeno', result.data
+    return status, f'{method}: {message}', meta
+
+
+class BolaScanner:
+    """Escaneo de un rango de IDs (resultados en orden) con corte por 404 consecutivos."""
+
+    def __init__(self, config: ScannerConfig, spec: Optional[ResourceSpec] = None):
+        self.config = config
+        self.spec = spec or resource_specs(config)[0]
+        # Con varios recursos en paralelo: prefijo en la salida, sufijo en los
+        # archivos y un semáforo compartido que acota los requests en vuelo.
+        self.multi = False
+        self.slots: Optional[asyncio.Semaphore] = None
+        self.known_max_id = 0
+        self.scan_limit = 0
+        self.user_id = None
+        self.plan = None
+        # Lecturas hechas durante --discover: el escaneo las reutiliza en lugar
+        # de volver a pedir esos IDs.
+        self.discovered: Dict[int, ProbeResult] = {}
+        self.delta = None
+        # Conteos arrastrados de una corrida reanudada; los de esta corrida
+        # salen de ``outcomes``.
+        self.counts: Counter = Counter()
+        self.outcomes = OutcomeStore()
+        self.write_counts: Counter = Counter()
+        self.write_methods: list = []
+        self.rate = AdaptiveRateController.from_delay(
+            config.sleep, max_rps=config.max_rps, adaptive=config.adaptive,
+        )
+        self.results_file = ''
+        self.results_json = ''
+        self.results_outcomes = ''
+        self._log = None
+        self.sink = None
+        self.state = None
+        self.tokens = None
+        self.cache = None
+        self.unchanged = 0
+        self.metrics = RequestMetrics()
+        self.progress = ProgressRenderer(resolve_mode(config.quiet, config.json_output))
+        # Lo que dejó ``summarize``, para el resumen combinado de varios recursos.
+        self.evaluated = 0
+        self.totals: Optional[Counter] = None
+
+    def _headers(self) -> dict:
+        headers = {"Content-Type": "application/json"}
+        if self.tokens is not None:
+            return self.tokens.headers(self.tokens.primary, headers)
+        headers["Authorization"] = f"Bearer {self.config.token}"
+        return headers
+
+    def _rate_factory(self):
+        return AdaptiveRateController.from_delay(
+            self.config.sleep, max_rps=self.config.max_rps, adaptive=self.config.adaptive,
+        )
+
+    async def login_if_needed(self, client: httpx.AsyncClient) -> bool:
+        """Autenticar todas las identidades; con más de una, cada cual lleva su propia tasa."""
+        try:
+            identities = load_identities(
+                self.config.identities or None, self.config.email, self.config.password, self.config.token,
+            )
+        except OSError as exc:
+            print(f"{Fore.RED}[!] No se pudo leer el archivo de identidades: {exc}", file=sys.stderr)
+            return False
+        self.tokens = TokenPool(
+            identities,
+            f"{self.config.target}{self.config.login_path}",
+            rate_factory=self._rate_factory if len(identities) > 1 else None,
+        )
+        try:
+            failed = await self.tokens.login_all(client)
+        except RuntimeError:
+            print(f"{Fore.RED}[!] Login falló para todas las identidades ({len(identities)}).", file=sys.stderr)
+            return False
+        for identity in failed:
+            print(f"{Fore.YELLOW}[~] Login falló para {identity.label}; se excluye del pool.")
+        self.config.token = self.tokens.primary.token
+        self.user_id = self.tokens.primary.user_id
+        return True
+
+    async def discover_scan_limit(self, client: httpx.AsyncClient):
+        if self.config.max_id > 0:
+            self.scan_limit = self.known_max_id = self.config.max_id
+            return
+
+        code = 0
+        try:
+            response = await client.get(self.spec.list_url(self.config.target), headers=self._headers())
+            code = response.status_code
+        except httpx.HTTPError:
+            response = None
+
+        if code == 200:
+            try:
+                ids = self.spec.ids_in_list(response.json())
+            except ValueError:
+                ids = []
+            self.known_max_id = max(ids, default=0)
+        else:
+            print(f"{Fore.YELLOW}[~] {self.prefix}No se pudo obtener listado propio ({code:03d}). "
+                  f"Se usará padding {self.config.scan_padding}.")
+            self.known_max_id = 0
+            ids = []
+
+        if self.config.discover:
+            await self.discover_id_space(client, ids)
+            return
+        self.scan_limit = self.known_max_id + self.config.scan_padding
+
+    def load_baseline(self) -> bool:
+        """Planificar el escaneo incremental contra el baseline pedido."""
+        path = self.config.baseline
+        if path == 'latest':
+            path = latest_results(self.config.results_dir, self.spec.name if self.multi else None)
+            if path is None:
+                print(f"{Fore.YELLOW}[~] {self.prefix}No hay resultados previos en {self.config.results_dir}; "
+                      "se hace un escaneo completo.")
+                return True
+        elif self.multi:
+            print(f"{Fore.RED}[!] Con varios recursos --baseline sólo admite 'latest' (uno por recurso).", file=sys.stderr)
+            return False
+        try:
+            baseline = Baseline.load(path)
+        except (OSError, RuntimeError, ValueError) as exc:
+            print(f"{Fore.RED}[!] No se pudo leer el baseline {path}: {exc}", file=sys.stderr)
+            return False
+        if self.plan is not None:
+            print(f"{Fore.YELLOW}[~] Con --baseline se ignora el plan de --discover.")
+            self.plan = None
+        high_water = baseline.high_water
+        self.known_max_id = max(self.known_max_id, high_water)
+        if self.config.max_id <= 0:
+            # Los IDs nuevos aparecen por encima del high-water mark anterior.
+            self.scan_limit = max(self.scan_limit, high_water + self.config.scan_padding)
+        self.delta = plan_delta(baseline, self.scan_limit, self.config.baseline_sample)
+        print(f"{Fore.BLUE}[*] {self.prefix}Baseline {path}: {len(baseline)} IDs, high-water mark {high_water} | "
+              f"{self.delta.describe()}")
+        return True
+
+    @property
+    def prefix(self) -> str:
+        return f"[{self.spec.name}] " if self.multi else ''
+
+    def _item_url(self, object_id: int) -> str:
+        return self.spec.item_url(self.config.target, object_id)
+
+    def _enumerator(self, client: httpx.AsyncClient) -> IdEnumerator:
+        return IdEnumerator(
+            client,
+            self._item_url,
+            headers=self._headers(),
+            concurrency=self.config.concurrency,
+            rate=self.rate,
+            tokens=self.tokens,
+        )
+
+    async def discover_id_space(self, client: httpx.AsyncClient, own_ids):
+        """Acotar el ID más alto y planificar sólo los bloques densos."""
+        enumerator = self._enumerator(client)
+
+        async def probe_many(ids):
+            statuses = {}
+            async for result in enumerator.stream(ids):
+                statuses[result.id] = result.status
+                if result.status not in (0, 401):
+                    self.discovered[result.id] = result
+            return statuses
+
+        print(f"{Fore.BLUE}[*] {self.prefix}Descubriendo espacio de IDs (galloping + muestreo de densidad)...")
+        self.plan = await discover_async(
+            probe_many,
+            hint=self.known_max_id,
+            known_ids=own_ids,
+            block_size=self.config.block_size,
+            samples=self.config.samples,
+        )
+        # Nada por encima del primer ID confirmado muerto; hasta ahí se escanea
+        # sin cortar por 404 consecutivos (el ID vivo más alto es sólo el visto).
+        self.known_max_id = self.scan_limit = self.plan.limit
+        reused = sum(1 for object_id in self.discovered if object_id <= self.plan.limit)
+        print(f"{Fore.BLUE}[*] {self.prefix}ID vivo más alto visto: {self.plan.highest_id}, límite {self.plan.limit} | "
+              f"{len(self.plan.ranges)} tramos densos, {self.plan.planned} IDs planificados "
+              f"({self.plan.probes} probes de descubrimiento, {reused} se reutilizan)")
+
+    def prepare_output(self):
+        os.makedirs(self.config.results_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if self.multi:
+            timestamp = f"{timestamp}_{self.spec.name}"
+        self.results_file = os.path.join(self.config.results_dir, f"bola_scan_{timestamp}.log")
+        suffix = {'gzip': '.gz', 'zstd': '.zst'}.get(self.config.compress, '')
+        self.results_json = os.path.join(self.config.results_dir, f"bola_scan_{timestamp}.jsonl{suffix}")
+        self.results_outcomes = os.path.join(self.config.results_dir, f"bola_scan_{timestamp}.outcomes")
+        self._log = open(self.results_file, 'w', encoding='utf-8')
+        self.sink = ResultSink(self.results_json)
+        self._log.write(
+            f"BOLA Scan Results - {datetime.now():%c}\n"
+            f"Target: {self.config.target}\n"
+            f"Resource: {self.spec.name} ({self.spec.item_path})\n"
+            f"Methods: {','.join(self.config.methods)}\n"
+            "==================================\n"
+        )
+
+    def open_state(self):
+        self.state = ScanState(
+            self.config.state_file, self.config.target, self.spec.name, self.tokens.label,
+            resume=self.config.resume,
+        )
+
+    def publish(self, result: ProbeResult, status: str, message: str, meta, method: str = 'GET'):
+        """Guardar un resultado y mostrarlo si es un hallazgo; con ``--changed-only``
+        sólo si cambió, y entonces todo cambio es un hallazgo."""
+        previous = None
+        if self.cache is not None:
+            identity = result.identity or self.tokens.primary
+            previous = self.cache.swap_outcome(identity.label, method, self._item_url(result.id), status)
+            if self.config.changed_only and previous == status:
+                self.unchanged += 1
+                return
+        record = self.append_result(status, result.id, message, meta, method, previous)
+        if status == 'VULNERABLE' or self.config.changed_only:
+            self.report(record, previous)
+
+    def append_result(self, status: str, object_id: int, message: str, payload, method: str = 'GET',
+                      previous: Optional[str] = None) -> dict:
+        self._log.write(f"{datetime.now():%H:%M:%S} | {status:<11} | ID {object_id} | {message}\n")
+        if payload:
+            self._log.write(f"    {json.dumps(payload, ensure_ascii=False)}\n")
+        record = {
+            'timestamp': time.time(),
+            'status': status,
+            'id': object_id,
+            'method': method,
+            'message': message,
+            'meta': payload,
+        }
+        if self.config.changed_only:
+            record['previous'] = previous
+        self.sink.write(record)
+        return record
+
+    def report(self, record: dict, previous: Optional[str] = None):
+        """Pasar un hallazgo al renderer (texto para la consola, registro para ``--json``)."""
+        object_id, status, method = record['id'], record['status'], record['method']
+        text = self.describe(object_id, status, record['message'], method)
+        if self.config.changed_only:
+            text += f"\n    {Fore.BLUE}↳ antes: {previous or 'sin registro'}"
+        self.progress.finding(text, {'event': 'finding', 'resource': self.spec.name, **record})
+
+    def describe(self, object_id: int, status: str, message: str, method: str = 'GET') -> str:
+        label, noun = f"{self.prefix}ID {object_id}", self.spec.noun
+        if method != 'GET':
+            return self.describe_write(label, method, status, message)
+        if status == 'VULNERABLE':
+            return f"{Fore.RED}[🚨] {label}: VULNERABLE (lectura de {noun} de otro usuario)"
+        if status == 'OWNED':
+            return f"{Fore.GREEN}[✓] {label}: Acceso autorizado ({noun} del propio usuario)"
+        if status == 'PROTECTED':
+            return f"{Fore.GREEN}[✓] {label}: Bloqueado correctamente (403)"
+        if status == 'NOT_FOUND':
+            return f"{Fore.YELLOW}[~] {label}: No encontrado (404)"
+        if message == 'Sin respuesta':
+            return f"{Fore.YELLOW}[?] {label}: Error de red (sin respuesta)"
+        return f"{Fore.YELLOW}[?] {label}: Error {message}"
+
+    def describe_write(self, label: str, method: str, status: str, message: str) -> str:
+        noun = self.spec.noun
+        if status == 'VULNERABLE':
+            return f"{Fore.RED}[🚨] {label}: {method} VULNERABLE (escritura sobre {noun} de otro usuario)"
+        if status == 'OWNED':
+            return f"{Fore.GREEN}[✓] {label}: {method} autorizado ({noun} del propio usuario)"
+        if status == 'PROTECTED':
+            return f"{Fore.GREEN}[✓] {label}: {method} bloqueado correctamente (403)"
+        if status == 'UNSUPPORTED':
+            return f"{Fore.YELLOW}[~] {label}: {method} no implementado por la API"
+        return f"{Fore.YELLOW}[?] {label}: Error {message}"
+
+    def select_methods(self) -> list:
+        """Métodos de escritura a probar tras el GET de cada ID, validados."""
+        selected = []
+        for method in self.config.methods:
+            if method == 'GET' or method in selected:
+                continue
+            if method not in WRITE_METHODS:
+                print(f"{Fore.YELLOW}[~] Método {method} no soportado. Se ignora.")
+            elif method == 'DELETE' and not self.config.allow_delete:
+                print(f"{Fore.YELLOW}[~] DELETE borra los objetos que la API no proteja; se omite sin --allow-delete.")
+            else:
+                selected.append(method)
+        # DELETE al final, para que PUT/PATCH encuentren el objeto.
+        selected.sort(key=lambda method: method == 'DELETE')
+        if selected and 'GET' not in self.config.methods:
+            print(f"{Fore.BLUE}[*] Se hace GET igual: da el payload reversible y el corte por 404.")
+        return selected
+
+    async def probe_id(self, enumerator: IdEnumerator, object_id: int):
+        """GET y luego cada método de escritura sobre el ID, con la misma identidad."""
+        if self.slots is None:
+            return await self._probe_id(enumerator, object_id)
+        async with self.slots:
+            return await self._probe_id(enumerator, object_id)
+
+    async def _probe_id(self, enumerator: IdEnumerator, object_id: int):
+        read = self.discovered.pop(object_id, None)
+        if read is not None:
+            identity = read.identity
+        else:
+            identity = self.tokens.acquire() if self.tokens is not None else None
+            read = await enumerator.paced_probe(object_id, identity=identity)
+        writes = []
+        if read.status in (0, 401, 404) or not self.write_methods:
+            return read, writes
+        original = resource_object(read.data, self.spec) if 200 <= read.status < 300 else None
+        own_user_id = identity.user_id if identity is not None else self.user_id
+        # Borrar un objeto propio no dice nada sobre autorización y sí pierde datos.
+        own = classify(read, own_user_id, self.spec)[0] == 'OWNED'
+        for method in self.write_methods:
+            if method == 'DELETE' and own:
+                continue
+            payload = reversible_payload(method, original)
+            writes.append((method, await enumerator.paced_probe(object_id, method, payload, identity)))
+        return read, writes
+
+    def record_writes(self, read: ProbeResult, read_status: str, own_user_id, writes) -> bool:
+        """Registrar las escrituras de un ID; False si alguna quedó en 401."""
+        owner = resource_owner(read.data, self.spec)
+        for method, result in writes:
+            status, message, meta = classify_write(method, result, read_status, owner, own_user_id, self.spec)
+            self.publish(result, status, message, meta, method)
+            self.write_counts[(method, status)] += 1
+            if result.status == 401:
+                return False
+        return True
+
+    async def run_scan(self, client: httpx.AsyncClient) -> int:
+        self.write_methods = self.select_methods()
+        enumerator = self._enumerator(client)
+        if self.delta is not None:
+            ids = self.delta.first_pass()
+            total = len(ids)
+        elif self.plan:
+            ids, total = self.plan.iter_ids(), self.plan.planned
+        else:
+            ids = range(1, self.scan_limit + 1)
+            total = len(ids)
+        if self.config.resume:
+            previous = self.state.counts()
+            for status, key in COUNT_KEYS.items():
+                self.counts[key] += previous[status]
+            done = sum(previous[status] for status in COUNT_KEYS)
+            total = max(0, total - done)
+            print(f"{Fore.BLUE}[*] {self.prefix}Reanudando escaneo: {done} IDs ya completados se omiten ({self.config.state_file})")
+        self.progress.start(total)
+        try:
+            last_id = await self.scan_passes(enumerator, ids)
+        finally:
+            self.progress.stop()
+        if last_id is None:
+            return 1
+        if self.delta is not None:
+            return self.summarize(self.delta.probed)
+        return self.summarize(last_id or self.scan_limit)
+
+    async def scan_passes(self, enumerator: IdEnumerator, ids) -> Optional[int]:
+        """Primera pasada y, si la muestra del baseline derivó, el resto de los IDs."""
+        last_id = await self.scan_ids(enumerator, ids)
+        if last_id is None or self.delta is None or not self.delta.drift:
+            return last_id
+        for object_id, before, after in self.delta.drift[:DRIFT_SHOWN]:
+            print(f"{Fore.YELLOW}[Δ] {self.prefix}ID {object_id} de la muestra: {before} → {after}")
+        print(f"{Fore.YELLOW}[*] {self.prefix}La muestra derivó ({len(self.delta.drift)} IDs); "
+              f"se escanean los {len(self.delta.rest)} IDs restantes.")
+        self.progress.add_total(len(self.delta.rest))
+        rest_last = await self.scan_ids(enumerator, self.delta.rest)
+        if rest_last is None:
+            return None
+        return max(last_id, rest_last)
+
+    async def scan_ids(self, enumerator: IdEnumerator, ids) -> Optional[int]:
+        """Probar ``ids`` (ascendentes) en orden; None si hay que abortar por 401.
+
+        Devuelve el último ID evaluado y corta tras ``miss_threshold`` 404
+        consecutivos por encima del máximo conocido.
+        """
+        consecutive_404 = 0
+        last_id = 0
+        if self.config.resume:
+            ids = self.state.pending(ids)
+        stream = ordered_map(lambda object_id: self.probe_id(enumerator, object_id), ids, self.config.concurrency)
+        try:
+            async for result, writes in stream:
+                last_id = result.id
+                own_user_id = result.identity.user_id if result.identity is not None else self.user_id
+                status, message, meta = classify(result, own_user_id, self.spec)
+                self.progress.count(status)
+                self.publish(result, status, message, meta)
+                authorized = self.record_writes(result, status, own_user_id, writes)
+                self.state.record(result.id, status, result.status)
+                body = resource_object(result.data, self.spec)
+                self.outcomes.record(result.id, status, self.spec.owner(body), result.elapsed,
+                                     body if status == 'VULNERABLE' else None)
+                if self.delta is not None:
+                    self.delta.observe(result.id, status)
+
+                if result.status == 401 or not authorized:
+                    print(f"{Fore.RED}[!] {self.prefix}Token inválido o expirado (401) y no se pudo renovar. Abortando.")
+                    return None
+                if status != 'NOT_FOUND':
+                    consecutive_404 = 0
+                    continue
+                consecutive_404 += 1
+                if result.id > self.known_max_id and consecutive_404 >= self.config.miss_threshold:
+                    print(f"{Fore.BLUE}[*] {self.prefix}Se alcanzó el umbral de {self.config.miss_threshold} 404 consecutivos. Fin del escaneo.")
+                    break
+        finally:
+            await stream.aclose()
+        return last_id
+
+    def rate_label(self) -> str:
+        stats = self.tokens.rate_summary() if self.tokens is not None else None
+        stats = stats or self.rate.summary()
+        return f"{stats['achieved_rps']:.2f} req/s (tasa final {stats['current_rps']:.2f} req/s)"
+
+    def summarize(self, total: int) -> int:
+        counts = self.counts + Counter({key: self.outcomes.tally(status) for status, key in TALLY_KEYS.items()})
+        self.evaluated, self.totals = total, counts
+        rate_label = self.rate_label()
+        self._log.write(
+            "\n==================================\n"
+            "RESUMEN:\n"
+            f"Total evaluado: {total}\n"
+            f"Vulnerables:    {counts['vuln']}\n"
+            f"Protegidos:     {counts['protected']}\n"
+            f"Propios:        {counts['own']}\n"
+            f"No encontrados: {counts['notfound']}\n"
+            f"Errores:        {counts['errors']}\n"
+            f"Tasa lograda:   {rate_label}\n"
+        )
+        write_lines = self.write_summary()
+        if write_lines:
+            self._log.write("Escrituras:\n" + "\n".join(write_lines) + "\n")
+        cache_line = self.cache.describe() if self.cache is not None else ''
+        if cache_line:
+            self._log.write(f"Caché:          {cache_line}\n")
+        if self.config.changed_only:
+            self._log.write(f"Sin cambios:    {self.unchanged} (omitidos del reporte)\n")
+        delta_line = self.delta_summary()
+        if delta_line:
+            self._log.write(f"Baseline:       {delta_line}\n")
+        breakdown = self.metrics.breakdown()
+        if breakdown:
+            self._log.write("Latencias por fase:\n" + "\n".join(breakdown) + "\n")
+
+        title = f"RESUMEN DEL ESCANEO: {self.spec.name}" if self.multi else "RESUMEN DEL ESCANEO"
+        print("")
+        print(f"{Fore.BLUE}═══════════════════════════════════════════════════════════")
+        print(f"{Fore.BLUE}{title:^59}".rstrip())
+        print(f"{Fore.BLUE}═══════════════════════════════════════════════════════════")
+        print(f"Total evaluado:  {Fore.BLUE}{total}")
+        print(f"🚨 Vulnerables:   {Fore.RED}{counts['vuln']}")
+        print(f"✅ Protegidos:    {Fore.GREEN}{counts['protected']}")
+        print(f"👤 Propios:       {Fore.GREEN}{counts['own']}")
+        print(f"⚠️  No encontrados: {Fore.YELLOW}{counts['notfound']}")
+        print(f"❌ Errores:       {Fore.YELLOW}{counts['errors']}")
+        for line in write_lines:
+            print(f"✏️  {line}")
+        if self.config.changed_only:
+            print(f"🔁 Sin cambios:   {Fore.BLUE}{self.unchanged} (omitidos del reporte)")
+        if delta_line:
+            print(f"📉 Baseline:      {Fore.BLUE}{delta_line}")
+        # Tasa, caché, tokens y latencias son de la sesión: con varios recursos
+        # los muestra una sola vez ``ResourceScheduler``.
+        if not self.multi:
+            self.print_session_summary()
+        print(f"Resultados guardados en: {self.results_file} (texto), {self.results_json} (JSONL) "
+              f"y {self.results_outcomes} (compacto)")
+        write_vulns = sum(count for (_, status), count in self.write_counts.items() if status == 'VULNERABLE')
+        return 1 if counts['vuln'] > 0 or write_vulns > 0 else 0
+
+    def print_session_summary(self):
+        print(f"⏱️  Tasa lograda:  {Fore.BLUE}{self.rate_label()}")
+        cache_line = self.cache.describe() if self.cache is not None else ''
+        if cache_line:
+            print(f"💾 Caché:         {Fore.BLUE}{cache_line}")
+        if self.tokens is not None and self.tokens.refreshes:
+            print(f"🔑 Tokens renovados tras 401: {Fore.BLUE}{self.tokens.refreshes}")
+        breakdown = self.metrics.breakdown()
+        if breakdown:
+            print(f"{Fore.BLUE}Latencias por fase:")
+            for line in breakdown:
+                print(f"    {line}")
+
+    def delta_summary(self) -> str:
+        if self.delta is None:
+            return ''
+        probed, total = self.delta.probed, self.delta.total
+        outcome = f"deriva en {len(self.delta.drift)} → escaneo completo" if self.delta.drift else "sin deriva"
+        return f"{probed} de {total} IDs probados ({probed / max(1, total):.1%}), {outcome}"
+
+    def write_summary(self) -> list:
+        lines = []
+        for method in self.write_methods:
+            counts = {status: self.write_counts[(method, status)] for status in
+                      ('VULNERABLE', 'PROTECTED', 'OWNED', 'NOT_FOUND', 'UNSUPPORTED', 'ERROR')}
+            lines.append(
+                f"{method:<6} vulnerables {counts['VULNERABLE']}, protegidos {counts['PROTECTED']}, "
+                f"propios {counts['OWNED']}, no encontrados {counts['NOT_FOUND']}, "
+                f"no soportado {counts['UNSUPPORTED']}, errores {counts['ERROR']}"
+            )
+        return lines
+
+    def close(self):
+        if self.results_outcomes:
+            self.outcomes.save(self.results_outcomes)
+        self.outcomes.close()
+        if self.delta is not None:
+            self.delta.baseline.close()
+        if self._log is not None:
+            self._log.close()
+        if self.sink is not None:
+            self.sink.close()
+        if self.state is not None:
+            self.state.close()
+
+    async def run(self) -> int:
+        print_banner()
+        exporter = MetricsExporter(self.metrics, path=self.config.metrics_file or None, port=self.config.metrics_port)
+        with exporter:
+            if exporter.url:
+                print(f"{Fore.BLUE}[*] Métricas OpenMetrics en {exporter.url}")
+            return await self._run()
+
+    async def _run(self) -> int:
+        self.cache = open_cache(self.config.cache_file, self.config.cache_ttl, self.config.cache_max_mb)
+        try:
+            async with make_async_client(
+                self.config.concurrency, verify=not self.config.insecure, metrics=self.metrics, cache=self.cache,
+                http2=self.config.http2,
+            ) as client:
+                if not await self.start_session(client):
+                    return 1
+                return await self.scan_resource(client)
+        finally:
+            if self.cache is not None:
+                self.cache.close()
+
+    async def start_session(self, client: httpx.AsyncClient) -> bool:
+        if not await self.login_if_needed(client):
+            return False
+        if self.cache is not None:
+            self.cache.identify(self.tokens)
+        return True
+
+    def print_session(self):
+        print(f"{Fore.BLUE}[*] Target: {self.config.target}")
+        if len(self.tokens) > 1:
+            print(f"{Fore.BLUE}[*] Identidades: {len(self.tokens)} (requests repartidos en round-robin)")
+        elif self.config.email:
+            print(f"{Fore.BLUE}[*] Usuario: {self.config.email}")
+        print(f"{Fore.BLUE}[*] Token: {self.config.token[:20]}...")
+        if self.config.http2 and not http2_available():
+            print(f"{Fore.YELLOW}[~] HTTP/2 requiere 'pip install h2'; se usa HTTP/1.1.")
+        elif self.config.http2:
+            print(f"{Fore.BLUE}[*] HTTP/2: {self.config.concurrency} probes multiplexados por conexión (HTTP/1.1 si el target no lo negocia)")
+
+    async def scan_resource(self, client: httpx.AsyncClient) -> int:
+        """Acotar el rango, abrir resultados y estado, y escanear este recurso."""
+        try:
+            await self.discover_scan_limit(client)
+            if self.config.baseline and not self.load_baseline():
+                return 1
+            self.prepare_output()
+            if self.state is None:
+                self.open_state()
+            if not self.multi:
+                self.print_session()
+            print(f"{Fore.BLUE}[*] {self.prefix}Recurso: {self.spec.item_path} | Rango dinámico hasta ID {self.scan_limit}")
+            if not self.multi:
+                print(f"{Fore.YELLOW}[*] Escaneo iniciado...")
+            return await self.run_scan(client)
+        finally:
+            self.close()
+
+
+class ResourceScheduler:
+    """Escaneo concurrente de varios recursos sobre una sola sesión.
+
+    Cada recurso tiene su ``BolaScanner`` (rango, corte por 404, baseline,
+    resultados y estado propios), pero todos comparten el pool HTTP, las
+    identidades, el control de tasa, la caché y las métricas. ``concurrency``
+    y ``max_rps`` son el presupuesto total: un semáforo común reparte los
+    requests en vuelo entre los recursos y el que termina antes libera su
+    parte para los demás.
+    """
+
+    def __init__(self, config: ScannerConfig, specs):
+        self.config = config
+        self.scanners = [BolaScanner(config, spec) for spec in specs]
+        self.lead = self.scanners[0]
+        self.progress = self.lead.progress
+        for scanner in self.scanners:
+            scanner.multi = True
+            scanner.rate, scanner.metrics = self.lead.rate, self.lead.metrics
+            # Una sola línea de estado: se apaga cuando termina el último recurso.
+            scanner.progress = self.progress
+
+    async def run(self) -> int:
+        print_banner()
+        exporter = MetricsExporter(self.lead.metrics, path=self.config.metrics_file or None,
+                                   port=self.config.metrics_port)
+        with exporter:
+            if exporter.url:
+                print(f"{Fore.BLUE}[*] Métricas OpenMetrics en {exporter.url}")
+            return await self._run()
+
+    async def _run(self) -> int:
+        lead = self.lead
+        lead.cache = open_cache(self.config.cache_file, self.config.cache_ttl, self.config.cache_max_mb)
+        try:
+            async with make_async_client(
+                self.config.concurrency, verify=not self.config.insecure, metrics=lead.metrics, cache=lead.cache,
+                http2=self.config.http2,
+            ) as client:
+                if not await lead.start_session(client):
+                    return 1
+                slots = asyncio.Semaphore(self.config.concurrency)
+                lead.open_state()
+                for scanner in self.scanners:
+                    scanner.slots = slots
+                    if scanner is not lead:
+                        scanner.tokens, scanner.user_id, scanner.cache = lead.tokens, lead.user_id, lead.cache
+                        scanner.state = lead.state.sibling(scanner.spec.name, self.config.resume)
+                lead.print_session()
+                print(f"{Fore.BLUE}[*] Recursos: {', '.join(s.spec.name for s in self.scanners)} en paralelo "
+                      f"({self.config.concurrency} requests simultáneos en total)")
+                print(f"{Fore.YELLOW}[*] Escaneo iniciado...")
+                codes = await asyncio.gather(*(scanner.scan_resource(client) for scanner in self.scanners))
+                self.summarize()
+                return max(codes)
+        finally:
+            if lead.cache is not None:
+                lead.cache.close()
+
+    def summarize(self):
+        finished = [scanner for scanner in self.scanners if scanner.totals is not None]
+        print("")
+        print(f"{Fore.BLUE}═══════════════════════════════════════════════════════════")
+        print(f"{Fore.BLUE}                  RESUMEN POR RECURSO")
+        print(f"{Fore.BLUE}═══════════════════════════════════════════════════════════")
+        print(f"{'Recurso':<14}{'Evaluados':>10}{'Vulnerables':>13}{'Protegidos':>12}{'Propios':>9}{'404':>7}{'Errores':>9}")
+        for scanner in finished:
+            counts = scanner.totals
+            color = Fore.RED if counts['vuln'] else Fore.GREEN
+            print(f"{color}{scanner.spec.name:<14}{scanner.evaluated:>10}{counts['vuln']:>13}{counts['protected']:>12}"
+                  f"{counts['own']:>9}{counts['notfound']:>7}{counts['errors']:>9}")
+        for scanner in self.scanners:
+            if scanner.totals is None:
+                print(f"{Fore.YELLOW}{scanner.spec.name:<14}sin resumen (escaneo abortado)")
+        self.lead.print_session_summary()
+
+
+def main(argv=None) -> int:
+    config = load_config(argv)
+    try:
+        specs = resource_specs(config)
+    except (OSError, ValueError) as exc:
+        print(f"{Fore.RED}[!] No se pudieron leer las specs de recursos: {exc}", file=sys.stderr)
+        return 1
+    runner = ResourceScheduler(config, specs) if len(specs) > 1 else BolaScanner(config, specs[0])
+    with runner.progress.redirect():
+        code = asyncio.run(runner.run())
+    runner.progress.finish()
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Búsqueda concurrente de los primeros N objetos ajenos.
+
+Lanza probes especulativos con el motor de enumeración y cancela los que
+siguen en vuelo en cuanto se reúnen suficientes hallazgos. Todo objeto leído
+queda en un ``OwnerIndex`` compartido por la corrida, de modo que los tests
+siguientes reutilizan lo descubierto en vez de volver a recorrer IDs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from typing import Callable, Iterable, List, Optional
+
+from .engine import DEFAULT_CONCURRENCY, IdEnumerator, make_async_client
+from .metrics import RequestMetrics
+
+
+class OwnerIndex:
+    """Objetos descubiertos agrupados por dueño, más los IDs ya consultados."""
+
+    def __init__(self, owner_field: str = 'userId'):
+        self.owner_field = owner_field
+        self.by_owner = defaultdict(dict)
+        self.probed = set()
+
+    def __len__(self) -> int:
+        return sum(len(objects) for objects in self.by_owner.values())
+
+    def add(self, obj: dict):
+        object_id = obj.get('id')
+        if object_id is None:
+            return
+        self.probed.add(object_id)
+        self.by_owner[obj.get(self.owner_field)][object_id] = obj
+
+    def owned_by(self, owner) -> List[dict]:
+        return list(self.by_owner.get(owner, {}).values())
+
+    def foreign(self, own_owner, exclude: Iterable[int] = ()) -> List[dict]:
+        """Objetos cuyo dueño conocido no es ``own_owner``, ordenados por ID."""
+        exclude = set(exclude)
+        found = [
+            obj
+            for owner, objects in self.by_owner.items()
+            if owner is not None and owner != own_owner
+            for object_id, obj in objects.items()
+            if object_id not in exclude
+        ]
+        return sorted(found, key=lambda obj: obj.get('id'))
+
+
+async def find_foreign(client, url_for: Callable[[int], str], headers: dict, own_owner,
+                       ids: Iterable[int], want: int, index: OwnerIndex,
+                       skip: Optional[set] = None, concurrency: int = DEFAULT_CONCURRENCY,
+                       item_key: str = 'order', rate=None) -> List[dict]:
+    """Devolver hasta ``want`` objetos ajenos (en orden de ID) y cancelar el resto."""
+    enumerator = IdEnumerator(client, url_for, headers=headers, concurrency=concurrency, rate=rate)
+    hits: List[dict] = []
+    stream = enumerator.stream(ids, skip=(skip or set()) | index.probed)
+    try:
+        async for result in stream:
+            if result.skipped:
+                continue
+            index.probed.add(result.id)
+            if result.status != 200 or not isinstance(result.data, dict):
+                continue
+            obj = result.data.get(item_key)
+            if not isinstance(obj, dict):
+                continue
+            index.add(obj)
+            owner = obj.get(index.owner_field)
+            if owner is not None and owner != own_owner:
+                hits.append(obj)
+                if len(hits) >= want:
+                    break
+    finally:
+        await stream.aclose()
+    return hits
+
+
+def find_foreign_sync(base_url: str, token: str, own_owner, ids: Iterable[int], want: int,
+                      index: OwnerIndex, skip: Optional[set] = None,
+                      concurrency: int = DEFAULT_CONCURRENCY, timeout: float = 10,
+                      resource: str = 'orders', item_key: str = 'order',
+                      metrics: Optional[RequestMetrics] = None, verify: bool = True,
+                      http2: bool = False) -> List[dict]:
+    """Atajo síncrono para scripts: abre su propio pool y ejecuta ``find_foreign``."""
+    base_url = base_url.rstrip('/')
+
+    async def run():
+        async with make_async_client(concurrency, timeout=timeout, verify=verify, metrics=metrics,
+                                     http2=http2) as client:
+            return await find_foreign(
+                client,
+                lambda object_id: f"{base_url}/api/{resource}/{object_id}",
+                {"Authorization": f"Bearer {token}"},
+                own_owner,
+                ids,
+                want,
+                index,
+                skip=skip,
+                concurrency=concurrency,
+                item_key=item_key,
+            )
+
+    return asyncio.run(run())
@@ -0,0 +1,276 @@
+"""Escaneo distribuido en shards sobre un pool de procesos.
+
+El coordinador divide el rango de IDs en shards, los ejecuta en un
+``ProcessPoolExecutor`` (cada uno con su propio cliente HTTP, token e
+identidad) y fusiona los JSONL parciales en un único resultado ordenado por ID
+y sin duplicados. Cada shard guarda un checkpoint para poder reanudar; el
+reparto queda en ``plan.json`` junto a ellos y ``--resume`` lo reutiliza (y
+rechaza un ``--start``/``--end`` distinto)::
+
+    python -m bolakit.shard -t http://localhost:3000 --end 2000000 --workers 8 \\
+        --identities identities.txt --resume
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from colorama import Fore, init
+
+from .engine import IdEnumerator, make_async_client
+from .ratelimit import AdaptiveRateController
+from .scanner import classify
+from .sink import ResultSink, iter_records
+from .tokens import Identity, TokenPool, load_identities
+
+init(autoreset=True)
+
+CHECKPOINT_EVERY = 500
+PLAN_FILE = 'plan.json'
+
+
+@dataclass
+class Shard:
+    index: int
+    start: int
+    end: int
+    target: str
+    item_path: str
+    login_path: str
+    email: str = ''
+    password: str = ''
+    token: str = ''
+    concurrency: int = 8
+    max_rps: float = 200.0
+    out_dir: str = 'scan-results/shards'
+    http2: bool = False
+
+    @property
+    def out_path(self) -> str:
+        return os.path.join(self.out_dir, f"shard_{self.index:04d}.jsonl")
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.out_dir, f"shard_{self.index:04d}.ckpt")
+
+
+def split_range(start: int, end: int, shards: int):
+    """Dividir ``[start, end]`` en hasta ``shards`` tramos contiguos."""
+    total = end - start + 1
+    shards = max(1, min(shards, total))
+    size, extra = divmod(total, shards)
+    lower = start
+    for index in range(shards):
+        upper = lower + size - 1 + (1 if index < extra else 0)
+        yield lower, upper
+        lower = upper + 1
+
+
+def write_plan(out_dir: str, shards):
+    """Guardar el reparto de shards junto a sus checkpoints (sin credenciales)."""
+    with open(os.path.join(out_dir, PLAN_FILE), 'w', encoding='utf-8') as handler:
+        json.dump([{k: v for k, v in asdict(shard).items() if k not in ('password', 'token')} for shard in shards],
+                  handler, indent=2)
+
+
+def read_plan(out_dir: str) -> Optional[list]:
+    """Tramos ``(start, end)`` del plan guardado, en orden de shard; None si no hay."""
+    try:
+        with open(os.path.join(out_dir, PLAN_FILE), encoding='utf-8') as handler:
+            plan = json.load(handler)
+    except (OSError, ValueError):
+        return None
+    if not plan:
+        return None
+    return [(entry['start'], entry['end']) for entry in sorted(plan, key=lambda entry: entry['index'])]
+
+
+def read_checkpoint(shard: Shard) -> Optional[dict]:
+    try:
+        with open(shard.checkpoint_path, encoding='utf-8') as handler:
+            return json.load(handler)
+    except (OSError, ValueError):
+        return None
+
+
+def write_checkpoint(shard: Shard, next_id: int, offset: int, done: bool, counts: Counter):
+    state = {
+        'start': shard.start,
+        'end': shard.end,
+        'next_id': next_id,
+        'offset': offset,
+        'done': done,
+        'counts': dict(counts),
+    }
+    tmp_path = f"{shard.checkpoint_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as handler:
+        json.dump(state, handler)
+    os.replace(tmp_path, shard.checkpoint_path)
+
+
+async def _scan_shard(shard: Shard, resume: bool) -> dict:
+    state = read_checkpoint(shard) if resume else None
+    if state and (state.get('start'), state.get('end')) != (shard.start, shard.end):
+        raise RuntimeError(f"el checkpoint {shard.checkpoint_path} es del rango {state.get('start')}-{state.get('end')}, "
+                           f"no de {shard.start}-{shard.end}")
+    if state and state.get('done'):
+        return {'index': shard.index, 'counts': state.get('counts', {}), 'skipped': True}
+
+    next_id = state['next_id'] if state else shard.start
+    counts = Counter(state.get('counts', {})) if state else Counter()
+    if state:
+        # Descartar lo escrito después del último checkpoint para que el
+        # archivo siga ordenado por ID al reanudar.
+        with open(shard.out_path, 'a', encoding='utf-8') as out:
+            out.truncate(state.get('offset', 0))
+    rate = AdaptiveRateController(initial_rps=min(20.0, shard.max_rps), max_rps=shard.max_rps)
+
+    async with make_async_client(shard.concurrency, http2=shard.http2) as client:
+        tokens = TokenPool([Identity(shard.email, shard.password, shard.token)], f"{shard.target}{shard.login_path}")
+        await tokens.login_all(client)
+        enumerator = IdEnumerator(
+            client,
+            lambda object_id: f"{shard.target}{shard.item_path}/{object_id}",
+            concurrency=shard.concurrency,
+            rate=rate,
+            tokens=tokens,
+        )
+        with open(shard.out_path, 'a' if state else 'w', encoding='utf-8') as out:
+            since_checkpoint = 0
+            async for result in enumerator.stream(range(next_id, shard.end + 1)):
+                status, message, meta = classify(result, tokens.primary.user_id)
+                counts[status] += 1
+                out.write(json.dumps({
+                    'timestamp': time.time(),
+                    'status': status,
+                    'id': result.id,
+                    'message': message,
+                    'meta': meta,
+                    'identity': shard.email or 'token',
+                }, ensure_ascii=False) + "\n")
+                since_checkpoint += 1
+                if since_checkpoint >= CHECKPOINT_EVERY:
+                    out.flush()
+                    write_checkpoint(shard, result.id + 1, out.tell(), False, counts)
+                    since_checkpoint = 0
+            write_checkpoint(shard, shard.end + 1, out.tell(), True, counts)
+    return {
+        'index': shard.index,
+        'counts': dict(counts),
+        'skipped': False,
+        'rate': rate.summary(),
+        'refreshes': tokens.refreshes,
+    }
+
+
+def run_shard(shard: Shard, resume: bool = False) -> dict:
+    """Punto de entrada de cada proceso del pool."""
+    return asyncio.run(_scan_shard(shard, resume))
+
+
+def merge_shards(paths, merged_path: str) -> int:
+    """Fusionar JSONL ordenados por ID en uno solo, descartando IDs repetidos."""
+    last_id = None
+    streams = [iter_records(path) for path in paths]
+    with ResultSink(merged_path) as out:
+        for record in heapq.merge(*streams, key=lambda record: record.get('id', 0)):
+            if record.get('id') == last_id:
+                continue
+            last_id = record.get('id')
+            out.write(record)
+    return out.total
+
+
+def coordinate(shards, workers: int, resume: bool, merged_path: str) -> Counter:
+    totals: Counter = Counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_shard, shard, resume): shard for shard in shards}
+        for future in as_completed(futures):
+            shard = futures[future]
+            try:
+                summary = future.result()
+            except Exception as exc:
+                print(f"{Fore.RED}[✗] Shard {shard.index} ({shard.start}-{shard.end}) falló: {exc}. Reanudable con --resume")
+                continue
+            totals.update(summary['counts'])
+            label = 'ya completado' if summary['skipped'] else f"{summary['rate']['achieved_rps']} req/s"
+            if summary.get('refreshes'):
+                label += f", {summary['refreshes']} tokens renovados"
+            print(f"{Fore.GREEN}[✓] Shard {shard.index} ({shard.start}-{shard.end}) listo - {label}")
+
+    written = merge_shards([shard.out_path for shard in shards], merged_path)
+    print(f"{Fore.CYAN}[*] {written} resultados fusionados en {merged_path}")
+    return totals
+
+
+def main(argv=None) -> int:
+    env = os.environ
+    parser = argparse.ArgumentParser(prog='python -m bolakit.shard', description='Escaneo BOLA distribuido en shards')
+    parser.add_argument('-t', '--target', default=env.get('BOLA_TARGET', 'http://localhost:3000'), help='Base URL de la API')
+    parser.add_argument('-r', '--resource', default=env.get('BOLA_RESOURCE', 'orders'), help='Recurso a evaluar')
+    parser.add_argument('--item-path', default=env.get('BOLA_ITEM_PATH'), help='Ruta base por ID (default /api/<resource>)')
+    parser.add_argument('--login-path', default=env.get('BOLA_LOGIN_PATH', '/api/auth/login'), help='Ruta de login')
+    parser.add_argument('-e', '--email', default=env.get('BOLA_EMAIL', ''), help='Email si no se usa --identities')
+    parser.add_argument('-p', '--password', default=env.get('BOLA_PASSWORD', ''), help='Password si no se usa --identities')
+    parser.add_argument('-k', '--token', default=env.get('BOLA_TOKEN', ''), help='Token JWT existente')
+    parser.add_argument('--identities', default=env.get('BOLA_IDENTITIES'), help='Archivo con email:password por línea (se reparten entre shards)')
+    parser.add_argument('--start', type=int, default=1, help='Primer ID del rango')
+    parser.add_argument('--end', type=int, required=True, help='Último ID del rango')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Procesos simultáneos (default: núcleos)')
+    parser.add_argument('--shards', type=int, help='Cantidad de shards (default 4 por worker)')
+    parser.add_argument('--concurrency', type=int, default=int(env.get('BOLA_CONCURRENCY', 8)), help='Requests en vuelo por shard')
+    parser.add_argument('--max-rps', type=float, default=float(env.get('BOLA_MAX_RPS', 200)), help='Tasa máxima por shard')
+    parser.add_argument('--http2', action='store_true', default=env.get('BOLA_HTTP2', '0') not in ('0', 'false', 'no', ''), help='Multiplexar los probes de cada shard sobre HTTP/2 (requiere h2)')
+    parser.add_argument('--out-dir', default=os.path.join(env.get('BOLA_RESULTS_DIR', 'scan-results'), 'shards'), help='Carpeta de JSONL y checkpoints')
+    parser.add_argument('--resume', action='store_true', help='Reanudar desde los checkpoints existentes')
+    args = parser.parse_args(argv)
+
+    resource = args.resource.strip('/')
+    identities = load_identities(args.identities, args.email, args.password, args.token)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    ranges = list(split_range(args.start, args.end, args.shards or args.workers * 4))
+    plan = read_plan(args.out_dir) if args.resume else None
+    if plan:
+        # Los índices de shard sólo significan algo con el reparto original
+        # (--shards por defecto depende de los núcleos de cada máquina).
+        if (plan[0][0], plan[-1][1]) != (args.start, args.end):
+            parser.error(f"el plan guardado en {args.out_dir} cubre {plan[0][0]}-{plan[-1][1]}; "
+                         f"--resume necesita el mismo --start/--end (o otro --out-dir)")
+        if len(plan) != len(ranges):
+            print(f"{Fore.YELLOW}[~] Se reanuda con los {len(plan)} shards del plan guardado.")
+        ranges = plan
+
+    shards = []
+    for index, (lower, upper) in enumerate(ranges):
+        identity = identities[index % len(identities)]
+        shards.append(Shard(
+            index=index, start=lower, end=upper, target=args.target.rstrip('/'),
+            item_path=args.item_path or f"/api/{resource}", login_path=args.login_path,
+            email=identity.email, password=identity.password, token=identity.token, concurrency=args.concurrency,
+            max_rps=args.max_rps, out_dir=args.out_dir, http2=args.http2,
+        ))
+    write_plan(args.out_dir, shards)
+
+    print(f"{Fore.BLUE}[*] {len(shards)} shards ({args.start}-{args.end}) en {args.workers} procesos, {len(identities)} identidades")
+    started = time.monotonic()
+    totals = coordinate(shards, args.workers, args.resume, os.path.join(args.out_dir, 'merged.jsonl'))
+    elapsed = time.monotonic() - started
+
+    print(f"{Fore.BLUE}[*] Resumen: " + ", ".join(f"{status}={count}" for status, count in sorted(totals.items())))
+    print(f"{Fore.BLUE}[*] {sum(totals.values())} IDs en {elapsed:.1f}s")
+    return 1 if totals.get('VULNERABLE') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
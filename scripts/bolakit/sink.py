@@ -0,0 +1,145 @@
+"""Sink de resultados JSONL en streaming con memoria acotada.
+
+Los registros se serializan al llegar y se acumulan en un buffer de tamaño
+fijo que se vuelca en lote; cada ``fsync_interval`` segundos se fuerza un
+``fsync`` como checkpoint. Ante una caída se pierde como mucho un buffer.
+Soporta compresión gzip (stdlib) o zstd (requiere ``zstandard``) según la
+extensión del archivo o el parámetro ``compression``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import os
+import time
+from collections import Counter
+from typing import Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # dependencia opcional
+    zstandard = None
+
+DEFAULT_BUFFER_RECORDS = 500
+DEFAULT_FSYNC_INTERVAL = 5.0
+
+
+def detect_compression(path: str) -> Optional[str]:
+    if path.endswith('.gz'):
+        return 'gzip'
+    if path.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise RuntimeError("La compresión zstd requiere 'pip install zstandard'")
+
+
+class ResultSink:
+    """Escritor JSONL con buffer, compresión opcional y contadores en vivo."""
+
+    def __init__(self, path: str, compression: Optional[str] = None, append: bool = False,
+                 buffer_records: int = DEFAULT_BUFFER_RECORDS,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL, count_by: str = 'status'):
+        self.path = path
+        self.compression = compression or detect_compression(path)
+        self.buffer_records = max(1, buffer_records)
+        self.fsync_interval = fsync_interval
+        self.count_by = count_by
+        self.counts: Counter = Counter()
+        self.total = 0
+        self._buffer = []
+        self._last_sync = time.monotonic()
+        if append:
+            # Al continuar un archivo existente los contadores incluyen lo ya escrito.
+            for record in iter_records(path):
+                self._count(record)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._raw = open(path, 'ab' if append else 'wb')
+        if self.compression == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='ab' if append else 'wb')
+        elif self.compression == 'zstd':
+            _require_zstd()
+            self._stream = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        elif self.compression is None:
+            self._stream = self._raw
+        else:
+            raise ValueError(f"Compresión no soportada: {self.compression}")
+
+    def __enter__(self) -> 'ResultSink':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, record: dict):
+        self._buffer.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        self._count(record)
+        if len(self._buffer) >= self.buffer_records:
+            self.flush()
+
+    def _count(self, record: dict):
+        self.total += 1
+        key = record.get(self.count_by)
+        if key is not None:
+            self.counts[key] += 1
+
+    def flush(self, sync: bool = False):
+        """Volcar el buffer; hace ``fsync`` si se pide o si venció el intervalo."""
+        if self._buffer:
+            self._stream.write(("\n".join(self._buffer) + "\n").encode('utf-8'))
+            self._buffer.clear()
+        if self.compression == 'gzip':
+            self._stream.flush()
+        elif self.compression == 'zstd':
+            self._stream.flush(zstandard.FLUSH_BLOCK)
+        self._raw.flush()
+        if sync or time.monotonic() - self._last_sync >= self.fsync_interval:
+            os.fsync(self._raw.fileno())
+            self._last_sync = time.monotonic()
+
+    def summary(self) -> dict:
+        return {'path': self.path, 'total': self.total, 'counts': dict(self.counts)}
+
+    def close(self):
+        if self._raw.closed:
+            return
+        self.flush(sync=True)
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+
+
+def open_results(path: str):
+    """Abrir un JSONL (plano, .gz o .zst) en modo texto para lectura."""
+    compression = detect_compression(path)
+    if compression == 'gzip':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if compression == 'zstd':
+        _require_zstd()
+        raw = open(path, 'rb')
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True), encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def iter_records(path: str) -> Iterator[dict]:
+    """Recorrer un JSONL registro a registro, ignorando líneas truncadas."""
+    try:
+        with open_results(path) as handler:
+            for line in handler:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    except (FileNotFoundError, EOFError):
+        return
@@ -0,0 +1,164 @@
+"""Estado de escaneo reanudable en SQLite.
+
+Cada escaneo se identifica por ``(target, recurso, identidad)``; por cada ID
+consultado se guarda el estado clasificado y el código HTTP. Con ``--resume``
+los IDs con resultado definitivo se saltan sin volver a pedirlos; los ERROR
+(401 por token vencido, caídas de red, 5xx) quedan pendientes y se reintentan.
+
+Las escrituras se agrupan en transacciones de ``commit_every`` filas, de modo
+que una caída o un Ctrl-C pierde como mucho un lote. Los escaneos de varios
+recursos en paralelo comparten una conexión con ``sibling``: dos conexiones
+con lotes abiertos en el mismo proceso se bloquearían entre sí.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import time
+from collections import Counter
+from typing import Iterable, Iterator, Optional
+
+DEFAULT_COMMIT_EVERY = 500
+RETRY_STATUSES = ('ERROR',)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    scan_key TEXT PRIMARY KEY,
+    target   TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    identity TEXT NOT NULL,
+    started  REAL NOT NULL,
+    updated  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS probes (
+    scan_key TEXT NOT NULL,
+    id       INTEGER NOT NULL,
+    status   TEXT NOT NULL,
+    code     INTEGER NOT NULL,
+    ts       REAL NOT NULL,
+    PRIMARY KEY (scan_key, id)
+) WITHOUT ROWID;
+"""
+
+
+def identity_label(email: str = '', token: str = '') -> str:
+    """Identificador estable del atacante sin guardar el token en claro."""
+    if email:
+        return email
+    return f"token:{hashlib.sha256(token.encode('utf-8')).hexdigest()[:12]}"
+
+
+class ScanState:
+    """Registro de IDs consultados por escaneo, con commits en lote."""
+
+    def __init__(self, path: str, target: str, resource: str, identity: str,
+                 resume: bool = True, commit_every: int = DEFAULT_COMMIT_EVERY, _shared=None):
+        self.path = path
+        self.target = target
+        self.resource = resource
+        self.identity = identity
+        self.commit_every = max(1, commit_every)
+        self.scan_key = hashlib.sha256(f"{target}|{resource}|{identity}".encode('utf-8')).hexdigest()[:16]
+        self._pending = 0
+
+        if _shared is not None:
+            # (conexión, estados abiertos sobre ella)
+            self._db, self._refs = _shared
+            self._refs[0] += 1
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+            self._refs = [1]
+        if not resume:
+            self._db.execute("DELETE FROM probes WHERE scan_key = ?", (self.scan_key,))
+        now = time.time()
+        self._db.execute(
+            "INSERT INTO scans VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(scan_key) DO UPDATE SET updated = excluded.updated",
+            (self.scan_key, target, resource, identity, now, now),
+        )
+        self._db.commit()
+
+    def sibling(self, resource: str, resume: bool) -> 'ScanState':
+        """Estado de otro recurso del mismo target e identidad sobre esta conexión."""
+        return ScanState(self.path, self.target, resource, self.identity, resume=resume,
+                         commit_every=self.commit_every, _shared=(self._db, self._refs))
+
+    def __enter__(self) -> 'ScanState':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, object_id: int, status: str, code: int):
+        self._db.execute(
+            "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?)",
+            (self.scan_key, object_id, status, code, time.time()),
+        )
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._db.execute("UPDATE scans SET updated = ? WHERE scan_key = ?", (time.time(), self.scan_key))
+            self._db.commit()
+            self._pending = 0
+
+    def pending(self, ids: Iterable[int]) -> Iterator[int]:
+        """Filtrar ``ids`` (ascendentes) quitando los ya completados.
+
+        Recorre en paralelo los IDs pedidos y los completados (ordenados por la
+        clave primaria) con una conexión de lectura aparte, así la memoria no
+        crece con el tamaño del escaneo y las escrituras en curso no interfieren.
+        """
+        self.flush()
+        reader = sqlite3.connect(self.path)
+        try:
+            placeholders = ','.join('?' for _ in RETRY_STATUSES)
+            done = (row[0] for row in reader.execute(
+                f"SELECT id FROM probes WHERE scan_key = ? AND status NOT IN ({placeholders}) ORDER BY id",
+                (self.scan_key, *RETRY_STATUSES),
+            ))
+            next_done = next(done, None)
+            for object_id in ids:
+                while next_done is not None and next_done < object_id:
+                    next_done = next(done, None)
+                if object_id != next_done:
+                    yield object_id
+        finally:
+            reader.close()
+
+    def counts(self) -> Counter:
+        """Estados registrados hasta ahora para este escaneo."""
+        self.flush()
+        rows = self._db.execute(
+            "SELECT status, COUNT(*) FROM probes WHERE scan_key = ? GROUP BY status", (self.scan_key,),
+        )
+        return Counter(dict(rows.fetchall()))
+
+    def completed(self) -> int:
+        counts = self.counts()
+        return sum(count for status, count in counts.items() if status not in RETRY_STATUSES)
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._refs[0] -= 1
+            if self._refs[0] == 0:
+                self._db.close()
+
+
+def open_state(path: Optional[str], target: str, resource: str, identity: str, resume: bool) -> Optional[ScanState]:
+    """Abrir el estado si hay ruta configurada; ``None`` lo desactiva."""
+    if not path:
+        return None
+    return ScanState(path, target, resource, identity, resume=resume)
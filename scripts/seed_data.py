@@ -2,19 +2,49 @@
 """
 Script para poblar la base de datos con datos de prueba
 Útil para resetear los datos después de demostraciones
+
+Sin argumentos crea los 3 usuarios y 6 órdenes de la demo. Con --users se
+generan datos sintéticos deterministas (misma semilla, mismos datos) y se
+cargan en paralelo sobre ambas APIs:
+
+    python seed_data.py --users 10000 --orders-per-user 50 --seed 7
 """
 
-import requests
-import json
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from dataclasses import replace
+
+import httpx
 from colorama import Fore, Style, init
 
+from bolakit import parse_retry_after
+from bolakit.client import LoginError, add_client_arguments, auth_headers, config_from_args, login, make_session
+from bolakit.engine import THROTTLE_RETRIES
+from bolakit.ratelimit import THROTTLE_STATUSES
+
 init(autoreset=True)
 
 VULNERABLE_URL = "http://localhost:3000"
 SECURE_URL = "http://localhost:3001"
 
-def create_users_and_orders(base_url, api_name):
-    """Crear usuarios y órdenes de prueba"""
+SYNTHETIC_PASSWORD = "password123"
+# La carga masiva encola muchos requests por conexión: nunca menos de 30 s por request.
+BULK_TIMEOUT = 30
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Diego", "Elena", "Fabio", "Gina", "Hugo", "Irene", "Jorge"]
+LAST_NAMES = ["Quispe", "Flores", "Rojas", "Vargas", "Torres", "Mendoza", "Castro", "Huamán"]
+PRODUCTS = [
+    ("Laptop Dell XPS 15", 1899.99), ("Mouse Logitech MX Master", 99.99), ("iPhone 15 Pro", 1299.99),
+    ("AirPods Pro", 249.99), ("Samsung Galaxy S24", 999.99), ("PlayStation 5", 499.99),
+    ("Monitor LG UltraWide", 549.99), ("Teclado Keychron K2", 89.99), ("Kindle Paperwhite", 149.99),
+]
+CITIES = ["Lima", "Cusco", "Arequipa", "Trujillo", "Piura", "Ciudad"]
+
+def create_users_and_orders(session, api_name):
+    """Crear usuarios y órdenes de prueba (rutas relativas a la URL base de ``session``)"""
     print(f"\n{Fore.CYAN}{'='*60}")
     print(f"Poblando {api_name}")
     print(f"{'='*60}{Style.RESET_ALL}")
@@ -98,11 +128,7 @@ def create_users_and_orders(base_url, api_name):
         
         try:
             # Intentar registrar
-            response = requests.post(
-                f"{base_url}/api/auth/register",
-                json=user,
-                timeout=5
-            )
+            response = session.post("/api/auth/register", json=user)
             
             if response.status_code == 201:
                 print(f"{Fore.GREEN}[✓] Usuario registrado")
@@ -110,21 +136,11 @@ def create_users_and_orders(base_url, api_name):
                 print(f"{Fore.YELLOW}[!] Usuario ya existe, obteniendo token...")
             
             # Login para obtener token
-            login_response = requests.post(
-                f"{base_url}/api/auth/login",
-                json={
-                    "email": user['email'],
-                    "password": user['password']
-                },
-                timeout=5
-            )
-            
-            if login_response.status_code == 200:
-                token = login_response.json()['token']
-                tokens[user['email']] = token
+            try:
+                tokens[user['email']], _ = login(session, user['email'], user['password'])
                 print(f"{Fore.GREEN}[✓] Token obtenido")
-            else:
-                print(f"{Fore.RED}[✗] Error al obtener token")
+            except LoginError as exc:
+                print(f"{Fore.RED}[✗] Error al obtener token: {exc}")
                 
         except Exception as e:
             print(f"{Fore.RED}[✗] Error: {str(e)}")
@@ -133,16 +149,11 @@ def create_users_and_orders(base_url, api_name):
     for email, token in tokens.items():
         print(f"\n{Fore.YELLOW}[*] Creando órdenes para {email}")
         
-        headers = {"Authorization": f"Bearer {token}"}
+        headers = auth_headers(token)
         
         for order in orders_data[email]:
             try:
-                response = requests.post(
-                    f"{base_url}/api/orders",
-                    json=order,
-                    headers=headers,
-                    timeout=5
-                )
+                response = session.post("/api/orders", json=order, headers=headers)
                 
                 if response.status_code == 201:
                     order_id = response.json().get('orderId')
@@ -157,27 +168,21 @@ def create_users_and_orders(base_url, api_name):
     print(f"Datos poblados exitosamente en {api_name}")
     print(f"{'='*60}{Style.RESET_ALL}")
 
-def verify_data(base_url, api_name):
+def verify_data(session, api_name):
     """Verificar que los datos se crearon correctamente"""
     print(f"\n{Fore.CYAN}{'='*60}")
     print(f"Verificando datos en {api_name}")
     print(f"{'='*60}{Style.RESET_ALL}")
     
     # Login como Alice
-    response = requests.post(
-        f"{base_url}/api/auth/login",
-        json={"email": "alice@example.com", "password": "password123"}
-    )
-    
-    if response.status_code == 200:
-        token = response.json()['token']
-        headers = {"Authorization": f"Bearer {token}"}
-        
+    try:
+        token, _ = login(session, "alice@example.com", "password123")
+    except LoginError:
+        token = None
+
+    if token:
         # Obtener órdenes
-        orders_response = requests.get(
-            f"{base_url}/api/orders",
-            headers=headers
-        )
+        orders_response = session.get("/api/orders", headers=auth_headers(token))
         
         if orders_response.status_code == 200:
             count = orders_response.json()['count']
@@ -187,30 +192,174 @@ def verify_data(base_url, api_name):
     else:
         print(f"{Fore.RED}[✗] Error al autenticar")
 
+def synthetic_user(index, seed, orders_per_user):
+    """Usuario ``index`` y sus órdenes; depende sólo de (seed, index), no del orden de carga."""
+    rng = random.Random(f"{seed}:{index}")
+    card = f"**** **** **** {rng.randint(0, 9999):04d}"
+    address = f"{rng.randint(1, 999)} Calle {rng.choice(LAST_NAMES)}, {rng.choice(CITIES)}"
+    phone = f"+51 9{rng.randint(0, 99):02d} {rng.randint(0, 999):03d} {rng.randint(0, 999):03d}"
+    user = {
+        "email": f"user{index:06d}.s{seed}@example.com",
+        "password": SYNTHETIC_PASSWORD,
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+    }
+    orders = []
+    for _ in range(orders_per_user):
+        product, price = rng.choice(PRODUCTS)
+        orders.append({
+            "product": product,
+            "amount": round(price * rng.uniform(0.8, 1.2), 2),
+            "creditCard": card,
+            "address": address,
+            "phone": phone,
+        })
+    return user, orders
+
+
+async def _post(client, url, payload, headers=None):
+    """POST con reintento ante 429/503 (respeta Retry-After); 0 si falla la red."""
+    for _ in range(THROTTLE_RETRIES + 1):
+        try:
+            response = await client.post(url, json=payload, headers=headers)
+        except httpx.HTTPError:
+            return 0, None
+        if response.status_code not in THROTTLE_STATUSES:
+            return response.status_code, response
+        await asyncio.sleep(parse_retry_after(response.headers.get('retry-after')) or 1.0)
+    return response.status_code, response
+
+
+async def seed_api_bulk(config, api_name, users, orders_per_user, seed, concurrency):
+    """Cargar ``users`` usuarios sintéticos con ``concurrency`` workers sobre un pool keep-alive.
+
+    Cada worker toma el siguiente usuario, lo registra, hace login y crea sus
+    órdenes; así nunca hay más de ``concurrency`` requests en vuelo por API.
+    """
+    base_url = config.base_url
+    counts = {'users': 0, 'orders': 0, 'errors': 0}
+    indexes = iter(range(1, users + 1))
+    progress_every = max(1, users // 10)
+    started = time.perf_counter()
+
+    async def worker(client):
+        for index in indexes:
+            user, orders = synthetic_user(index, seed, orders_per_user)
+            status, _ = await _post(client, f"{base_url}/api/auth/register", user)
+            if status == 0:
+                counts['errors'] += 1
+                continue
+            status, response = await _post(
+                client, config.url(config.login_path), {"email": user['email'], "password": user['password']},
+            )
+            if status != 200:
+                counts['errors'] += 1
+                continue
+            try:
+                token = response.json()['token']
+            except (ValueError, KeyError, TypeError):
+                counts['errors'] += 1
+                continue
+            counts['users'] += 1
+            headers = auth_headers(token)
+            for order in orders:
+                status, _ = await _post(client, f"{base_url}/api/orders", order, headers)
+                if status == 201:
+                    counts['orders'] += 1
+                else:
+                    counts['errors'] += 1
+            if index % progress_every == 0:
+                print(f"{Fore.CYAN}[*] {api_name}: {index}/{users} usuarios procesados")
+
+    async with config.async_client(concurrency, timeout=max(config.timeout, BULK_TIMEOUT)) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+
+    elapsed = time.perf_counter() - started
+    rows = counts['users'] + counts['orders']
+    counts.update({'api': api_name, 'elapsed': elapsed, 'rows_per_sec': rows / elapsed if elapsed else 0.0})
+    return counts
+
+
+async def seed_bulk(targets, users, orders_per_user, seed, concurrency):
+    """Poblar todas las APIs a la vez (cada una con su propio pool de conexiones)."""
+    return await asyncio.gather(*(
+        seed_api_bulk(config, name, users, orders_per_user, seed, concurrency) for config, name in targets
+    ))
+
+
+def write_identities(path, users, seed):
+    """Exportar las credenciales sintéticas para ``--identities`` de los scanners."""
+    with open(path, 'w', encoding='utf-8') as handler:
+        for index in range(1, users + 1):
+            user, _ = synthetic_user(index, seed, 0)
+            handler.write(f"{user['email']}:{user['password']}\n")
+
+
+def parse_args():
+    env = os.environ
+    parser = argparse.ArgumentParser(description='Poblar las APIs vulnerable y segura con datos de prueba')
+    parser.add_argument('--vulnerable-url', default=env.get('BOLA_VULNERABLE_URL', VULNERABLE_URL), help='URL base de la API vulnerable')
+    parser.add_argument('--secure-url', default=env.get('BOLA_SECURE_URL', SECURE_URL), help='URL base de la API segura')
+    parser.add_argument('--only', choices=['vulnerable', 'secure'], help='Poblar sólo una de las APIs')
+    parser.add_argument('--users', type=int, help='Cantidad de usuarios sintéticos (activa la carga masiva)')
+    parser.add_argument('--orders-per-user', type=int, default=5, help='Órdenes por usuario sintético (default 5)')
+    parser.add_argument('--seed', type=int, default=1, help='Semilla de los datos sintéticos (default 1)')
+    parser.add_argument('--concurrency', type=int, default=int(env.get('BOLA_SEED_CONCURRENCY', 32)), help='Requests simultáneos por API (default 32)')
+    parser.add_argument('--identities-out', help='Escribir email:password de los usuarios sintéticos en este archivo')
+    add_client_arguments(parser, url_option=False, credentials=False)
+    return parser.parse_args()
+
+
+def main_bulk(args, targets):
+    total_rows = args.users * (1 + args.orders_per_user)
+    print(f"\n{Fore.YELLOW}[!] Carga masiva: {args.users} usuarios x {args.orders_per_user} órdenes "
+          f"(semilla {args.seed}, {args.concurrency} requests simultáneos por API)")
+    print(f"[!] {total_rows} filas por API en: {', '.join(name for _, name in targets)}{Style.RESET_ALL}")
+
+    started = time.perf_counter()
+    results = asyncio.run(seed_bulk(targets, args.users, args.orders_per_user, args.seed, max(1, args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    for result in results:
+        color = Fore.GREEN if not result['errors'] else Fore.YELLOW
+        print(f"{color}[✓] {result['api']}: {result['users']} usuarios, {result['orders']} órdenes, "
+              f"{result['errors']} errores en {result['elapsed']:.1f}s ({result['rows_per_sec']:.0f} filas/s)")
+    rows = sum(result['users'] + result['orders'] for result in results)
+    print(f"{Fore.CYAN}[*] Total: {rows} filas en {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} filas/s)")
+
+    if args.identities_out:
+        write_identities(args.identities_out, args.users, args.seed)
+        print(f"{Fore.GREEN}[✓] Credenciales escritas en {args.identities_out}")
+
+
 def main():
+    args = parse_args()
+    config = config_from_args(args)
+    targets = []
+    if args.only != 'secure':
+        targets.append((replace(config, base_url=args.vulnerable_url.rstrip('/')), "API Vulnerable"))
+    if args.only != 'vulnerable':
+        targets.append((replace(config, base_url=args.secure_url.rstrip('/')), "API Segura"))
+
     print(f"\n{Fore.YELLOW}{'='*60}")
     print("SCRIPT DE POBLACIÓN DE DATOS")
     print("Base de datos para APIs Vulnerable y Segura")
     print(f"{'='*60}{Style.RESET_ALL}")
     
+    if args.users:
+        main_bulk(args, targets)
+        return
+
     print(f"\n{Fore.YELLOW}[!] Este script poblará las bases de datos con datos de prueba")
     print(f"[!] Se crearán 3 usuarios y 6 órdenes totales{Style.RESET_ALL}")
     
-    # Poblar API Vulnerable
-    try:
-        create_users_and_orders(VULNERABLE_URL, "API Vulnerable (Puerto 3000)")
-        verify_data(VULNERABLE_URL, "API Vulnerable")
-    except Exception as e:
-        print(f"{Fore.RED}[✗] Error con API Vulnerable: {str(e)}")
-        print(f"Asegúrate de que la API esté corriendo en {VULNERABLE_URL}")
-    
-    # Poblar API Segura
-    try:
-        create_users_and_orders(SECURE_URL, "API Segura (Puerto 3001)")
-        verify_data(SECURE_URL, "API Segura")
-    except Exception as e:
-        print(f"{Fore.RED}[✗] Error con API Segura: {str(e)}")
-        print(f"Asegúrate de que la API esté corriendo en {SECURE_URL}")
+    for target, api_name in targets:
+        try:
+            with make_session(target) as session:
+                create_users_and_orders(session, f"{api_name} ({target.base_url})")
+                verify_data(session, api_name)
+        except Exception as e:
+            print(f"{Fore.RED}[✗] Error con {api_name}: {str(e)}")
+            print(f"Asegúrate de que la API esté corriendo en {target.base_url}")
     
     print(f"\n{Fore.GREEN}{'='*60}")
     print("✅ PROCESO COMPLETADO")
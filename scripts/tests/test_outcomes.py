@@ -0,0 +1,114 @@
+"""Checks offline de ``bolakit.outcomes.OutcomeStore`` (sólo stdlib).
+
+Desde ``scripts/``::
+
+    python -m unittest discover -s tests
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from bolakit.mockapi import MockConfig, start_in_thread
+from bolakit.outcomes import INITIAL_CAPACITY, MAX_LATENCY_MS, OutcomeStore
+
+
+class OutcomeStoreTest(unittest.TestCase):
+
+    def test_id_before_first_id_is_rejected(self):
+        store = OutcomeStore(first_id=1)
+        with self.assertRaises(IndexError):
+            store.record(0, 'NOT_FOUND')
+        self.assertEqual(len(store), 0)
+
+    def test_first_id_zero_accepts_id_zero(self):
+        store = OutcomeStore(first_id=0)
+        store.record(0, 'NOT_FOUND')
+        self.assertEqual(store[0], 'NOT_FOUND')
+        self.assertNotIn(1, store)
+
+    def test_growth_keeps_earlier_results(self):
+        store = OutcomeStore(first_id=1)
+        store.record(1, 'VULNERABLE', owner=2, elapsed=0.012, body={'id': 1, 'userId': 2})
+        far = INITIAL_CAPACITY * 3 + 7
+        store.record(far, 'PROTECTED', owner=5)
+        self.assertEqual(store[1], 'VULNERABLE')
+        self.assertEqual(store.owner(1), 2)
+        self.assertEqual(store.latency_ms(1), 12)
+        self.assertEqual(store[far], 'PROTECTED')
+        self.assertEqual(store.owner(far), 5)
+        self.assertIsNone(store.get(far - 1))
+        self.assertEqual(store.tallies(), {'VULNERABLE': 1, 'PROTECTED': 1})
+
+    def test_rerecord_moves_tally_and_drops_body(self):
+        store = OutcomeStore()
+        store.record(3, 'VULNERABLE', body={'id': 3})
+        store.record(3, 'PROTECTED')
+        self.assertEqual(store.tally('VULNERABLE'), 0)
+        self.assertEqual(store.tally('PROTECTED'), 1)
+        self.assertIsNone(store.body(3))
+        self.assertEqual(len(store), 1)
+
+    def test_latency_saturates_and_bad_owner_is_unknown(self):
+        store = OutcomeStore()
+        store.record(1, 'ERROR', owner='x', elapsed=120.0)
+        self.assertEqual(store.latency_ms(1), MAX_LATENCY_MS)
+        self.assertIsNone(store.owner(1))
+
+    def test_save_load_round_trip(self):
+        store = OutcomeStore(first_id=0)
+        store.record(0, 'NOT_FOUND', elapsed=0.002)
+        store.record(5, 'VULNERABLE', owner=7, elapsed=0.04, body={'id': 5, 'userId': 7, 'amount': 9.5})
+        store.record(6, 'OWNED', owner=1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'scan.outcomes')
+            store.save(path)
+            loaded = OutcomeStore.load(path)
+            try:
+                self.assertEqual(loaded.first_id, 0)
+                self.assertEqual(list(loaded.items()), list(store.items()))
+                self.assertEqual(loaded.tallies(), store.tallies())
+                self.assertEqual(loaded.owner(5), 7)
+                self.assertEqual(loaded.latency_ms(5), 40)
+                self.assertEqual(list(loaded.hits()), [{'id': 5, 'userId': 7, 'amount': 9.5}])
+                # Crecer un almacén mapeado lo pasa a memoria propia sin perder lo cargado.
+                loaded.record(INITIAL_CAPACITY * 2, 'PROTECTED')
+                self.assertEqual(loaded[6], 'OWNED')
+                self.assertEqual(loaded.tally('PROTECTED'), 1)
+            finally:
+                loaded.close()
+
+    def test_load_rejects_other_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.jsonl')
+            with open(path, 'w', encoding='utf-8') as handler:
+                handler.write('{"id": 1}\n')
+            with self.assertRaises(ValueError):
+                OutcomeStore.load(path)
+
+
+class BruteForceFromZeroTest(unittest.TestCase):
+    """``--brute-start 0`` contra el mock: el almacén tiene que cubrir el ID 0."""
+
+    def setUp(self):
+        self.server = start_in_thread(MockConfig(orders=6, users=3))
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_brute_force_records_id_zero(self):
+        from exploit_bola import BOLAExploit
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            exploit = BOLAExploit(self.server.url)
+            token, _ = exploit.login('alice@example.com', 'password123')
+            exploit.brute_force_orders(token, 0, 6, 0.001)
+        self.assertEqual(exploit.outcomes.first_id, 0)
+        self.assertEqual(exploit.outcomes[0], 'NOT_FOUND')
+        self.assertEqual(len(exploit.outcomes), 7)
+        self.assertTrue(all(object_id in exploit.outcomes for object_id in range(1, 7)))
+
+
+if __name__ == '__main__':
+    unittest.main()